@@ -0,0 +1,106 @@
+"""
+Micro-benchmarks for the per-frame primitives of the Python API.
+
+Run with:
+    python -m pytest benchmarks --benchmark-json=bench_output.json
+    python benchmarks/compare.py bench_output.json
+"""
+
+import numpy as np
+
+import ndirust_py
+from conftest import FOURCC_UYVY
+
+
+def bench_video_frame_creation(benchmark, resolution, uyvy_bytes):
+    width, height = resolution
+    benchmark(
+        ndirust_py.receiver.NdiVideoFrame,
+        width, height, 30, 1, 0, len(uyvy_bytes), uyvy_bytes, FOURCC_UYVY,
+    )
+
+
+def bench_video_buffer_export(benchmark, video_frame):
+    benchmark(video_frame.get_data)
+
+
+def bench_video_numpy_view(benchmark, video_frame):
+    width, height = video_frame.width, video_frame.height
+
+    def make_view():
+        return np.frombuffer(video_frame.get_data(), dtype=np.uint8).reshape(height, width, 2)
+
+    benchmark(make_view)
+
+
+def bench_video_buffer_view(benchmark, video_frame):
+    width, height = video_frame.width, video_frame.height
+
+    def make_view():
+        return np.frombuffer(video_frame, dtype=np.uint8).reshape(height, width, 2)
+
+    benchmark(make_view)
+
+
+def bench_test_pattern_generation(benchmark, resolution):
+    width, height = resolution
+    benchmark(ndirust_py.sender.generate_test_pattern, width=width, height=height)
+
+
+def bench_test_pattern_animation(benchmark, resolution):
+    width, height = resolution
+    generator = ndirust_py.sender.TestPatternGenerator(width=width, height=height)
+    benchmark(generator.render)
+
+
+def bench_acquire_submit(benchmark, resolution):
+    width, height = resolution
+    sender = ndirust_py.sender.NdiSender(f"bench-slots-{width}x{height}", backend="loopback")
+
+    def send_frame():
+        frame = sender.acquire_frame(width, height)
+        frame[:, :, 0] = 128
+        sender.submit(frame)
+
+    benchmark(send_frame)
+    sender.close()
+
+
+def bench_rgba_to_uyvy(benchmark, resolution):
+    width, height = resolution
+    rgba = np.zeros((height, width, 4), dtype=np.uint8)
+    sender = ndirust_py.sender.NdiSender(f"bench-convert-{width}x{height}", backend="loopback")
+
+    def convert_frame():
+        frame = sender.acquire_frame(width, height)
+        ndirust_py.sender.rgb_to_yuv(rgba, frame)
+        sender.submit(frame)
+
+    benchmark(convert_frame)
+    sender.close()
+
+
+def bench_audio_frame_creation(benchmark, audio_layout):
+    channels, samples = audio_layout
+    planar = bytes(channels * samples * 4)
+    benchmark(ndirust_py.receiver.NdiAudioFrame, 48000, channels, samples, 0, len(planar), planar)
+
+
+def bench_audio_deinterleave(benchmark, audio_frame):
+    channels, samples = audio_frame.num_channels, audio_frame.num_samples
+
+    def split_channels():
+        planar = np.frombuffer(audio_frame.get_data(), dtype=np.float32)
+        return planar.reshape(channels, samples)
+
+    benchmark(split_channels)
+
+
+def bench_audio_interleave_int16(benchmark, audio_frame):
+    channels, samples = audio_frame.num_channels, audio_frame.num_samples
+
+    def to_interleaved():
+        planar = np.frombuffer(audio_frame.get_data(), dtype=np.float32).reshape(channels, samples)
+        return (planar.T * 32767.0).astype(np.int16)
+
+    benchmark(to_interleaved)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""
+Compare a pytest-benchmark JSON report against the stored baseline.
+
+Usage:
+    python benchmarks/compare.py bench_output.json
+    python benchmarks/compare.py bench_output.json --threshold 0.15
+    python benchmarks/compare.py bench_output.json --update
+
+The comparison uses the median of each benchmark, which is less sensitive to
+scheduler noise than the mean. A benchmark regresses when its median is slower
+than the baseline's by more than the threshold and by more than the spread
+(interquartile range) of either run, so jitter on a noisy runner is not
+reported. The script exits with status 1 when any benchmark regresses, or
+when none of the results has a baseline entry to be compared against.
+
+The committed baseline holds the results of the CI benchmark runner and is
+refreshed by every push to main (see .github/workflows/build.yml). Baselines
+are only meaningful on the machine that produced them, so pass --baseline to
+compare local runs against a file recorded locally.
+"""
+
+import os
+import sys
+import json
+import argparse
+from pathlib import Path
+
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+DEFAULT_THRESHOLD = float(os.environ.get("NDIRUST_BENCH_THRESHOLD", "0.25"))
+
+
+def load_results(path):
+    """Load a pytest-benchmark report as a {name: {"median", "iqr"}} mapping."""
+    with open(path) as f:
+        report = json.load(f)
+
+    return {
+        bench["fullname"]: {"median": bench["stats"]["median"], "iqr": bench["stats"].get("iqr", 0.0)}
+        for bench in report.get("benchmarks", [])
+    }, report.get("machine_info", {})
+
+
+def load_baseline(path):
+    """Load the stored baseline, returning an empty one if it does not exist."""
+    if not path.exists():
+        return {"benchmarks": {}}
+
+    with open(path) as f:
+        return json.load(f)
+
+
+def update_baseline(path, results, machine_info):
+    """Overwrite the baseline with the medians from the given results."""
+    baseline = {
+        "machine": {
+            "node": machine_info.get("node", ""),
+            "processor": machine_info.get("processor", ""),
+            "python": machine_info.get("python_version", ""),
+        },
+        "benchmarks": dict(sorted(results.items())),
+    }
+
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2)
+        f.write("\n")
+
+    print(f"Wrote {len(results)} baseline entries to {path}")
+
+
+def compare(results, baseline, threshold):
+    """Print a comparison table.
+
+    Returns the names of regressed benchmarks and the number of benchmarks
+    that had a baseline entry.
+    """
+    regressions = []
+    compared = 0
+    stored = baseline.get("benchmarks", {})
+
+    width = max((len(name) for name in results), default=0)
+    for name, result in sorted(results.items()):
+        median = result["median"]
+        entry = stored.get(name)
+        if entry is None:
+            print(f"{name:<{width}}  {median * 1e6:12.1f} us  (no baseline)")
+            continue
+
+        compared += 1
+        reference = entry["median"]
+        change = (median - reference) / reference if reference > 0 else 0.0
+        noise = max(result["iqr"], entry.get("iqr", 0.0))
+        marker = ""
+        if change > threshold and median - reference > noise:
+            marker = "  REGRESSION"
+            regressions.append(name)
+
+        print(f"{name:<{width}}  {median * 1e6:12.1f} us  {change:+8.1%}{marker}")
+
+    return regressions, compared
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check benchmark results against the baseline")
+    parser.add_argument("results", help="JSON report written by --benchmark-json")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="Baseline file to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed slowdown as a fraction of the baseline (default: 0.25)")
+    parser.add_argument("--update", action="store_true", help="Replace the baseline with these results")
+
+    args = parser.parse_args()
+
+    results, machine_info = load_results(args.results)
+    if not results:
+        print("No benchmark results found.")
+        return 1
+
+    if args.update:
+        update_baseline(args.baseline, results, machine_info)
+        return 0
+
+    regressions, compared = compare(results, load_baseline(args.baseline), args.threshold)
+    if not compared:
+        print(f"\nNone of the results has an entry in {args.baseline}; nothing was compared.")
+        print("Record a baseline on this machine first with --update.")
+        return 1
+
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}:")
+        for name in regressions:
+            print(f"  {name}")
+        return 1
+
+    print(f"\nNo regressions beyond {args.threshold:.0%}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
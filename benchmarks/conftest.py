@@ -0,0 +1,64 @@
+"""
+Shared fixtures for the frame-handling micro-benchmarks.
+
+None of these benchmarks initialise the NDI runtime or open a network
+connection, so they run on CI machines without an NDI source available.
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("pytest_benchmark")
+ndirust_py = pytest.importorskip("ndirust_py")
+
+# (width, height) pairs that every per-frame benchmark is run against
+RESOLUTIONS = {
+    "360p": (640, 360),
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "2160p": (3840, 2160),
+}
+
+# (channels, samples per frame) pairs used by the audio benchmarks
+AUDIO_LAYOUTS = {
+    "stereo": (2, 1602),
+    "16ch": (16, 1602),
+}
+
+FOURCC_UYVY = 0x59565955
+
+
+@pytest.fixture(params=list(RESOLUTIONS.values()), ids=list(RESOLUTIONS.keys()))
+def resolution(request):
+    """Frame size as a (width, height) tuple."""
+    return request.param
+
+
+@pytest.fixture(params=list(AUDIO_LAYOUTS.values()), ids=list(AUDIO_LAYOUTS.keys()))
+def audio_layout(request):
+    """Audio layout as a (channels, samples) tuple."""
+    return request.param
+
+
+@pytest.fixture
+def uyvy_bytes(resolution):
+    """A UYVY frame payload of the current resolution."""
+    width, height = resolution
+    return ndirust_py.sender.generate_test_pattern(width=width, height=height)
+
+
+@pytest.fixture
+def video_frame(resolution, uyvy_bytes):
+    """An NdiVideoFrame wrapping a UYVY payload of the current resolution."""
+    width, height = resolution
+    return ndirust_py.receiver.NdiVideoFrame(
+        width, height, 30, 1, 0, len(uyvy_bytes), uyvy_bytes, FOURCC_UYVY
+    )
+
+
+@pytest.fixture
+def audio_frame(audio_layout):
+    """An NdiAudioFrame holding planar float32 samples."""
+    channels, samples = audio_layout
+    planar = np.linspace(-1.0, 1.0, channels * samples, dtype=np.float32).tobytes()
+    return ndirust_py.receiver.NdiAudioFrame(48000, channels, samples, 0, len(planar), planar)
@@ -158,7 +158,7 @@ _load_ndi_library()
 try:
     # Import the actual Rust module
     from .ndirust_py import *
-    from .ndirust_py import discovery, sender, receiver
+    from .ndirust_py import discovery, sender, receiver, recording, relay, shm
 except ImportError as e:
     logger.error(f"Error importing ndirust_py module: {e}")
     logger.error("Make sure the NDI SDK is installed or this package has bundled DLLs")
@@ -6,18 +6,22 @@ Run this module directly with:
 
 import sys
 import time
+import json
+import math
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from . import initialize_ndi, is_supported_cpu, get_version_info
 
 
-def discover_sources(timeout=2000, count=1):
+def discover_sources(timeout=2000, count=1, pattern=None, groups=None, extra_ips=None, show_local=True):
     """Discover NDI sources on the network."""
     from . import discovery
     
     print(f"Searching for NDI sources (timeout: {timeout}ms)...")
     
     # Create finder
-    finder = discovery.NdiFinder()
+    finder = discovery.NdiFinder(groups=groups, extra_ips=extra_ips, show_local_sources=show_local,
+                                 name_filter=pattern)
     
     # Search for sources multiple times if requested
     for i in range(count):
@@ -45,22 +49,219 @@ def send_test_pattern(name="Test Sender", width=1280, height=720, fps=30, durati
     
     print(f"Creating NDI sender '{name}'...")
     ndi_sender = sender.NdiSender(name)
+    generator = sender.TestPatternGenerator(width=width, height=height, fps_n=fps, fps_d=1)
     
-    frames = fps * duration
-    print(f"Sending {frames} frames of {width}x{height} @ {fps} fps for {duration} seconds...")
+    print(f"Sending {width}x{height} @ {fps} fps for {duration} seconds...")
+    stats = ndi_sender.run_paced(generator, fps_n=fps, fps_d=1, duration=duration)
     
-    for i in range(frames):
-        ndi_sender.send_test_pattern(width=width, height=height, fps_n=fps, fps_d=1)
-        # Show progress
-        if i % fps == 0:
-            print(f"Sent {i} frames ({i//fps} seconds)...")
-        time.sleep(1/fps)
-    
-    print(f"Sent {frames} frames.")
+    print(f"Sent {stats['frames_sent']} frames in {stats['elapsed']:.2f}s "
+          f"({stats['actual_fps']:.2f} fps, {stats['late']} late, {stats['dropped']} dropped).")
     ndi_sender.close()
     print("Sender closed.")
 
 
+def _open_monitored_source(name, finder, bandwidth, max_fps):
+    """Connect a decimated receiver and an audio meter to one source."""
+    from . import receiver
+    
+    ndi_receiver = receiver.NdiReceiver(
+        backend=finder.backend,
+        track_latency=True,
+        max_video_fps=max_fps,
+        latest_only=True,
+        bandwidth=bandwidth,
+    )
+    try:
+        # The monitor's finder already knows the sources, so connecting
+        # does not wait for another discovery round
+        ndi_receiver.connect_to_source(name, finder=finder)
+    except Exception:
+        ndi_receiver.close()
+        raise
+    # The meter keeps the receiver capturing on its native thread
+    meter = receiver.NdiAudioMeter(ndi_receiver, true_peak=False)
+    meter.start()
+    return ndi_receiver, meter
+
+
+def _source_health(name, ndi_receiver, meter):
+    """Collect one row of health figures for a source."""
+    video = ndi_receiver.video_stats
+    levels = meter.levels()
+    latency = ndi_receiver.get_latency_stats().get(name, {}).get("transport", {})
+    # Silence meters as -inf, which JSON cannot represent
+    peaks = [peak for peak in levels["peak"] if math.isfinite(peak)]
+    loudness = levels["programme"]["momentary"]
+    
+    return {
+        "source": name,
+        "width": video["width"],
+        "height": video["height"],
+        "format": video["four_cc_name"],
+        "frame_rate": video["frame_rate"][0] / video["frame_rate"][1] if video["frame_rate"] and video["frame_rate"][1] else None,
+        "fps": round(video["incoming_fps"], 2),
+        "mbps": round(video["bitrate"] / 1e6, 2),
+        "frames": video["incoming"],
+        "gaps": video["gaps"],
+        "latency_ms": latency.get("p50"),
+        "audio_channels": len(levels["peak"]),
+        "audio_peak_dbfs": max(peaks) if peaks else None,
+        "loudness_lufs": loudness if math.isfinite(loudness) else None,
+    }
+
+
+def _format_health_table(rows):
+    """Render health rows as a fixed-width table."""
+    def number(value, digits=1):
+        return "-" if value is None else f"{value:.{digits}f}"
+    
+    width = max([len("SOURCE")] + [len(row["source"]) for row in rows])
+    lines = [
+        f"{'SOURCE':<{width}}  {'FORMAT':<22} {'FPS':>6} {'MBPS':>8} {'GAPS':>6} {'LAT MS':>7} {'PEAK':>6} {'LUFS':>6}"
+    ]
+    for row in rows:
+        if row.get("error"):
+            lines.append(f"{row['source']:<{width}}  {row['error']}")
+            continue
+        video_format = "-"
+        if row["width"]:
+            video_format = f"{row['width']}x{row['height']} {row['format']} {number(row['frame_rate'], 2)}"
+        lines.append(
+            f"{row['source']:<{width}}  {video_format:<22} {number(row['fps']):>6} {number(row['mbps']):>8} "
+            f"{row['gaps']:>6} {number(row['latency_ms']):>7} {number(row['audio_peak_dbfs']):>6} "
+            f"{number(row['loudness_lufs']):>6}"
+        )
+    return "\n".join(lines)
+
+
+def monitor_sources(names=None, pattern=None, backend=None, bandwidth="lowest", max_fps=1.0,
+                    interval=1.0, duration=None, as_json=False, discover_timeout=3000, workers=32,
+                    groups=None, extra_ips=None):
+    """Watch the health of many sources from one process."""
+    from . import discovery
+    
+    names = list(names or [])
+    # One finder serves both the discovery and every connection
+    finder = discovery.NdiFinder(backend=backend, groups=groups, extra_ips=extra_ips, name_filter=pattern)
+    try:
+        if pattern or not names:
+            found = [source.name for source in finder.find_sources(timeout_ms=discover_timeout)]
+            names += [name for name in found if name not in names]
+        if not names:
+            print("No sources to monitor.", file=sys.stderr)
+            return 1
+        
+        # Connecting releases the GIL, so sources are connected concurrently
+        monitored, errors = {}, {}
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(names)))) as pool:
+            futures = {
+                name: pool.submit(_open_monitored_source, name, finder, bandwidth, max_fps)
+                for name in names
+            }
+            for name, future in futures.items():
+                try:
+                    monitored[name] = future.result()
+                except Exception as error:
+                    errors[name] = str(error)
+    finally:
+        finder.close()
+    
+    interactive = sys.stdout.isatty() and not as_json
+    started = time.monotonic()
+    try:
+        while duration is None or time.monotonic() - started < duration:
+            time.sleep(interval)
+            rows = [_source_health(name, *monitored[name]) for name in names if name in monitored]
+            rows += [{"source": name, "error": error} for name, error in errors.items()]
+            
+            if as_json:
+                now = time.time()
+                for row in rows:
+                    print(json.dumps(dict(row, time=now)), flush=True)
+            else:
+                if interactive:
+                    # Redraw in place
+                    print("\x1b[H\x1b[2J", end="")
+                print(_format_health_table(rows), flush=True)
+                if not interactive:
+                    print()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for ndi_receiver, meter in monitored.values():
+            meter.stop()
+            ndi_receiver.close()
+    
+    return 0
+
+
+def _parse_frame_rate(text):
+    """Parse "30", "29.97" or "30000/1001" into a frame rate fraction."""
+    if "/" in text:
+        numerator, denominator = text.split("/", 1)
+        return int(numerator), int(denominator)
+    
+    rate = float(text)
+    if rate.is_integer():
+        return int(rate), 1
+    # NTSC-style rates such as 29.97 and 59.94 are N*1000/1001
+    ntsc = round(rate * 1.001)
+    if abs(ntsc / 1.001 - rate) < 0.01:
+        return ntsc * 1000, 1001
+    return round(rate * 1000), 1000
+
+
+def generate_load(count=10, name="Load {index}", width=1280, height=720, four_cc="UYVY", fps="30",
+                  pattern="bars", still=False, audio_channels=0, metadata_rate=0.0, threads=None,
+                  duration=None, interval=5.0, backend=None):
+    """Publish many test senders and report their achieved rates."""
+    from . import sender
+    
+    fps_n, fps_d = _parse_frame_rate(fps)
+    print(f"Creating {count} senders...")
+    generator = sender.NdiLoadGenerator(
+        count,
+        name_template=name,
+        width=width,
+        height=height,
+        four_cc=four_cc,
+        fps_n=fps_n,
+        fps_d=fps_d,
+        pattern=pattern,
+        animate=not still,
+        audio_channels=audio_channels,
+        metadata_rate=metadata_rate,
+        backend=backend,
+        threads=threads,
+    )
+    print(f"Sending {width}x{height} {four_cc} @ {fps_n / fps_d:.2f} fps from {count} senders "
+          f"on {generator.threads} threads. Press Ctrl+C to stop.")
+    
+    def report():
+        stats = generator.stats
+        width = max(len(entry["name"]) for entry in stats)
+        print(f"\n{'SENDER':<{width}}  {'TARGET':>7} {'ACTUAL':>7} {'FRAMES':>8} {'LATE':>6} {'DROPPED':>7} {'ERRORS':>6}")
+        for entry in stats:
+            print(f"{entry['name']:<{width}}  {entry['target_fps']:>7.2f} {entry['actual_fps']:>7.2f} "
+                  f"{entry['video_frames']:>8} {entry['late']:>6} {entry['dropped']:>7} {entry['errors']:>6}")
+        total = sum(entry["actual_fps"] for entry in stats)
+        print(f"Total: {total:.1f} of {stats[0]['target_fps'] * len(stats):.1f} fps after {generator.elapsed:.1f}s")
+    
+    generator.start()
+    started = time.monotonic()
+    try:
+        while duration is None or time.monotonic() - started < duration:
+            time.sleep(interval if duration is None else max(0.0, min(interval, duration - (time.monotonic() - started))))
+            report()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        generator.stop()
+        generator.close()
+    
+    return 0
+
+
 def main():
     """Run the main CLI interface."""
     parser = argparse.ArgumentParser(description="NDI Python Bindings Demo")
@@ -72,6 +273,10 @@ def main():
     discover_parser = subparsers.add_parser('discover', help='Discover NDI sources')
     discover_parser.add_argument('--timeout', type=int, default=2000, help='Timeout in milliseconds')
     discover_parser.add_argument('--count', type=int, default=1, help='Number of searches to perform')
+    discover_parser.add_argument('--match', type=str, default=None, help='Only list sources matching this glob pattern')
+    discover_parser.add_argument('--groups', type=str, default=None, help='Comma-separated groups to search')
+    discover_parser.add_argument('--extra-ips', type=str, default=None, help='Comma-separated addresses to query directly')
+    discover_parser.add_argument('--no-local', action='store_true', help='Hide sources published on this machine')
     
     # Send command
     send_parser = subparsers.add_parser('send', help='Send a test pattern')
@@ -81,6 +286,37 @@ def main():
     send_parser.add_argument('--fps', type=int, default=30, help='Frames per second')
     send_parser.add_argument('--duration', type=int, default=5, help='Duration in seconds')
     
+    # Monitor command
+    monitor_parser = subparsers.add_parser('monitor', help='Watch the health of NDI sources')
+    monitor_parser.add_argument('sources', nargs='*', help='Names of the sources (default: all discovered)')
+    monitor_parser.add_argument('--match', type=str, default=None, help='Also watch discovered sources matching this glob pattern')
+    monitor_parser.add_argument('--backend', type=str, default=None, help='Transport, "ndi" or "loopback"')
+    monitor_parser.add_argument('--bandwidth', type=str, default="lowest", help='Streams to receive: highest, lowest, audio_only or metadata_only')
+    monitor_parser.add_argument('--max-fps', type=float, default=1.0, help='Video frames per second copied out of each receiver')
+    monitor_parser.add_argument('--interval', type=float, default=1.0, help='Seconds between updates')
+    monitor_parser.add_argument('--duration', type=float, default=None, help='Stop after this many seconds')
+    monitor_parser.add_argument('--json', action='store_true', help='Print one JSON object per source per update')
+    monitor_parser.add_argument('--timeout', type=int, default=3000, help='Discovery timeout in milliseconds')
+    monitor_parser.add_argument('--groups', type=str, default=None, help='Comma-separated groups to search')
+    monitor_parser.add_argument('--extra-ips', type=str, default=None, help='Comma-separated addresses to query directly')
+    
+    # Load generator command
+    loadgen_parser = subparsers.add_parser('loadgen', help='Publish many test senders')
+    loadgen_parser.add_argument('--count', type=int, default=10, help='Number of senders')
+    loadgen_parser.add_argument('--name', type=str, default="Load {index}", help='Sender name template; {index} is replaced by the sender number')
+    loadgen_parser.add_argument('--width', type=int, default=1280, help='Frame width')
+    loadgen_parser.add_argument('--height', type=int, default=720, help='Frame height')
+    loadgen_parser.add_argument('--format', type=str, default="UYVY", help='Pixel format: UYVY, BGRA, BGRX, RGBA or RGBX')
+    loadgen_parser.add_argument('--fps', type=str, default="30", help='Frame rate, e.g. 25, 29.97 or 60000/1001')
+    loadgen_parser.add_argument('--pattern', type=str, default="bars", help='bars, ramp, zoneplate or black')
+    loadgen_parser.add_argument('--still', action='store_true', help='Send a still frame instead of rendering each frame')
+    loadgen_parser.add_argument('--audio-channels', type=int, default=0, help='Channels of tone audio per sender')
+    loadgen_parser.add_argument('--metadata-rate', type=float, default=0.0, help='Metadata frames per second per sender')
+    loadgen_parser.add_argument('--threads', type=int, default=None, help='Worker threads (default: one per CPU)')
+    loadgen_parser.add_argument('--duration', type=float, default=None, help='Stop after this many seconds')
+    loadgen_parser.add_argument('--interval', type=float, default=5.0, help='Seconds between reports')
+    loadgen_parser.add_argument('--backend', type=str, default=None, help='Transport, "ndi" or "loopback"')
+    
     args = parser.parse_args()
     
     # Check if NDI is supported
@@ -99,15 +335,25 @@ def main():
         return 0
     
     if args.command == 'discover':
-        discover_sources(args.timeout, args.count)
+        discover_sources(args.timeout, args.count, args.match, args.groups, args.extra_ips, not args.no_local)
     elif args.command == 'send':
         send_test_pattern(args.name, args.width, args.height, args.fps, args.duration)
+    elif args.command == 'loadgen':
+        return generate_load(args.count, args.name, args.width, args.height, args.format, args.fps, args.pattern,
+                             args.still, args.audio_channels, args.metadata_rate, args.threads, args.duration,
+                             args.interval, args.backend)
+    elif args.command == 'monitor':
+        return monitor_sources(args.sources, args.match, args.backend, args.bandwidth, args.max_fps,
+                               args.interval, args.duration, args.json, args.timeout,
+                               groups=args.groups, extra_ips=args.extra_ips)
     else:
         # Default to discover if no command specified
         print(f"ndirust-py v{get_version_info().split()[-1]}")
         print("Available commands:")
         print("  discover - Find NDI sources on the network")
         print("  send     - Send a test pattern")
+        print("  monitor  - Watch the health of NDI sources")
+        print("  loadgen  - Publish many test senders")
         print("\nFor help on a specific command, use: python -m ndirust_py command --help")
         
     return 0
@@ -0,0 +1,611 @@
+// src/audio_stream.rs
+//
+// Continuous audio from a receiver in fixed-size blocks. Audio frames are
+// taken from the receiver's capture thread into a native ring buffer per
+// channel, optionally resampled and reduced to selected channels, and read
+// out in blocks of exactly `block_size` samples.
+
+use pyo3::prelude::*;
+use pyo3::exceptions::{PyRuntimeError, PyStopIteration, PyValueError};
+use pyo3::types::{PyByteArray, PyBytes, PyDict};
+use std::collections::VecDeque;
+use std::sync::atomic::{AtomicBool, Ordering};
+use std::sync::{Arc, Condvar, Mutex};
+use std::time::{Duration, Instant};
+
+use crate::frame::{AudioFrameData, CapturedFrame};
+use crate::receiver::{FrameSink, NdiReceiver, ReceiverCore};
+
+/// Timeout of each wait made while iterating, between signal checks
+const ITER_TIMEOUT_MS: u64 = 100;
+
+/// Sample format of the blocks returned to Python
+#[derive(Clone, Copy, PartialEq, Eq)]
+enum SampleType {
+    Float32,
+    Int16,
+}
+
+impl SampleType {
+    fn from_name(name: &str) -> PyResult<Self> {
+        match name {
+            "float32" | "f4" => Ok(SampleType::Float32),
+            "int16" | "i2" => Ok(SampleType::Int16),
+            other => Err(PyValueError::new_err(format!(
+                "Unsupported dtype '{}', expected 'float32' or 'int16'",
+                other
+            ))),
+        }
+    }
+
+    fn name(&self) -> &'static str {
+        match self {
+            SampleType::Float32 => "float32",
+            SampleType::Int16 => "int16",
+        }
+    }
+
+    fn size(&self) -> usize {
+        match self {
+            SampleType::Float32 => 4,
+            SampleType::Int16 => 2,
+        }
+    }
+}
+
+/// Linear-interpolation resampler keeping its phase across frames
+struct Resampler {
+    // Input samples per output sample
+    step: f64,
+    // Position of the next output sample, relative to the first sample of
+    // the next input frame; -1.0 is the last sample of the previous frame
+    position: f64,
+    previous: Vec<f32>,
+    started: bool,
+}
+
+impl Resampler {
+    fn new(source_rate: u32, target_rate: u32, channels: usize) -> Self {
+        Resampler {
+            step: source_rate as f64 / target_rate as f64,
+            position: 0.0,
+            previous: vec![0.0; channels],
+            started: false,
+        }
+    }
+
+    /// Resample one frame of planar channels, appending to `output`
+    fn process(&mut self, input: &[&[f32]], output: &mut [Vec<f32>]) {
+        let samples = input.first().map_or(0, |channel| channel.len());
+        if samples == 0 {
+            return;
+        }
+        if !self.started {
+            self.started = true;
+            self.position = 0.0;
+        }
+
+        let end = samples as f64 - 1.0;
+        let mut position = self.position;
+        while position < end {
+            let index = position.floor();
+            let fraction = (position - index) as f32;
+            let index = index as isize;
+            for (channel, (samples, out)) in input.iter().zip(output.iter_mut()).enumerate() {
+                let a = if index < 0 { self.previous[channel] } else { samples[index as usize] };
+                let b = samples[(index + 1) as usize];
+                out.push(a + (b - a) * fraction);
+            }
+            position += self.step;
+        }
+
+        self.position = position - samples as f64;
+        for (previous, samples) in self.previous.iter_mut().zip(input) {
+            *previous = samples[samples.len() - 1];
+        }
+    }
+}
+
+/// Ring buffer of output samples and the state of the conversion into it
+struct AudioBuffer {
+    channels: Vec<VecDeque<f32>>,
+    capacity: usize,
+    // Fixed at the first frame unless given
+    sample_rate: Option<u32>,
+    selection: Option<Vec<usize>>,
+    source_rate: u32,
+    resampler: Option<Resampler>,
+    // Most audio kept, and the jitter buffer, in milliseconds
+    buffer_ms: u32,
+    latency_ms: u32,
+    block_size: usize,
+    // Whether reading has started since the last underrun
+    primed: bool,
+    underruns: u64,
+    overruns: u64,
+    dropped_samples: u64,
+    blocks_read: u64,
+}
+
+impl AudioBuffer {
+    fn buffered(&self) -> usize {
+        self.channels.first().map_or(0, |channel| channel.len())
+    }
+
+    /// Jitter buffer size in samples at the output rate, or a block before
+    /// the rate is known
+    fn prebuffer(&self) -> usize {
+        match self.sample_rate {
+            Some(rate) => (rate as u64 * self.latency_ms as u64 / 1000) as usize,
+            None => self.block_size,
+        }
+    }
+
+    /// Samples per channel kept before the oldest are dropped
+    ///
+    /// Always room for a block on top of the jitter buffer, or a read that
+    /// waits for both could never be served.
+    fn capacity_for(&self, sample_rate: u32) -> usize {
+        let requested = (sample_rate as u64 * self.buffer_ms as u64 / 1000) as usize;
+        let needed = self.block_size + (sample_rate as u64 * self.latency_ms as u64 / 1000) as usize;
+        requested.max(needed).max(1)
+    }
+
+    /// Mark a read that could not be served, so reading resumes only once the
+    /// jitter buffer has refilled
+    fn underrun(&mut self) {
+        if self.primed {
+            self.primed = false;
+            self.underruns += 1;
+        }
+    }
+
+    /// Convert and append an audio frame
+    fn push(&mut self, audio: &AudioFrameData) {
+        let samples = audio.num_samples as usize;
+        let source_channels = audio.num_channels as usize;
+        if samples == 0 || audio.sample_rate == 0 || audio.data.len() < samples * source_channels {
+            return;
+        }
+
+        // The output layout is fixed by the first frame
+        if self.channels.is_empty() {
+            let count = self.selection.as_ref().map_or(source_channels, |selection| selection.len());
+            let sample_rate = *self.sample_rate.get_or_insert(audio.sample_rate);
+            self.capacity = self.capacity_for(sample_rate);
+            self.channels = vec![VecDeque::with_capacity(self.capacity); count];
+        }
+        let sample_rate = self.sample_rate.unwrap_or(audio.sample_rate);
+
+        // Channels missing from the frame are filled with silence
+        let silence = vec![0.0f32; samples];
+        let plane = |channel: usize| -> &[f32] {
+            if channel < source_channels {
+                &audio.data[channel * samples..(channel + 1) * samples]
+            } else {
+                &silence
+            }
+        };
+        let input: Vec<&[f32]> = match &self.selection {
+            Some(selection) => selection.iter().map(|&channel| plane(channel)).collect(),
+            None => (0..self.channels.len()).map(plane).collect(),
+        };
+
+        if audio.sample_rate == sample_rate {
+            self.resampler = None;
+            for (ring, samples) in self.channels.iter_mut().zip(&input) {
+                ring.extend(samples.iter());
+            }
+        } else {
+            if self.resampler.is_none() || self.source_rate != audio.sample_rate {
+                self.resampler = Some(Resampler::new(audio.sample_rate, sample_rate, input.len()));
+            }
+            let mut output = vec![Vec::with_capacity(samples * 2); input.len()];
+            self.resampler.as_mut().unwrap().process(&input, &mut output);
+            for (ring, samples) in self.channels.iter_mut().zip(&output) {
+                ring.extend(samples.iter());
+            }
+        }
+        self.source_rate = audio.sample_rate;
+
+        // Keep the newest samples when the reader falls behind
+        let excess = self.buffered().saturating_sub(self.capacity);
+        if excess > 0 {
+            for ring in self.channels.iter_mut() {
+                ring.drain(..excess);
+            }
+            self.overruns += 1;
+            self.dropped_samples += excess as u64;
+        }
+    }
+
+    /// Whether a block can be taken
+    ///
+    /// Until reading has started, and after an underrun, the jitter buffer
+    /// must be full as well.
+    fn block_ready(&self, block_size: usize) -> bool {
+        let prebuffer = if self.primed { 0 } else { self.prebuffer() };
+        !self.channels.is_empty() && self.buffered() >= block_size + prebuffer
+    }
+
+    /// Take one block as interleaved samples, writing it into `block`, which
+    /// holds exactly one block
+    fn take_block(&mut self, block_size: usize, sample_type: SampleType, block: &mut [u8]) {
+        let mut rings: Vec<_> = self.channels.iter_mut().map(|ring| ring.drain(..block_size)).collect();
+        let mut outputs = block.chunks_exact_mut(sample_type.size());
+        for _ in 0..block_size {
+            for ring in rings.iter_mut() {
+                let sample = ring.next().unwrap_or(0.0);
+                let output = outputs.next().unwrap();
+                match sample_type {
+                    SampleType::Float32 => output.copy_from_slice(&sample.to_ne_bytes()),
+                    SampleType::Int16 => {
+                        let value = (sample.clamp(-1.0, 1.0) * 32767.0).round() as i16;
+                        output.copy_from_slice(&value.to_ne_bytes());
+                    },
+                }
+            }
+        }
+        drop(rings);
+
+        self.primed = true;
+        self.blocks_read += 1;
+    }
+}
+
+/// State shared between a stream, its sink and readers
+struct AudioShared {
+    buffer: Mutex<AudioBuffer>,
+    ready: Condvar,
+}
+
+impl FrameSink for AudioShared {
+    fn on_frame(&self, frame: &CapturedFrame) {
+        if let CapturedFrame::Audio(audio) = frame {
+            self.buffer.lock().unwrap().push(audio);
+            self.ready.notify_all();
+        }
+    }
+}
+
+/// Reads a receiver's audio as a continuous stream of fixed-size blocks
+///
+/// Blocks are NumPy arrays shaped (block_size, channels). While streaming,
+/// the receiver captures on a background thread, so receive_frame() cannot
+/// be used at the same time.
+#[pyclass]
+struct NdiAudioStream {
+    // Kept so the receiver outlives the stream
+    receiver: Py<NdiReceiver>,
+    core: Arc<ReceiverCore>,
+    shared: Arc<AudioShared>,
+    block_size: usize,
+    sample_type: SampleType,
+    latency_ms: u32,
+    running: AtomicBool,
+}
+
+impl NdiAudioStream {
+    /// Wait until a block can be taken; the number of channels, or None if
+    /// the deadline passes first
+    ///
+    /// Waiting for live audio to arrive is not an underrun by itself;
+    /// callers decide when a wait has failed and report it with
+    /// `underrun()`.
+    fn wait_ready(&self, deadline: Instant) -> Option<usize> {
+        let mut buffer = self.shared.buffer.lock().unwrap();
+        loop {
+            if buffer.block_ready(self.block_size) {
+                return Some(buffer.channels.len());
+            }
+
+            let now = Instant::now();
+            if now >= deadline {
+                return None;
+            }
+            buffer = self.shared.ready.wait_timeout(buffer, deadline - now).unwrap().0;
+        }
+    }
+
+    /// Wait for a block, releasing the GIL, and take it; None if the timeout
+    /// expires first
+    ///
+    /// The samples are written straight into the memory of the returned
+    /// NumPy array, or of bytes if NumPy is not installed.
+    fn read_block(&self, timeout: Duration, py: Python<'_>) -> PyResult<Option<PyObject>> {
+        let deadline = Instant::now() + timeout;
+        let numpy = py.import("numpy").ok();
+        loop {
+            let Some(channels) = py.allow_threads(|| self.wait_ready(deadline)) else {
+                return Ok(None);
+            };
+
+            let size = self.block_size * channels * self.sample_type.size();
+            let mut taken = false;
+            let fill = |block: &mut [u8]| {
+                // Another reader may have taken the block meanwhile
+                let mut buffer = self.shared.buffer.lock().unwrap();
+                if buffer.block_ready(self.block_size) && buffer.channels.len() == channels {
+                    buffer.take_block(self.block_size, self.sample_type, block);
+                    taken = true;
+                }
+                Ok(())
+            };
+            let Some(numpy) = numpy else {
+                let block = PyBytes::new_with(py, size, fill)?;
+                if taken {
+                    return Ok(Some(block.into_py(py)));
+                }
+                continue;
+            };
+
+            // A bytearray keeps the array writable, as with sounddevice buffers
+            let block = PyByteArray::new_with(py, size, fill)?;
+            if taken {
+                let array = numpy
+                    .call_method1("frombuffer", (block, self.sample_type.name()))?
+                    .call_method1("reshape", ((self.block_size, channels),))?;
+                return Ok(Some(array.into_py(py)));
+            }
+        }
+    }
+
+    fn underrun(&self) {
+        self.shared.buffer.lock().unwrap().underrun();
+    }
+
+    /// How long iteration waits for a block before counting an underrun: the
+    /// block's own duration plus the jitter buffer
+    fn stall_limit(&self) -> Duration {
+        let rate = self.shared.buffer.lock().unwrap().sample_rate.unwrap_or(48000).max(1);
+        Duration::from_millis(self.block_size as u64 * 1000 / rate as u64 + self.latency_ms as u64)
+    }
+
+}
+
+impl Drop for NdiAudioStream {
+    fn drop(&mut self) {
+        if self.running.swap(false, Ordering::AcqRel) {
+            let sink: Arc<dyn FrameSink> = self.shared.clone();
+            self.core.remove_sink(&sink);
+            self.core.release_pump();
+        }
+    }
+}
+
+#[pymethods]
+impl NdiAudioStream {
+    /// Create an audio stream on a receiver
+    ///
+    /// Args:
+    ///     receiver: The NdiReceiver to read audio from
+    ///     block_size: Samples per channel in each block (default: 1024)
+    ///     channels: Indices of the source channels to read, in output order
+    ///         (default: all channels of the first frame)
+    ///     sample_rate: Output sample rate; audio at other rates is resampled
+    ///         by linear interpolation (default: the rate of the first frame)
+    ///     dtype: "float32" or "int16" (default: "float32")
+    ///     latency_ms: Jitter buffer filled before reading starts and after
+    ///         every underrun (default: 50)
+    ///     buffer_ms: Most audio buffered before the oldest samples are
+    ///         dropped as an overrun; raised if needed to hold a block on top
+    ///         of the jitter buffer (default: 2000)
+    #[new]
+    #[pyo3(signature = (
+        receiver,
+        block_size = 1024,
+        channels = None,
+        sample_rate = None,
+        dtype = "float32",
+        latency_ms = 50,
+        buffer_ms = 2000
+    ))]
+    fn new(
+        receiver: Py<NdiReceiver>,
+        block_size: usize,
+        channels: Option<Vec<usize>>,
+        sample_rate: Option<u32>,
+        dtype: &str,
+        latency_ms: u32,
+        buffer_ms: u32,
+        py: Python<'_>,
+    ) -> PyResult<Self> {
+        if block_size == 0 {
+            return Err(PyValueError::new_err("block_size must be positive"));
+        }
+        if matches!(&channels, Some(channels) if channels.is_empty()) {
+            return Err(PyValueError::new_err("channels must not be empty"));
+        }
+        if sample_rate == Some(0) {
+            return Err(PyValueError::new_err("sample_rate must be positive"));
+        }
+        let sample_type = SampleType::from_name(dtype)?;
+
+        let core = receiver.borrow(py).core();
+        let buffer = AudioBuffer {
+            channels: Vec::new(),
+            capacity: 0,
+            sample_rate,
+            selection: channels,
+            source_rate: 0,
+            resampler: None,
+            buffer_ms,
+            latency_ms,
+            block_size,
+            primed: false,
+            underruns: 0,
+            overruns: 0,
+            dropped_samples: 0,
+            blocks_read: 0,
+        };
+
+        Ok(NdiAudioStream {
+            receiver,
+            core,
+            shared: Arc::new(AudioShared {
+                buffer: Mutex::new(buffer),
+                ready: Condvar::new(),
+            }),
+            block_size,
+            sample_type,
+            latency_ms,
+            running: AtomicBool::new(false),
+        })
+    }
+
+    /// Start taking audio from the receiver
+    fn start(&self) -> PyResult<()> {
+        if !self.core.is_open() {
+            return Err(PyRuntimeError::new_err("Receiver is not initialized"));
+        }
+        if self.running.swap(true, Ordering::AcqRel) {
+            return Err(PyRuntimeError::new_err("Audio stream is already running"));
+        }
+
+        self.core.add_sink(self.shared.clone());
+        self.core.retain_pump();
+        Ok(())
+    }
+
+    /// Stop taking audio; buffered samples can still be read
+    fn stop(&self, py: Python<'_>) {
+        if self.running.swap(false, Ordering::AcqRel) {
+            py.allow_threads(|| {
+                let sink: Arc<dyn FrameSink> = self.shared.clone();
+                self.core.remove_sink(&sink);
+                self.core.release_pump();
+            });
+        }
+        // Wake readers so they see the stream has stopped
+        self.shared.ready.notify_all();
+    }
+
+    /// Read the next block
+    ///
+    /// A read that times out after reading has started counts as an
+    /// underrun, and the next block is held back until the jitter buffer has
+    /// refilled.
+    ///
+    /// Args:
+    ///     timeout_ms: Longest time to wait for a full block; 0 returns at
+    ///         once (default: 1000)
+    ///
+    /// Returns:
+    ///     An array shaped (block_size, channels), bytes of interleaved
+    ///     samples if NumPy is not installed, or None on timeout
+    #[pyo3(signature = (timeout_ms = 1000))]
+    fn read(&self, timeout_ms: u64, py: Python<'_>) -> PyResult<Option<PyObject>> {
+        let block = self.read_block(Duration::from_millis(timeout_ms), py)?;
+        if block.is_none() {
+            self.underrun();
+        }
+        Ok(block)
+    }
+
+    /// Clear the buffer and counters
+    fn reset(&self) {
+        let mut buffer = self.shared.buffer.lock().unwrap();
+        for ring in buffer.channels.iter_mut() {
+            ring.clear();
+        }
+        buffer.primed = false;
+        buffer.resampler = None;
+        buffer.underruns = 0;
+        buffer.overruns = 0;
+        buffer.dropped_samples = 0;
+        buffer.blocks_read = 0;
+    }
+
+    fn __iter__(slf: PyRef<'_, Self>) -> PyRef<'_, Self> {
+        slf
+    }
+
+    /// Blocks until the stream is stopped
+    ///
+    /// A wait longer than a block plus the jitter buffer counts as one
+    /// underrun.
+    fn __next__(&self, py: Python<'_>) -> PyResult<PyObject> {
+        let started = Instant::now();
+        let stall_limit = self.stall_limit();
+        let mut stalled = false;
+        loop {
+            py.check_signals()?;
+            if let Some(block) = self.read_block(Duration::from_millis(ITER_TIMEOUT_MS), py)? {
+                return Ok(block);
+            }
+            if !self.running.load(Ordering::Acquire) {
+                return Err(PyStopIteration::new_err(()));
+            }
+            if !stalled && started.elapsed() >= stall_limit {
+                self.underrun();
+                stalled = true;
+            }
+        }
+    }
+
+    /// Whether audio is being taken from the receiver
+    #[getter]
+    fn get_is_running(&self) -> bool {
+        self.running.load(Ordering::Acquire)
+    }
+
+    /// Samples per channel in each block
+    #[getter]
+    fn get_block_size(&self) -> usize {
+        self.block_size
+    }
+
+    /// Sample type of the blocks
+    #[getter]
+    fn get_dtype(&self) -> &'static str {
+        self.sample_type.name()
+    }
+
+    /// Output sample rate, or None until the first frame arrives
+    #[getter]
+    fn get_sample_rate(&self) -> Option<u32> {
+        self.shared.buffer.lock().unwrap().sample_rate
+    }
+
+    /// Number of output channels, or None until the first frame arrives
+    #[getter]
+    fn get_channels(&self) -> Option<usize> {
+        let buffer = self.shared.buffer.lock().unwrap();
+        if buffer.channels.is_empty() { None } else { Some(buffer.channels.len()) }
+    }
+
+    /// Samples per channel waiting to be read
+    #[getter]
+    fn get_buffered(&self) -> usize {
+        self.shared.buffer.lock().unwrap().buffered()
+    }
+
+    /// The receiver being read
+    #[getter]
+    fn get_receiver(&self, py: Python<'_>) -> Py<NdiReceiver> {
+        self.receiver.clone_ref(py)
+    }
+
+    /// Stream statistics: underruns (reads that timed out, or iterations
+    /// that stalled, after reading started), overruns (times samples were
+    /// dropped because reading fell behind), dropped_samples, blocks_read
+    /// and buffered
+    #[getter]
+    fn get_stats(&self, py: Python<'_>) -> PyResult<Py<PyDict>> {
+        let buffer = self.shared.buffer.lock().unwrap();
+        let stats = PyDict::new(py);
+        stats.set_item("underruns", buffer.underruns)?;
+        stats.set_item("overruns", buffer.overruns)?;
+        stats.set_item("dropped_samples", buffer.dropped_samples)?;
+        stats.set_item("blocks_read", buffer.blocks_read)?;
+        stats.set_item("buffered", buffer.buffered())?;
+        Ok(stats.into())
+    }
+}
+
+/// Register audio stream classes
+pub fn register_audio_stream_functions(m: &PyModule) -> PyResult<()> {
+    m.add_class::<NdiAudioStream>()?;
+
+    Ok(())
+}
@@ -0,0 +1,70 @@
+// src/backend.rs
+
+use pyo3::prelude::*;
+use pyo3::exceptions::PyValueError;
+
+/// Environment variable that selects the default transport backend
+pub const BACKEND_ENV_VAR: &str = "NDIRUST_BACKEND";
+
+/// Transport used by finders, senders and receivers
+#[derive(Clone, Copy, PartialEq, Eq, Hash, Debug)]
+pub enum Backend {
+    /// The NDI SDK
+    Ndi,
+    /// In-process transport that never touches the NDI SDK
+    Loopback,
+}
+
+impl Backend {
+    /// Parse a backend name
+    pub fn from_name(name: &str) -> PyResult<Self> {
+        match name.trim().to_ascii_lowercase().as_str() {
+            "ndi" | "" => Ok(Backend::Ndi),
+            "loopback" => Ok(Backend::Loopback),
+            other => Err(PyValueError::new_err(format!(
+                "Unknown backend '{}', expected 'ndi' or 'loopback'",
+                other
+            ))),
+        }
+    }
+
+    /// Resolve the backend from an explicit argument, falling back to the
+    /// NDIRUST_BACKEND environment variable and then to the NDI SDK
+    pub fn resolve(name: Option<&str>) -> PyResult<Self> {
+        match name {
+            Some(name) => Backend::from_name(name),
+            None => match std::env::var(BACKEND_ENV_VAR) {
+                Ok(value) => Backend::from_name(&value),
+                Err(_) => Ok(Backend::Ndi),
+            },
+        }
+    }
+
+    /// Name of the backend as accepted by `from_name`
+    pub fn name(&self) -> &'static str {
+        match self {
+            Backend::Ndi => "ndi",
+            Backend::Loopback => "loopback",
+        }
+    }
+}
+
+/// Register backend-related Python functions
+pub fn register_backend_functions(m: &PyModule) -> PyResult<()> {
+    /// Get the name of the backend used when none is passed explicitly
+    #[pyfunction]
+    fn get_default_backend() -> PyResult<String> {
+        Ok(Backend::resolve(None)?.name().to_string())
+    }
+
+    /// List the names of the available transport backends
+    #[pyfunction]
+    fn available_backends() -> Vec<&'static str> {
+        vec![Backend::Ndi.name(), Backend::Loopback.name()]
+    }
+
+    m.add_function(wrap_pyfunction!(get_default_backend, m)?)?;
+    m.add_function(wrap_pyfunction!(available_backends, m)?)?;
+
+    Ok(())
+}
@@ -0,0 +1,480 @@
+// src/convert.rs
+//
+// Conversion between the packed 8-bit video formats: UYVY and the four
+// RGB orderings. Colour conversion uses 16-bit fixed-point coefficients
+// derived from the matrix's luma weights. Rendered RGB, including 3-byte
+// pixels, can also be converted to UYVY or NV12 for sending, split across
+// threads by rows.
+
+use std::sync::Arc;
+
+use crate::frame::{
+    VideoFormat, VideoFrameData, FOURCC_BGRA, FOURCC_BGRX, FOURCC_NV12, FOURCC_RGBA, FOURCC_RGBX, FOURCC_UYVY,
+};
+
+/// Fixed-point scale of the conversion coefficients
+const ONE: f32 = 65536.0;
+const HALF: i32 = 1 << 15;
+
+/// YCbCr conversion matrix in 16-bit fixed point
+#[derive(Clone, Copy, Debug)]
+pub struct YuvMatrix {
+    // RGB to Y, Cb and Cr, one row each
+    forward: [[i32; 3]; 3],
+    luma_offset: i32,
+    // Y, Cb and Cr back to RGB
+    luma_gain: i32,
+    r_cr: i32,
+    g_cb: i32,
+    g_cr: i32,
+    b_cb: i32,
+}
+
+impl YuvMatrix {
+    /// Build the matrix of a colour space from its red and blue luma weights
+    pub fn new(kr: f32, kb: f32, full_range: bool) -> Self {
+        let kg = 1.0 - kr - kb;
+        let (luma_scale, chroma_scale, luma_offset) =
+            if full_range { (1.0, 1.0, 0) } else { (219.0 / 255.0, 224.0 / 255.0, 16) };
+        let fixed = |value: f32| (value * ONE).round() as i32;
+
+        let cb = chroma_scale / (2.0 * (1.0 - kb));
+        let cr = chroma_scale / (2.0 * (1.0 - kr));
+        YuvMatrix {
+            forward: [
+                [fixed(kr * luma_scale), fixed(kg * luma_scale), fixed(kb * luma_scale)],
+                [fixed(-kr * cb), fixed(-kg * cb), fixed((1.0 - kb) * cb)],
+                [fixed((1.0 - kr) * cr), fixed(-kg * cr), fixed(-kb * cr)],
+            ],
+            luma_offset,
+            luma_gain: fixed(1.0 / luma_scale),
+            r_cr: fixed(2.0 * (1.0 - kr) / chroma_scale),
+            g_cb: fixed(2.0 * kb * (1.0 - kb) / (kg * chroma_scale)),
+            g_cr: fixed(2.0 * kr * (1.0 - kr) / (kg * chroma_scale)),
+            b_cb: fixed(2.0 * (1.0 - kb) / chroma_scale),
+        }
+    }
+
+    /// BT.709 with limited-range luma and chroma, as used for HD video
+    pub fn bt709() -> Self {
+        YuvMatrix::new(0.2126, 0.0722, false)
+    }
+
+    /// Matrix of a named colour space, "bt601" or "bt709"
+    pub fn from_name(name: &str, full_range: bool) -> Result<Self, String> {
+        match name.trim().to_ascii_lowercase().replace(['.', '-', '_'], "").as_str() {
+            "bt601" | "601" => Ok(YuvMatrix::new(0.299, 0.114, full_range)),
+            "bt709" | "709" => Ok(YuvMatrix::new(0.2126, 0.0722, full_range)),
+            _ => Err(format!("Unknown colour space '{}', expected 'bt601' or 'bt709'", name)),
+        }
+    }
+
+    /// Luma of one RGB pixel
+    #[inline]
+    fn luma(&self, r: i32, g: i32, b: i32) -> u8 {
+        let [kr, kg, kb] = self.forward[0];
+        (((kr * r + kg * g + kb * b + HALF) >> 16) + self.luma_offset).clamp(0, 255) as u8
+    }
+
+    /// Chroma of the sum of 2^`pixels_log2` RGB pixels
+    #[inline]
+    fn chroma_of_sum(&self, r: i32, g: i32, b: i32, pixels_log2: u32) -> (u8, u8) {
+        let [ur, ug, ub] = self.forward[1];
+        let [vr, vg, vb] = self.forward[2];
+        let shift = 16 + pixels_log2;
+        let u = ((ur * r + ug * g + ub * b + (1 << (shift - 1))) >> shift) + 128;
+        let v = ((vr * r + vg * g + vb * b + (1 << (shift - 1))) >> shift) + 128;
+        (u.clamp(0, 255) as u8, v.clamp(0, 255) as u8)
+    }
+
+    /// Chroma of the sum of two RGB pixels
+    #[inline]
+    fn chroma_of_pair(&self, r: i32, g: i32, b: i32) -> (u8, u8) {
+        self.chroma_of_sum(r, g, b, 1)
+    }
+
+    /// RGB of one pixel
+    #[inline]
+    fn rgb(&self, y: u8, u: u8, v: u8) -> (u8, u8, u8) {
+        let luma = (y as i32 - self.luma_offset) * self.luma_gain + HALF;
+        let (u, v) = (u as i32 - 128, v as i32 - 128);
+        let r = (luma + self.r_cr * v) >> 16;
+        let g = (luma - self.g_cb * u - self.g_cr * v) >> 16;
+        let b = (luma + self.b_cb * u) >> 16;
+        (r.clamp(0, 255) as u8, g.clamp(0, 255) as u8, b.clamp(0, 255) as u8)
+    }
+}
+
+/// Byte positions of red and blue in a 4-byte RGB pixel
+pub fn rgb_order(four_cc: u32) -> Option<(usize, usize)> {
+    match four_cc {
+        FOURCC_RGBA | FOURCC_RGBX => Some((0, 2)),
+        FOURCC_BGRA | FOURCC_BGRX => Some((2, 0)),
+        _ => None,
+    }
+}
+
+/// Byte positions of red and blue in a packed RGB pixel, and its size
+#[derive(Clone, Copy, Debug, PartialEq, Eq)]
+pub struct RgbLayout {
+    pub r_at: usize,
+    pub b_at: usize,
+    pub bytes_per_pixel: usize,
+}
+
+impl RgbLayout {
+    /// Layout of "RGB", "BGR", "RGBA", "BGRA", "RGBX" or "BGRX" pixels
+    pub fn from_name(name: &str) -> Option<Self> {
+        let (r_at, b_at, bytes_per_pixel) = match name.trim().to_ascii_uppercase().as_str() {
+            "RGB" => (0, 2, 3),
+            "BGR" => (2, 0, 3),
+            "RGBA" | "RGBX" => (0, 2, 4),
+            "BGRA" | "BGRX" => (2, 0, 4),
+            _ => return None,
+        };
+        Some(RgbLayout { r_at, b_at, bytes_per_pixel })
+    }
+}
+
+/// Check whether a conversion between two formats is supported
+pub fn can_convert(from: u32, to: u32) -> bool {
+    let packed = |four_cc| four_cc == FOURCC_UYVY || rgb_order(four_cc).is_some();
+    packed(from) && packed(to)
+}
+
+/// Red, green and blue of pixel `x` of a row
+#[inline]
+fn rgb_at(row: &[u8], x: usize, layout: RgbLayout) -> (i32, i32, i32) {
+    let pixel = &row[x * layout.bytes_per_pixel..];
+    (pixel[layout.r_at] as i32, pixel[1] as i32, pixel[layout.b_at] as i32)
+}
+
+fn rgb_row_to_uyvy(source: &[u8], target: &mut [u8], width: usize, layout: RgbLayout, matrix: &YuvMatrix) {
+    for (pair, out) in target[..width * 2].chunks_exact_mut(4).enumerate() {
+        let (r0, g0, b0) = rgb_at(source, pair * 2, layout);
+        let (r1, g1, b1) = rgb_at(source, pair * 2 + 1, layout);
+        let (u, v) = matrix.chroma_of_pair(r0 + r1, g0 + g1, b0 + b1);
+        out.copy_from_slice(&[u, matrix.luma(r0, g0, b0), v, matrix.luma(r1, g1, b1)]);
+    }
+}
+
+/// Convert two RGB rows to two NV12 luma rows and the chroma row they share
+fn rgb_rows_to_nv12(
+    (top, bottom): (&[u8], &[u8]),
+    (luma_top, luma_bottom): (&mut [u8], &mut [u8]),
+    chroma: &mut [u8],
+    width: usize,
+    layout: RgbLayout,
+    matrix: &YuvMatrix,
+) {
+    for pair in 0..width / 2 {
+        let (x0, x1) = (pair * 2, pair * 2 + 1);
+        let quad = [rgb_at(top, x0, layout), rgb_at(top, x1, layout), rgb_at(bottom, x0, layout), rgb_at(bottom, x1, layout)];
+        luma_top[x0] = matrix.luma(quad[0].0, quad[0].1, quad[0].2);
+        luma_top[x1] = matrix.luma(quad[1].0, quad[1].1, quad[1].2);
+        luma_bottom[x0] = matrix.luma(quad[2].0, quad[2].1, quad[2].2);
+        luma_bottom[x1] = matrix.luma(quad[3].0, quad[3].1, quad[3].2);
+
+        let (r, g, b) = quad.iter().fold((0, 0, 0), |sum, pixel| (sum.0 + pixel.0, sum.1 + pixel.1, sum.2 + pixel.2));
+        let (u, v) = matrix.chroma_of_sum(r, g, b, 2);
+        chroma[x0] = u;
+        chroma[x1] = v;
+    }
+}
+
+fn uyvy_row_to_rgb(source: &[u8], target: &mut [u8], width: usize, (r_at, b_at): (usize, usize), matrix: &YuvMatrix) {
+    for (pair, out) in target[..width * 4].chunks_exact_mut(8).enumerate() {
+        let [u, y0, v, y1] = [source[pair * 4], source[pair * 4 + 1], source[pair * 4 + 2], source[pair * 4 + 3]];
+        for (pixel, y) in out.chunks_exact_mut(4).zip([y0, y1]) {
+            let (r, g, b) = matrix.rgb(y, u, v);
+            pixel[r_at] = r;
+            pixel[1] = g;
+            pixel[b_at] = b;
+            pixel[3] = 255;
+        }
+    }
+}
+
+fn rgb_row_to_rgb(source: &[u8], target: &mut [u8], width: usize, from: (usize, usize), to: (usize, usize), opaque: bool) {
+    let source = &source[..width * 4];
+    let target = &mut target[..width * 4];
+    if from == to && !opaque {
+        target.copy_from_slice(source);
+        return;
+    }
+    for (input, out) in source.chunks_exact(4).zip(target.chunks_exact_mut(4)) {
+        out[to.0] = input[from.0];
+        out[1] = input[1];
+        out[to.1] = input[from.1];
+        out[3] = if opaque { 255 } else { input[3] };
+    }
+}
+
+/// Convert one packed frame into another format of the same size
+///
+/// The target must be `to.data_size()` bytes. UYVY frames must have an even
+/// width.
+pub fn convert_into(
+    source: &[u8],
+    from: &VideoFormat,
+    target: &mut [u8],
+    to: &VideoFormat,
+    matrix: &YuvMatrix,
+) -> Result<(), String> {
+    if from.width != to.width || from.height != to.height {
+        return Err("Conversion cannot change the frame size".to_string());
+    }
+    if !can_convert(from.four_cc, to.four_cc) {
+        return Err("Only UYVY, BGRA, BGRX, RGBA and RGBX frames can be converted".to_string());
+    }
+    if (from.four_cc == FOURCC_UYVY || to.four_cc == FOURCC_UYVY) && from.width % 2 != 0 {
+        return Err("UYVY frames must have an even width".to_string());
+    }
+    if source.len() < from.data_size() || target.len() < to.data_size() {
+        return Err("Frame buffer is too small for its format".to_string());
+    }
+
+    let width = from.width as usize;
+    // Only X formats leave alpha undefined; an A source keeps its alpha
+    let opaque = matches!(from.four_cc, FOURCC_BGRX | FOURCC_RGBX);
+    for y in 0..from.height as usize {
+        let input = &source[y * from.line_stride..];
+        let output = &mut target[y * to.line_stride..];
+        match (rgb_order(from.four_cc), rgb_order(to.four_cc)) {
+            (Some((r_at, b_at)), None) => {
+                rgb_row_to_uyvy(input, output, width, RgbLayout { r_at, b_at, bytes_per_pixel: 4 }, matrix)
+            },
+            (None, Some(order)) => uyvy_row_to_rgb(input, output, width, order, matrix),
+            (Some(source_order), Some(target_order)) => {
+                rgb_row_to_rgb(input, output, width, source_order, target_order, opaque)
+            },
+            (None, None) => output[..width * 2].copy_from_slice(&input[..width * 2]),
+        }
+    }
+    Ok(())
+}
+
+/// Rows below which splitting a conversion between threads does not pay off
+const MIN_ROWS_PER_THREAD: usize = 32;
+
+/// Convert packed RGB pixels to a UYVY or NV12 frame
+///
+/// Rows are split into bands converted on up to `threads` threads.
+/// `source_stride` is the distance between source rows in bytes. Both
+/// formats need an even width; NV12 also needs an even height.
+pub fn rgb_to_yuv_into(
+    source: &[u8],
+    layout: RgbLayout,
+    source_stride: usize,
+    target: &mut [u8],
+    to: &VideoFormat,
+    matrix: &YuvMatrix,
+    threads: usize,
+) -> Result<(), String> {
+    let (width, height) = (to.width as usize, to.height as usize);
+    let nv12 = match to.four_cc {
+        FOURCC_UYVY => false,
+        FOURCC_NV12 => true,
+        _ => return Err("RGB can only be converted to UYVY or NV12".to_string()),
+    };
+    if width % 2 != 0 || (nv12 && height % 2 != 0) {
+        return Err(format!("{}x{} cannot be converted: UYVY needs an even width and NV12 even dimensions", width, height));
+    }
+    if height == 0 {
+        return Ok(());
+    }
+    let row_bytes = width * layout.bytes_per_pixel;
+    if source_stride < row_bytes || source.len() < source_stride * (height - 1) + row_bytes {
+        return Err(format!("Source is too small for {}x{} pixels of {} bytes", width, height, layout.bytes_per_pixel));
+    }
+    if target.len() < to.data_size() {
+        return Err("Frame buffer is too small for its format".to_string());
+    }
+
+    // Bands hold whole row pairs so NV12 chroma rows are never split
+    let threads = threads.clamp(1, (height / MIN_ROWS_PER_THREAD).max(1));
+    let band = (height.div_ceil(threads) + 1) & !1;
+    let stride = to.line_stride;
+    let convert_band = |source: &[u8], luma: &mut [u8], chroma: &mut [u8]| {
+        let rows = luma.len() / stride;
+        if nv12 {
+            for pair in 0..rows / 2 {
+                let (top, bottom) = luma[pair * 2 * stride..].split_at_mut(stride);
+                rgb_rows_to_nv12(
+                    (&source[pair * 2 * source_stride..], &source[(pair * 2 + 1) * source_stride..]),
+                    (top, bottom),
+                    &mut chroma[pair * stride..],
+                    width,
+                    layout,
+                    matrix,
+                );
+            }
+        } else {
+            for row in 0..rows {
+                rgb_row_to_uyvy(&source[row * source_stride..], &mut luma[row * stride..], width, layout, matrix);
+            }
+        }
+    };
+
+    let (luma, chroma) = target[..to.data_size()].split_at_mut(stride * height);
+    let chroma_band = if nv12 { band / 2 * stride } else { 0 };
+    if threads == 1 {
+        convert_band(source, luma, chroma);
+        return Ok(());
+    }
+    let convert_band = &convert_band;
+    std::thread::scope(|scope| {
+        let mut chroma = chroma;
+        for (source, luma) in source.chunks(band * source_stride).zip(luma.chunks_mut(band * stride)) {
+            let split = chroma_band.min(chroma.len());
+            let (chroma_rows, rest) = std::mem::take(&mut chroma).split_at_mut(split);
+            chroma = rest;
+            scope.spawn(move || convert_band(source, luma, chroma_rows));
+        }
+    });
+    Ok(())
+}
+
+/// Convert a captured frame to another format, keeping its size and rate
+pub fn convert_video(frame: &VideoFrameData, four_cc: u32, matrix: &YuvMatrix) -> Result<VideoFrameData, String> {
+    let from = frame.format();
+    let to = VideoFormat::new(from.width, from.height, four_cc, from.frame_rate_n, from.frame_rate_d);
+    let mut data = vec![0u8; to.data_size()];
+    convert_into(&frame.data, &from, &mut data, &to, matrix)?;
+
+    Ok(VideoFrameData {
+        four_cc,
+        line_stride: to.line_stride,
+        data: Arc::new(data),
+        ..frame.clone()
+    })
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use crate::frame::four_cc_name;
+
+    const RGB: RgbLayout = RgbLayout { r_at: 0, b_at: 2, bytes_per_pixel: 3 };
+
+    /// A frame of RGB pixels all of one colour
+    fn solid(width: usize, height: usize, colour: [u8; 3]) -> Vec<u8> {
+        colour.repeat(width * height)
+    }
+
+    fn to_yuv(source: &[u8], width: u32, height: u32, four_cc: u32, threads: usize) -> Result<Vec<u8>, String> {
+        let format = VideoFormat::new(width, height, four_cc, 30, 1);
+        let mut target = vec![0u8; format.data_size()];
+        rgb_to_yuv_into(source, RGB, width as usize * 3, &mut target, &format, &YuvMatrix::bt709(), threads)?;
+        Ok(target)
+    }
+
+    #[test]
+    fn reference_levels() {
+        let limited = YuvMatrix::bt709();
+        assert_eq!(limited.luma(255, 255, 255), 235);
+        assert_eq!(limited.luma(0, 0, 0), 16);
+        assert_eq!(limited.chroma_of_pair(510, 510, 510), (128, 128));
+        // Pure red in BT.709 limited range
+        assert_eq!(limited.luma(255, 0, 0), 63);
+        assert_eq!(limited.chroma_of_pair(510, 0, 0), (102, 240));
+
+        let full = YuvMatrix::from_name("BT.709", true).unwrap();
+        assert_eq!((full.luma(255, 255, 255), full.luma(0, 0, 0)), (255, 0));
+        assert_eq!(full.rgb(255, 128, 128), (255, 255, 255));
+
+        assert!(YuvMatrix::from_name("bt2020", false).is_err());
+    }
+
+    #[test]
+    fn rgb_survives_a_round_trip_through_uyvy() {
+        let matrix = YuvMatrix::from_name("bt601", false).unwrap();
+        for colour in [[0, 0, 0], [255, 255, 255], [255, 0, 0], [0, 255, 0], [0, 0, 255], [40, 120, 200]] {
+            let (r, g, b) = (colour[0] as i32, colour[1] as i32, colour[2] as i32);
+            let (u, v) = matrix.chroma_of_pair(2 * r, 2 * g, 2 * b);
+            let back = matrix.rgb(matrix.luma(r, g, b), u, v);
+            for (original, converted) in colour.iter().zip([back.0, back.1, back.2]) {
+                assert!((*original as i32 - converted as i32).abs() <= 2, "{:?} came back as {:?}", colour, back);
+            }
+        }
+    }
+
+    #[test]
+    fn converts_between_packed_formats() {
+        let (width, height) = (4, 2);
+        let rgba = VideoFormat::new(width, height, FOURCC_RGBA, 30, 1);
+        let bgrx = VideoFormat::new(width, height, FOURCC_BGRX, 30, 1);
+        let uyvy = VideoFormat::new(width, height, FOURCC_UYVY, 30, 1);
+        let source: Vec<u8> = [10u8, 20, 30, 40].repeat((width * height) as usize);
+        let matrix = YuvMatrix::bt709();
+
+        let mut swapped = vec![0u8; bgrx.data_size()];
+        convert_into(&source, &rgba, &mut swapped, &bgrx, &matrix).unwrap();
+        assert_eq!(&swapped[..4], &[30, 20, 10, 40]);
+
+        let mut packed = vec![0u8; uyvy.data_size()];
+        convert_into(&source, &rgba, &mut packed, &uyvy, &matrix).unwrap();
+        let mut back = vec![0u8; rgba.data_size()];
+        convert_into(&packed, &uyvy, &mut back, &rgba, &matrix).unwrap();
+        for (original, converted) in source.chunks_exact(4).zip(back.chunks_exact(4)) {
+            for channel in 0..3 {
+                assert!((original[channel] as i32 - converted[channel] as i32).abs() <= 2);
+            }
+            // Alpha is opaque after UYVY
+            assert_eq!(converted[3], 255);
+        }
+    }
+
+    #[test]
+    fn rgb_to_uyvy_layout() {
+        let target = to_yuv(&solid(4, 1, [255, 255, 255]), 4, 1, FOURCC_UYVY, 1).unwrap();
+        assert_eq!(target, [128, 235, 128, 235].repeat(2));
+    }
+
+    #[test]
+    fn rgb_to_nv12_layout() {
+        // Left half red, right half blue, over two rows
+        let mut source = Vec::new();
+        for _ in 0..2 {
+            source.extend(solid(2, 1, [255, 0, 0]));
+            source.extend(solid(2, 1, [0, 0, 255]));
+        }
+        let target = to_yuv(&source, 4, 2, FOURCC_NV12, 1).unwrap();
+        assert_eq!(target.len(), 4 * 2 * 3 / 2);
+        // Two luma rows, then one row of interleaved U and V per 2x2 block
+        assert_eq!(&target[..8], &[63, 63, 32, 32, 63, 63, 32, 32]);
+        assert_eq!(&target[8..], &[102, 240, 240, 118]);
+    }
+
+    #[test]
+    fn threads_do_not_change_the_result() {
+        let (width, height) = (64usize, 130usize);
+        let source: Vec<u8> = (0..width * height * 3).map(|index| (index * 7 % 251) as u8).collect();
+        for four_cc in [FOURCC_UYVY, FOURCC_NV12] {
+            let single = to_yuv(&source, width as u32, height as u32, four_cc, 1).unwrap();
+            let parallel = to_yuv(&source, width as u32, height as u32, four_cc, 4).unwrap();
+            assert!(single == parallel, "threaded {} differs", four_cc_name(four_cc));
+        }
+    }
+
+    #[test]
+    fn rejects_odd_sizes_and_short_buffers() {
+        assert!(to_yuv(&solid(3, 2, [0, 0, 0]), 3, 2, FOURCC_UYVY, 1).is_err());
+        assert!(to_yuv(&solid(4, 3, [0, 0, 0]), 4, 3, FOURCC_NV12, 1).is_err());
+        assert!(to_yuv(&solid(4, 3, [0, 0, 0]), 4, 3, FOURCC_UYVY, 1).is_ok());
+        assert!(to_yuv(&solid(4, 1, [0, 0, 0]), 4, 2, FOURCC_UYVY, 1).is_err());
+        assert!(to_yuv(&[], 4, 2, FOURCC_BGRA, 1).is_err());
+
+        let rgba = VideoFormat::new(3, 2, FOURCC_RGBA, 30, 1);
+        let uyvy = VideoFormat::new(3, 2, FOURCC_UYVY, 30, 1);
+        let mut target = vec![0u8; 64];
+        let error = convert_into(&[0u8; 24], &rgba, &mut target, &uyvy, &YuvMatrix::bt709()).unwrap_err();
+        assert_eq!(error, "UYVY frames must have an even width");
+    }
+
+    #[test]
+    fn empty_frames_convert_to_nothing() {
+        assert_eq!(to_yuv(&[], 4, 0, FOURCC_UYVY, 4).unwrap(), Vec::<u8>::new());
+        assert_eq!(to_yuv(&[], 0, 0, FOURCC_NV12, 1).unwrap(), Vec::<u8>::new());
+    }
+}
@@ -0,0 +1,378 @@
+// src/decimate.rs
+//
+// Video decimation for consumers that need a fraction of a source's frame
+// rate. Decisions are made on the capture path before a frame is copied out
+// of SDK memory, so skipped frames cost no copy and no Python object, while
+// the counters still see every incoming frame: its rate, size, format and
+// any gaps in its timecodes.
+
+use std::time::{Duration, Instant};
+
+use crate::frame::{ndi_video_layout, VideoFrameData};
+
+/// Length of the windows the incoming and delivered rates are measured over
+const RATE_WINDOW: Duration = Duration::from_secs(1);
+
+/// Rate of events, or of an amount such as bytes, measured over consecutive
+/// windows
+#[derive(Clone, Debug)]
+struct RateMeter {
+    window_start: Option<Instant>,
+    // Amount recorded since the event that started the window
+    window_total: f64,
+    rate: f64,
+}
+
+impl RateMeter {
+    fn new() -> Self {
+        RateMeter { window_start: None, window_total: 0.0, rate: 0.0 }
+    }
+
+    fn record(&mut self, now: Instant, amount: f64) {
+        let Some(start) = self.window_start else {
+            self.window_start = Some(now);
+            return;
+        };
+        self.window_total += amount;
+        let elapsed = now.duration_since(start);
+        if elapsed >= RATE_WINDOW {
+            self.rate = self.window_total / elapsed.as_secs_f64();
+            self.window_start = Some(now);
+            self.window_total = 0.0;
+        }
+    }
+
+    /// Rate over the last complete window, 0 until one has completed or
+    /// once events have stopped for several windows
+    fn rate(&self, now: Instant) -> f64 {
+        match self.window_start {
+            Some(start) if now.duration_since(start) < RATE_WINDOW * 3 => self.rate,
+            _ => 0.0,
+        }
+    }
+}
+
+/// Format and size of an incoming video frame, read before it is copied
+#[derive(Clone, Copy, Debug, Default)]
+pub struct VideoHeader {
+    pub width: u32,
+    pub height: u32,
+    pub four_cc: u32,
+    pub frame_rate_n: u32,
+    pub frame_rate_d: u32,
+    pub timecode: i64,
+    pub size: usize,
+}
+
+impl VideoHeader {
+    pub fn from_ndi(video: &ndi::VideoData) -> Self {
+        VideoHeader {
+            width: video.width() as u32,
+            height: video.height() as u32,
+            four_cc: video.four_cc() as u32,
+            frame_rate_n: video.frame_rate_n() as u32,
+            frame_rate_d: video.frame_rate_d() as u32,
+            timecode: video.timecode(),
+            size: ndi_video_layout(video).1,
+        }
+    }
+
+    pub fn from_frame(video: &VideoFrameData) -> Self {
+        VideoHeader {
+            width: video.width,
+            height: video.height,
+            four_cc: video.four_cc,
+            frame_rate_n: video.frame_rate_n,
+            frame_rate_d: video.frame_rate_d,
+            timecode: video.timecode,
+            size: video.data.len(),
+        }
+    }
+}
+
+/// Timecode steps beyond which a jump is a discontinuity, not lost frames
+const MAX_GAP_FRAMES: i64 = 300;
+
+/// Which video frames a receiver keeps
+///
+/// `every_n` keeps one frame in n. `max_fps` keeps a frame only once its
+/// slot in a grid of 1 / max_fps intervals is due, so the kept frames are
+/// evenly spread rather than bunched. With `latest_only`, frames that are
+/// already superseded by a newer one when captured are skipped.
+#[derive(Clone, Debug)]
+pub struct VideoDecimator {
+    every_n: u32,
+    max_fps: Option<f64>,
+    latest_only: bool,
+    // Video frames seen since every_n was set
+    seen: u64,
+    // Earliest time the next frame may be kept under max_fps
+    next_due: Option<Instant>,
+    incoming: u64,
+    delivered: u64,
+    superseded: u64,
+    incoming_rate: RateMeter,
+    delivered_rate: RateMeter,
+    bytes: u64,
+    byte_rate: RateMeter,
+    // Frames missing from the incoming timecode sequence
+    gaps: u64,
+    last: Option<VideoHeader>,
+}
+
+impl Default for VideoDecimator {
+    fn default() -> Self {
+        VideoDecimator::new(1, None, false)
+    }
+}
+
+impl VideoDecimator {
+    pub fn new(every_n: u32, max_fps: Option<f64>, latest_only: bool) -> Self {
+        VideoDecimator {
+            every_n: every_n.max(1),
+            max_fps: max_fps.filter(|fps| *fps > 0.0),
+            latest_only,
+            seen: 0,
+            next_due: None,
+            incoming: 0,
+            delivered: 0,
+            superseded: 0,
+            incoming_rate: RateMeter::new(),
+            delivered_rate: RateMeter::new(),
+            bytes: 0,
+            byte_rate: RateMeter::new(),
+            gaps: 0,
+            last: None,
+        }
+    }
+
+    /// Change the options, keeping the counters
+    pub fn configure(&mut self, every_n: u32, max_fps: Option<f64>, latest_only: bool) {
+        self.every_n = every_n.max(1);
+        self.max_fps = max_fps.filter(|fps| *fps > 0.0);
+        self.latest_only = latest_only;
+        self.seen = 0;
+        self.next_due = None;
+    }
+
+    pub fn every_n(&self) -> u32 {
+        self.every_n
+    }
+
+    pub fn max_fps(&self) -> Option<f64> {
+        self.max_fps
+    }
+
+    /// Whether frames superseded by a newer queued frame are skipped
+    pub fn latest_only(&self) -> bool {
+        self.latest_only
+    }
+
+    /// Count an incoming frame and look for gaps in its timecode sequence
+    fn observe(&mut self, now: Instant, header: &VideoHeader) {
+        self.incoming += 1;
+        self.incoming_rate.record(now, 1.0);
+        self.bytes += header.size as u64;
+        self.byte_rate.record(now, header.size as f64);
+
+        if let Some(last) = &self.last {
+            if header.frame_rate_n > 0 && header.frame_rate_d > 0 && last.timecode != 0 && header.timecode != 0 {
+                // Timecodes are in 100ns units
+                let interval = 10_000_000.0 * header.frame_rate_d as f64 / header.frame_rate_n as f64;
+                let steps = ((header.timecode - last.timecode) as f64 / interval).round() as i64;
+                if steps > 1 && steps <= MAX_GAP_FRAMES {
+                    self.gaps += (steps - 1) as u64;
+                }
+            }
+        }
+        self.last = Some(*header);
+    }
+
+    /// Record an incoming video frame and decide whether to keep it
+    pub fn admit(&mut self, now: Instant, header: &VideoHeader) -> bool {
+        self.observe(now, header);
+
+        self.seen += 1;
+        if (self.seen - 1) % self.every_n as u64 != 0 {
+            return false;
+        }
+
+        if let Some(max_fps) = self.max_fps {
+            let interval = Duration::from_secs_f64(1.0 / max_fps);
+            match self.next_due {
+                Some(due) if now < due => return false,
+                // Keep to the grid unless a whole interval was missed, as
+                // after a pause in the source
+                Some(due) if now < due + interval => self.next_due = Some(due + interval),
+                _ => self.next_due = Some(now + interval),
+            }
+        }
+
+        self.delivered += 1;
+        self.delivered_rate.record(now, 1.0);
+        true
+    }
+
+    /// Record an incoming frame skipped because a newer one was queued
+    pub fn supersede(&mut self, now: Instant, header: &VideoHeader) {
+        self.observe(now, header);
+        self.superseded += 1;
+    }
+
+    /// Video frames captured, including skipped ones
+    pub fn incoming(&self) -> u64 {
+        self.incoming
+    }
+
+    /// Video frames kept
+    pub fn delivered(&self) -> u64 {
+        self.delivered
+    }
+
+    /// Video frames skipped because a newer frame was already queued
+    pub fn superseded(&self) -> u64 {
+        self.superseded
+    }
+
+    /// Bytes of video received, including skipped frames
+    pub fn bytes(&self) -> u64 {
+        self.bytes
+    }
+
+    /// Frames missing from the incoming timecode sequence
+    pub fn gaps(&self) -> u64 {
+        self.gaps
+    }
+
+    /// Header of the last incoming frame
+    pub fn last(&self) -> Option<&VideoHeader> {
+        self.last.as_ref()
+    }
+
+    /// Incoming and delivered frame rates
+    pub fn rates(&self, now: Instant) -> (f64, f64) {
+        (self.incoming_rate.rate(now), self.delivered_rate.rate(now))
+    }
+
+    /// Incoming video in bytes per second
+    pub fn byte_rate(&self, now: Instant) -> f64 {
+        self.byte_rate.rate(now)
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    /// Header of a 30 fps frame whose timecode is `index` frames in
+    fn frame(index: i64) -> VideoHeader {
+        VideoHeader {
+            width: 1920,
+            height: 1080,
+            frame_rate_n: 30000,
+            frame_rate_d: 1000,
+            timecode: 1 + index * 10_000_000 / 30,
+            size: 1920 * 1080 * 2,
+            ..Default::default()
+        }
+    }
+
+    /// Feed frames 0..count at 30 fps, returning which were kept
+    fn run(decimator: &mut VideoDecimator, count: i64) -> Vec<bool> {
+        let start = Instant::now();
+        (0..count)
+            .map(|index| decimator.admit(start + Duration::from_micros(index as u64 * 33_333), &frame(index)))
+            .collect()
+    }
+
+    #[test]
+    fn keeps_every_frame_by_default() {
+        let mut decimator = VideoDecimator::default();
+        assert!(run(&mut decimator, 10).into_iter().all(|kept| kept));
+        assert_eq!((decimator.incoming(), decimator.delivered()), (10, 10));
+    }
+
+    #[test]
+    fn every_n_keeps_one_frame_in_n() {
+        let mut decimator = VideoDecimator::new(3, None, false);
+        assert_eq!(run(&mut decimator, 9), [true, false, false, true, false, false, true, false, false]);
+        assert_eq!((decimator.incoming(), decimator.delivered()), (9, 3));
+
+        // Zero is treated as one
+        assert_eq!(VideoDecimator::new(0, None, false).every_n(), 1);
+    }
+
+    #[test]
+    fn max_fps_spreads_kept_frames_evenly() {
+        let mut decimator = VideoDecimator::new(1, Some(10.0), false);
+        let kept = run(&mut decimator, 30);
+        assert_eq!(decimator.delivered(), 10);
+        let positions: Vec<usize> = kept.iter().enumerate().filter(|(_, kept)| **kept).map(|(index, _)| index).collect();
+        for pair in positions.windows(2) {
+            assert!((3..=4).contains(&(pair[1] - pair[0])), "uneven cadence {:?}", positions);
+        }
+    }
+
+    #[test]
+    fn max_fps_restarts_after_a_pause() {
+        let mut decimator = VideoDecimator::new(1, Some(10.0), false);
+        let start = Instant::now();
+        assert!(decimator.admit(start, &frame(0)));
+        // Several intervals later the next frame is kept at once
+        assert!(decimator.admit(start + Duration::from_millis(550), &frame(1)));
+        assert!(!decimator.admit(start + Duration::from_millis(600), &frame(2)));
+        assert!(decimator.admit(start + Duration::from_millis(650), &frame(3)));
+    }
+
+    #[test]
+    fn configure_restarts_the_cadence_and_keeps_counters() {
+        let mut decimator = VideoDecimator::new(2, None, false);
+        run(&mut decimator, 3);
+        decimator.configure(4, Some(0.0), true);
+        assert_eq!((decimator.every_n(), decimator.max_fps(), decimator.latest_only()), (4, None, true));
+        assert_eq!(run(&mut decimator, 5), [true, false, false, false, true]);
+        assert_eq!((decimator.incoming(), decimator.delivered()), (8, 4));
+    }
+
+    #[test]
+    fn counts_gaps_in_timecodes() {
+        let mut decimator = VideoDecimator::default();
+        let now = Instant::now();
+        for index in [0, 1, 2, 5, 6] {
+            decimator.admit(now, &frame(index));
+        }
+        assert_eq!(decimator.gaps(), 2);
+
+        // A jump of more than MAX_GAP_FRAMES is a discontinuity
+        decimator.admit(now, &frame(6 + MAX_GAP_FRAMES + 10));
+        // Frames without a timecode are not compared
+        decimator.admit(now, &VideoHeader { timecode: 0, ..frame(0) });
+        assert_eq!(decimator.gaps(), 2);
+    }
+
+    #[test]
+    fn superseded_frames_are_counted_but_not_delivered() {
+        let mut decimator = VideoDecimator::default();
+        let now = Instant::now();
+        decimator.supersede(now, &frame(0));
+        decimator.admit(now, &frame(1));
+        assert_eq!((decimator.incoming(), decimator.superseded(), decimator.delivered()), (2, 1, 1));
+        assert_eq!(decimator.bytes(), 2 * 1920 * 1080 * 2);
+        assert_eq!(decimator.last().map(|last| last.timecode), Some(frame(1).timecode));
+    }
+
+    #[test]
+    fn rates_need_a_complete_window() {
+        let mut decimator = VideoDecimator::new(2, None, false);
+        let start = Instant::now();
+        assert_eq!(decimator.rates(start), (0.0, 0.0));
+        for index in 0..=60 {
+            decimator.admit(start + Duration::from_micros(index as u64 * 33_333), &frame(index));
+        }
+        let (incoming, delivered) = decimator.rates(start + Duration::from_secs(2));
+        assert!((incoming - 30.0).abs() < 0.5, "incoming rate {}", incoming);
+        assert!((delivered - 15.0).abs() < 0.5, "delivered rate {}", delivered);
+        // Rates fall to zero once frames have stopped for a while
+        assert_eq!(decimator.rates(start + Duration::from_secs(10)), (0.0, 0.0));
+    }
+}
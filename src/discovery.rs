@@ -2,9 +2,18 @@
 
 use pyo3::prelude::*;
 use ndi;
-use pyo3::exceptions::PyRuntimeError;
-use pyo3::types::{PyDict, PyList};
-use std::time::Duration;
+use pyo3::exceptions::{PyRuntimeError, PyTypeError, PyValueError};
+use pyo3::types::{PyDict, PyList, PyString};
+use std::path::PathBuf;
+use std::sync::atomic::{AtomicBool, Ordering};
+use std::sync::{Arc, Mutex};
+use std::thread::JoinHandle;
+use std::time::{Duration, Instant};
+
+use crate::backend::Backend;
+use crate::loopback;
+use crate::receiver::ReceiverCore;
+use crate::source_cache::{unix_now, SourceCache};
 
 /// Python class representing an NDI source
 #[pyclass]
@@ -28,61 +37,304 @@ impl NdiSource {
     }
 }
 
-/// Python class representing an NDI finder
-#[pyclass]
-struct NdiFinder {
-    finder: Option<ndi::find::Find>,
+/// Transport a finder lists sources from
+///
+/// An NDI finder is locked while its list is read, since the sources it
+/// returns are only valid until the next read.
+enum FindBackend {
+    Ndi(Mutex<ndi::find::Find>),
+    Loopback,
 }
 
-#[pymethods]
-impl NdiFinder {
-    #[new]
-    fn new() -> PyResult<Self> {
+/// What a finder searches
+///
+/// Receivers search with the same options when they look up the source to
+/// connect to.
+#[derive(Clone, Debug)]
+pub struct FindOptions {
+    pub groups: Option<String>,
+    pub extra_ips: Option<String>,
+    pub show_local_sources: bool,
+}
+
+impl Default for FindOptions {
+    fn default() -> Self {
+        FindOptions { groups: None, extra_ips: None, show_local_sources: true }
+    }
+}
+
+impl FindOptions {
+    /// Options from Python arguments; groups and extra_ips are strings or
+    /// sequences of strings
+    pub fn from_py(groups: Option<&PyAny>, extra_ips: Option<&PyAny>, show_local_sources: bool) -> PyResult<Self> {
+        Ok(FindOptions { groups: comma_list(groups)?, extra_ips: comma_list(extra_ips)?, show_local_sources })
+    }
+
+    /// Create an NDI finder searching with these options
+    ///
+    /// The NDI runtime must already be initialized.
+    pub fn build_finder(&self) -> PyResult<ndi::find::Find> {
+        let mut find_builder = ndi::find::FindBuilder::new().show_local_sources(self.show_local_sources);
+        if let Some(groups) = &self.groups {
+            find_builder = find_builder.groups(groups);
+        }
+        if let Some(extra_ips) = &self.extra_ips {
+            find_builder = find_builder.extra_ips(extra_ips);
+        }
+        find_builder.build().map_err(|_| PyRuntimeError::new_err("Failed to create NDI finder"))
+    }
+}
+
+impl FindBackend {
+    fn create(backend: Backend, options: &FindOptions) -> PyResult<Self> {
+        if backend == Backend::Loopback {
+            return Ok(FindBackend::Loopback);
+        }
+        
         // Initialize the NDI system if not already initialized
         match ndi::initialize() {
-            Ok(_) => {
-                // Create a finder with default settings
-                let find_create = ndi::find::FindBuilder::new().build();
-                match find_create {
-                    Ok(finder) => Ok(NdiFinder { finder: Some(finder) }),
-                    Err(_) => Err(PyRuntimeError::new_err("Failed to create NDI finder")),
-                }
-            },
+            Ok(_) => Ok(FindBackend::Ndi(Mutex::new(options.build_finder()?))),
             Err(_) => Err(PyRuntimeError::new_err(
                 "Failed to initialize NDI runtime. Make sure the NDI SDK is installed on your system.",
             )),
         }
     }
 
+    /// Names of the current sources, or None if none were found in time
+    ///
+    /// The loopback backend returns the currently published sources
+    /// immediately rather than waiting for the timeout.
+    fn source_names(&self, timeout_ms: u32) -> Option<Vec<String>> {
+        match self {
+            // current_sources expects a u128 value in milliseconds
+            FindBackend::Ndi(finder) => finder
+                .lock()
+                .unwrap()
+                .current_sources(timeout_ms as u128)
+                .ok()
+                .map(|sources| sources.iter().map(|source| source.get_name()).collect()),
+            FindBackend::Loopback => Some(loopback::source_names()),
+        }
+    }
+}
+
+/// Least time between saves of a finder's cache that add no new source
+const CACHE_SAVE_INTERVAL: Duration = Duration::from_secs(30);
+
+/// Record sources in a cache and save it
+///
+/// Saving rewrites and syncs the whole file, so unless a source is new to
+/// the cache it is skipped when the last save is less than `min_interval`
+/// old; the sightings are kept in memory until the next save.
+fn record_sources(cache: &Mutex<SourceCache>, names: &[String], min_interval: Duration) -> std::io::Result<()> {
+    let mut cache = cache.lock().unwrap();
+    let now = unix_now();
+    let mut added = false;
+    for name in names {
+        added |= cache.seen(name, now);
+    }
+    if added || !cache.saved_within(min_interval) {
+        cache.save()?;
+    }
+    Ok(())
+}
+
+/// A thread keeping a finder's cache up to date
+struct RevalidationThread {
+    stop: Arc<AtomicBool>,
+    thread: JoinHandle<()>,
+}
+
+/// Match a source name against a glob pattern with `*` and `?`, ignoring case
+fn glob_match(pattern: &str, name: &str) -> bool {
+    let pattern: Vec<char> = pattern.to_lowercase().chars().collect();
+    let name: Vec<char> = name.to_lowercase().chars().collect();
+    let (mut p, mut n) = (0, 0);
+    // Position after the last `*` and the name position it was tried at
+    let mut retry: Option<(usize, usize)> = None;
+    while n < name.len() {
+        match pattern.get(p) {
+            Some('*') => {
+                p += 1;
+                retry = Some((p, n));
+            },
+            Some(c) if *c == '?' || *c == name[n] => {
+                p += 1;
+                n += 1;
+            },
+            _ => match retry {
+                Some((after_star, tried)) => {
+                    // Let the `*` swallow one more character
+                    p = after_star;
+                    n = tried + 1;
+                    retry = Some((after_star, tried + 1));
+                },
+                None => return false,
+            },
+        }
+    }
+    pattern[p..].iter().all(|c| *c == '*')
+}
+
+/// Join a string or a sequence of strings into the SDK's comma-separated form
+fn comma_list(value: Option<&PyAny>) -> PyResult<Option<String>> {
+    let Some(value) = value.filter(|value| !value.is_none()) else {
+        return Ok(None);
+    };
+    if let Ok(text) = value.downcast::<PyString>() {
+        return Ok(Some(text.to_str()?.to_string()));
+    }
+    let mut items = Vec::new();
+    for item in value.iter().map_err(|_| PyTypeError::new_err("Expected a string or a sequence of strings"))? {
+        items.push(item?.extract::<String>()?.trim().to_string());
+    }
+    Ok(Some(items.join(",")))
+}
+
+/// Python class representing an NDI finder
+#[pyclass]
+pub struct NdiFinder {
+    finder: Option<FindBackend>,
+    backend: Backend,
+    options: FindOptions,
+    name_filter: Option<String>,
+    cache: Option<Arc<Mutex<SourceCache>>>,
+    revalidation: Option<RevalidationThread>,
+}
+
+impl NdiFinder {
+    /// Check a source name against the name filter
+    fn matches(&self, name: &str) -> bool {
+        self.name_filter.as_deref().map_or(true, |pattern| glob_match(pattern, name))
+    }
+
+    fn stop_thread(&mut self) {
+        if let Some(revalidation) = self.revalidation.take() {
+            revalidation.stop.store(true, Ordering::Relaxed);
+            let _ = revalidation.thread.join();
+        }
+    }
+
+    /// Connect a receiver to a source this finder has discovered
+    ///
+    /// The finder's current list is polled instead of starting a discovery
+    /// round for the receiver, so many receivers connect as fast as one.
+    pub fn connect_receiver(&self, core: &ReceiverCore, source_name: &str, timeout: Duration, py: Python<'_>) -> PyResult<()> {
+        if core.backend() != self.backend {
+            return Err(PyValueError::new_err(format!(
+                "The finder uses the {} backend and the receiver the {} backend",
+                self.backend.name(),
+                core.backend().name()
+            )));
+        }
+        let finder = self.finder.as_ref().ok_or_else(|| PyRuntimeError::new_err("Finder is not initialized"))?;
+        let options = &self.options;
+        py.allow_threads(|| match finder {
+            FindBackend::Ndi(finder) => core.connect_through(finder, source_name, timeout),
+            // Loopback sources are connected to directly
+            FindBackend::Loopback => core.connect_within(source_name, timeout, options),
+        })
+    }
+
+    /// Save sightings still held back by the save interval
+    fn flush_cache(&self) -> std::io::Result<()> {
+        let Some(cache) = &self.cache else {
+            return Ok(());
+        };
+        let mut cache = cache.lock().unwrap();
+        if cache.has_unsaved() { cache.save() } else { Ok(()) }
+    }
+}
+
+impl Drop for NdiFinder {
+    fn drop(&mut self) {
+        self.stop_thread();
+        let _ = self.flush_cache();
+    }
+}
+
+#[pymethods]
+impl NdiFinder {
+    /// Create a finder
+    ///
+    /// Args:
+    ///     backend: Transport to use, "ndi" or "loopback" (default: the
+    ///         NDIRUST_BACKEND environment variable, or "ndi")
+    ///     groups: Groups to search, as a comma-separated string or a list
+    ///         (default: the groups configured for this machine, usually
+    ///         "public")
+    ///     extra_ips: Addresses of machines or discovery servers to query
+    ///         directly, for discovery across subnets without mDNS, as a
+    ///         comma-separated string or a list (default: None)
+    ///     show_local_sources: List sources published on this machine
+    ///         (default: True)
+    ///     name_filter: Glob pattern with * and ?, matched case-insensitively;
+    ///         sources whose names do not match are dropped before they
+    ///         reach Python (default: None, all sources)
+    ///     cache_path: File to keep the names of the sources this finder
+    ///         sees in, so a restarted process can start connecting to them
+    ///         without blocking on discovery (default: None, no cache)
+    ///     cache_max_age: Seconds after which a source not seen again
+    ///         expires from the cache (default: 86400)
+    ///
+    /// Groups, extra IPs and local sources are decided by the SDK; the
+    /// loopback backend only applies the name filter.
+    #[new]
+    #[pyo3(signature = (
+        backend = None,
+        groups = None,
+        extra_ips = None,
+        show_local_sources = true,
+        name_filter = None,
+        cache_path = None,
+        cache_max_age = 86400.0
+    ))]
+    fn new(
+        backend: Option<&str>,
+        groups: Option<&PyAny>,
+        extra_ips: Option<&PyAny>,
+        show_local_sources: bool,
+        name_filter: Option<String>,
+        cache_path: Option<PathBuf>,
+        cache_max_age: f64,
+    ) -> PyResult<Self> {
+        if !(cache_max_age > 0.0) {
+            return Err(PyValueError::new_err("cache_max_age must be positive"));
+        }
+        let backend = Backend::resolve(backend)?;
+        let options = FindOptions::from_py(groups, extra_ips, show_local_sources)?;
+        let finder = FindBackend::create(backend, &options)?;
+        let cache = cache_path
+            .map(|path| Arc::new(Mutex::new(SourceCache::load(&path, Duration::from_secs_f64(cache_max_age)))));
+        Ok(NdiFinder { finder: Some(finder), backend, options, name_filter, cache, revalidation: None })
+    }
+
     /// Find all current NDI sources on the network
+    ///
+    /// The loopback backend returns the currently published sources
+    /// immediately rather than waiting for the timeout. With a cache, every
+    /// source found is recorded in it, whether or not it matches the name
+    /// filter. The file is written when a new source appears and otherwise
+    /// at most every 30 seconds, and when the finder is closed.
     fn find_sources(&self, timeout_ms: Option<u32>, py: Python<'_>) -> PyResult<Py<PyList>> {
-        let finder = match &self.finder {
-            Some(f) => f,
-            None => return Err(PyRuntimeError::new_err("Finder is not initialized")),
-        };
+        let finder = self.finder.as_ref().ok_or_else(|| PyRuntimeError::new_err("Finder is not initialized"))?;
         
         // Get current sources with timeout
         let wait_ms = timeout_ms.unwrap_or(1000); // Default to 1 second timeout
-        // current_sources expects a u128 value in milliseconds
-        let sources_result = finder.current_sources(wait_ms as u128);
+        let names = finder.source_names(wait_ms);
         
         // Convert to Python list
         let py_list = PyList::empty(py);
-        
-        // Process the result
-        match sources_result {
-            Ok(sources) => {
-                // Process each found source
-                for source in sources.iter() {
-                    // Get the name from the source
-                    let name = source.get_name();
-                    
-                    // Create a Python source object
-                    let py_source = Py::new(py, NdiSource::new(name))?;
-                    py_list.append(py_source)?;
+        match names {
+            Some(names) => {
+                if let Some(cache) = &self.cache {
+                    py.allow_threads(|| record_sources(cache, &names, CACHE_SAVE_INTERVAL))?;
+                }
+                for name in names.into_iter().filter(|name| self.matches(name)) {
+                    py_list.append(Py::new(py, NdiSource::new(name))?)?;
                 }
             },
-            Err(_) => {
+            None => {
                 // Timeout occurred, return empty list (this is not an error)
                 println!("Find sources timeout occurred, no sources found.");
             }
@@ -91,8 +343,129 @@ impl NdiFinder {
         Ok(py_list.into())
     }
 
-    /// Free resources associated with the finder
-    fn close(&mut self) -> PyResult<()> {
+    /// Get the sources in the cache that have not expired
+    ///
+    /// Returns:
+    ///     A list of dicts with "name", "last_seen" (Unix time) and "age"
+    ///     (seconds), most recently seen first and filtered by the name
+    ///     filter
+    fn cached_sources(&self, py: Python<'_>) -> PyResult<Py<PyList>> {
+        let cache = self.cache.as_ref().ok_or_else(|| PyRuntimeError::new_err("Finder has no cache_path"))?;
+        let now = unix_now();
+        let entries = cache.lock().unwrap().entries(now);
+        let py_list = PyList::empty(py);
+        for entry in entries.into_iter().filter(|entry| self.matches(&entry.name)) {
+            let item = PyDict::new(py);
+            item.set_item("name", &entry.name)?;
+            item.set_item("last_seen", entry.last_seen)?;
+            item.set_item("age", (now - entry.last_seen).max(0.0))?;
+            py_list.append(item)?;
+        }
+        Ok(py_list.into())
+    }
+
+    /// Keep the cache up to date from a background thread
+    ///
+    /// The thread runs its own discovery with this finder's options and
+    /// saves every source it hears about, so entries stay fresh and the
+    /// ones that disappear eventually expire.
+    ///
+    /// Args:
+    ///     interval: Seconds between saves (default: 5.0)
+    #[pyo3(signature = (interval = 5.0))]
+    fn start_revalidation(&mut self, interval: f64) -> PyResult<()> {
+        let cache = self.cache.clone().ok_or_else(|| PyRuntimeError::new_err("Finder has no cache_path"))?;
+        if self.revalidation.is_some() {
+            return Err(PyRuntimeError::new_err("Revalidation is already running"));
+        }
+        if !(interval > 0.0) {
+            return Err(PyValueError::new_err("interval must be positive"));
+        }
+        let finder = FindBackend::create(self.backend, &self.options)?;
+        
+        let stop = Arc::new(AtomicBool::new(false));
+        let interval = Duration::from_secs_f64(interval);
+        let thread = {
+            let stop = stop.clone();
+            std::thread::Builder::new().name("ndirust-discovery-cache".to_string()).spawn(move || {
+                let mut next_save = Instant::now();
+                while !stop.load(Ordering::Relaxed) {
+                    let now = Instant::now();
+                    if now < next_save {
+                        // Short sleeps keep stop() responsive
+                        std::thread::sleep((next_save - now).min(Duration::from_millis(100)));
+                        continue;
+                    }
+                    // An empty list is saved too, so vanished sources expire
+                    let names = finder.source_names(0).unwrap_or_default();
+                    // Unwritable caches are reported by find_sources()
+                    let _ = record_sources(&cache, &names, Duration::ZERO);
+                    next_save = Instant::now() + interval;
+                }
+            })?
+        };
+        self.revalidation = Some(RevalidationThread { stop, thread });
+        Ok(())
+    }
+
+    /// Stop the background revalidation
+    fn stop_revalidation(&mut self, py: Python<'_>) {
+        py.allow_threads(|| self.stop_thread());
+    }
+
+    /// Get the name of the transport backend ("ndi" or "loopback")
+    #[getter]
+    fn get_backend(&self) -> &'static str {
+        self.backend.name()
+    }
+
+    /// Groups searched, comma-separated, or None for the machine's default
+    #[getter]
+    fn get_groups(&self) -> Option<String> {
+        self.options.groups.clone()
+    }
+
+    /// Addresses queried directly, comma-separated, or None
+    #[getter]
+    fn get_extra_ips(&self) -> Option<String> {
+        self.options.extra_ips.clone()
+    }
+
+    /// Whether sources published on this machine are listed
+    #[getter]
+    fn get_show_local_sources(&self) -> bool {
+        self.options.show_local_sources
+    }
+
+    /// Glob pattern source names must match, or None (settable)
+    #[getter]
+    fn get_name_filter(&self) -> Option<String> {
+        self.name_filter.clone()
+    }
+
+    #[setter]
+    fn set_name_filter(&mut self, name_filter: Option<String>) {
+        self.name_filter = name_filter;
+    }
+
+    /// Path of the cache file, or None
+    #[getter]
+    fn get_cache_path(&self) -> Option<PathBuf> {
+        self.cache.as_ref().map(|cache| cache.lock().unwrap().path().to_path_buf())
+    }
+
+    /// Whether the cache is being revalidated in the background
+    #[getter]
+    fn get_is_revalidating(&self) -> bool {
+        self.revalidation.is_some()
+    }
+
+    /// Free resources associated with the finder, saving the cache
+    fn close(&mut self, py: Python<'_>) -> PyResult<()> {
+        py.allow_threads(|| {
+            self.stop_thread();
+            self.flush_cache()
+        })?;
         self.finder = None;
         Ok(())
     }
@@ -0,0 +1,415 @@
+// src/frame.rs
+
+use pyo3::prelude::*;
+use pyo3::exceptions::PyBufferError;
+use pyo3::ffi;
+use pyo3::types::PyBytes;
+use std::os::raw::{c_char, c_int};
+use std::sync::Arc;
+
+// FourCC codes as used by the NDI SDK
+pub const FOURCC_UYVY: u32 = 0x59565955;
+pub const FOURCC_UYVA: u32 = 0x41565955;
+pub const FOURCC_P216: u32 = 0x36313250;
+pub const FOURCC_PA16: u32 = 0x36314150;
+pub const FOURCC_YV12: u32 = 0x32315659;
+pub const FOURCC_I420: u32 = 0x30323449;
+pub const FOURCC_NV12: u32 = 0x3231564E;
+pub const FOURCC_BGRA: u32 = 0x41524742;
+pub const FOURCC_BGRX: u32 = 0x58524742;
+pub const FOURCC_RGBA: u32 = 0x41424752;
+pub const FOURCC_RGBX: u32 = 0x58424752;
+
+/// Timecode asking the SDK to synthesize one from the send time
+pub const TIMECODE_SYNTHESIZE: i64 = i64::MAX;
+
+/// Timestamp the SDK reports for frames sent without one
+pub const TIMESTAMP_UNDEFINED: i64 = i64::MAX;
+
+/// Current UTC time in the SDK's units of 100ns since the Unix epoch
+pub fn current_time_100ns() -> i64 {
+    match std::time::SystemTime::now().duration_since(std::time::UNIX_EPOCH) {
+        Ok(elapsed) => (elapsed.as_nanos() / 100) as i64,
+        Err(_) => 0,
+    }
+}
+
+/// Map the SDK's undefined timestamp to 0
+pub fn timestamp_or_zero(timestamp: i64) -> i64 {
+    if timestamp == TIMESTAMP_UNDEFINED { 0 } else { timestamp }
+}
+
+/// Get the name of a FourCC video format
+pub fn four_cc_name(four_cc: u32) -> String {
+    match four_cc {
+        FOURCC_UYVY => "UYVY".to_string(),
+        FOURCC_UYVA => "UYVA".to_string(),
+        FOURCC_P216 => "P216".to_string(),
+        FOURCC_PA16 => "PA16".to_string(),
+        FOURCC_YV12 => "YV12".to_string(),
+        FOURCC_I420 => "I420".to_string(),
+        FOURCC_NV12 => "NV12".to_string(),
+        FOURCC_BGRA => "BGRA".to_string(),
+        FOURCC_RGBA => "RGBA".to_string(),
+        FOURCC_BGRX => "BGRX".to_string(),
+        FOURCC_RGBX => "RGBX".to_string(),
+        _ => format!("Unknown (0x{:08X})", four_cc),
+    }
+}
+
+/// Look up a FourCC code by its name (e.g. "UYVY")
+pub fn four_cc_from_name(name: &str) -> Option<u32> {
+    match name.to_ascii_uppercase().as_str() {
+        "UYVY" => Some(FOURCC_UYVY),
+        "UYVA" => Some(FOURCC_UYVA),
+        "P216" => Some(FOURCC_P216),
+        "PA16" => Some(FOURCC_PA16),
+        "YV12" => Some(FOURCC_YV12),
+        "I420" => Some(FOURCC_I420),
+        "NV12" => Some(FOURCC_NV12),
+        "BGRA" => Some(FOURCC_BGRA),
+        "BGRX" => Some(FOURCC_BGRX),
+        "RGBA" => Some(FOURCC_RGBA),
+        "RGBX" => Some(FOURCC_RGBX),
+        _ => None,
+    }
+}
+
+/// Convert a FourCC code to the ndi crate's enum
+pub fn to_ndi_four_cc(four_cc: u32) -> Option<ndi::FourCCVideoType> {
+    match four_cc {
+        FOURCC_UYVY => Some(ndi::FourCCVideoType::UYVY),
+        FOURCC_UYVA => Some(ndi::FourCCVideoType::UYVA),
+        FOURCC_P216 => Some(ndi::FourCCVideoType::P216),
+        FOURCC_PA16 => Some(ndi::FourCCVideoType::PA16),
+        FOURCC_YV12 => Some(ndi::FourCCVideoType::YV12),
+        FOURCC_I420 => Some(ndi::FourCCVideoType::I420),
+        FOURCC_NV12 => Some(ndi::FourCCVideoType::NV12),
+        FOURCC_BGRA => Some(ndi::FourCCVideoType::BGRA),
+        FOURCC_BGRX => Some(ndi::FourCCVideoType::BGRX),
+        FOURCC_RGBA => Some(ndi::FourCCVideoType::RGBA),
+        FOURCC_RGBX => Some(ndi::FourCCVideoType::RGBX),
+        _ => None,
+    }
+}
+
+/// Default line stride in bytes for a packed format, or the luma plane of a planar one
+pub fn default_line_stride(four_cc: u32, width: u32) -> usize {
+    let width = width as usize;
+    match four_cc {
+        FOURCC_BGRA | FOURCC_BGRX | FOURCC_RGBA | FOURCC_RGBX => width * 4,
+        FOURCC_P216 | FOURCC_PA16 => width * 2,
+        FOURCC_YV12 | FOURCC_I420 | FOURCC_NV12 => width,
+        _ => width * 2, // UYVY and UYVA
+    }
+}
+
+/// Total number of bytes of a video frame, including any extra planes
+pub fn video_data_size(four_cc: u32, line_stride: usize, height: u32) -> usize {
+    let height = height as usize;
+    match four_cc {
+        // Planar 4:2:0 formats carry half as many chroma bytes as luma bytes
+        FOURCC_YV12 | FOURCC_I420 | FOURCC_NV12 => line_stride * height + line_stride * height / 2,
+        // UYVY followed by an 8-bit alpha plane
+        FOURCC_UYVA => line_stride * height + line_stride * height / 2,
+        // 16-bit Y plane followed by interleaved 16-bit UV plane (and alpha)
+        FOURCC_P216 => line_stride * height * 2,
+        FOURCC_PA16 => line_stride * height * 3,
+        _ => line_stride * height,
+    }
+}
+
+/// Layout and rate of a video frame
+#[derive(Clone, Copy, PartialEq, Eq, Hash, Debug)]
+pub struct VideoFormat {
+    pub width: u32,
+    pub height: u32,
+    pub four_cc: u32,
+    pub line_stride: usize,
+    pub frame_rate_n: u32,
+    pub frame_rate_d: u32,
+}
+
+impl VideoFormat {
+    /// Create a format with the default line stride for the FourCC
+    pub fn new(width: u32, height: u32, four_cc: u32, frame_rate_n: u32, frame_rate_d: u32) -> Self {
+        VideoFormat {
+            width,
+            height,
+            four_cc,
+            line_stride: default_line_stride(four_cc, width),
+            frame_rate_n,
+            frame_rate_d,
+        }
+    }
+
+    /// Number of bytes a frame of this format occupies
+    pub fn data_size(&self) -> usize {
+        video_data_size(self.four_cc, self.line_stride, self.height)
+    }
+}
+
+/// Wrap a borrowed buffer in an SDK video frame for sending
+///
+/// The SDK only reads from the buffer while sending, but the ndi crate asks
+/// for a mutable slice, so the borrow is widened here. The returned frame must
+/// not outlive `data`.
+pub fn ndi_video_frame(data: &[u8], format: &VideoFormat, timecode: i64) -> Option<ndi::VideoData> {
+    let four_cc = to_ndi_four_cc(format.four_cc)?;
+    let data = unsafe { std::slice::from_raw_parts_mut(data.as_ptr() as *mut u8, data.len()) };
+
+    Some(ndi::VideoData::from_buffer(
+        format.width as i32,
+        format.height as i32,
+        four_cc,
+        format.frame_rate_n as i32,
+        format.frame_rate_d as i32,
+        ndi::FrameFormatType::Progressive,
+        timecode,
+        format.line_stride as i32,
+        None, // metadata
+        data,
+    ))
+}
+
+/// Wrap borrowed planar float samples in an SDK audio frame for sending
+///
+/// As with `ndi_video_frame`, the returned frame must not outlive `samples`.
+pub fn ndi_audio_frame(
+    samples: &[f32],
+    sample_rate: u32,
+    num_channels: u32,
+    num_samples: u32,
+    timecode: i64,
+) -> ndi::AudioData {
+    let samples = unsafe { std::slice::from_raw_parts_mut(samples.as_ptr() as *mut f32, samples.len()) };
+
+    ndi::AudioData::from_buffer(
+        sample_rate as i32,
+        num_channels as i32,
+        num_samples as i32,
+        timecode,
+        (num_samples * 4) as i32, // channel stride of packed planes
+        None,                     // metadata
+        samples,
+    )
+}
+
+/// Build an SDK metadata frame for sending
+pub fn ndi_metadata_frame(data: &str, timecode: i64) -> ndi::MetaData {
+    ndi::MetaData::new(data.len() as i32, timecode, data.to_string())
+}
+
+/// A video frame held in native memory
+///
+/// The pixel data is reference counted so a captured frame can be handed to
+/// several consumers without copying it.
+#[derive(Clone)]
+pub struct VideoFrameData {
+    pub width: u32,
+    pub height: u32,
+    pub four_cc: u32,
+    pub frame_rate_n: u32,
+    pub frame_rate_d: u32,
+    pub timecode: i64,
+    /// Time the sender submitted the frame, in 100ns units since the Unix
+    /// epoch, or 0 if unknown
+    pub timestamp: i64,
+    pub line_stride: usize,
+    pub data: Arc<Vec<u8>>,
+}
+
+impl VideoFrameData {
+    /// Layout and rate of the frame, assuming the default line stride if the
+    /// SDK did not report one
+    pub fn format(&self) -> VideoFormat {
+        VideoFormat {
+            width: self.width,
+            height: self.height,
+            four_cc: self.four_cc,
+            line_stride: if self.line_stride > 0 {
+                self.line_stride
+            } else {
+                default_line_stride(self.four_cc, self.width)
+            },
+            frame_rate_n: self.frame_rate_n,
+            frame_rate_d: self.frame_rate_d,
+        }
+    }
+}
+
+/// An audio frame held in native memory as planar 32-bit float samples
+#[derive(Clone)]
+pub struct AudioFrameData {
+    pub sample_rate: u32,
+    pub num_channels: u32,
+    pub num_samples: u32,
+    pub timecode: i64,
+    pub timestamp: i64,
+    pub data: Arc<Vec<f32>>,
+}
+
+/// A metadata frame held in native memory
+#[derive(Clone)]
+pub struct MetadataFrameData {
+    pub timecode: i64,
+    pub timestamp: i64,
+    pub data: String,
+}
+
+/// Result of a native capture
+#[derive(Clone)]
+pub enum CapturedFrame {
+    None,
+    Video(VideoFrameData),
+    Audio(AudioFrameData),
+    Metadata(MetadataFrameData),
+    Error,
+}
+
+/// Line stride and data size of a video frame in SDK-owned memory
+pub fn ndi_video_layout(video: &ndi::VideoData) -> (usize, usize) {
+    let width = video.width() as u32;
+    let height = video.height() as u32;
+    let four_cc = video.four_cc() as u32;
+
+    // Determine the frame data size based on the format
+    if let Some(stride) = video.line_stride_in_bytes() {
+        let stride = stride as usize;
+        (stride, video_data_size(four_cc, stride, height))
+    } else if let Some(size) = video.data_size_in_bytes() {
+        (0, size as usize)
+    } else {
+        // If neither is available, fall back to the packed size of the format
+        let stride = default_line_stride(four_cc, width);
+        (stride, video_data_size(four_cc, stride, height))
+    }
+}
+
+/// Copy a video frame out of SDK-owned memory
+pub fn copy_ndi_video(video: &ndi::VideoData) -> VideoFrameData {
+    let width = video.width() as u32;
+    let height = video.height() as u32;
+    let four_cc = video.four_cc() as u32;
+    let (line_stride, data_size) = ndi_video_layout(video);
+
+    let data = unsafe { std::slice::from_raw_parts(video.p_data() as *const u8, data_size) }.to_vec();
+
+    VideoFrameData {
+        width,
+        height,
+        four_cc,
+        frame_rate_n: video.frame_rate_n() as u32,
+        frame_rate_d: video.frame_rate_d() as u32,
+        timecode: video.timecode(),
+        timestamp: timestamp_or_zero(video.timestamp()),
+        line_stride,
+        data: Arc::new(data),
+    }
+}
+
+/// Copy an audio frame out of SDK-owned memory into a packed planar buffer
+pub fn copy_ndi_audio(audio: &ndi::AudioData) -> AudioFrameData {
+    let num_channels = audio.no_channels() as u32;
+    let num_samples = audio.no_samples() as u32;
+    let channel_stride = audio.channel_stride_in_bytes() as usize / 4;
+    let samples = num_samples as usize;
+    let p_data = audio.p_data() as *const f32;
+
+    let mut data = Vec::with_capacity(num_channels as usize * samples);
+    for channel in 0..num_channels as usize {
+        // Each channel starts at its own stride, which may include padding
+        let offset = if channel_stride > 0 { channel * channel_stride } else { channel * samples };
+        let plane = unsafe { std::slice::from_raw_parts(p_data.add(offset), samples) };
+        data.extend_from_slice(plane);
+    }
+
+    AudioFrameData {
+        sample_rate: audio.sample_rate() as u32,
+        num_channels,
+        num_samples,
+        timecode: audio.timecode(),
+        timestamp: timestamp_or_zero(audio.timestamp()),
+        data: Arc::new(data),
+    }
+}
+
+/// Frame payload backing the `get_data()` method of the Python frame classes
+#[derive(Clone)]
+pub enum Payload {
+    /// Bytes supplied from Python
+    Python(Py<PyBytes>),
+    /// Pixel data captured natively
+    Video(Arc<Vec<u8>>),
+    /// Planar float samples captured natively
+    Audio(Arc<Vec<f32>>),
+}
+
+impl Payload {
+    /// Copy the payload into a Python bytes object
+    pub fn to_bytes(&self, py: Python<'_>) -> Py<PyBytes> {
+        match self {
+            Payload::Python(bytes) => bytes.clone_ref(py),
+            Payload::Video(data) => PyBytes::new(py, data.as_slice()).into(),
+            Payload::Audio(data) => PyBytes::new(py, samples_as_bytes(data.as_slice())).into(),
+        }
+    }
+
+    /// The payload's bytes, valid for as long as the payload is held
+    pub fn as_slice<'a>(&'a self, py: Python<'a>) -> &'a [u8] {
+        match self {
+            Payload::Python(bytes) => bytes.as_ref(py).as_bytes(),
+            Payload::Video(data) => data.as_slice(),
+            Payload::Audio(data) => samples_as_bytes(data.as_slice()),
+        }
+    }
+}
+
+/// Fill in a read-only, one-dimensional buffer view of unsigned bytes
+///
+/// The view keeps `owner` alive, so `data` must stay valid and unchanged for
+/// as long as `owner` does.
+///
+/// # Safety
+///
+/// `view` must be the pointer passed to `__getbuffer__`.
+pub unsafe fn export_readonly_bytes(
+    owner: *mut ffi::PyObject,
+    data: &[u8],
+    view: *mut ffi::Py_buffer,
+    flags: c_int,
+) -> PyResult<()> {
+    if view.is_null() {
+        return Err(PyBufferError::new_err("View is null"));
+    }
+    if (flags & ffi::PyBUF_WRITABLE) == ffi::PyBUF_WRITABLE {
+        return Err(PyBufferError::new_err("Frame data is read-only"));
+    }
+
+    unsafe {
+        ffi::Py_INCREF(owner);
+        (*view).obj = owner;
+        (*view).buf = data.as_ptr() as *mut std::os::raw::c_void;
+        (*view).len = data.len() as ffi::Py_ssize_t;
+        (*view).readonly = 1;
+        (*view).itemsize = 1;
+        (*view).format = if (flags & ffi::PyBUF_FORMAT) == ffi::PyBUF_FORMAT {
+            b"B\0".as_ptr() as *mut c_char
+        } else {
+            std::ptr::null_mut()
+        };
+        (*view).ndim = 1;
+        // A one-dimensional byte buffer needs neither shape nor strides
+        (*view).shape = std::ptr::null_mut();
+        (*view).strides = std::ptr::null_mut();
+        (*view).suboffsets = std::ptr::null_mut();
+        (*view).internal = std::ptr::null_mut();
+    }
+
+    Ok(())
+}
+
+/// View a slice of float samples as raw bytes
+pub fn samples_as_bytes(samples: &[f32]) -> &[u8] {
+    unsafe { std::slice::from_raw_parts(samples.as_ptr() as *const u8, samples.len() * 4) }
+}
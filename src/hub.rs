@@ -0,0 +1,290 @@
+// src/hub.rs
+//
+// Capture hubs: one receiver per source, shared by every consumer in the
+// process. A hub hands out subscriber handles, each with its own bounded
+// queue and drop policy, fed from the same captured frames. Frame payloads
+// are reference-counted, so adding a subscriber adds no network connection,
+// decode or copy.
+
+use pyo3::prelude::*;
+use pyo3::exceptions::{PyRuntimeError, PyValueError};
+use pyo3::types::PyDict;
+use std::collections::HashMap;
+use std::sync::atomic::{AtomicBool, AtomicUsize, Ordering};
+use std::sync::{Arc, Mutex, OnceLock, Weak};
+use std::time::Duration;
+
+use crate::backend::Backend;
+use crate::discovery::FindOptions;
+use crate::frame::CapturedFrame;
+use crate::queue::{DropPolicy, FrameQueue};
+use crate::receiver::{captured_to_py, FrameSink, FrameType, NdiReceiver, ReceiverCore};
+
+/// Hubs alive in the process, by backend and source name
+fn hubs() -> &'static Mutex<HashMap<(Backend, String), Weak<HubShared>>> {
+    static HUBS: OnceLock<Mutex<HashMap<(Backend, String), Weak<HubShared>>>> = OnceLock::new();
+    HUBS.get_or_init(|| Mutex::new(HashMap::new()))
+}
+
+/// The receiver of one source and its subscriber count
+struct HubShared {
+    source: String,
+    backend: Backend,
+    core: Arc<ReceiverCore>,
+    subscribers: AtomicUsize,
+}
+
+impl HubShared {
+    /// The hub of a source, opening and connecting a receiver if there is none
+    fn get_or_open(source: &str, backend: Backend, options: &FindOptions, py: Python<'_>) -> PyResult<Arc<HubShared>> {
+        let key = (backend, source.to_string());
+        if let Some(hub) = hubs().lock().unwrap().get(&key).and_then(Weak::upgrade) {
+            return Ok(hub);
+        }
+
+        // Connecting can take seconds, so it happens outside the registry
+        // lock and without the GIL
+        let core = py.allow_threads(|| -> PyResult<_> {
+            let core = ReceiverCore::open(backend, None)?;
+            core.connect(source, options)?;
+            Ok(Arc::new(core))
+        })?;
+        let created = Arc::new(HubShared {
+            source: source.to_string(),
+            backend,
+            core,
+            subscribers: AtomicUsize::new(0),
+        });
+
+        // Another thread may have opened the same source meanwhile
+        let mut hubs = hubs().lock().unwrap();
+        hubs.retain(|_, hub| hub.strong_count() > 0);
+        if let Some(hub) = hubs.get(&key).and_then(Weak::upgrade) {
+            return Ok(hub);
+        }
+        hubs.insert(key, Arc::downgrade(&created));
+        Ok(created)
+    }
+}
+
+/// Shared capture of one source
+///
+/// Creating a hub for a source that already has one returns a handle on the
+/// same receiver. Recorders, probes, meters and other attachments can share
+/// it too through the `receiver` property, which hands each caller its own
+/// handle: closing it detaches that caller only.
+#[pyclass]
+struct NdiCaptureHub {
+    shared: Arc<HubShared>,
+}
+
+#[pymethods]
+impl NdiCaptureHub {
+    /// Get the hub of a source, connecting to it if no hub exists yet
+    ///
+    /// Args:
+    ///     source: Name of the source
+    ///     backend: Transport, "ndi" or "loopback" (default: the
+    ///         NDIRUST_BACKEND environment variable, or "ndi")
+    ///     groups: Groups to search for the source, as in NdiFinder
+    ///         (default: the groups configured for this machine)
+    ///     extra_ips: Addresses of machines or discovery servers to query
+    ///         directly, as in NdiFinder (default: None)
+    ///
+    /// The search options only apply when the hub is opened; a hub that
+    /// already exists for the source is returned as is.
+    #[new]
+    #[pyo3(signature = (source, backend = None, groups = None, extra_ips = None))]
+    fn new(
+        source: &str,
+        backend: Option<&str>,
+        groups: Option<&PyAny>,
+        extra_ips: Option<&PyAny>,
+        py: Python<'_>,
+    ) -> PyResult<Self> {
+        let backend = Backend::resolve(backend)?;
+        let options = FindOptions::from_py(groups, extra_ips, true)?;
+        Ok(NdiCaptureHub {
+            shared: HubShared::get_or_open(source, backend, &options, py)?,
+        })
+    }
+
+    /// Subscribe to the source's frames
+    ///
+    /// Args:
+    ///     depth: Frames the subscriber's queue holds (default: 8)
+    ///     policy: What a full queue drops: "drop_oldest" to stay close to
+    ///         live, or "drop_newest" to keep a contiguous run of frames
+    ///         (default: "drop_oldest")
+    ///     video: Queue video frames (default: True)
+    ///     audio: Queue audio frames (default: True)
+    ///     metadata: Queue metadata frames (default: True)
+    ///
+    /// Returns:
+    ///     An NdiSubscriber that receives until it is closed
+    #[pyo3(signature = (depth = 8, policy = "drop_oldest", video = true, audio = true, metadata = true))]
+    fn subscribe(&self, depth: usize, policy: &str, video: bool, audio: bool, metadata: bool) -> PyResult<NdiSubscriber> {
+        if depth == 0 {
+            return Err(PyValueError::new_err("depth must be positive"));
+        }
+        let policy = DropPolicy::from_name(policy).ok_or_else(|| {
+            PyValueError::new_err(format!("Unknown drop policy '{}', expected 'drop_oldest' or 'drop_newest'", policy))
+        })?;
+        if !self.shared.core.is_open() {
+            return Err(PyRuntimeError::new_err("Receiver is not initialized"));
+        }
+
+        let queue = Arc::new(FrameQueue::with_options(depth, policy, video, audio, metadata));
+        self.shared.core.add_sink(queue.clone());
+        self.shared.core.retain_pump();
+        self.shared.subscribers.fetch_add(1, Ordering::Relaxed);
+        Ok(NdiSubscriber {
+            hub: self.shared.clone(),
+            queue,
+            open: AtomicBool::new(true),
+        })
+    }
+
+    /// Name of the source
+    #[getter]
+    fn get_source(&self) -> String {
+        self.shared.source.clone()
+    }
+
+    /// Name of the transport backend
+    #[getter]
+    fn get_backend(&self) -> &'static str {
+        self.shared.backend.name()
+    }
+
+    /// A handle on the shared receiver, for recorders, probes and other
+    /// attachments
+    ///
+    /// Each access returns a new handle. Closing it stops only what was
+    /// received through that handle; it cannot be reconnected to another
+    /// source.
+    #[getter]
+    fn get_receiver(&self, py: Python<'_>) -> PyResult<Py<NdiReceiver>> {
+        Py::new(py, NdiReceiver::shared_view(self.shared.core.clone()))
+    }
+
+    /// Number of open subscribers
+    #[getter]
+    fn get_subscribers(&self) -> usize {
+        self.shared.subscribers.load(Ordering::Relaxed)
+    }
+
+    /// Names of the sources with a hub in this process
+    #[staticmethod]
+    fn active_sources() -> Vec<String> {
+        let hubs = hubs().lock().unwrap();
+        let mut sources: Vec<String> =
+            hubs.iter().filter(|(_, hub)| hub.strong_count() > 0).map(|((_, source), _)| source.clone()).collect();
+        sources.sort();
+        sources
+    }
+
+    fn __repr__(&self) -> String {
+        format!(
+            "NdiCaptureHub('{}', subscribers={})",
+            self.shared.source,
+            self.shared.subscribers.load(Ordering::Relaxed)
+        )
+    }
+}
+
+/// One consumer of a capture hub, with its own bounded queue
+///
+/// Frames share their native buffers with every other subscriber; nothing
+/// is copied until a frame's data is requested from Python.
+#[pyclass]
+struct NdiSubscriber {
+    hub: Arc<HubShared>,
+    queue: Arc<FrameQueue>,
+    open: AtomicBool,
+}
+
+impl NdiSubscriber {
+    fn detach(&self) {
+        if self.open.swap(false, Ordering::AcqRel) {
+            let sink: Arc<dyn FrameSink> = self.queue.clone();
+            self.hub.core.remove_sink(&sink);
+            self.hub.core.release_pump();
+            self.hub.subscribers.fetch_sub(1, Ordering::Relaxed);
+        }
+    }
+}
+
+impl Drop for NdiSubscriber {
+    fn drop(&mut self) {
+        self.detach();
+    }
+}
+
+#[pymethods]
+impl NdiSubscriber {
+    /// Receive the next queued frame, waiting up to the timeout
+    ///
+    /// Args:
+    ///     timeout_ms: Longest wait in milliseconds (default: 1000)
+    ///
+    /// Returns:
+    ///     Tuple of frame_type and frame, (FrameType.None, None) on timeout
+    #[pyo3(signature = (timeout_ms = 1000))]
+    fn receive_frame(&self, timeout_ms: u64, py: Python<'_>) -> PyResult<(FrameType, PyObject)> {
+        let captured = py.allow_threads(|| self.queue.pop(Duration::from_millis(timeout_ms)));
+        captured_to_py(captured.unwrap_or(CapturedFrame::None), py)
+    }
+
+    /// Take a queued frame without waiting
+    fn try_receive(&self, py: Python<'_>) -> PyResult<(FrameType, PyObject)> {
+        captured_to_py(self.queue.try_pop().unwrap_or(CapturedFrame::None), py)
+    }
+
+    /// File descriptor that is readable while frames are queued (Unix only)
+    fn fileno(&self) -> PyResult<i64> {
+        self.queue.fileno().map_err(|error| PyRuntimeError::new_err(error.to_string()))
+    }
+
+    /// Stop receiving; frames already queued can still be taken
+    fn close(&self, py: Python<'_>) {
+        py.allow_threads(|| self.detach());
+    }
+
+    /// Whether the subscriber still receives frames
+    #[getter]
+    fn get_is_open(&self) -> bool {
+        self.open.load(Ordering::Acquire)
+    }
+
+    /// Name of the source
+    #[getter]
+    fn get_source(&self) -> String {
+        self.hub.source.clone()
+    }
+
+    /// Subscriber statistics: received (frames offered to the queue),
+    /// dropped, queued, depth and policy
+    #[getter]
+    fn get_stats(&self, py: Python<'_>) -> PyResult<Py<PyDict>> {
+        let stats = PyDict::new(py);
+        stats.set_item("received", self.queue.received())?;
+        stats.set_item("dropped", self.queue.dropped())?;
+        stats.set_item("queued", self.queue.len())?;
+        stats.set_item("depth", self.queue.depth())?;
+        stats.set_item("policy", self.queue.policy().name())?;
+        Ok(stats.into())
+    }
+
+    fn __repr__(&self) -> String {
+        format!("NdiSubscriber('{}', {})", self.hub.source, self.queue.policy().name())
+    }
+}
+
+/// Register capture hub classes
+pub fn register_hub_functions(m: &PyModule) -> PyResult<()> {
+    m.add_class::<NdiCaptureHub>()?;
+    m.add_class::<NdiSubscriber>()?;
+
+    Ok(())
+}
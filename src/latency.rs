@@ -0,0 +1,111 @@
+// src/latency.rs
+//
+// Per-source latency statistics computed from the timestamps and timecodes of
+// received frames. All times are in the SDK's 100ns units.
+
+use pyo3::prelude::*;
+use pyo3::types::PyDict;
+use std::collections::{HashMap, VecDeque};
+
+use crate::frame::CapturedFrame;
+
+/// Number of recent samples kept per measurement
+const WINDOW_SIZE: usize = 1024;
+
+/// Largest distance from the receive time at which a timecode is taken to be
+/// a wall-clock time rather than a free-running counter
+const WALL_CLOCK_TOLERANCE: i64 = 60 * 10_000_000;
+
+/// Recent samples of one latency measurement
+#[derive(Default)]
+struct LatencyWindow {
+    samples: VecDeque<i64>,
+    count: u64,
+}
+
+impl LatencyWindow {
+    fn record(&mut self, latency: i64) {
+        if self.samples.len() == WINDOW_SIZE {
+            self.samples.pop_front();
+        }
+        self.samples.push_back(latency);
+        self.count += 1;
+    }
+
+    /// Summarise the window in milliseconds
+    fn to_dict<'py>(&self, py: Python<'py>) -> PyResult<&'py PyDict> {
+        let stats = PyDict::new(py);
+        stats.set_item("count", self.count)?;
+        if self.samples.is_empty() {
+            return Ok(stats);
+        }
+
+        let mut sorted: Vec<i64> = self.samples.iter().copied().collect();
+        sorted.sort_unstable();
+        let to_ms = |value: i64| value as f64 / 10_000.0;
+        let percentile = |p: f64| to_ms(sorted[((sorted.len() - 1) as f64 * p).round() as usize]);
+        let mean = sorted.iter().map(|&value| value as f64).sum::<f64>() / sorted.len() as f64;
+
+        stats.set_item("min", to_ms(sorted[0]))?;
+        stats.set_item("mean", mean / 10_000.0)?;
+        stats.set_item("p50", percentile(0.50))?;
+        stats.set_item("p90", percentile(0.90))?;
+        stats.set_item("p99", percentile(0.99))?;
+        stats.set_item("max", to_ms(sorted[sorted.len() - 1]))?;
+        Ok(stats)
+    }
+}
+
+/// Latency measurements of one source
+#[derive(Default)]
+struct SourceLatency {
+    // Sender submit (frame timestamp) to receive
+    transport: LatencyWindow,
+    // Capture (frame timecode) to receive, for wall-clock timecodes only
+    end_to_end: LatencyWindow,
+}
+
+/// Latency statistics of every source a receiver has received from
+#[derive(Default)]
+pub struct LatencyTracker {
+    sources: HashMap<String, SourceLatency>,
+}
+
+impl LatencyTracker {
+    /// Record the latency of a frame received at `received_at`
+    pub fn record(&mut self, source: &str, frame: &CapturedFrame, received_at: i64) {
+        let (timecode, timestamp) = match frame {
+            CapturedFrame::Video(video) => (video.timecode, video.timestamp),
+            CapturedFrame::Audio(audio) => (audio.timecode, audio.timestamp),
+            CapturedFrame::Metadata(metadata) => (metadata.timecode, metadata.timestamp),
+            CapturedFrame::None | CapturedFrame::Error => return,
+        };
+
+        let latency = self.sources.entry(source.to_string()).or_default();
+
+        if timestamp > 0 {
+            latency.transport.record(received_at - timestamp);
+        }
+        let since_timecode = received_at - timecode;
+        if since_timecode.abs() < WALL_CLOCK_TOLERANCE {
+            latency.end_to_end.record(since_timecode);
+        }
+    }
+
+    /// Forget all samples
+    pub fn reset(&mut self) {
+        self.sources.clear();
+    }
+
+    /// Summarise the statistics as {source: {"transport": {...}, "end_to_end": {...}}}
+    pub fn to_dict<'py>(&self, py: Python<'py>) -> PyResult<&'py PyDict> {
+        let stats = PyDict::new(py);
+        for (source, latency) in &self.sources {
+            let entry = PyDict::new(py);
+            entry.set_item("transport", latency.transport.to_dict(py)?)?;
+            entry.set_item("end_to_end", latency.end_to_end.to_dict(py)?)?;
+            stats.set_item(source, entry)?;
+        }
+        Ok(stats)
+    }
+}
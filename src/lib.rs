@@ -1,6 +1,29 @@
+mod audio_stream;
+mod backend;
+mod convert;
+mod decimate;
 mod discovery;
+mod frame;
+mod hub;
+mod latency;
+mod loadgen;
+mod loopback;
+mod metadata;
+mod meters;
+mod multiview;
+mod pacing;
+mod player;
+mod probe;
+mod queue;
+mod patterns;
 mod receiver;
+mod recorder;
+mod relay;
+mod scale;
 mod sender;
+mod shm;
+mod slots;
+mod source_cache;
 mod utils;
 
 use pyo3::prelude::*;
@@ -44,9 +67,22 @@ fn ndirust_py(_py: Python, m: &PyModule) -> PyResult<()> {
     let sender_module = PyModule::new(_py, "sender")?;
     sender::register_sender_functions(sender_module)?;
     m.add_submodule(sender_module)?;
+
+    let recording_module = PyModule::new(_py, "recording")?;
+    recorder::register_recording_functions(recording_module)?;
+    m.add_submodule(recording_module)?;
+
+    let relay_module = PyModule::new(_py, "relay")?;
+    relay::register_relay_functions(relay_module)?;
+    m.add_submodule(relay_module)?;
+
+    let shm_module = PyModule::new(_py, "shm")?;
+    shm::register_shm_functions(shm_module)?;
+    m.add_submodule(shm_module)?;
     
     // Add utility functions directly to the module
     utils::register_utility_functions(m)?;
+    backend::register_backend_functions(m)?;
 
     // Add module-level attributes
     let sys = PyModule::import(_py, "sys")?;
@@ -0,0 +1,501 @@
+// src/loadgen.rs
+//
+// Load generator publishing many senders from one process. Senders are
+// spread over a fixed pool of native threads; each thread waits for the
+// earliest deadline among its senders rather than running a thread and a
+// sleep loop per sender, so dozens of streams keep their rate without the
+// GIL or per-sender threads getting in the way.
+
+use pyo3::prelude::*;
+use pyo3::exceptions::{PyRuntimeError, PyValueError};
+use pyo3::types::{PyDict, PyList};
+use std::sync::atomic::{AtomicBool, AtomicU64, Ordering};
+use std::sync::{Arc, Mutex};
+use std::thread::JoinHandle;
+use std::time::{Duration, Instant};
+
+use crate::backend::Backend;
+use crate::frame::{four_cc_from_name, VideoFormat, TIMECODE_SYNTHESIZE};
+use crate::pacing::{sleep_until, Pacer};
+use crate::patterns::{PatternGenerator, PatternKind};
+use crate::sender::SendBackend;
+
+/// Longest a worker sleeps before checking whether it should stop
+const MAX_IDLE: Duration = Duration::from_millis(50);
+
+/// Frequency of the generated audio tone
+const TONE_HZ: f64 = 1000.0;
+
+/// Amplitude of the generated audio tone (-20 dBFS)
+const TONE_LEVEL: f64 = 0.1;
+
+/// Counters of one load stream, read from Python while the workers run
+#[derive(Default)]
+struct StreamStats {
+    video_frames: AtomicU64,
+    audio_frames: AtomicU64,
+    metadata_frames: AtomicU64,
+    late: AtomicU64,
+    dropped: AtomicU64,
+    errors: AtomicU64,
+}
+
+impl StreamStats {
+    fn reset(&self) {
+        for counter in [
+            &self.video_frames,
+            &self.audio_frames,
+            &self.metadata_frames,
+            &self.late,
+            &self.dropped,
+            &self.errors,
+        ] {
+            counter.store(0, Ordering::Relaxed);
+        }
+    }
+}
+
+/// Where a stream's video frames come from
+enum Frames {
+    /// Rendered for every frame: moving box and burnt-in counter
+    Animated(PatternGenerator),
+    /// One still frame, sent by reference
+    Still(Arc<Vec<u8>>),
+}
+
+/// One sender and its schedules
+struct LoadStream {
+    index: usize,
+    sender: SendBackend,
+    format: VideoFormat,
+    frames: Frames,
+    video: Pacer,
+    audio_channels: u32,
+    sample_rate: u32,
+    // One second of tone, shared by every stream
+    tone: Arc<Vec<f32>>,
+    // Metadata frames per thousand seconds, 0 for none
+    metadata_rate_n: u32,
+    metadata: Option<Pacer>,
+    stats: Arc<StreamStats>,
+}
+
+impl LoadStream {
+    /// Restart the schedules from now
+    fn restart(&mut self) {
+        self.video = Pacer::new(self.format.frame_rate_n, self.format.frame_rate_d);
+        if self.metadata_rate_n > 0 {
+            self.metadata = Some(Pacer::new(self.metadata_rate_n, 1000));
+        }
+    }
+
+    fn next_deadline(&self) -> Instant {
+        let video = self.video.next_deadline();
+        match &self.metadata {
+            Some(metadata) => video.min(metadata.next_deadline()),
+            None => video,
+        }
+    }
+
+    /// Send whatever is due
+    fn service(&mut self, samples: &mut Vec<f32>) {
+        let stats = self.stats.clone();
+        let count = |counter: &AtomicU64, result: PyResult<()>| match result {
+            Ok(()) => {
+                counter.fetch_add(1, Ordering::Relaxed);
+            },
+            Err(_) => {
+                stats.errors.fetch_add(1, Ordering::Relaxed);
+            },
+        };
+
+        if let Some(index) = self.video.take_due(Instant::now()) {
+            let sent = match &mut self.frames {
+                Frames::Animated(generator) => {
+                    generator.render(index);
+                    self.sender.send_video(generator.frame(), &self.format, TIMECODE_SYNTHESIZE)
+                },
+                Frames::Still(frame) => self.sender.send_shared_video(frame, &self.format, TIMECODE_SYNTHESIZE),
+            };
+            count(&self.stats.video_frames, sent);
+
+            if self.audio_channels > 0 {
+                let num_samples = self.fill_audio(index, samples);
+                let sent = self.sender.send_audio(samples, self.sample_rate, self.audio_channels, num_samples, TIMECODE_SYNTHESIZE);
+                count(&self.stats.audio_frames, sent);
+            }
+            self.stats.late.store(self.video.late, Ordering::Relaxed);
+            self.stats.dropped.store(self.video.dropped, Ordering::Relaxed);
+        }
+
+        if let Some(metadata) = &mut self.metadata {
+            if let Some(index) = metadata.take_due(Instant::now()) {
+                let xml = format!("<ndirust_loadgen sender=\"{}\" sequence=\"{}\"/>", self.index, index);
+                count(&self.stats.metadata_frames, self.sender.send_metadata(&xml, TIMECODE_SYNTHESIZE));
+            }
+        }
+    }
+
+    /// Fill `samples` with the planar audio accompanying video frame `index`
+    ///
+    /// Frames carry a varying number of samples at rates such as 30000/1001,
+    /// so the tone stays continuous and in step with the video, including
+    /// across dropped frames.
+    fn fill_audio(&self, index: u64, samples: &mut Vec<f32>) -> u32 {
+        let (fps_n, fps_d) = (self.format.frame_rate_n as u128, self.format.frame_rate_d as u128);
+        let position = |frame: u64| (frame as u128 * self.sample_rate as u128 * fps_d / fps_n) as u64;
+        let start = position(index);
+        let num_samples = (position(index + 1) - start) as usize;
+
+        samples.clear();
+        let period = self.tone.len() as u64;
+        for _ in 0..self.audio_channels {
+            for offset in 0..num_samples as u64 {
+                samples.push(self.tone[((start + offset) % period) as usize]);
+            }
+        }
+        num_samples as u32
+    }
+}
+
+/// Serve a share of the streams until told to stop, then hand them back
+fn run_worker(mut streams: Vec<LoadStream>, stop: Arc<AtomicBool>) -> Vec<LoadStream> {
+    let mut samples = Vec::new();
+    while !stop.load(Ordering::Relaxed) {
+        let mut next = Instant::now() + MAX_IDLE;
+        for stream in streams.iter_mut() {
+            stream.service(&mut samples);
+            next = next.min(stream.next_deadline());
+        }
+        sleep_until(next);
+    }
+    streams
+}
+
+/// Running worker threads
+struct Workers {
+    stop: Arc<AtomicBool>,
+    threads: Vec<JoinHandle<Vec<LoadStream>>>,
+    started: Instant,
+}
+
+/// Publishes many test senders from a shared pool of native threads
+///
+/// Each sender sends an animated (or still) test pattern at its own exact
+/// rate, with optional tone audio in step with the video and metadata at a
+/// fixed rate. Backgrounds are rendered once and shared between senders.
+#[pyclass]
+struct NdiLoadGenerator {
+    names: Vec<String>,
+    source_names: Vec<String>,
+    format: VideoFormat,
+    threads: usize,
+    stats: Vec<Arc<StreamStats>>,
+    // Held here while stopped and by the workers while running
+    streams: Mutex<Vec<LoadStream>>,
+    workers: Mutex<Option<Workers>>,
+    elapsed: Mutex<Duration>,
+}
+
+impl NdiLoadGenerator {
+    fn stop_workers(&self) {
+        let Some(workers) = self.workers.lock().unwrap().take() else {
+            return;
+        };
+        workers.stop.store(true, Ordering::Relaxed);
+        let mut streams: Vec<LoadStream> = workers
+            .threads
+            .into_iter()
+            .flat_map(|thread| thread.join().unwrap_or_default())
+            .collect();
+        streams.sort_by_key(|stream| stream.index);
+        *self.streams.lock().unwrap() = streams;
+        *self.elapsed.lock().unwrap() = workers.started.elapsed();
+    }
+}
+
+impl Drop for NdiLoadGenerator {
+    fn drop(&mut self) {
+        self.stop_workers();
+    }
+}
+
+#[pymethods]
+impl NdiLoadGenerator {
+    /// Create the senders
+    ///
+    /// Args:
+    ///     count: Number of senders
+    ///     name_template: Sender names, with "{index}" replaced by the
+    ///         sender's number (default: "Load {index}")
+    ///     width: Frame width (default: 1280)
+    ///     height: Frame height (default: 720)
+    ///     four_cc: Pixel format, "UYVY", "BGRA", "BGRX", "RGBA" or "RGBX"
+    ///         (default: "UYVY")
+    ///     fps_n: Framerate numerator (default: 30)
+    ///     fps_d: Framerate denominator (default: 1)
+    ///     pattern: "bars", "ramp", "zoneplate" or "black" (default: "bars")
+    ///     animate: Render a moving box and frame counter into every frame;
+    ///         otherwise one still frame is sent over and over (default: True)
+    ///     audio_channels: Channels of 1 kHz tone sent with every video
+    ///         frame, 0 for none (default: 0)
+    ///     sample_rate: Audio sample rate (default: 48000)
+    ///     metadata_rate: Metadata frames per second per sender, 0 for none
+    ///         (default: 0)
+    ///     backend: Transport, "ndi" or "loopback" (default: the
+    ///         NDIRUST_BACKEND environment variable, or "ndi")
+    ///     threads: Worker threads (default: one per CPU, at most one per
+    ///         sender)
+    ///     first_index: Number of the first sender (default: 1)
+    #[new]
+    #[pyo3(signature = (
+        count,
+        name_template = "Load {index}",
+        width = 1280,
+        height = 720,
+        four_cc = "UYVY",
+        fps_n = 30,
+        fps_d = 1,
+        pattern = "bars",
+        animate = true,
+        audio_channels = 0,
+        sample_rate = 48000,
+        metadata_rate = 0.0,
+        backend = None,
+        threads = None,
+        first_index = 1
+    ))]
+    fn new(
+        count: usize,
+        name_template: &str,
+        width: u32,
+        height: u32,
+        four_cc: &str,
+        fps_n: u32,
+        fps_d: u32,
+        pattern: &str,
+        animate: bool,
+        audio_channels: u32,
+        sample_rate: u32,
+        metadata_rate: f64,
+        backend: Option<&str>,
+        threads: Option<usize>,
+        first_index: usize,
+        py: Python<'_>,
+    ) -> PyResult<Self> {
+        if count == 0 {
+            return Err(PyValueError::new_err("count must be positive"));
+        }
+        if count > 1 && !name_template.contains("{index}") {
+            return Err(PyValueError::new_err("name_template must contain {index} for more than one sender"));
+        }
+        if fps_n == 0 || fps_d == 0 {
+            return Err(PyValueError::new_err("fps_n and fps_d must be positive"));
+        }
+        if audio_channels > 0 && sample_rate == 0 {
+            return Err(PyValueError::new_err("sample_rate must be positive"));
+        }
+        if !(metadata_rate >= 0.0) {
+            return Err(PyValueError::new_err("metadata_rate must not be negative"));
+        }
+        let kind = PatternKind::from_name(pattern).map_err(PyValueError::new_err)?;
+        let four_cc = four_cc_from_name(four_cc)
+            .ok_or_else(|| PyValueError::new_err(format!("Unknown FourCC format: {}", four_cc)))?;
+        let backend = Backend::resolve(backend)?;
+        let format = VideoFormat::new(width, height, four_cc, fps_n, fps_d);
+
+        let threads = threads
+            .unwrap_or_else(|| std::thread::available_parallelism().map_or(1, |cpus| cpus.get()))
+            .clamp(1, count);
+        let tone: Arc<Vec<f32>> = Arc::new(
+            (0..sample_rate.max(1))
+                .map(|i| (TONE_LEVEL * (2.0 * std::f64::consts::PI * TONE_HZ * i as f64 / sample_rate as f64).sin()) as f32)
+                .collect(),
+        );
+        let still = if animate {
+            None
+        } else {
+            let mut generator =
+                PatternGenerator::new(kind, width, height, four_cc, fps_n, fps_d, false, false).map_err(PyValueError::new_err)?;
+            Some(Arc::new(generator.render(0).to_vec()))
+        };
+
+        let metadata_rate_n = if metadata_rate > 0.0 { ((metadata_rate * 1000.0).round() as u32).max(1) } else { 0 };
+        let names: Vec<String> = (first_index..first_index + count)
+            .map(|index| name_template.replace("{index}", &index.to_string()))
+            .collect();
+        let streams = py.allow_threads(|| {
+            names
+                .iter()
+                .enumerate()
+                .map(|(index, name)| {
+                    let frames = match &still {
+                        Some(frame) => Frames::Still(frame.clone()),
+                        None => Frames::Animated(
+                            PatternGenerator::new(kind, width, height, four_cc, fps_n, fps_d, true, true)
+                                .map_err(PyValueError::new_err)?,
+                        ),
+                    };
+                    Ok(LoadStream {
+                        index,
+                        sender: SendBackend::create(name, backend, false, false)?,
+                        format,
+                        frames,
+                        video: Pacer::new(fps_n, fps_d),
+                        audio_channels,
+                        sample_rate,
+                        tone: tone.clone(),
+                        metadata_rate_n,
+                        metadata: None,
+                        stats: Arc::new(StreamStats::default()),
+                    })
+                })
+                .collect::<PyResult<Vec<LoadStream>>>()
+        })?;
+
+        Ok(NdiLoadGenerator {
+            source_names: streams
+                .iter()
+                .zip(&names)
+                .map(|(stream, name)| stream.sender.source_name().unwrap_or(name).to_string())
+                .collect(),
+            names,
+            format,
+            threads,
+            stats: streams.iter().map(|stream| stream.stats.clone()).collect(),
+            streams: Mutex::new(streams),
+            workers: Mutex::new(None),
+            elapsed: Mutex::new(Duration::ZERO),
+        })
+    }
+
+    /// Start sending; counters restart from zero
+    fn start(&self) -> PyResult<()> {
+        let mut workers = self.workers.lock().unwrap();
+        if workers.is_some() {
+            return Err(PyRuntimeError::new_err("Load generator is already running"));
+        }
+        let mut streams = std::mem::take(&mut *self.streams.lock().unwrap());
+        if streams.is_empty() {
+            return Err(PyRuntimeError::new_err("Load generator has been closed"));
+        }
+
+        // Deal the streams out so each thread has senders spread over the
+        // whole list, and start them all on the same schedule
+        let mut shares: Vec<Vec<LoadStream>> = (0..self.threads).map(|_| Vec::new()).collect();
+        for (index, mut stream) in streams.drain(..).enumerate() {
+            stream.stats.reset();
+            stream.restart();
+            shares[index % self.threads].push(stream);
+        }
+
+        let stop = Arc::new(AtomicBool::new(false));
+        let threads = shares
+            .into_iter()
+            .enumerate()
+            .map(|(index, share)| {
+                let stop = stop.clone();
+                std::thread::Builder::new()
+                    .name(format!("ndirust-loadgen-{}", index))
+                    .spawn(move || run_worker(share, stop))
+                    .expect("failed to spawn load generator thread")
+            })
+            .collect();
+        *workers = Some(Workers { stop, threads, started: Instant::now() });
+        Ok(())
+    }
+
+    /// Stop sending; the senders stay published until close()
+    fn stop(&self, py: Python<'_>) {
+        py.allow_threads(|| self.stop_workers());
+    }
+
+    /// Stop and remove the senders
+    fn close(&self, py: Python<'_>) {
+        py.allow_threads(|| {
+            self.stop_workers();
+            self.streams.lock().unwrap().clear();
+        });
+    }
+
+    /// Whether the senders are sending
+    #[getter]
+    fn get_is_running(&self) -> bool {
+        self.workers.lock().unwrap().is_some()
+    }
+
+    /// Names of the senders
+    #[getter]
+    fn get_names(&self) -> Vec<String> {
+        self.names.clone()
+    }
+
+    /// Names receivers connect to
+    #[getter]
+    fn get_source_names(&self) -> Vec<String> {
+        self.source_names.clone()
+    }
+
+    /// Number of worker threads
+    #[getter]
+    fn get_threads(&self) -> usize {
+        self.threads
+    }
+
+    /// Seconds since start(), or the length of the last run once stopped
+    #[getter]
+    fn get_elapsed(&self) -> f64 {
+        match self.workers.lock().unwrap().as_ref() {
+            Some(workers) => workers.started.elapsed().as_secs_f64(),
+            None => self.elapsed.lock().unwrap().as_secs_f64(),
+        }
+    }
+
+    /// Statistics of each sender since start(): name, video_frames,
+    /// audio_frames, metadata_frames, late, dropped, errors, target_fps and
+    /// actual_fps
+    #[getter]
+    fn get_stats(&self, py: Python<'_>) -> PyResult<Py<PyList>> {
+        let elapsed = self.get_elapsed();
+        let target_fps = self.format.frame_rate_n as f64 / self.format.frame_rate_d as f64;
+        let list = PyList::empty(py);
+        for (name, stats) in self.names.iter().zip(&self.stats) {
+            let video_frames = stats.video_frames.load(Ordering::Relaxed);
+            let entry = PyDict::new(py);
+            entry.set_item("name", name)?;
+            entry.set_item("video_frames", video_frames)?;
+            entry.set_item("audio_frames", stats.audio_frames.load(Ordering::Relaxed))?;
+            entry.set_item("metadata_frames", stats.metadata_frames.load(Ordering::Relaxed))?;
+            entry.set_item("late", stats.late.load(Ordering::Relaxed))?;
+            entry.set_item("dropped", stats.dropped.load(Ordering::Relaxed))?;
+            entry.set_item("errors", stats.errors.load(Ordering::Relaxed))?;
+            entry.set_item("target_fps", target_fps)?;
+            entry.set_item("actual_fps", if elapsed > 0.0 { video_frames as f64 / elapsed } else { 0.0 })?;
+            list.append(entry)?;
+        }
+        Ok(list.into())
+    }
+
+    fn __len__(&self) -> usize {
+        self.names.len()
+    }
+
+    fn __repr__(&self) -> String {
+        format!(
+            "NdiLoadGenerator({} senders, {}x{} @ {}/{}, {} threads)",
+            self.names.len(),
+            self.format.width,
+            self.format.height,
+            self.format.frame_rate_n,
+            self.format.frame_rate_d,
+            self.threads
+        )
+    }
+}
+
+/// Register load generator classes
+pub fn register_loadgen_functions(m: &PyModule) -> PyResult<()> {
+    m.add_class::<NdiLoadGenerator>()?;
+
+    Ok(())
+}
@@ -0,0 +1,176 @@
+// src/loopback.rs
+//
+// In-process transport used by the "loopback" backend. Senders publish their
+// frames into a process-wide registry, finders list the registry and receivers
+// subscribe to a source's frames. Nothing here touches the NDI SDK or the
+// network, which makes it suitable for CI machines and load simulation.
+
+use crate::frame::CapturedFrame;
+use std::collections::{HashMap, VecDeque};
+use std::sync::{Arc, Condvar, Mutex, OnceLock, Weak};
+use std::time::{Duration, Instant};
+
+/// Number of frames a loopback receiver queues before dropping the oldest
+pub const DEFAULT_QUEUE_DEPTH: usize = 8;
+
+/// Process-wide map of full source names to published sources
+fn registry() -> &'static Mutex<HashMap<String, Weak<LoopbackSource>>> {
+    static REGISTRY: OnceLock<Mutex<HashMap<String, Weak<LoopbackSource>>>> = OnceLock::new();
+    REGISTRY.get_or_init(|| Mutex::new(HashMap::new()))
+}
+
+/// Build the full source name, following the NDI "MACHINE (name)" convention
+pub fn full_source_name(name: &str) -> String {
+    format!("LOOPBACK ({})", name)
+}
+
+/// List the full names of all published loopback sources
+pub fn source_names() -> Vec<String> {
+    let sources = registry().lock().unwrap();
+    let mut names: Vec<String> = sources
+        .iter()
+        .filter(|(_, source)| source.strong_count() > 0)
+        .map(|(name, _)| name.clone())
+        .collect();
+    names.sort();
+    names
+}
+
+/// Subscribe to a published source by its full name
+pub fn connect(full_name: &str, depth: usize) -> Option<Arc<LoopbackQueue>> {
+    let source = registry().lock().unwrap().get(full_name)?.upgrade()?;
+    Some(source.subscribe(depth))
+}
+
+/// A source published by a loopback sender
+pub struct LoopbackSource {
+    full_name: String,
+    subscribers: Mutex<Vec<Weak<LoopbackQueue>>>,
+    connected: Condvar,
+}
+
+impl LoopbackSource {
+    /// Publish a new source under the given sender name
+    pub fn publish(name: &str) -> Result<Arc<Self>, String> {
+        let full_name = full_source_name(name);
+        let mut sources = registry().lock().unwrap();
+
+        if let Some(existing) = sources.get(&full_name) {
+            if existing.strong_count() > 0 {
+                return Err(format!("A loopback source named '{}' already exists", full_name));
+            }
+        }
+
+        let source = Arc::new(LoopbackSource {
+            full_name: full_name.clone(),
+            subscribers: Mutex::new(Vec::new()),
+            connected: Condvar::new(),
+        });
+        sources.insert(full_name, Arc::downgrade(&source));
+
+        Ok(source)
+    }
+
+    /// Full name under which receivers can find this source
+    pub fn full_name(&self) -> &str {
+        &self.full_name
+    }
+
+    /// Deliver a frame to every connected receiver
+    ///
+    /// Frame payloads are reference counted, so this does not copy pixel or
+    /// sample data no matter how many receivers are connected.
+    pub fn send(&self, frame: CapturedFrame) {
+        let mut subscribers = self.subscribers.lock().unwrap();
+        subscribers.retain(|subscriber| match subscriber.upgrade() {
+            Some(queue) => {
+                queue.push(frame.clone());
+                true
+            }
+            None => false,
+        });
+    }
+
+    /// Number of receivers currently connected to this source
+    pub fn connection_count(&self) -> usize {
+        let subscribers = self.subscribers.lock().unwrap();
+        subscribers.iter().filter(|subscriber| subscriber.strong_count() > 0).count()
+    }
+
+    /// Wait up to `timeout` for at least one receiver to connect
+    pub fn wait_for_connections(&self, timeout: Duration) -> usize {
+        let deadline = Instant::now() + timeout;
+        let mut subscribers = self.subscribers.lock().unwrap();
+
+        loop {
+            let count = subscribers.iter().filter(|subscriber| subscriber.strong_count() > 0).count();
+            let now = Instant::now();
+            if count > 0 || now >= deadline {
+                return count;
+            }
+
+            subscribers = self.connected.wait_timeout(subscribers, deadline - now).unwrap().0;
+        }
+    }
+
+    fn subscribe(&self, depth: usize) -> Arc<LoopbackQueue> {
+        let queue = Arc::new(LoopbackQueue {
+            frames: Mutex::new(VecDeque::with_capacity(depth)),
+            available: Condvar::new(),
+            depth: depth.max(1),
+        });
+        self.subscribers.lock().unwrap().push(Arc::downgrade(&queue));
+        self.connected.notify_all();
+        queue
+    }
+}
+
+impl Drop for LoopbackSource {
+    fn drop(&mut self) {
+        let mut sources = registry().lock().unwrap();
+        // Only remove the entry if it has not been taken over by a new source
+        if let Some(existing) = sources.get(&self.full_name) {
+            if existing.strong_count() == 0 {
+                sources.remove(&self.full_name);
+            }
+        }
+    }
+}
+
+/// Bounded frame queue owned by a loopback receiver
+pub struct LoopbackQueue {
+    frames: Mutex<VecDeque<CapturedFrame>>,
+    available: Condvar,
+    depth: usize,
+}
+
+impl LoopbackQueue {
+    fn push(&self, frame: CapturedFrame) {
+        let mut frames = self.frames.lock().unwrap();
+        // Like the NDI SDK, drop the oldest frame rather than block the sender
+        if frames.len() >= self.depth {
+            frames.pop_front();
+        }
+        frames.push_back(frame);
+        self.available.notify_one();
+    }
+
+    /// Wait up to `timeout` for the next frame
+    pub fn pop(&self, timeout: Duration) -> CapturedFrame {
+        let deadline = Instant::now() + timeout;
+        let mut frames = self.frames.lock().unwrap();
+
+        loop {
+            if let Some(frame) = frames.pop_front() {
+                return frame;
+            }
+
+            let now = Instant::now();
+            if now >= deadline {
+                return CapturedFrame::None;
+            }
+
+            frames = self.available.wait_timeout(frames, deadline - now).unwrap().0;
+        }
+    }
+}
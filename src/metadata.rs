@@ -0,0 +1,261 @@
+// src/metadata.rs
+//
+// Native handling of metadata frames: XML parsing into Python dicts, and
+// filtering by root element name so unwanted frames are discarded before
+// any Python object is created.
+
+use pyo3::prelude::*;
+use pyo3::exceptions::PyValueError;
+use pyo3::types::{PyDict, PyList};
+use quick_xml::events::{BytesStart, Event};
+use quick_xml::reader::Reader;
+use std::collections::HashSet;
+
+/// An XML element of a metadata frame
+#[derive(Clone, Debug, Default, PartialEq)]
+pub struct XmlElement {
+    pub tag: String,
+    pub attributes: Vec<(String, String)>,
+    pub text: String,
+    pub children: Vec<XmlElement>,
+}
+
+impl XmlElement {
+    fn from_start(start: &BytesStart) -> Result<Self, String> {
+        let mut element = XmlElement {
+            tag: String::from_utf8_lossy(start.name().as_ref()).into_owned(),
+            ..Default::default()
+        };
+        for attribute in start.attributes() {
+            let attribute = attribute.map_err(|error| error.to_string())?;
+            let value = attribute.unescape_value().map_err(|error| error.to_string())?;
+            element
+                .attributes
+                .push((String::from_utf8_lossy(attribute.key.as_ref()).into_owned(), value.into_owned()));
+        }
+        Ok(element)
+    }
+
+    /// Convert to {"tag": str, "attributes": dict, "text": str, "children": list}
+    pub fn to_dict<'py>(&self, py: Python<'py>) -> PyResult<&'py PyDict> {
+        let element = PyDict::new(py);
+        element.set_item("tag", &self.tag)?;
+        element.set_item("attributes", self.attributes_dict(py)?)?;
+        element.set_item("text", &self.text)?;
+        let children = PyList::empty(py);
+        for child in &self.children {
+            children.append(child.to_dict(py)?)?;
+        }
+        element.set_item("children", children)?;
+        Ok(element)
+    }
+
+    /// Attributes as a dict of strings
+    pub fn attributes_dict<'py>(&self, py: Python<'py>) -> PyResult<&'py PyDict> {
+        let attributes = PyDict::new(py);
+        for (name, value) in &self.attributes {
+            attributes.set_item(name, value)?;
+        }
+        Ok(attributes)
+    }
+}
+
+/// Parse the top-level elements of a metadata frame
+pub fn parse_xml(xml: &str) -> Result<Vec<XmlElement>, String> {
+    let mut reader = Reader::from_str(xml);
+    reader.config_mut().trim_text(true);
+
+    let mut roots = Vec::new();
+    // Elements whose end tag has not been read yet
+    let mut open: Vec<XmlElement> = Vec::new();
+    let mut close = |element: XmlElement, open: &mut Vec<XmlElement>| match open.last_mut() {
+        Some(parent) => parent.children.push(element),
+        None => roots.push(element),
+    };
+
+    loop {
+        match reader.read_event().map_err(|error| error.to_string())? {
+            Event::Start(start) => open.push(XmlElement::from_start(&start)?),
+            Event::Empty(start) => close(XmlElement::from_start(&start)?, &mut open),
+            Event::End(_) => {
+                if let Some(element) = open.pop() {
+                    close(element, &mut open);
+                }
+            },
+            Event::Text(text) => {
+                if let Some(element) = open.last_mut() {
+                    element.text.push_str(&text.unescape().map_err(|error| error.to_string())?);
+                }
+            },
+            Event::CData(data) => {
+                if let Some(element) = open.last_mut() {
+                    element.text.push_str(&String::from_utf8_lossy(&data.into_inner()));
+                }
+            },
+            Event::Eof => break,
+            _ => {},
+        }
+    }
+
+    if let Some(element) = open.last() {
+        return Err(format!("Unclosed element <{}>", element.tag));
+    }
+    Ok(roots)
+}
+
+/// Name of the first element of a metadata frame, without parsing the rest
+///
+/// Skips an XML declaration, comments and processing instructions.
+pub fn root_tag(xml: &str) -> Option<&str> {
+    let mut rest = xml;
+    loop {
+        rest = &rest[rest.find('<')?..];
+        if rest.starts_with("<!--") {
+            rest = &rest[rest.find("-->")? + 3..];
+        } else if rest.starts_with("<?") || rest.starts_with("<!") {
+            rest = &rest[rest.find('>')? + 1..];
+        } else {
+            let name = &rest[1..];
+            let end = name.find(|c: char| c.is_whitespace() || c == '/' || c == '>').unwrap_or(name.len());
+            return if end > 0 { Some(&name[..end]) } else { None };
+        }
+    }
+}
+
+/// Which metadata frames a receiver keeps, by root element name
+#[derive(Clone, Debug, Default)]
+pub struct MetadataFilter {
+    names: HashSet<String>,
+    exclude: bool,
+}
+
+impl MetadataFilter {
+    /// Keep only the named elements, or with `exclude` all but them
+    pub fn new(names: impl IntoIterator<Item = String>, exclude: bool) -> Self {
+        MetadataFilter {
+            names: names.into_iter().collect(),
+            exclude,
+        }
+    }
+
+    /// Whether a metadata frame passes the filter
+    ///
+    /// Frames without a recognisable element only pass an exclude filter.
+    pub fn accepts(&self, xml: &str) -> bool {
+        match root_tag(xml) {
+            Some(tag) => self.names.contains(tag) != self.exclude,
+            None => self.exclude,
+        }
+    }
+
+    /// Names in the filter, sorted
+    pub fn names(&self) -> Vec<String> {
+        let mut names: Vec<String> = self.names.iter().cloned().collect();
+        names.sort();
+        names
+    }
+
+    /// Whether the filter drops the named elements rather than keeping them
+    pub fn is_exclude(&self) -> bool {
+        self.exclude
+    }
+}
+
+/// Parse a metadata frame's XML in the native layer
+///
+/// Args:
+///     xml: The metadata XML
+///
+/// Returns:
+///     List of the top-level elements, each a dict with "tag", "attributes"
+///     (dict of strings), "text" and "children" (list of elements)
+#[pyfunction]
+pub fn parse_metadata(xml: &str, py: Python<'_>) -> PyResult<Py<PyList>> {
+    let roots = py.allow_threads(|| parse_xml(xml)).map_err(PyValueError::new_err)?;
+    let elements = PyList::empty(py);
+    for root in &roots {
+        elements.append(root.to_dict(py)?)?;
+    }
+    Ok(elements.into())
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn element(tag: &str, attributes: &[(&str, &str)], text: &str, children: Vec<XmlElement>) -> XmlElement {
+        XmlElement {
+            tag: tag.to_string(),
+            attributes: attributes.iter().map(|(name, value)| (name.to_string(), value.to_string())).collect(),
+            text: text.to_string(),
+            children,
+        }
+    }
+
+    #[test]
+    fn parses_nested_elements() {
+        let xml = r#"<?xml version="1.0"?>
+            <ndi_tally program="true" preview="false"/>
+            <camera id="1">
+                <zoom level="0.5">wide</zoom>
+                <name>Cam &amp; Co</name>
+                <note><![CDATA[<raw>]]></note>
+            </camera>"#;
+        assert_eq!(
+            parse_xml(xml).unwrap(),
+            vec![
+                element("ndi_tally", &[("program", "true"), ("preview", "false")], "", vec![]),
+                element(
+                    "camera",
+                    &[("id", "1")],
+                    "",
+                    vec![
+                        element("zoom", &[("level", "0.5")], "wide", vec![]),
+                        element("name", &[], "Cam & Co", vec![]),
+                        element("note", &[], "<raw>", vec![]),
+                    ]
+                ),
+            ]
+        );
+    }
+
+    #[test]
+    fn empty_input_has_no_elements() {
+        assert_eq!(parse_xml("").unwrap(), vec![]);
+        assert_eq!(parse_xml("  <!-- only a comment -->  ").unwrap(), vec![]);
+    }
+
+    #[test]
+    fn rejects_malformed_xml() {
+        assert_eq!(parse_xml("<a><b></b>").unwrap_err(), "Unclosed element <a>");
+        assert!(parse_xml("<a></b>").is_err());
+        assert!(parse_xml(r#"<a x="1" x="2"/>"#).is_err());
+    }
+
+    #[test]
+    fn finds_the_root_tag() {
+        assert_eq!(root_tag("<ndi_tally program=\"true\"/>"), Some("ndi_tally"));
+        assert_eq!(root_tag("<?xml version=\"1.0\"?><!-- c > d --><camera>x</camera>"), Some("camera"));
+        assert_eq!(root_tag("<!DOCTYPE x><ptz/>"), Some("ptz"));
+        assert_eq!(root_tag("<clip>"), Some("clip"));
+        assert_eq!(root_tag(""), None);
+        assert_eq!(root_tag("plain text"), None);
+        assert_eq!(root_tag("<>"), None);
+        assert_eq!(root_tag("<!-- unterminated"), None);
+    }
+
+    #[test]
+    fn filters_by_root_tag() {
+        let keep = MetadataFilter::new(["ndi_tally".to_string(), "ptz".to_string()], false);
+        assert!(keep.accepts("<ndi_tally/>"));
+        assert!(!keep.accepts("<camera/>"));
+        assert!(!keep.accepts("not xml"));
+        assert_eq!(keep.names(), vec!["ndi_tally".to_string(), "ptz".to_string()]);
+
+        let drop = MetadataFilter::new(["ndi_tally".to_string()], true);
+        assert!(!drop.accepts("<ndi_tally/>"));
+        assert!(drop.accepts("<camera/>"));
+        assert!(drop.accepts("not xml"));
+        assert!(drop.is_exclude());
+    }
+}
@@ -0,0 +1,782 @@
+// src/meters.rs
+//
+// Audio metering on received audio: sample peak, true peak, RMS and EBU R128
+// loudness per channel, computed natively on the receiver's capture thread as
+// frames arrive. Loudness follows ITU-R BS.1770: K-weighting, 400 ms blocks
+// every 100 ms, and gating for the integrated value.
+
+use pyo3::prelude::*;
+use pyo3::exceptions::{PyRuntimeError, PyValueError};
+use pyo3::types::{PyDict, PyList};
+use std::collections::VecDeque;
+use std::f64::consts::PI;
+use std::sync::atomic::{AtomicBool, Ordering};
+use std::sync::{Arc, Condvar, Mutex};
+use std::time::Duration;
+
+use crate::frame::{AudioFrameData, CapturedFrame};
+use crate::receiver::{FrameSink, NdiReceiver, ReceiverCore};
+
+/// Most emitted readings kept before the oldest are dropped
+const MAX_READINGS: usize = 1024;
+
+/// Loudness blocks advance in steps of 100 ms
+const STEPS_PER_SECOND: u32 = 10;
+
+/// Steps in a momentary (400 ms) and a short-term (3 s) window
+const MOMENTARY_STEPS: usize = 4;
+const SHORT_TERM_STEPS: usize = 30;
+
+/// Absolute and relative gates of the integrated loudness
+const ABSOLUTE_GATE: f64 = -70.0;
+const RELATIVE_GATE: f64 = -10.0;
+
+/// Resolution and top of the gating histogram, in LU
+const HISTOGRAM_STEP: f64 = 0.1;
+const HISTOGRAM_TOP: f64 = 10.0;
+
+/// Taps per phase of the 4x true-peak interpolator
+const TRUE_PEAK_TAPS: usize = 12;
+
+/// Loudness in LUFS of a K-weighted mean square
+fn lufs(mean_square: f64) -> f64 {
+    if mean_square > 0.0 { -0.691 + 10.0 * mean_square.log10() } else { f64::NEG_INFINITY }
+}
+
+/// Level in dBFS of a linear amplitude
+fn dbfs(amplitude: f64) -> f64 {
+    if amplitude > 0.0 { 20.0 * amplitude.log10() } else { f64::NEG_INFINITY }
+}
+
+/// Second-order IIR section, transposed direct form II
+#[derive(Clone, Copy)]
+struct Biquad {
+    b: [f64; 3],
+    a: [f64; 2],
+    z: [f64; 2],
+}
+
+impl Biquad {
+    #[inline]
+    fn process(&mut self, x: f64) -> f64 {
+        let y = self.b[0] * x + self.z[0];
+        self.z[0] = self.b[1] * x - self.a[0] * y + self.z[1];
+        self.z[1] = self.b[2] * x - self.a[1] * y;
+        y
+    }
+}
+
+/// K-weighting filter of BS.1770 for a sample rate: a high shelf modelling
+/// the head, then the RLB high-pass
+fn k_weighting(sample_rate: u32) -> [Biquad; 2] {
+    let rate = sample_rate as f64;
+
+    let (f0, gain, q) = (1681.974450955533, 3.999843853973347, 0.7071752369554196);
+    let k = (PI * f0 / rate).tan();
+    let vh = 10f64.powf(gain / 20.0);
+    let vb = vh.powf(0.4996667741545416);
+    let a0 = 1.0 + k / q + k * k;
+    let shelf = Biquad {
+        b: [(vh + vb * k / q + k * k) / a0, 2.0 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0],
+        a: [2.0 * (k * k - 1.0) / a0, (1.0 - k / q + k * k) / a0],
+        z: [0.0; 2],
+    };
+
+    let (f0, q) = (38.13547087602444, 0.5003270373238773);
+    let k = (PI * f0 / rate).tan();
+    let a0 = 1.0 + k / q + k * k;
+    let high_pass = Biquad {
+        b: [1.0, -2.0, 1.0],
+        a: [2.0 * (k * k - 1.0) / a0, (1.0 - k / q + k * k) / a0],
+        z: [0.0; 2],
+    };
+
+    [shelf, high_pass]
+}
+
+/// Coefficients of the three interpolated phases of a 4x oversampler
+///
+/// Hann-windowed sinc, normalised to unity gain, placing samples between the
+/// middle two of the last TRUE_PEAK_TAPS input samples.
+fn true_peak_phases() -> [[f32; TRUE_PEAK_TAPS]; 3] {
+    let half = TRUE_PEAK_TAPS as f64 / 2.0;
+    let mut phases = [[0f32; TRUE_PEAK_TAPS]; 3];
+    for (phase, taps) in phases.iter_mut().enumerate() {
+        let at = half - 1.0 + (phase + 1) as f64 / 4.0;
+        let mut values = [0f64; TRUE_PEAK_TAPS];
+        for (tap, value) in values.iter_mut().enumerate() {
+            let t = at - tap as f64;
+            let sinc = if t == 0.0 { 1.0 } else { (PI * t).sin() / (PI * t) };
+            let window = if t.abs() < half { 0.5 * (1.0 + (PI * t / half).cos()) } else { 0.0 };
+            *value = sinc * window;
+        }
+        let sum: f64 = values.iter().sum();
+        for (tap, value) in taps.iter_mut().zip(values) {
+            *tap = (value / sum) as f32;
+        }
+    }
+    phases
+}
+
+/// Histogram of gating-block energies for the integrated loudness, so
+/// memory stays constant however long a source is metered
+struct GatingHistogram {
+    // Count and summed mean square of blocks per HISTOGRAM_STEP
+    bins: Vec<(u64, f64)>,
+}
+
+impl GatingHistogram {
+    fn new() -> Self {
+        let bins = ((HISTOGRAM_TOP - ABSOLUTE_GATE) / HISTOGRAM_STEP).ceil() as usize;
+        GatingHistogram { bins: vec![(0, 0.0); bins] }
+    }
+
+    fn bin(loudness: f64) -> usize {
+        ((loudness - ABSOLUTE_GATE) / HISTOGRAM_STEP) as usize
+    }
+
+    fn add(&mut self, mean_square: f64) {
+        let loudness = lufs(mean_square);
+        if loudness <= ABSOLUTE_GATE {
+            return;
+        }
+        let bin = Self::bin(loudness).min(self.bins.len() - 1);
+        self.bins[bin].0 += 1;
+        self.bins[bin].1 += mean_square;
+    }
+
+    /// Mean of the blocks in bins from `first` up
+    fn mean_from(&self, first: usize) -> Option<f64> {
+        let (count, sum) = self.bins[first.min(self.bins.len())..]
+            .iter()
+            .fold((0u64, 0.0), |(count, sum), bin| (count + bin.0, sum + bin.1));
+        if count > 0 { Some(sum / count as f64) } else { None }
+    }
+
+    /// Gated loudness of everything added
+    fn integrated(&self) -> f64 {
+        let ungated = match self.mean_from(0) {
+            Some(mean) => mean,
+            None => return f64::NEG_INFINITY,
+        };
+        let gate = lufs(ungated) + RELATIVE_GATE;
+        let first = if gate > ABSOLUTE_GATE { Self::bin(gate) } else { 0 };
+        self.mean_from(first).map_or(f64::NEG_INFINITY, lufs)
+    }
+}
+
+/// Momentary, short-term and integrated loudness of one signal
+struct Loudness {
+    // Mean squares of the latest 100 ms steps
+    steps: VecDeque<f64>,
+    histogram: GatingHistogram,
+}
+
+impl Loudness {
+    fn new() -> Self {
+        Loudness {
+            steps: VecDeque::with_capacity(SHORT_TERM_STEPS),
+            histogram: GatingHistogram::new(),
+        }
+    }
+
+    fn push_step(&mut self, mean_square: f64) {
+        if self.steps.len() == SHORT_TERM_STEPS {
+            self.steps.pop_front();
+        }
+        self.steps.push_back(mean_square);
+        if self.steps.len() >= MOMENTARY_STEPS {
+            self.histogram.add(self.window(MOMENTARY_STEPS));
+        }
+    }
+
+    /// Mean square over the latest `steps` steps
+    fn window(&self, steps: usize) -> f64 {
+        self.steps.iter().rev().take(steps).sum::<f64>() / steps as f64
+    }
+
+    fn momentary(&self) -> f64 {
+        if self.steps.len() < MOMENTARY_STEPS { f64::NEG_INFINITY } else { lufs(self.window(MOMENTARY_STEPS)) }
+    }
+
+    fn short_term(&self) -> f64 {
+        if self.steps.len() < SHORT_TERM_STEPS { f64::NEG_INFINITY } else { lufs(self.window(SHORT_TERM_STEPS)) }
+    }
+}
+
+/// Peak and RMS accumulated over a reading interval
+#[derive(Clone, Copy, Default)]
+struct Interval {
+    peak: f32,
+    true_peak: f32,
+    sum_squares: f64,
+    samples: u64,
+}
+
+/// Metering state of one channel
+struct ChannelMeter {
+    filters: [Biquad; 2],
+    // Latest input samples, oldest first, for true-peak interpolation
+    history: [f32; TRUE_PEAK_TAPS],
+    // K-weighted sum of squares of the current 100 ms step
+    step_energy: f64,
+    loudness: Loudness,
+    max_true_peak: f32,
+    polled: Interval,
+    emitted: Interval,
+}
+
+impl ChannelMeter {
+    fn new(sample_rate: u32) -> Self {
+        ChannelMeter {
+            filters: k_weighting(sample_rate),
+            history: [0.0; TRUE_PEAK_TAPS],
+            step_energy: 0.0,
+            loudness: Loudness::new(),
+            max_true_peak: 0.0,
+            polled: Interval::default(),
+            emitted: Interval::default(),
+        }
+    }
+
+    /// Meter a run of samples, all within one loudness step
+    fn process(&mut self, samples: &[f32], phases: Option<&[[f32; TRUE_PEAK_TAPS]; 3]>) {
+        let (mut peak, mut true_peak, mut sum_squares, mut energy) = (0f32, 0f32, 0f64, 0f64);
+        for &sample in samples {
+            let magnitude = sample.abs();
+            peak = peak.max(magnitude);
+            sum_squares += sample as f64 * sample as f64;
+
+            let shelved = self.filters[0].process(sample as f64);
+            let weighted = self.filters[1].process(shelved);
+            energy += weighted * weighted;
+
+            if let Some(phases) = phases {
+                self.history.copy_within(1.., 0);
+                self.history[TRUE_PEAK_TAPS - 1] = sample;
+                for taps in phases {
+                    let value: f32 = taps.iter().zip(&self.history).map(|(tap, x)| tap * x).sum();
+                    true_peak = true_peak.max(value.abs());
+                }
+            }
+        }
+        let true_peak = true_peak.max(peak);
+
+        self.step_energy += energy;
+        self.max_true_peak = self.max_true_peak.max(true_peak);
+        for interval in [&mut self.polled, &mut self.emitted] {
+            interval.peak = interval.peak.max(peak);
+            interval.true_peak = interval.true_peak.max(true_peak);
+            interval.sum_squares += sum_squares;
+            interval.samples += samples.len() as u64;
+        }
+    }
+}
+
+/// Levels of every channel at one moment
+struct MeterReading {
+    timecode: i64,
+    sample_rate: u32,
+    peak: Vec<f64>,
+    true_peak: Vec<f64>,
+    rms: Vec<f64>,
+    max_true_peak: Vec<f64>,
+    momentary: Vec<f64>,
+    short_term: Vec<f64>,
+    integrated: Vec<f64>,
+    // Loudness of all channels together
+    programme: [f64; 3],
+}
+
+impl MeterReading {
+    fn to_dict<'py>(&self, py: Python<'py>) -> PyResult<&'py PyDict> {
+        let reading = PyDict::new(py);
+        reading.set_item("timecode", self.timecode)?;
+        reading.set_item("sample_rate", self.sample_rate)?;
+        reading.set_item("peak", PyList::new(py, &self.peak))?;
+        reading.set_item("true_peak", PyList::new(py, &self.true_peak))?;
+        reading.set_item("rms", PyList::new(py, &self.rms))?;
+        reading.set_item("max_true_peak", PyList::new(py, &self.max_true_peak))?;
+        reading.set_item("momentary", PyList::new(py, &self.momentary))?;
+        reading.set_item("short_term", PyList::new(py, &self.short_term))?;
+        reading.set_item("integrated", PyList::new(py, &self.integrated))?;
+        let programme = PyDict::new(py);
+        programme.set_item("momentary", self.programme[0])?;
+        programme.set_item("short_term", self.programme[1])?;
+        programme.set_item("integrated", self.programme[2])?;
+        reading.set_item("programme", programme)?;
+        Ok(reading)
+    }
+}
+
+/// Settings of a meter
+struct MeterSettings {
+    // Audio time between emitted readings, if readings are emitted
+    interval_ms: Option<u32>,
+    true_peak: bool,
+    weights: Option<Vec<f64>>,
+}
+
+/// Metering state for the current audio layout
+#[derive(Default)]
+struct MeterState {
+    sample_rate: u32,
+    channels: Vec<ChannelMeter>,
+    programme: Option<Loudness>,
+    // Samples into the current loudness step and emitted interval
+    step_position: u32,
+    interval_position: u64,
+    timecode: i64,
+    readings: VecDeque<MeterReading>,
+    frames: u64,
+    dropped_readings: u64,
+}
+
+impl MeterState {
+    fn step_length(&self) -> u32 {
+        (self.sample_rate / STEPS_PER_SECOND).max(1)
+    }
+
+    fn push(&mut self, audio: &AudioFrameData, settings: &MeterSettings, phases: &[[f32; TRUE_PEAK_TAPS]; 3]) {
+        let samples = audio.num_samples as usize;
+        let channels = audio.num_channels as usize;
+        if samples == 0 || channels == 0 || audio.sample_rate == 0 || audio.data.len() < samples * channels {
+            return;
+        }
+
+        // A new layout starts metering again
+        if audio.sample_rate != self.sample_rate || channels != self.channels.len() {
+            self.sample_rate = audio.sample_rate;
+            self.channels = (0..channels).map(|_| ChannelMeter::new(audio.sample_rate)).collect();
+            self.programme = Some(Loudness::new());
+            self.step_position = 0;
+            self.interval_position = 0;
+        }
+        self.frames += 1;
+        self.timecode = audio.timecode;
+        let phases = if settings.true_peak { Some(phases) } else { None };
+        let interval = settings
+            .interval_ms
+            .map(|interval_ms| (self.sample_rate as u64 * interval_ms as u64 / 1000).max(1));
+
+        // Meter in runs that end at step and interval boundaries
+        let mut start = 0;
+        while start < samples {
+            let mut end = samples.min(start + (self.step_length() - self.step_position) as usize);
+            if let Some(interval) = interval {
+                end = end.min(start + (interval - self.interval_position) as usize);
+            }
+            for (channel, meter) in self.channels.iter_mut().enumerate() {
+                let plane = &audio.data[channel * samples..(channel + 1) * samples];
+                meter.process(&plane[start..end], phases);
+            }
+
+            let run = (end - start) as u32;
+            self.step_position += run;
+            if self.step_position == self.step_length() {
+                self.end_step(settings);
+            }
+            if let Some(interval) = interval {
+                self.interval_position += run as u64;
+                if self.interval_position == interval {
+                    self.interval_position = 0;
+                    let reading = self.reading(true);
+                    if self.readings.len() >= MAX_READINGS {
+                        self.readings.pop_front();
+                        self.dropped_readings += 1;
+                    }
+                    self.readings.push_back(reading);
+                }
+            }
+            start = end;
+        }
+    }
+
+    /// Close a 100 ms step on every channel and on the programme
+    fn end_step(&mut self, settings: &MeterSettings) {
+        let length = self.step_position as f64;
+        self.step_position = 0;
+        let mut programme = 0.0;
+        for (channel, meter) in self.channels.iter_mut().enumerate() {
+            let mean_square = meter.step_energy / length;
+            meter.step_energy = 0.0;
+            meter.loudness.push_step(mean_square);
+            let weight = settings.weights.as_ref().and_then(|weights| weights.get(channel)).copied().unwrap_or(1.0);
+            programme += weight * mean_square;
+        }
+        if let Some(loudness) = &mut self.programme {
+            loudness.push_step(programme);
+        }
+    }
+
+    /// Current levels, restarting the polled or emitted interval
+    fn reading(&mut self, emitted: bool) -> MeterReading {
+        let mut reading = MeterReading {
+            timecode: self.timecode,
+            sample_rate: self.sample_rate,
+            peak: Vec::with_capacity(self.channels.len()),
+            true_peak: Vec::with_capacity(self.channels.len()),
+            rms: Vec::with_capacity(self.channels.len()),
+            max_true_peak: Vec::with_capacity(self.channels.len()),
+            momentary: Vec::with_capacity(self.channels.len()),
+            short_term: Vec::with_capacity(self.channels.len()),
+            integrated: Vec::with_capacity(self.channels.len()),
+            programme: [f64::NEG_INFINITY; 3],
+        };
+        for meter in self.channels.iter_mut() {
+            let interval = std::mem::take(if emitted { &mut meter.emitted } else { &mut meter.polled });
+            let mean_square = if interval.samples > 0 { interval.sum_squares / interval.samples as f64 } else { 0.0 };
+            reading.peak.push(dbfs(interval.peak as f64));
+            reading.true_peak.push(dbfs(interval.true_peak as f64));
+            reading.rms.push(dbfs(mean_square.sqrt()));
+            reading.max_true_peak.push(dbfs(meter.max_true_peak as f64));
+            reading.momentary.push(meter.loudness.momentary());
+            reading.short_term.push(meter.loudness.short_term());
+            reading.integrated.push(meter.loudness.histogram.integrated());
+        }
+        if let Some(loudness) = &self.programme {
+            reading.programme = [loudness.momentary(), loudness.short_term(), loudness.histogram.integrated()];
+        }
+        reading
+    }
+}
+
+/// State shared between a meter and the receiver's capture thread
+struct MeterShared {
+    settings: MeterSettings,
+    phases: [[f32; TRUE_PEAK_TAPS]; 3],
+    state: Mutex<MeterState>,
+    emitted: Condvar,
+}
+
+impl FrameSink for MeterShared {
+    fn on_frame(&self, frame: &CapturedFrame) {
+        if let CapturedFrame::Audio(audio) = frame {
+            let mut state = self.state.lock().unwrap();
+            let readings = state.readings.len();
+            state.push(audio, &self.settings, &self.phases);
+            if state.readings.len() != readings {
+                self.emitted.notify_all();
+            }
+        }
+    }
+}
+
+/// Meters a receiver's audio per channel
+///
+/// Levels are in dBFS (peak, true peak, RMS) and LUFS (loudness), and
+/// -inf for silence or before enough audio has arrived. Peak and RMS cover
+/// the time since the previous reading; loudness uses the BS.1770 windows.
+#[pyclass]
+struct NdiAudioMeter {
+    // Kept so the receiver outlives the meter
+    receiver: Py<NdiReceiver>,
+    core: Arc<ReceiverCore>,
+    shared: Arc<MeterShared>,
+    running: AtomicBool,
+}
+
+impl NdiAudioMeter {
+    fn detach(&self) {
+        let sink: Arc<dyn FrameSink> = self.shared.clone();
+        self.core.remove_sink(&sink);
+        self.core.release_pump();
+    }
+}
+
+impl Drop for NdiAudioMeter {
+    fn drop(&mut self) {
+        if self.running.swap(false, Ordering::AcqRel) {
+            self.detach();
+        }
+    }
+}
+
+#[pymethods]
+impl NdiAudioMeter {
+    /// Create a meter on a receiver
+    ///
+    /// Args:
+    ///     receiver: The NdiReceiver whose audio to meter
+    ///     interval_ms: Emit a reading for get_readings() every interval_ms
+    ///         of audio (default: None, only poll with levels())
+    ///     true_peak: Measure true peak with 4x oversampling; without it the
+    ///         true peak is the sample peak (default: True)
+    ///     weights: Weight of each channel in the programme loudness, such as
+    ///         1.41 for surround channels and 0.0 for LFE (default: 1.0 each)
+    #[new]
+    #[pyo3(signature = (receiver, interval_ms = None, true_peak = true, weights = None))]
+    fn new(
+        receiver: Py<NdiReceiver>,
+        interval_ms: Option<u32>,
+        true_peak: bool,
+        weights: Option<Vec<f64>>,
+        py: Python<'_>,
+    ) -> PyResult<Self> {
+        if interval_ms == Some(0) {
+            return Err(PyValueError::new_err("interval_ms must be positive"));
+        }
+        let core = receiver.borrow(py).core();
+
+        Ok(NdiAudioMeter {
+            receiver,
+            core,
+            shared: Arc::new(MeterShared {
+                settings: MeterSettings { interval_ms, true_peak, weights },
+                phases: true_peak_phases(),
+                state: Mutex::new(MeterState::default()),
+                emitted: Condvar::new(),
+            }),
+            running: AtomicBool::new(false),
+        })
+    }
+
+    /// Start metering the receiver's audio
+    fn start(&self) -> PyResult<()> {
+        if !self.core.is_open() {
+            return Err(PyRuntimeError::new_err("Receiver is not initialized"));
+        }
+        if self.running.swap(true, Ordering::AcqRel) {
+            return Err(PyRuntimeError::new_err("Meter is already running"));
+        }
+
+        self.core.add_sink(self.shared.clone());
+        self.core.retain_pump();
+        Ok(())
+    }
+
+    /// Stop metering; the levels are kept until reset()
+    fn stop(&self, py: Python<'_>) {
+        if self.running.swap(false, Ordering::AcqRel) {
+            py.allow_threads(|| self.detach());
+        }
+        self.shared.emitted.notify_all();
+    }
+
+    /// Current levels
+    ///
+    /// Peak, true peak and RMS cover the audio since the previous call.
+    ///
+    /// Returns:
+    ///     Dict of per-channel lists "peak", "true_peak", "rms",
+    ///     "max_true_peak" (since start or reset), "momentary", "short_term"
+    ///     and "integrated", plus "programme" (dict of the same loudness
+    ///     values over all channels), "timecode" and "sample_rate"
+    fn levels(&self, py: Python<'_>) -> PyResult<Py<PyDict>> {
+        let reading = self.shared.state.lock().unwrap().reading(false);
+        Ok(reading.to_dict(py)?.into())
+    }
+
+    /// Take the readings emitted every interval_ms since the last call
+    ///
+    /// Args:
+    ///     timeout_ms: Time to wait for a reading if there is none (default: 0)
+    ///
+    /// Returns:
+    ///     List of dicts as returned by levels()
+    #[pyo3(signature = (timeout_ms = 0))]
+    fn get_readings(&self, timeout_ms: u64, py: Python<'_>) -> PyResult<Py<PyList>> {
+        if self.shared.settings.interval_ms.is_none() {
+            return Err(PyRuntimeError::new_err("Meter was created without interval_ms"));
+        }
+        let readings: Vec<MeterReading> = py.allow_threads(|| {
+            let state = self.shared.state.lock().unwrap();
+            let mut state = self
+                .shared
+                .emitted
+                .wait_timeout_while(state, Duration::from_millis(timeout_ms), |state| {
+                    state.readings.is_empty() && self.running.load(Ordering::Acquire)
+                })
+                .unwrap()
+                .0;
+            state.readings.drain(..).collect()
+        });
+
+        let list = PyList::empty(py);
+        for reading in &readings {
+            list.append(reading.to_dict(py)?)?;
+        }
+        Ok(list.into())
+    }
+
+    /// Restart all measurements, including integrated loudness
+    fn reset(&self) {
+        *self.shared.state.lock().unwrap() = MeterState::default();
+    }
+
+    /// Whether the meter is attached to the receiver
+    #[getter]
+    fn get_is_running(&self) -> bool {
+        self.running.load(Ordering::Acquire)
+    }
+
+    /// Sample rate being metered, or None before the first frame
+    #[getter]
+    fn get_sample_rate(&self) -> Option<u32> {
+        let state = self.shared.state.lock().unwrap();
+        if state.channels.is_empty() { None } else { Some(state.sample_rate) }
+    }
+
+    /// Number of channels being metered, or None before the first frame
+    #[getter]
+    fn get_channels(&self) -> Option<usize> {
+        let state = self.shared.state.lock().unwrap();
+        if state.channels.is_empty() { None } else { Some(state.channels.len()) }
+    }
+
+    /// The receiver being metered
+    #[getter]
+    fn get_receiver(&self, py: Python<'_>) -> Py<NdiReceiver> {
+        self.receiver.clone_ref(py)
+    }
+
+    /// Meter statistics: frames (audio frames metered), readings (emitted
+    /// readings waiting) and dropped_readings
+    #[getter]
+    fn get_stats(&self, py: Python<'_>) -> PyResult<Py<PyDict>> {
+        let state = self.shared.state.lock().unwrap();
+        let stats = PyDict::new(py);
+        stats.set_item("frames", state.frames)?;
+        stats.set_item("readings", state.readings.len())?;
+        stats.set_item("dropped_readings", state.dropped_readings)?;
+        Ok(stats.into())
+    }
+}
+
+/// Register metering classes
+pub fn register_meter_functions(m: &PyModule) -> PyResult<()> {
+    m.add_class::<NdiAudioMeter>()?;
+
+    Ok(())
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    const RATE: u32 = 48000;
+
+    fn settings(true_peak: bool) -> MeterSettings {
+        MeterSettings { interval_ms: None, true_peak, weights: None }
+    }
+
+    /// Mono frames of a sine, `seconds` long in 100 ms frames
+    fn sine(amplitude: f32, frequency: f64, seconds: f64) -> Vec<AudioFrameData> {
+        let step = (RATE / STEPS_PER_SECOND) as usize;
+        let total = (seconds * RATE as f64) as usize;
+        (0..total / step)
+            .map(|frame| {
+                let samples: Vec<f32> = (frame * step..(frame + 1) * step)
+                    .map(|n| amplitude * (2.0 * PI * frequency * n as f64 / RATE as f64).sin() as f32)
+                    .collect();
+                AudioFrameData {
+                    sample_rate: RATE,
+                    num_channels: 1,
+                    num_samples: step as u32,
+                    timecode: 0,
+                    timestamp: 0,
+                    data: Arc::new(samples),
+                }
+            })
+            .collect()
+    }
+
+    fn meter(frames: &[AudioFrameData], settings: &MeterSettings) -> MeterState {
+        let phases = true_peak_phases();
+        let mut state = MeterState::default();
+        for frame in frames {
+            state.push(frame, settings, &phases);
+        }
+        state
+    }
+
+    #[test]
+    fn sine_reads_its_reference_loudness() {
+        // BS.1770: a 997 Hz sine at 0 dBFS in one channel reads -3.01 LUFS
+        let mut state = meter(&sine(0.1, 997.0, 4.0), &settings(false));
+        let reading = state.reading(false);
+        for loudness in [reading.momentary[0], reading.short_term[0], reading.integrated[0]] {
+            assert!((loudness - -23.01).abs() < 0.05, "read {} LUFS", loudness);
+        }
+        assert!((reading.peak[0] - -20.0).abs() < 0.01);
+        assert!((reading.rms[0] - -23.01).abs() < 0.05);
+    }
+
+    #[test]
+    fn gating_ignores_silence_and_quiet_passages() {
+        let loud = sine(0.1, 997.0, 5.0);
+        let mut frames = loud.clone();
+        // Silence is below the absolute gate
+        frames.extend(sine(0.0, 997.0, 5.0));
+        // 30 dB quieter is below the relative gate
+        frames.extend(sine(0.1 / 31.62, 997.0, 5.0));
+        frames.extend(loud);
+        // Ungated, the quiet passage would pull this down to about -24.8;
+        // only the blocks straddling the changes of level pass the gates
+        let integrated = meter(&frames, &settings(false)).reading(false).integrated[0];
+        assert!((integrated - -23.01).abs() < 0.25, "integrated {} LUFS", integrated);
+    }
+
+    #[test]
+    fn silence_has_no_loudness() {
+        let reading = meter(&sine(0.0, 997.0, 4.0), &settings(true)).reading(false);
+        assert_eq!(reading.peak[0], f64::NEG_INFINITY);
+        assert_eq!(reading.integrated[0], f64::NEG_INFINITY);
+        assert_eq!(reading.programme[2], f64::NEG_INFINITY);
+    }
+
+    #[test]
+    fn true_peak_finds_peaks_between_samples() {
+        // A quarter of the sample rate, sampled 45 degrees off its peaks
+        let step = (RATE / STEPS_PER_SECOND) as usize;
+        let samples: Vec<f32> = (0..step).map(|n| (PI / 2.0 * n as f64 + PI / 4.0).sin() as f32).collect();
+        let frame = AudioFrameData {
+            sample_rate: RATE,
+            num_channels: 1,
+            num_samples: step as u32,
+            timecode: 0,
+            timestamp: 0,
+            data: Arc::new(samples),
+        };
+
+        let reading = meter(std::slice::from_ref(&frame), &settings(true)).reading(false);
+        assert!((reading.peak[0] - -3.01).abs() < 0.01);
+        assert!(reading.true_peak[0] > -0.5 && reading.true_peak[0] < 0.5, "true peak {}", reading.true_peak[0]);
+        assert_eq!(reading.max_true_peak[0], reading.true_peak[0]);
+
+        // Without true peak the sample peak is reported
+        let reading = meter(&[frame], &settings(false)).reading(false);
+        assert_eq!(reading.true_peak[0], reading.peak[0]);
+    }
+
+    #[test]
+    fn emits_readings_at_the_interval() {
+        let settings = MeterSettings { interval_ms: Some(250), true_peak: false, weights: None };
+        let state = meter(&sine(0.5, 997.0, 1.0), &settings);
+        assert_eq!(state.readings.len(), 4);
+        assert_eq!(state.frames, 10);
+    }
+
+    #[test]
+    fn ignores_empty_and_short_frames() {
+        let empty = AudioFrameData {
+            sample_rate: RATE,
+            num_channels: 2,
+            num_samples: 0,
+            timecode: 0,
+            timestamp: 0,
+            data: Arc::new(Vec::new()),
+        };
+        let short = AudioFrameData { num_samples: 10, data: Arc::new(vec![0.5; 10]), ..empty.clone() };
+        let state = meter(&[empty, short], &settings(true));
+        assert_eq!(state.frames, 0);
+        assert!(state.channels.is_empty());
+    }
+
+    #[test]
+    fn levels_of_zero_are_minus_infinity() {
+        assert_eq!(dbfs(0.0), f64::NEG_INFINITY);
+        assert_eq!(lufs(0.0), f64::NEG_INFINITY);
+        assert!((dbfs(0.5) - -6.02).abs() < 0.01);
+    }
+}
@@ -0,0 +1,803 @@
+// src/multiview.rs
+//
+// Multiviewer: tiles the latest frame of several receivers into one mosaic
+// and publishes it at a fixed rate, all on native threads. Tiles that have
+// a new frame are scaled in parallel into their own buffers and copied into
+// the mosaic; unchanged tiles are left as they are. Labels and tally borders
+// are drawn with the test pattern engine's canvas. Sources that cannot be
+// found when the multiviewer is created keep their tile, shown as
+// "NO SIGNAL", while a background thread keeps looking for them.
+
+use pyo3::prelude::*;
+use pyo3::exceptions::{PyRuntimeError, PyTypeError, PyValueError};
+use pyo3::types::{PyDict, PyList};
+use std::sync::atomic::{AtomicBool, AtomicU64, Ordering};
+use std::sync::{Arc, Mutex};
+use std::thread::JoinHandle;
+use std::time::{Duration, Instant};
+
+use crate::backend::Backend;
+use crate::convert::{can_convert, convert_into, YuvMatrix};
+use crate::discovery::FindOptions;
+use crate::frame::{four_cc_from_name, four_cc_name, CapturedFrame, VideoFormat, VideoFrameData, FOURCC_UYVY, TIMECODE_SYNTHESIZE};
+use crate::pacing::Pacer;
+use crate::patterns::{text_size, Canvas, Rect, Rgb};
+use crate::receiver::{Bandwidth, FrameSink, NdiReceiver, ReceiverCore, CONNECT_TIMEOUT};
+use crate::scale::{can_scale, scale_into};
+use crate::sender::SendBackend;
+
+/// Time without frames after which a tile shows "NO SIGNAL"
+const NO_SIGNAL_AFTER: Duration = Duration::from_secs(2);
+
+/// How long each background attempt looks for a source that was offline
+const RECONNECT_WINDOW: Duration = Duration::from_secs(10);
+
+/// Pause between background attempts that failed at once
+const RECONNECT_PAUSE: Duration = Duration::from_secs(1);
+
+/// Colour of the border of a tile without tally
+const IDLE_BORDER: Rgb = Rgb(0.25, 0.25, 0.25);
+
+/// Latest video frame of one receiver
+#[derive(Default)]
+struct TileSink {
+    // Sequence number and frame
+    latest: Mutex<(u64, Option<VideoFrameData>)>,
+}
+
+impl FrameSink for TileSink {
+    fn on_frame(&self, frame: &CapturedFrame) {
+        if let CapturedFrame::Video(video) = frame {
+            // Payloads are reference-counted, so this is not a copy
+            let mut latest = self.latest.lock().unwrap();
+            latest.0 += 1;
+            latest.1 = Some(video.clone());
+        }
+    }
+}
+
+/// Tally state of a tile
+#[derive(Clone, Copy, Debug, PartialEq, Eq)]
+enum Tally {
+    Off,
+    Preview,
+    Program,
+}
+
+impl Tally {
+    fn from_name(name: Option<&str>) -> PyResult<Self> {
+        match name {
+            None | Some("off") => Ok(Tally::Off),
+            Some("preview") => Ok(Tally::Preview),
+            Some("program") => Ok(Tally::Program),
+            Some(other) => Err(PyValueError::new_err(format!(
+                "Unknown tally '{}', expected 'program', 'preview' or None",
+                other
+            ))),
+        }
+    }
+
+    fn name(&self) -> Option<&'static str> {
+        match self {
+            Tally::Off => None,
+            Tally::Preview => Some("preview"),
+            Tally::Program => Some("program"),
+        }
+    }
+}
+
+/// Label and tally of a tile, changed from Python
+#[derive(Clone, Debug)]
+struct TileStyle {
+    label: String,
+    tally: Tally,
+}
+
+/// Styles of all tiles, with a version bumped on every change
+struct Styles {
+    tiles: Vec<TileStyle>,
+    version: u64,
+}
+
+/// Grid geometry of the mosaic
+struct Layout {
+    format: VideoFormat,
+    columns: u32,
+    cell_width: u32,
+    cell_height: u32,
+    border: u32,
+    labels: bool,
+}
+
+impl Layout {
+    fn bytes_per_pixel(&self) -> usize {
+        if self.format.four_cc == FOURCC_UYVY { 2 } else { 4 }
+    }
+
+    fn cell(&self, index: usize) -> Rect {
+        let (column, row) = (index as u32 % self.columns, index as u32 / self.columns);
+        Rect::new(column * self.cell_width, row * self.cell_height, self.cell_width, self.cell_height)
+    }
+
+    /// Area of a cell inside its border
+    fn inner(&self, index: usize) -> Rect {
+        let cell = self.cell(index);
+        let border = self.border.min(cell.w / 4).min(cell.h / 4);
+        Rect::new(cell.x + border, cell.y + border, cell.w - 2 * border, cell.h - 2 * border)
+    }
+
+    /// Largest rectangle of the frame's aspect ratio centred in a tile
+    fn fit(&self, index: usize, width: u32, height: u32) -> Rect {
+        let inner = self.inner(index);
+        let (width, height) = (width.max(1) as u64, height.max(1) as u64);
+        let (mut w, mut h) = (width * inner.h as u64 / height, inner.h as u64);
+        if w > inner.w as u64 {
+            (w, h) = (inner.w as u64, height * inner.w as u64 / width);
+        }
+        let (mut w, h) = ((w as u32).max(2), (h as u32).max(1));
+        let mut x = inner.x + (inner.w.saturating_sub(w)) / 2;
+        if self.format.four_cc == FOURCC_UYVY {
+            // Pictures start and end on whole pixel pairs
+            w &= !1;
+            x &= !1;
+        }
+        Rect::new(x, inner.y + (inner.h.saturating_sub(h)) / 2, w, h)
+    }
+}
+
+/// Compositor state of one tile
+struct Tile {
+    sink: Arc<TileSink>,
+    composed: u64,
+    last_frame: Option<Instant>,
+    // Picture scaled to its place in the mosaic, in the output format
+    picture: Vec<u8>,
+    placed: Option<Rect>,
+    // Set when the picture has changed since it was last copied
+    fresh: bool,
+    // Set while the tile shows "NO SIGNAL"
+    blank: bool,
+    error: Option<String>,
+}
+
+impl Tile {
+    /// Scale and convert a frame into the tile's picture
+    fn render(&mut self, frame: &VideoFrameData, place: Rect, layout: &Layout, scratch: &mut Vec<u8>, matrix: &YuvMatrix) {
+        let output = layout.format.four_cc;
+        let to = VideoFormat::new(place.w, place.h, output, frame.frame_rate_n, frame.frame_rate_d);
+        self.picture.resize(to.data_size(), 0);
+
+        let from = frame.format();
+        let result = if frame.four_cc == output {
+            scale_into(&frame.data, &from, &mut self.picture, &to)
+        } else if can_scale(frame.four_cc) && can_convert(frame.four_cc, output) {
+            // Scale first, so the conversion only touches the tile's pixels
+            let scaled = VideoFormat::new(place.w, place.h, frame.four_cc, frame.frame_rate_n, frame.frame_rate_d);
+            scratch.resize(scaled.data_size(), 0);
+            scale_into(&frame.data, &from, scratch, &scaled)
+                .and_then(|_| convert_into(scratch, &scaled, &mut self.picture, &to, matrix))
+        } else {
+            Err(format!("Cannot show {} frames", four_cc_name(frame.four_cc)))
+        };
+
+        match result {
+            Ok(()) => {
+                self.fresh = true;
+                self.error = None;
+            },
+            Err(error) => self.error = Some(error),
+        }
+    }
+}
+
+/// Counters shared between a multiviewer and its thread
+#[derive(Default)]
+struct MultiviewStats {
+    frames_sent: AtomicU64,
+    tiles_scaled: AtomicU64,
+    late: AtomicU64,
+    dropped: AtomicU64,
+    errors: AtomicU64,
+    // Microseconds spent composing the last frame
+    compose_us: AtomicU64,
+    // Kept as the exception so the compositor thread never needs the GIL
+    last_error: Mutex<Option<PyErr>>,
+}
+
+/// The compositor thread's state
+struct Compositor {
+    layout: Layout,
+    tiles: Vec<Tile>,
+    styles: Arc<Mutex<Styles>>,
+    styles_version: u64,
+    mosaic: Vec<u8>,
+    threads: usize,
+    matrix: YuvMatrix,
+}
+
+impl Compositor {
+    /// Bring the mosaic up to date
+    fn compose(&mut self, stats: &MultiviewStats) {
+        let now = Instant::now();
+        let layout = &self.layout;
+
+        // Take the tiles with a new frame
+        let mut updates: Vec<(&mut Tile, VideoFrameData, Rect)> = Vec::new();
+        for (index, tile) in self.tiles.iter_mut().enumerate() {
+            let latest = tile.sink.latest.lock().unwrap();
+            if latest.0 == tile.composed {
+                continue;
+            }
+            let Some(frame) = latest.1.clone() else { continue };
+            tile.composed = latest.0;
+            drop(latest);
+            tile.last_frame = Some(now);
+            let place = layout.fit(index, frame.width, frame.height);
+            updates.push((tile, frame, place));
+        }
+
+        // Scale them in parallel, each into its own buffer
+        if !updates.is_empty() {
+            stats.tiles_scaled.fetch_add(updates.len() as u64, Ordering::Relaxed);
+            let per_thread = updates.len().div_ceil(self.threads.max(1));
+            let matrix = &self.matrix;
+            std::thread::scope(|scope| {
+                for chunk in updates.chunks_mut(per_thread) {
+                    scope.spawn(move || {
+                        let mut scratch = Vec::new();
+                        for (tile, frame, place) in chunk.iter_mut() {
+                            tile.render(frame, *place, layout, &mut scratch, matrix);
+                        }
+                    });
+                }
+            });
+            for (tile, _, place) in updates {
+                if tile.fresh {
+                    tile.placed = Some(place);
+                }
+            }
+        }
+
+        // Restyling may have shrunk labels, so every cell is redrawn
+        let styles = {
+            let styles = self.styles.lock().unwrap();
+            let restyled = styles.version != self.styles_version;
+            self.styles_version = styles.version;
+            if restyled {
+                for tile in self.tiles.iter_mut() {
+                    tile.fresh = true;
+                }
+            }
+            styles.tiles.clone()
+        };
+
+        let bytes_per_pixel = layout.bytes_per_pixel();
+        let stride = layout.format.line_stride;
+        let (width, height, four_cc) = (layout.format.width, layout.format.height, layout.format.four_cc);
+        for (index, tile) in self.tiles.iter_mut().enumerate() {
+            let style = &styles[index];
+            let cell = layout.cell(index);
+            let inner = layout.inner(index);
+            let signal = tile.last_frame.is_some_and(|at| now.duration_since(at) < NO_SIGNAL_AFTER);
+
+            if !signal {
+                if !tile.blank || tile.fresh {
+                    let mut canvas = Canvas::new(&mut self.mosaic, width, height, stride, four_cc);
+                    canvas.fill_rect(inner, Rgb::BLACK);
+                    let scale = (cell.h / 90).max(1);
+                    let (text_w, text_h) = text_size("NO SIGNAL", scale);
+                    canvas.draw_text(
+                        inner.x + inner.w.saturating_sub(text_w) / 2,
+                        inner.y + inner.h.saturating_sub(text_h) / 2,
+                        scale,
+                        "NO SIGNAL",
+                        Rgb::WHITE,
+                    );
+                    tile.blank = true;
+                    tile.fresh = false;
+                }
+            } else if tile.fresh {
+                if let Some(place) = tile.placed {
+                    if place != inner {
+                        // Clear the letterbox, whose size may have changed
+                        Canvas::new(&mut self.mosaic, width, height, stride, four_cc).fill_rect(inner, Rgb::BLACK);
+                    }
+                    let row_bytes = place.w as usize * bytes_per_pixel;
+                    for row in 0..place.h as usize {
+                        let start = (place.y as usize + row) * stride + place.x as usize * bytes_per_pixel;
+                        self.mosaic[start..start + row_bytes]
+                            .copy_from_slice(&tile.picture[row * row_bytes..(row + 1) * row_bytes]);
+                    }
+                    tile.blank = false;
+                }
+                tile.fresh = false;
+            }
+            if let Some(error) = tile.error.take() {
+                stats.errors.fetch_add(1, Ordering::Relaxed);
+                *stats.last_error.lock().unwrap() = Some(PyValueError::new_err(error));
+            }
+
+            let mut canvas = Canvas::new(&mut self.mosaic, width, height, stride, four_cc);
+            let colour = match style.tally {
+                Tally::Program => Rgb::RED,
+                Tally::Preview => Rgb::GREEN,
+                Tally::Off => IDLE_BORDER,
+            };
+            if inner != cell {
+                canvas.stroke_rect(cell, inner.x - cell.x, colour);
+            }
+            if layout.labels && !style.label.is_empty() {
+                let scale = (cell.h / 120).max(1);
+                let (text_w, text_h) = text_size(&style.label, scale);
+                let margin = 2 * scale;
+                let plate = Rect::new(
+                    inner.x + inner.w.saturating_sub(text_w + 2 * margin) / 2,
+                    inner.y + inner.h.saturating_sub(text_h + 3 * margin),
+                    text_w + 2 * margin,
+                    text_h + 2 * margin,
+                );
+                canvas.fill_rect(plate, Rgb::BLACK);
+                canvas.draw_text(plate.x + margin, plate.y + margin, scale, &style.label, Rgb::WHITE);
+            }
+        }
+    }
+}
+
+/// A running compositor thread; it hands its state back when stopped
+struct CompositorThread {
+    stop: Arc<AtomicBool>,
+    thread: JoinHandle<Compositor>,
+}
+
+/// Keep looking for an offline source on a background thread until it is
+/// connected, the receiver is closed or `stop` is set
+fn reconnect_in_background(
+    core: Arc<ReceiverCore>,
+    name: String,
+    options: FindOptions,
+    stop: Arc<AtomicBool>,
+) -> std::io::Result<()> {
+    std::thread::Builder::new().name("ndirust-multiview-connect".to_string()).spawn(move || {
+        while !stop.load(Ordering::Relaxed) && core.is_open() {
+            let attempt = Instant::now();
+            // A cancelled search returns Ok without connecting
+            if core.connect_within(&name, RECONNECT_WINDOW, &options).is_ok() {
+                return;
+            }
+            std::thread::sleep(RECONNECT_PAUSE.saturating_sub(attempt.elapsed()));
+        }
+    })?;
+    Ok(())
+}
+
+/// Tiles several sources into one NDI output
+///
+/// Each source's latest video frame is scaled into its grid cell natively,
+/// with the tiles that changed scaled in parallel, and the mosaic is sent at
+/// a fixed rate. The GIL is not needed while running.
+#[pyclass]
+struct NdiMultiviewer {
+    output_name: String,
+    receivers: Vec<Py<NdiReceiver>>,
+    cores: Vec<Arc<ReceiverCore>>,
+    sinks: Vec<Arc<TileSink>>,
+    sender: Arc<SendBackend>,
+    styles: Arc<Mutex<Styles>>,
+    stats: Arc<MultiviewStats>,
+    format: VideoFormat,
+    columns: u32,
+    // Held here while stopped and by the thread while running
+    compositor: Mutex<Option<Compositor>>,
+    thread: Mutex<Option<CompositorThread>>,
+    started: Mutex<Option<Instant>>,
+    // Receivers of sources that were offline, and the flag stopping the
+    // threads looking for them
+    reconnecting: Vec<Arc<ReceiverCore>>,
+    reconnect_stop: Arc<AtomicBool>,
+}
+
+impl NdiMultiviewer {
+    fn stop_thread(&self) {
+        let Some(thread) = self.thread.lock().unwrap().take() else {
+            return;
+        };
+        thread.stop.store(true, Ordering::Relaxed);
+        if let Ok(compositor) = thread.thread.join() {
+            *self.compositor.lock().unwrap() = Some(compositor);
+        }
+        for (core, sink) in self.cores.iter().zip(&self.sinks) {
+            let sink: Arc<dyn FrameSink> = sink.clone();
+            core.remove_sink(&sink);
+            core.release_pump();
+        }
+    }
+}
+
+impl Drop for NdiMultiviewer {
+    fn drop(&mut self) {
+        self.stop_thread();
+        self.reconnect_stop.store(true, Ordering::Relaxed);
+        for core in self.reconnecting.iter().filter(|core| core.connected_source().is_none()) {
+            core.cancel_connect();
+        }
+    }
+}
+
+#[pymethods]
+impl NdiMultiviewer {
+    /// Create a multiviewer
+    ///
+    /// Args:
+    ///     sources: NdiReceivers, or source names to receive at proxy
+    ///         bandwidth, one per tile in reading order; a name that cannot
+    ///         be found yet shows "NO SIGNAL" and is looked for in the
+    ///         background until it appears
+    ///     output_name: Name to publish the mosaic under
+    ///     backend: Transport of the output and of receivers created from
+    ///         names, "ndi" or "loopback" (default: the NDIRUST_BACKEND
+    ///         environment variable, or "ndi")
+    ///     width: Mosaic width (default: 1920)
+    ///     height: Mosaic height (default: 1080)
+    ///     four_cc: Mosaic pixel format, "UYVY", "BGRA", "BGRX", "RGBA" or
+    ///         "RGBX" (default: "UYVY")
+    ///     fps_n: Output framerate numerator (default: 30)
+    ///     fps_d: Output framerate denominator (default: 1)
+    ///     columns: Tiles per row (default: the smallest square grid)
+    ///     labels: Tile labels (default: the source names)
+    ///     show_labels: Draw labels (default: True)
+    ///     border: Border width in pixels, drawn in the tally colour
+    ///         (default: 2)
+    ///     threads: Threads scaling tiles (default: one per CPU)
+    ///     start: Start publishing immediately (default: True)
+    ///     groups: Groups to search for sources given by name, as in
+    ///         NdiFinder (default: the groups configured for this machine)
+    ///     extra_ips: Addresses of machines or discovery servers to query
+    ///         directly, as in NdiFinder (default: None)
+    #[new]
+    #[pyo3(signature = (
+        sources,
+        output_name,
+        backend = None,
+        width = 1920,
+        height = 1080,
+        four_cc = "UYVY",
+        fps_n = 30,
+        fps_d = 1,
+        columns = None,
+        labels = None,
+        show_labels = true,
+        border = 2,
+        threads = None,
+        start = true,
+        groups = None,
+        extra_ips = None
+    ))]
+    fn new(
+        sources: &PyList,
+        output_name: &str,
+        backend: Option<&str>,
+        width: u32,
+        height: u32,
+        four_cc: &str,
+        fps_n: u32,
+        fps_d: u32,
+        columns: Option<u32>,
+        labels: Option<Vec<String>>,
+        show_labels: bool,
+        border: u32,
+        threads: Option<usize>,
+        start: bool,
+        groups: Option<&PyAny>,
+        extra_ips: Option<&PyAny>,
+        py: Python<'_>,
+    ) -> PyResult<Self> {
+        if sources.is_empty() {
+            return Err(PyValueError::new_err("At least one source is required"));
+        }
+        if fps_n == 0 || fps_d == 0 {
+            return Err(PyValueError::new_err("fps_n and fps_d must be positive"));
+        }
+        let four_cc = four_cc_from_name(four_cc)
+            .filter(|four_cc| can_scale(*four_cc))
+            .ok_or_else(|| PyValueError::new_err(format!("Unsupported output format: {}", four_cc)))?;
+        let backend = Backend::resolve(backend)?;
+        let find_options = FindOptions::from_py(groups, extra_ips, true)?;
+
+        let count = sources.len() as u32;
+        let columns = columns.unwrap_or_else(|| (count as f64).sqrt().ceil() as u32).clamp(1, count);
+        let rows = count.div_ceil(columns);
+        let uyvy = four_cc == FOURCC_UYVY;
+        let cell_width = if uyvy { (width / columns) & !1 } else { width / columns };
+        let cell_height = height / rows;
+        if cell_width < 8 || cell_height < 8 {
+            return Err(PyValueError::new_err("The mosaic is too small for this many tiles"));
+        }
+        if let Some(labels) = &labels {
+            if labels.len() != sources.len() {
+                return Err(PyValueError::new_err("labels must have one entry per source"));
+            }
+        }
+
+        // Names are connected concurrently, at proxy bandwidth
+        let mut receivers: Vec<Option<Py<NdiReceiver>>> = Vec::new();
+        let mut names: Vec<Option<String>> = Vec::new();
+        for item in sources.iter() {
+            if let Ok(receiver) = item.extract::<Py<NdiReceiver>>() {
+                receivers.push(Some(receiver));
+                names.push(None);
+            } else if let Ok(name) = item.extract::<String>() {
+                receivers.push(None);
+                names.push(Some(name));
+            } else {
+                return Err(PyTypeError::new_err("sources must be NdiReceivers or source names"));
+            }
+        }
+        // A source that is not found keeps an unconnected receiver
+        let opened: Vec<Option<PyResult<(ReceiverCore, bool)>>> = py.allow_threads(|| {
+            std::thread::scope(|scope| {
+                let handles: Vec<_> = names
+                    .iter()
+                    .map(|name| {
+                        name.as_ref().map(|name| {
+                            let find_options = &find_options;
+                            scope.spawn(move || {
+                                let core = ReceiverCore::open_with_bandwidth(backend, Bandwidth::Lowest, None)?;
+                                let connected = core.connect_within(name, CONNECT_TIMEOUT, find_options).is_ok();
+                                Ok((core, connected))
+                            })
+                        })
+                    })
+                    .collect();
+                handles
+                    .into_iter()
+                    .map(|handle| handle.map(|handle| handle.join().expect("connect thread panicked")))
+                    .collect()
+            })
+        });
+        let mut receivers_out = Vec::new();
+        let mut offline = Vec::new();
+        for ((receiver, opened), name) in receivers.into_iter().zip(opened).zip(&names) {
+            receivers_out.push(match (receiver, opened, name) {
+                (Some(receiver), _, _) => receiver,
+                (None, Some(opened), Some(name)) => {
+                    let (core, connected) = opened?;
+                    let core = Arc::new(core);
+                    if !connected {
+                        offline.push((core.clone(), name.clone()));
+                    }
+                    Py::new(py, NdiReceiver::from_core(core))?
+                },
+                _ => unreachable!(),
+            });
+        }
+        let cores: Vec<Arc<ReceiverCore>> = receivers_out.iter().map(|receiver| receiver.borrow(py).core()).collect();
+        let labels = labels.unwrap_or_else(|| {
+            cores
+                .iter()
+                .zip(&names)
+                .map(|(core, name)| name.clone().or_else(|| core.connected_source()).unwrap_or_default())
+                .collect()
+        });
+
+        let format = VideoFormat::new(width, height, four_cc, fps_n, fps_d);
+        let sinks: Vec<Arc<TileSink>> = cores.iter().map(|_| Arc::new(TileSink::default())).collect();
+        let styles = Arc::new(Mutex::new(Styles {
+            tiles: labels.into_iter().map(|label| TileStyle { label, tally: Tally::Off }).collect(),
+            version: 0,
+        }));
+
+        // Start from a black mosaic
+        let mut mosaic = vec![0u8; format.data_size()];
+        Canvas::new(&mut mosaic, width, height, format.line_stride, four_cc).fill_rect(Rect::new(0, 0, width, height), Rgb::BLACK);
+        let compositor = Compositor {
+            layout: Layout { format, columns, cell_width, cell_height, border, labels: show_labels },
+            tiles: sinks
+                .iter()
+                .map(|sink| Tile {
+                    sink: sink.clone(),
+                    composed: 0,
+                    last_frame: None,
+                    picture: Vec::new(),
+                    placed: None,
+                    fresh: false,
+                    blank: false,
+                    error: None,
+                })
+                .collect(),
+            styles: styles.clone(),
+            styles_version: u64::MAX,
+            mosaic,
+            threads: threads.unwrap_or_else(|| std::thread::available_parallelism().map_or(1, |cpus| cpus.get())).max(1),
+            matrix: YuvMatrix::bt709(),
+        };
+
+        let sender = py.allow_threads(|| SendBackend::create(output_name, backend, false, false))?;
+        let multiviewer = NdiMultiviewer {
+            output_name: output_name.to_string(),
+            receivers: receivers_out,
+            cores,
+            sinks,
+            sender: Arc::new(sender),
+            styles,
+            stats: Arc::new(MultiviewStats::default()),
+            format,
+            columns,
+            compositor: Mutex::new(Some(compositor)),
+            thread: Mutex::new(None),
+            started: Mutex::new(None),
+            reconnecting: offline.iter().map(|(core, _)| core.clone()).collect(),
+            reconnect_stop: Arc::new(AtomicBool::new(false)),
+        };
+        for (core, name) in offline {
+            reconnect_in_background(core, name, find_options.clone(), multiviewer.reconnect_stop.clone())?;
+        }
+        if start {
+            multiviewer.start()?;
+        }
+        Ok(multiviewer)
+    }
+
+    /// Start publishing the mosaic
+    fn start(&self) -> PyResult<()> {
+        let mut thread = self.thread.lock().unwrap();
+        if thread.is_some() {
+            return Err(PyRuntimeError::new_err("Multiviewer is already running"));
+        }
+        if self.cores.iter().any(|core| !core.is_open()) {
+            return Err(PyRuntimeError::new_err("A receiver is not initialized"));
+        }
+        let Some(mut compositor) = self.compositor.lock().unwrap().take() else {
+            return Err(PyRuntimeError::new_err("Multiviewer is not initialized"));
+        };
+
+        for (core, sink) in self.cores.iter().zip(&self.sinks) {
+            core.add_sink(sink.clone());
+            core.retain_pump();
+        }
+
+        let stop = Arc::new(AtomicBool::new(false));
+        let handle = {
+            let (sender, stats, stop) = (self.sender.clone(), self.stats.clone(), stop.clone());
+            let format = self.format;
+            std::thread::Builder::new().name("ndirust-multiview".to_string()).spawn(move || {
+                let mut pacer = Pacer::new(format.frame_rate_n, format.frame_rate_d);
+                while !stop.load(Ordering::Relaxed) {
+                    pacer.wait();
+                    let composing = Instant::now();
+                    compositor.compose(&stats);
+                    stats.compose_us.store(composing.elapsed().as_micros() as u64, Ordering::Relaxed);
+
+                    match sender.send_video(&compositor.mosaic, &format, TIMECODE_SYNTHESIZE) {
+                        Ok(()) => {
+                            stats.frames_sent.fetch_add(1, Ordering::Relaxed);
+                        },
+                        Err(error) => {
+                            stats.errors.fetch_add(1, Ordering::Relaxed);
+                            *stats.last_error.lock().unwrap() = Some(error);
+                        },
+                    }
+                    stats.late.store(pacer.late, Ordering::Relaxed);
+                    stats.dropped.store(pacer.dropped, Ordering::Relaxed);
+                }
+                compositor
+            })?
+        };
+
+        *thread = Some(CompositorThread { stop, thread: handle });
+        self.started.lock().unwrap().get_or_insert_with(Instant::now);
+        Ok(())
+    }
+
+    /// Stop publishing; start() resumes
+    fn stop(&self, py: Python<'_>) {
+        py.allow_threads(|| self.stop_thread());
+    }
+
+    /// Set the tally of a tile, drawn as its border colour
+    ///
+    /// Args:
+    ///     index: Tile number, in the order of the sources
+    ///     state: "program" (red), "preview" (green) or None
+    #[pyo3(signature = (index, state = None))]
+    fn set_tally(&self, index: usize, state: Option<&str>) -> PyResult<()> {
+        let tally = Tally::from_name(state)?;
+        let mut styles = self.styles.lock().unwrap();
+        let tile = styles.tiles.get_mut(index).ok_or_else(|| PyValueError::new_err("Tile index out of range"))?;
+        tile.tally = tally;
+        styles.version += 1;
+        Ok(())
+    }
+
+    /// Set the label of a tile
+    fn set_label(&self, index: usize, label: &str) -> PyResult<()> {
+        let mut styles = self.styles.lock().unwrap();
+        let tile = styles.tiles.get_mut(index).ok_or_else(|| PyValueError::new_err("Tile index out of range"))?;
+        tile.label = label.to_string();
+        styles.version += 1;
+        Ok(())
+    }
+
+    /// Whether the mosaic is being published
+    #[getter]
+    fn get_is_running(&self) -> bool {
+        self.thread.lock().unwrap().is_some()
+    }
+
+    /// Name the mosaic was published under
+    #[getter]
+    fn get_output_name(&self) -> String {
+        self.output_name.clone()
+    }
+
+    /// Name receivers connect to for the mosaic
+    #[getter]
+    fn get_output_source_name(&self) -> String {
+        self.sender.source_name().unwrap_or(self.output_name.as_str()).to_string()
+    }
+
+    /// The receivers of the tiles, in order
+    #[getter]
+    fn get_receivers(&self, py: Python<'_>) -> Vec<Py<NdiReceiver>> {
+        self.receivers.iter().map(|receiver| receiver.clone_ref(py)).collect()
+    }
+
+    /// Tiles per row
+    #[getter]
+    fn get_columns(&self) -> u32 {
+        self.columns
+    }
+
+    /// Labels and tally states, as a list of {"label", "tally"} dicts
+    #[getter]
+    fn get_tiles(&self, py: Python<'_>) -> PyResult<Py<PyList>> {
+        let list = PyList::empty(py);
+        for tile in self.styles.lock().unwrap().tiles.iter() {
+            let entry = PyDict::new(py);
+            entry.set_item("label", &tile.label)?;
+            entry.set_item("tally", tile.tally.name())?;
+            list.append(entry)?;
+        }
+        Ok(list.into())
+    }
+
+    /// Multiviewer statistics: frames_sent, late, dropped, tiles_scaled,
+    /// compose_ms (time spent composing the last frame), errors,
+    /// last_error, offline (tiles without a connected source),
+    /// connections (receivers of the output) and elapsed
+    #[getter]
+    fn get_stats(&self, py: Python<'_>) -> PyResult<Py<PyDict>> {
+        let stats = PyDict::new(py);
+        stats.set_item("frames_sent", self.stats.frames_sent.load(Ordering::Relaxed))?;
+        stats.set_item("late", self.stats.late.load(Ordering::Relaxed))?;
+        stats.set_item("dropped", self.stats.dropped.load(Ordering::Relaxed))?;
+        stats.set_item("tiles_scaled", self.stats.tiles_scaled.load(Ordering::Relaxed))?;
+        stats.set_item("compose_ms", self.stats.compose_us.load(Ordering::Relaxed) as f64 / 1000.0)?;
+        stats.set_item("errors", self.stats.errors.load(Ordering::Relaxed))?;
+        let last_error = self.stats.last_error.lock().unwrap().as_ref().map(|error| error.value(py).to_string());
+        stats.set_item("last_error", last_error)?;
+        let offline = self.cores.iter().filter(|core| core.connected_source().is_none()).count();
+        stats.set_item("offline", offline)?;
+        stats.set_item("connections", self.sender.connections(0))?;
+        let elapsed = self.started.lock().unwrap().map_or(0.0, |started| started.elapsed().as_secs_f64());
+        stats.set_item("elapsed", elapsed)?;
+        Ok(stats.into())
+    }
+
+    fn __repr__(&self) -> String {
+        format!(
+            "NdiMultiviewer('{}', {} tiles, {}x{} {})",
+            self.output_name,
+            self.sinks.len(),
+            self.format.width,
+            self.format.height,
+            four_cc_name(self.format.four_cc)
+        )
+    }
+}
+
+/// Register multiviewer classes
+pub fn register_multiview_functions(m: &PyModule) -> PyResult<()> {
+    m.add_class::<NdiMultiviewer>()?;
+
+    Ok(())
+}
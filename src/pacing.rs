@@ -0,0 +1,275 @@
+// src/pacing.rs
+//
+// Frame pacing at exact rational frame rates. Deadlines are computed from the
+// start time and the frame index rather than by adding up per-frame sleeps,
+// so rounding errors and scheduling jitter never accumulate into drift.
+
+use std::time::{Duration, Instant};
+
+/// Remaining time below which `sleep_until` yields instead of sleeping,
+/// since OS sleeps commonly overshoot by a few hundred microseconds
+const SPIN_THRESHOLD: Duration = Duration::from_micros(500);
+
+/// Sleep until the given instant
+pub fn sleep_until(deadline: Instant) {
+    loop {
+        let now = Instant::now();
+        if now >= deadline {
+            return;
+        }
+
+        let remaining = deadline - now;
+        if remaining > SPIN_THRESHOLD {
+            std::thread::sleep(remaining - SPIN_THRESHOLD);
+        } else {
+            std::thread::yield_now();
+        }
+    }
+}
+
+/// Paces frames at `fps_n / fps_d` frames per second
+pub struct Pacer {
+    began: Instant,
+    start: Instant,
+    fps_n: u64,
+    fps_d: u64,
+    next_index: u64,
+    /// Frames that were sent later than a tenth of an interval past their deadline
+    pub late: u64,
+    /// Frames that were skipped because their slot had already passed
+    pub dropped: u64,
+    // Whether the schedule follows the phase of a sender's clock
+    clock_aligned: bool,
+}
+
+impl Pacer {
+    pub fn new(fps_n: u32, fps_d: u32) -> Self {
+        let now = Instant::now();
+        Pacer {
+            began: now,
+            start: now,
+            fps_n: fps_n.max(1) as u64,
+            fps_d: fps_d.max(1) as u64,
+            next_index: 0,
+            late: 0,
+            dropped: 0,
+            clock_aligned: false,
+        }
+    }
+
+    /// Check whether this pacer runs at the given rate
+    pub fn has_rate(&self, fps_n: u32, fps_d: u32) -> bool {
+        self.fps_n == fps_n.max(1) as u64 && self.fps_d == fps_d.max(1) as u64
+    }
+
+    /// Restart the schedule from now, keeping the counters
+    pub fn restart(&mut self) {
+        self.start = Instant::now();
+        self.next_index = 0;
+        self.clock_aligned = false;
+    }
+
+    /// Time of frame `index` relative to the start
+    pub fn offset(&self, index: u64) -> Duration {
+        let nanos = index as u128 * 1_000_000_000 * self.fps_d as u128 / self.fps_n as u128;
+        Duration::from_nanos(nanos as u64)
+    }
+
+    /// Duration of one frame
+    pub fn interval(&self) -> Duration {
+        self.offset(1)
+    }
+
+    /// Deadline of frame `index`
+    pub fn deadline(&self, index: u64) -> Instant {
+        self.start + self.offset(index)
+    }
+
+    /// Index of the frame whose slot contains `now`
+    fn index_at(&self, now: Instant) -> u64 {
+        let elapsed = now.saturating_duration_since(self.start).as_nanos();
+        (elapsed * self.fps_n as u128 / (1_000_000_000 * self.fps_d as u128)) as u64
+    }
+
+    /// Number of frames scheduled so far
+    pub fn frames_scheduled(&self) -> u64 {
+        self.next_index
+    }
+
+    /// Time since the pacer was created
+    pub fn elapsed(&self) -> Duration {
+        self.began.elapsed()
+    }
+
+    /// Wait until the next frame is due and return its index
+    ///
+    /// If the caller has fallen more than a full interval behind, the frames
+    /// whose slots have passed are skipped and counted as dropped so the
+    /// stream stays on its original cadence.
+    pub fn wait(&mut self) -> u64 {
+        let mut index = self.next_index;
+
+        let now = Instant::now();
+        if now > self.deadline(index) + self.interval() {
+            let current = self.index_at(now);
+            if current > index {
+                self.dropped += current - index;
+                index = current;
+            }
+        }
+
+        let deadline = self.deadline(index);
+        let now = Instant::now();
+        if now < deadline {
+            sleep_until(deadline);
+        } else if now - deadline > self.interval() / 10 {
+            self.late += 1;
+        }
+
+        self.next_index = index + 1;
+        index
+    }
+
+    /// Take the next frame index if it is due, without waiting
+    ///
+    /// For callers that wait on several schedules at once: drops and late
+    /// frames are counted as in `wait`.
+    pub fn take_due(&mut self, now: Instant) -> Option<u64> {
+        let mut index = self.next_index;
+        let deadline = self.deadline(index);
+        if now < deadline {
+            return None;
+        }
+
+        if now > deadline + self.interval() {
+            let current = self.index_at(now);
+            if current > index {
+                self.dropped += current - index;
+                index = current;
+            }
+        } else if now - deadline > self.interval() / 10 {
+            self.late += 1;
+        }
+
+        self.next_index = index + 1;
+        Some(index)
+    }
+
+    /// Deadline of the next frame
+    pub fn next_deadline(&self) -> Instant {
+        self.deadline(self.next_index)
+    }
+
+    /// Take the next frame index without waiting, for callers that are paced
+    /// by something else
+    pub fn skip(&mut self) -> u64 {
+        let index = self.next_index;
+        self.next_index += 1;
+        index
+    }
+
+    /// Account for a frame whose send blocked on the sender's clock
+    ///
+    /// For callers that take indices with `skip`: the clock keeps its own
+    /// phase, so the schedule is aligned to the first send. A send returning
+    /// more than a tenth of an interval after its deadline is late. One
+    /// returning more than an interval late means the sender stalled and its
+    /// clock started over, so the slots that passed are counted as dropped
+    /// and the schedule is aligned to the clock again.
+    pub fn complete_clocked(&mut self, index: u64, now: Instant) {
+        let deadline = self.deadline(index);
+        if self.clock_aligned && now <= deadline + self.interval() {
+            if now > deadline + self.interval() / 10 {
+                self.late += 1;
+            }
+            return;
+        }
+        if self.clock_aligned {
+            // Slots that passed while the sender stalled
+            let current = self.index_at(now).max(index);
+            self.dropped += current - index;
+            self.next_index = self.next_index.max(current + 1);
+        }
+
+        // The frame just sent marks the phase of the clock
+        self.start = now.checked_sub(self.offset(self.next_index - 1)).unwrap_or(now);
+        self.clock_aligned = true;
+    }
+
+    /// Wait until the next frame is due without dropping any frames
+    ///
+    /// This mirrors the SDK's clocked sending: a sender that stalls for
+    /// longer than an interval starts a new schedule instead of bursting.
+    pub fn wait_clocked(&mut self) {
+        let now = Instant::now();
+        if now > self.deadline(self.next_index) + self.interval() {
+            self.restart();
+        }
+
+        sleep_until(self.deadline(self.next_index));
+        self.next_index += 1;
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn deadlines_follow_the_exact_rate() {
+        let pacer = Pacer::new(30000, 1001);
+        assert_eq!(pacer.offset(30000), Duration::from_secs(1001));
+        assert_eq!(pacer.interval(), Duration::from_nanos(33_366_666));
+    }
+
+    #[test]
+    fn clocked_sends_are_measured_against_the_first_one() {
+        let mut pacer = Pacer::new(50, 1);
+        let interval = pacer.interval();
+        let first = Instant::now() + Duration::from_secs(1);
+        let index = pacer.skip();
+        pacer.complete_clocked(index, first);
+
+        // On time, then a little early, then late by half an interval
+        let index = pacer.skip();
+        pacer.complete_clocked(index, first + interval);
+        let index = pacer.skip();
+        pacer.complete_clocked(index, first + 2 * interval - interval / 20);
+        assert_eq!((pacer.late, pacer.dropped), (0, 0));
+        let index = pacer.skip();
+        pacer.complete_clocked(index, first + 3 * interval + interval / 2);
+        assert_eq!((pacer.late, pacer.dropped), (1, 0));
+    }
+
+    #[test]
+    fn clocked_stalls_drop_the_slots_that_passed() {
+        let mut pacer = Pacer::new(50, 1);
+        let interval = pacer.interval();
+        let first = Instant::now() + Duration::from_secs(1);
+        let index = pacer.skip();
+        pacer.complete_clocked(index, first);
+
+        // Frame 1 leaves three and a half intervals late: slots 1 to 3 passed
+        let index = pacer.skip();
+        let resumed = first + interval * 4 + interval / 2;
+        pacer.complete_clocked(index, resumed);
+        assert_eq!((pacer.late, pacer.dropped), (0, 3));
+        assert_eq!(pacer.frames_scheduled(), 5);
+
+        // The clock started over at the stalled send
+        let index = pacer.skip();
+        assert_eq!(index, 5);
+        pacer.complete_clocked(index, resumed + interval);
+        assert_eq!((pacer.late, pacer.dropped), (0, 3));
+    }
+
+    #[test]
+    fn waiting_behind_schedule_drops_missed_slots() {
+        let mut pacer = Pacer::new(1000, 1);
+        assert_eq!(pacer.wait(), 0);
+        std::thread::sleep(Duration::from_millis(20));
+        let index = pacer.wait();
+        assert!(index >= 19, "index {}", index);
+        assert_eq!(pacer.dropped, index - 1);
+    }
+}
@@ -0,0 +1,780 @@
+// src/patterns.rs
+//
+// Native test pattern engine. Static backgrounds are rendered once per
+// (pattern, size, format) and cached; each frame only restores and redraws
+// the regions that animate (the moving box and the burnt-in counter).
+
+use pyo3::prelude::*;
+use pyo3::exceptions::PyValueError;
+use pyo3::types::PyBytes;
+use std::collections::HashMap;
+use std::sync::{Arc, Mutex, OnceLock};
+
+use crate::frame::{
+    default_line_stride, four_cc_from_name, four_cc_name, FOURCC_BGRA, FOURCC_BGRX, FOURCC_RGBA,
+    FOURCC_RGBX, FOURCC_UYVY,
+};
+
+/// Maximum number of cached backgrounds before the cache is cleared
+const MAX_CACHED_BACKGROUNDS: usize = 32;
+
+/// Static background of a test pattern
+#[derive(Clone, Copy, PartialEq, Eq, Hash, Debug)]
+pub enum PatternKind {
+    /// SMPTE colour bars
+    Bars,
+    /// Horizontal luma ramp above an 11-step greyscale
+    Ramp,
+    /// Circular zone plate
+    ZonePlate,
+    /// Plain black
+    Black,
+}
+
+impl PatternKind {
+    pub fn from_name(name: &str) -> Result<Self, String> {
+        match name.to_ascii_lowercase().as_str() {
+            "bars" | "smpte" => Ok(PatternKind::Bars),
+            "ramp" => Ok(PatternKind::Ramp),
+            "zoneplate" | "zone_plate" => Ok(PatternKind::ZonePlate),
+            "black" => Ok(PatternKind::Black),
+            other => Err(format!(
+                "Unknown pattern '{}', expected 'bars', 'ramp', 'zoneplate' or 'black'",
+                other
+            )),
+        }
+    }
+
+    pub fn name(&self) -> &'static str {
+        match self {
+            PatternKind::Bars => "bars",
+            PatternKind::Ramp => "ramp",
+            PatternKind::ZonePlate => "zoneplate",
+            PatternKind::Black => "black",
+        }
+    }
+}
+
+/// Linear RGB colour with components in 0.0..=1.0
+#[derive(Clone, Copy, PartialEq, Debug)]
+pub struct Rgb(pub f32, pub f32, pub f32);
+
+impl Rgb {
+    pub const BLACK: Rgb = Rgb(0.0, 0.0, 0.0);
+    pub const WHITE: Rgb = Rgb(1.0, 1.0, 1.0);
+    pub const RED: Rgb = Rgb(0.75, 0.0, 0.0);
+    pub const GREEN: Rgb = Rgb(0.0, 0.75, 0.0);
+
+    fn grey(level: f32) -> Rgb {
+        Rgb(level, level, level)
+    }
+
+    /// BT.709 limited-range Y, Cb, Cr
+    fn to_ycbcr(self) -> (u8, u8, u8) {
+        let Rgb(r, g, b) = self;
+        let luma = 0.2126 * r + 0.7152 * g + 0.0722 * b;
+        let cb = (b - luma) / 1.8556;
+        let cr = (r - luma) / 1.5748;
+        (
+            (16.0 + 219.0 * luma).round().clamp(1.0, 254.0) as u8,
+            (128.0 + 224.0 * cb).round().clamp(1.0, 254.0) as u8,
+            (128.0 + 224.0 * cr).round().clamp(1.0, 254.0) as u8,
+        )
+    }
+
+    fn to_u8(value: f32) -> u8 {
+        (value * 255.0).round().clamp(0.0, 255.0) as u8
+    }
+}
+
+/// Check whether the pattern engine can draw into a format
+pub fn is_supported_format(four_cc: u32) -> bool {
+    matches!(four_cc, FOURCC_UYVY | FOURCC_BGRA | FOURCC_BGRX | FOURCC_RGBA | FOURCC_RGBX)
+}
+
+/// Encode a colour as one 4-byte unit: a UYVY pixel pair or one RGB pixel
+fn encode(colour: Rgb, four_cc: u32) -> [u8; 4] {
+    match four_cc {
+        FOURCC_UYVY => {
+            let (y, u, v) = colour.to_ycbcr();
+            [u, y, v, y]
+        },
+        FOURCC_RGBA | FOURCC_RGBX => [Rgb::to_u8(colour.0), Rgb::to_u8(colour.1), Rgb::to_u8(colour.2), 255],
+        _ => [Rgb::to_u8(colour.2), Rgb::to_u8(colour.1), Rgb::to_u8(colour.0), 255],
+    }
+}
+
+/// Encode two horizontally adjacent pixels as a UYVY pair with averaged chroma
+fn encode_uyvy_pair(left: Rgb, right: Rgb) -> [u8; 4] {
+    let (y0, u0, v0) = left.to_ycbcr();
+    let (y1, u1, v1) = right.to_ycbcr();
+    let u = ((u0 as u16 + u1 as u16 + 1) / 2) as u8;
+    let v = ((v0 as u16 + v1 as u16 + 1) / 2) as u8;
+    [u, y0, v, y1]
+}
+
+/// Rectangle in pixel coordinates
+#[derive(Clone, Copy, PartialEq, Eq, Debug, Default)]
+pub struct Rect {
+    pub x: u32,
+    pub y: u32,
+    pub w: u32,
+    pub h: u32,
+}
+
+impl Rect {
+    pub fn new(x: u32, y: u32, w: u32, h: u32) -> Self {
+        Rect { x, y, w, h }
+    }
+}
+
+/// Mutable view of a frame buffer that the pattern engine can draw into
+pub struct Canvas<'a> {
+    pub data: &'a mut [u8],
+    pub width: u32,
+    pub height: u32,
+    pub stride: usize,
+    pub four_cc: u32,
+}
+
+impl<'a> Canvas<'a> {
+    pub fn new(data: &'a mut [u8], width: u32, height: u32, stride: usize, four_cc: u32) -> Self {
+        Canvas { data, width, height, stride, four_cc }
+    }
+
+    /// Pixels covered by one 4-byte unit
+    fn unit_width(&self) -> u32 {
+        if self.four_cc == FOURCC_UYVY { 2 } else { 1 }
+    }
+
+    /// Clip a rectangle to the canvas and align it to whole units
+    pub fn clip(&self, rect: Rect) -> Rect {
+        let unit = self.unit_width();
+        let x0 = (rect.x.min(self.width) / unit) * unit;
+        let x1 = rect.x.saturating_add(rect.w).min(self.width);
+        let x1 = ((x1 + unit - 1) / unit * unit).min(self.width / unit * unit);
+        let y0 = rect.y.min(self.height);
+        let y1 = rect.y.saturating_add(rect.h).min(self.height);
+        Rect::new(x0, y0, x1.saturating_sub(x0), y1.saturating_sub(y0))
+    }
+
+    fn row_span(&self, rect: &Rect, y: u32) -> std::ops::Range<usize> {
+        let bytes_per_pixel = 4 / self.unit_width() as usize;
+        let start = y as usize * self.stride + rect.x as usize * bytes_per_pixel;
+        start..start + rect.w as usize * bytes_per_pixel
+    }
+
+    /// Fill a rectangle with a solid colour
+    pub fn fill_rect(&mut self, rect: Rect, colour: Rgb) -> Rect {
+        let rect = self.clip(rect);
+        let unit = encode(colour, self.four_cc);
+        for y in rect.y..rect.y + rect.h {
+            let span = self.row_span(&rect, y);
+            for chunk in self.data[span].chunks_exact_mut(4) {
+                chunk.copy_from_slice(&unit);
+            }
+        }
+        rect
+    }
+
+    /// Set the pixels of a rectangle to a colour without aligning it to units
+    ///
+    /// A UYVY pair shares its chroma, so a pair the rectangle only half
+    /// covers takes the colour's luma and keeps its chroma. One-pixel detail
+    /// such as small text stays sharp instead of widening to whole pairs.
+    pub fn fill_pixels(&mut self, rect: Rect, colour: Rgb) {
+        if self.four_cc != FOURCC_UYVY {
+            self.fill_rect(rect, colour);
+            return;
+        }
+        let (luma, u, v) = colour.to_ycbcr();
+        let x1 = rect.x.saturating_add(rect.w).min(self.width);
+        let y1 = rect.y.saturating_add(rect.h).min(self.height);
+        for y in rect.y.min(y1)..y1 {
+            let row = y as usize * self.stride;
+            for x in rect.x.min(x1)..x1 {
+                let offset = row + x as usize * 2;
+                self.data[offset + 1] = luma;
+                if x % 2 == 0 && x + 1 < x1 {
+                    self.data[offset] = u;
+                    self.data[offset + 2] = v;
+                }
+            }
+        }
+    }
+
+    /// Draw a rectangular outline of the given thickness
+    pub fn stroke_rect(&mut self, rect: Rect, thickness: u32, colour: Rgb) {
+        let t = thickness.min(rect.w / 2).min(rect.h / 2).max(1);
+        self.fill_rect(Rect::new(rect.x, rect.y, rect.w, t), colour);
+        self.fill_rect(Rect::new(rect.x, rect.y + rect.h - t, rect.w, t), colour);
+        self.fill_rect(Rect::new(rect.x, rect.y, t, rect.h), colour);
+        self.fill_rect(Rect::new(rect.x + rect.w - t, rect.y, t, rect.h), colour);
+    }
+
+    /// Copy a rectangle back from a background buffer of the same layout
+    pub fn restore_rect(&mut self, background: &[u8], rect: Rect) {
+        let rect = self.clip(rect);
+        for y in rect.y..rect.y + rect.h {
+            let span = self.row_span(&rect, y);
+            self.data[span.clone()].copy_from_slice(&background[span]);
+        }
+    }
+
+    /// Draw text with the built-in 5x7 font, returning the covered rectangle
+    ///
+    /// Glyph dots are drawn pixel by pixel, so text stays legible at scale 1
+    /// in UYVY too.
+    pub fn draw_text(&mut self, x: u32, y: u32, scale: u32, text: &str, colour: Rgb) -> Rect {
+        let scale = scale.max(1);
+        let mut cursor = x;
+        for c in text.chars() {
+            let rows = glyph(c);
+            for (row, bits) in rows.iter().enumerate() {
+                for col in 0..5u32 {
+                    if bits & (0x10 >> col) != 0 {
+                        let px = Rect::new(cursor + col * scale, y + row as u32 * scale, scale, scale);
+                        self.fill_pixels(px, colour);
+                    }
+                }
+            }
+            cursor += 6 * scale;
+        }
+        Rect::new(x, y, cursor - x, 7 * scale)
+    }
+
+    /// Paint every pixel from a colour function
+    fn paint<F: Fn(u32, u32) -> Rgb>(&mut self, colour_at: F) {
+        for y in 0..self.height {
+            let row = &mut self.data[y as usize * self.stride..];
+            if self.four_cc == FOURCC_UYVY {
+                for x in (0..self.width & !1).step_by(2) {
+                    let unit = encode_uyvy_pair(colour_at(x, y), colour_at(x + 1, y));
+                    let offset = x as usize * 2;
+                    row[offset..offset + 4].copy_from_slice(&unit);
+                }
+                if self.width % 2 == 1 {
+                    // The last pixel of an odd width has no partner: only
+                    // its Cb and Y fit in the row
+                    let x = self.width - 1;
+                    let unit = encode(colour_at(x, y), FOURCC_UYVY);
+                    let offset = x as usize * 2;
+                    row[offset..offset + 2].copy_from_slice(&unit[..2]);
+                }
+            } else {
+                for x in 0..self.width {
+                    let unit = encode(colour_at(x, y), self.four_cc);
+                    let offset = x as usize * 4;
+                    row[offset..offset + 4].copy_from_slice(&unit);
+                }
+            }
+        }
+    }
+}
+
+/// Size in pixels of a text string drawn with `Canvas::draw_text`
+pub fn text_size(text: &str, scale: u32) -> (u32, u32) {
+    let scale = scale.max(1);
+    (text.chars().count() as u32 * 6 * scale, 7 * scale)
+}
+
+/// Rows of a 5x7 glyph, most significant of the low five bits on the left
+pub fn glyph(c: char) -> [u8; 7] {
+    match c.to_ascii_uppercase() {
+        '0' => [0x0E, 0x11, 0x13, 0x15, 0x19, 0x11, 0x0E],
+        '1' => [0x04, 0x0C, 0x04, 0x04, 0x04, 0x04, 0x0E],
+        '2' => [0x0E, 0x11, 0x01, 0x02, 0x04, 0x08, 0x1F],
+        '3' => [0x1F, 0x02, 0x04, 0x02, 0x01, 0x11, 0x0E],
+        '4' => [0x02, 0x06, 0x0A, 0x12, 0x1F, 0x02, 0x02],
+        '5' => [0x1F, 0x10, 0x1E, 0x01, 0x01, 0x11, 0x0E],
+        '6' => [0x06, 0x08, 0x10, 0x1E, 0x11, 0x11, 0x0E],
+        '7' => [0x1F, 0x01, 0x02, 0x04, 0x08, 0x08, 0x08],
+        '8' => [0x0E, 0x11, 0x11, 0x0E, 0x11, 0x11, 0x0E],
+        '9' => [0x0E, 0x11, 0x11, 0x0F, 0x01, 0x02, 0x0C],
+        'A' => [0x0E, 0x11, 0x11, 0x11, 0x1F, 0x11, 0x11],
+        'B' => [0x1E, 0x11, 0x11, 0x1E, 0x11, 0x11, 0x1E],
+        'C' => [0x0E, 0x11, 0x10, 0x10, 0x10, 0x11, 0x0E],
+        'D' => [0x1C, 0x12, 0x11, 0x11, 0x11, 0x12, 0x1C],
+        'E' => [0x1F, 0x10, 0x10, 0x1E, 0x10, 0x10, 0x1F],
+        'F' => [0x1F, 0x10, 0x10, 0x1E, 0x10, 0x10, 0x10],
+        'G' => [0x0E, 0x11, 0x10, 0x17, 0x11, 0x11, 0x0F],
+        'H' => [0x11, 0x11, 0x11, 0x1F, 0x11, 0x11, 0x11],
+        'I' => [0x0E, 0x04, 0x04, 0x04, 0x04, 0x04, 0x0E],
+        'J' => [0x07, 0x02, 0x02, 0x02, 0x02, 0x12, 0x0C],
+        'K' => [0x11, 0x12, 0x14, 0x18, 0x14, 0x12, 0x11],
+        'L' => [0x10, 0x10, 0x10, 0x10, 0x10, 0x10, 0x1F],
+        'M' => [0x11, 0x1B, 0x15, 0x15, 0x11, 0x11, 0x11],
+        'N' => [0x11, 0x11, 0x19, 0x15, 0x13, 0x11, 0x11],
+        'O' => [0x0E, 0x11, 0x11, 0x11, 0x11, 0x11, 0x0E],
+        'P' => [0x1E, 0x11, 0x11, 0x1E, 0x10, 0x10, 0x10],
+        'Q' => [0x0E, 0x11, 0x11, 0x11, 0x15, 0x12, 0x0D],
+        'R' => [0x1E, 0x11, 0x11, 0x1E, 0x14, 0x12, 0x11],
+        'S' => [0x0F, 0x10, 0x10, 0x0E, 0x01, 0x01, 0x1E],
+        'T' => [0x1F, 0x04, 0x04, 0x04, 0x04, 0x04, 0x04],
+        'U' => [0x11, 0x11, 0x11, 0x11, 0x11, 0x11, 0x0E],
+        'V' => [0x11, 0x11, 0x11, 0x11, 0x11, 0x0A, 0x04],
+        'W' => [0x11, 0x11, 0x11, 0x15, 0x15, 0x15, 0x0A],
+        'X' => [0x11, 0x11, 0x0A, 0x04, 0x0A, 0x11, 0x11],
+        'Y' => [0x11, 0x11, 0x11, 0x0A, 0x04, 0x04, 0x04],
+        'Z' => [0x1F, 0x01, 0x02, 0x04, 0x08, 0x10, 0x1F],
+        ':' => [0x00, 0x0C, 0x0C, 0x00, 0x0C, 0x0C, 0x00],
+        '-' => [0x00, 0x00, 0x00, 0x1F, 0x00, 0x00, 0x00],
+        '.' => [0x00, 0x00, 0x00, 0x00, 0x00, 0x0C, 0x0C],
+        '/' => [0x00, 0x01, 0x02, 0x04, 0x08, 0x10, 0x00],
+        '_' => [0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x1F],
+        '(' => [0x02, 0x04, 0x08, 0x08, 0x08, 0x04, 0x02],
+        ')' => [0x08, 0x04, 0x02, 0x02, 0x02, 0x04, 0x08],
+        ' ' => [0x00; 7],
+        _ => [0x0E, 0x11, 0x01, 0x02, 0x04, 0x00, 0x04], // '?'
+    }
+}
+
+/// Colour of the SMPTE bars pattern at a pixel
+fn bars_colour(x: u32, y: u32, width: u32, height: u32) -> Rgb {
+    const TOP: [Rgb; 7] = [
+        Rgb(0.75, 0.75, 0.75),
+        Rgb(0.75, 0.75, 0.0),
+        Rgb(0.0, 0.75, 0.75),
+        Rgb(0.0, 0.75, 0.0),
+        Rgb(0.75, 0.0, 0.75),
+        Rgb(0.75, 0.0, 0.0),
+        Rgb(0.0, 0.0, 0.75),
+    ];
+    const MIDDLE: [Rgb; 7] = [
+        Rgb(0.0, 0.0, 0.75),
+        Rgb::BLACK,
+        Rgb(0.75, 0.0, 0.75),
+        Rgb::BLACK,
+        Rgb(0.0, 0.75, 0.75),
+        Rgb::BLACK,
+        Rgb(0.75, 0.75, 0.75),
+    ];
+
+    let bar = ((x as u64 * 7) / width as u64) as usize;
+    if y < height * 2 / 3 {
+        return TOP[bar];
+    }
+    if y < height * 3 / 4 {
+        return MIDDLE[bar];
+    }
+
+    // Bottom row in 28ths of the width: -I, white, +Q, black (5 each),
+    // then a PLUGE of three 4/3 steps and a final black bar
+    let slot = (x as u64 * 84) / width as u64;
+    match slot {
+        0..=14 => Rgb(0.0, 0.13, 0.30),
+        15..=29 => Rgb::WHITE,
+        30..=44 => Rgb(0.20, 0.0, 0.42),
+        45..=59 => Rgb::BLACK,
+        60..=63 => Rgb::BLACK,
+        64..=67 => Rgb::grey(0.02),
+        68..=71 => Rgb::grey(0.04),
+        _ => Rgb::BLACK,
+    }
+}
+
+/// Colour of the ramp pattern at a pixel
+fn ramp_colour(x: u32, y: u32, width: u32, height: u32) -> Rgb {
+    if y < height / 2 {
+        Rgb::grey(x as f32 / (width.max(2) - 1) as f32)
+    } else {
+        let step = (x as u64 * 11 / width as u64) as f32;
+        Rgb::grey(step / 10.0)
+    }
+}
+
+/// Colour of the zone plate pattern at a pixel
+fn zone_plate_colour(x: u32, y: u32, width: u32, height: u32) -> Rgb {
+    // Phase grows with the squared radius so frequency rises towards the
+    // edges, reaching Nyquist at the frame's half-height
+    let cx = x as f32 - width as f32 / 2.0;
+    let cy = y as f32 - height as f32 / 2.0;
+    let k = std::f32::consts::PI / height.max(1) as f32;
+    Rgb::grey(0.5 + 0.5 * (k * (cx * cx + cy * cy)).cos())
+}
+
+/// Render the static background of a pattern
+fn render_background(kind: PatternKind, width: u32, height: u32, stride: usize, four_cc: u32) -> Vec<u8> {
+    let mut data = vec![0u8; stride * height as usize];
+    let mut canvas = Canvas::new(&mut data, width, height, stride, four_cc);
+    match kind {
+        PatternKind::Bars => canvas.paint(|x, y| bars_colour(x, y, width, height)),
+        PatternKind::Ramp => canvas.paint(|x, y| ramp_colour(x, y, width, height)),
+        PatternKind::ZonePlate => canvas.paint(|x, y| zone_plate_colour(x, y, width, height)),
+        PatternKind::Black => canvas.paint(|_, _| Rgb::BLACK),
+    }
+    data
+}
+
+type BackgroundKey = (PatternKind, u32, u32, u32);
+
+/// Get a background from the process-wide cache, rendering it if needed
+fn cached_background(kind: PatternKind, width: u32, height: u32, stride: usize, four_cc: u32) -> Arc<Vec<u8>> {
+    static CACHE: OnceLock<Mutex<HashMap<BackgroundKey, Arc<Vec<u8>>>>> = OnceLock::new();
+    let cache = CACHE.get_or_init(|| Mutex::new(HashMap::new()));
+
+    let key = (kind, width, height, four_cc);
+    if let Some(background) = cache.lock().unwrap().get(&key) {
+        return background.clone();
+    }
+
+    // Render outside the lock so other formats are not held up
+    let background = Arc::new(render_background(kind, width, height, stride, four_cc));
+
+    let mut cache = cache.lock().unwrap();
+    if cache.len() >= MAX_CACHED_BACKGROUNDS {
+        cache.clear();
+    }
+    cache.entry(key).or_insert(background).clone()
+}
+
+/// Format a frame number as an SMPTE-style HH:MM:SS:FF timecode
+pub fn format_timecode(frame_number: u64, fps_n: u32, fps_d: u32) -> String {
+    let fps = ((fps_n as f64 / fps_d.max(1) as f64).round() as u64).max(1);
+    let frames = frame_number % fps;
+    let seconds = frame_number / fps;
+    format!(
+        "{:02}:{:02}:{:02}:{:02}",
+        (seconds / 3600) % 24,
+        (seconds / 60) % 60,
+        seconds % 60,
+        frames
+    )
+}
+
+/// Animated test pattern generator
+///
+/// Keeps a working frame that is updated in place: every call restores the
+/// regions drawn for the previous frame from the cached background and then
+/// draws the moving box and the burnt-in counter for the new one.
+pub struct PatternGenerator {
+    pub kind: PatternKind,
+    pub width: u32,
+    pub height: u32,
+    pub four_cc: u32,
+    pub stride: usize,
+    pub fps_n: u32,
+    pub fps_d: u32,
+    pub moving_box: bool,
+    pub burn_in: bool,
+    pub frame_number: u64,
+    background: Arc<Vec<u8>>,
+    frame: Vec<u8>,
+    dirty: Vec<Rect>,
+}
+
+impl PatternGenerator {
+    pub fn new(
+        kind: PatternKind,
+        width: u32,
+        height: u32,
+        four_cc: u32,
+        fps_n: u32,
+        fps_d: u32,
+        moving_box: bool,
+        burn_in: bool,
+    ) -> Result<Self, String> {
+        if !is_supported_format(four_cc) {
+            return Err(format!("Test patterns cannot be drawn in {} format", four_cc_name(four_cc)));
+        }
+        if width < 2 || height < 2 {
+            return Err("Test patterns must be at least 2x2 pixels".to_string());
+        }
+
+        let stride = default_line_stride(four_cc, width);
+        let background = cached_background(kind, width, height, stride, four_cc);
+        let frame = background.as_ref().clone();
+
+        Ok(PatternGenerator {
+            kind,
+            width,
+            height,
+            four_cc,
+            stride,
+            fps_n,
+            fps_d,
+            moving_box,
+            burn_in,
+            frame_number: 0,
+            background,
+            frame,
+            dirty: Vec::new(),
+        })
+    }
+
+    /// Check whether this generator produces the given pattern and format
+    pub fn matches(&self, kind: PatternKind, width: u32, height: u32, four_cc: u32) -> bool {
+        self.kind == kind && self.width == width && self.height == height && self.four_cc == four_cc
+    }
+
+    /// Render a specific frame number and return the frame data
+    pub fn render(&mut self, frame_number: u64) -> &[u8] {
+        let background = self.background.clone();
+        let (width, height, stride, four_cc) = (self.width, self.height, self.stride, self.four_cc);
+        let mut canvas = Canvas::new(&mut self.frame, width, height, stride, four_cc);
+
+        // Undo the previous frame's overlays
+        for rect in self.dirty.drain(..) {
+            canvas.restore_rect(&background, rect);
+        }
+
+        if self.moving_box {
+            // Bounce a square across the frame, moving 1/120 of the width per frame
+            let size = (height / 6).max(2);
+            let travel = width.saturating_sub(size).max(1) as u64;
+            let step = (width as u64 / 120).max(2);
+            let position = (frame_number * step) % (2 * travel);
+            let x = (if position < travel { position } else { 2 * travel - position }) as u32;
+            let y = (height / 3).saturating_sub(size / 2);
+            let rect = canvas.fill_rect(Rect::new(x, y, size, size), Rgb::WHITE);
+            self.dirty.push(rect);
+        }
+
+        if self.burn_in {
+            let text = format!(
+                "{:06} {}",
+                frame_number,
+                format_timecode(frame_number, self.fps_n, self.fps_d)
+            );
+            let scale = (height / 216).max(1);
+            let (text_w, text_h) = text_size(&text, scale);
+            let margin = 2 * scale;
+            let x = width.saturating_sub(text_w + 2 * margin) / 2;
+            let y = height.saturating_sub(text_h + 2 * margin + height / 16);
+            let plate = canvas.fill_rect(Rect::new(x, y, text_w + 2 * margin, text_h + 2 * margin), Rgb::BLACK);
+            canvas.draw_text(x + margin, y + margin, scale, &text, Rgb::WHITE);
+            self.dirty.push(plate);
+        }
+
+        self.frame_number = frame_number + 1;
+        &self.frame
+    }
+
+    /// Render the next frame in sequence
+    pub fn advance(&mut self) -> &[u8] {
+        self.render(self.frame_number)
+    }
+
+    /// The most recently rendered frame
+    pub fn frame(&self) -> &[u8] {
+        &self.frame
+    }
+}
+
+/// Python class wrapping the native test pattern generator
+///
+/// Args:
+///     width: Width of the pattern (default: 1280)
+///     height: Height of the pattern (default: 720)
+///     pattern: "bars", "ramp", "zoneplate" or "black" (default: "bars")
+///     four_cc: Pixel format, "UYVY", "BGRA", "BGRX", "RGBA" or "RGBX" (default: "UYVY")
+///     fps_n: Framerate numerator used for the burnt-in timecode (default: 30)
+///     fps_d: Framerate denominator used for the burnt-in timecode (default: 1)
+///     moving_box: Draw a box that moves every frame (default: True)
+///     burn_in: Draw the frame counter and timecode (default: True)
+#[pyclass]
+pub struct TestPatternGenerator {
+    generator: PatternGenerator,
+}
+
+impl TestPatternGenerator {
+    pub fn generator_mut(&mut self) -> &mut PatternGenerator {
+        &mut self.generator
+    }
+}
+
+#[pymethods]
+impl TestPatternGenerator {
+    #[new]
+    #[pyo3(signature = (width=1280, height=720, pattern="bars", four_cc="UYVY", fps_n=30, fps_d=1, moving_box=true, burn_in=true))]
+    fn new(
+        width: u32,
+        height: u32,
+        pattern: &str,
+        four_cc: &str,
+        fps_n: u32,
+        fps_d: u32,
+        moving_box: bool,
+        burn_in: bool,
+        py: Python<'_>,
+    ) -> PyResult<Self> {
+        let kind = PatternKind::from_name(pattern).map_err(PyValueError::new_err)?;
+        let four_cc = four_cc_from_name(four_cc)
+            .ok_or_else(|| PyValueError::new_err(format!("Unknown FourCC format: {}", four_cc)))?;
+
+        // Rendering an uncached background can take a while at 4K
+        let generator = py.allow_threads(|| {
+            PatternGenerator::new(kind, width, height, four_cc, fps_n, fps_d, moving_box, burn_in)
+        });
+
+        Ok(TestPatternGenerator {
+            generator: generator.map_err(PyValueError::new_err)?,
+        })
+    }
+
+    /// Render a frame and return it as bytes
+    ///
+    /// Args:
+    ///     frame_number: Frame to render (default: the frame after the last one rendered)
+    #[pyo3(signature = (frame_number=None))]
+    fn render(&mut self, frame_number: Option<u64>, py: Python<'_>) -> PyResult<Py<PyBytes>> {
+        let generator = &mut self.generator;
+        let frame_number = frame_number.unwrap_or(generator.frame_number);
+        py.allow_threads(|| {
+            generator.render(frame_number);
+        });
+
+        let frame = generator.frame();
+        Ok(PyBytes::new_with(py, frame.len(), |buffer: &mut [u8]| {
+            buffer.copy_from_slice(frame);
+            Ok(())
+        })?
+        .into())
+    }
+
+    /// Number of the next frame to be rendered
+    #[getter]
+    fn get_frame_number(&self) -> u64 {
+        self.generator.frame_number
+    }
+
+    #[setter]
+    fn set_frame_number(&mut self, frame_number: u64) {
+        self.generator.frame_number = frame_number;
+    }
+
+    #[getter]
+    fn get_width(&self) -> u32 {
+        self.generator.width
+    }
+
+    #[getter]
+    fn get_height(&self) -> u32 {
+        self.generator.height
+    }
+
+    #[getter]
+    fn get_pattern(&self) -> &'static str {
+        self.generator.kind.name()
+    }
+
+    /// Get the FourCC format as a string
+    fn get_four_cc_name(&self) -> String {
+        four_cc_name(self.generator.four_cc)
+    }
+
+    fn __repr__(&self) -> String {
+        format!(
+            "TestPatternGenerator(pattern='{}', width={}, height={}, four_cc='{}')",
+            self.generator.kind.name(),
+            self.generator.width,
+            self.generator.height,
+            four_cc_name(self.generator.four_cc)
+        )
+    }
+}
+
+/// Generate a single test pattern frame without sending it
+///
+/// This does not touch the NDI runtime, which makes it usable for
+/// benchmarking the pattern generator on machines without the SDK.
+///
+/// Args:
+///     width: Width of the test pattern (default: 1280)
+///     height: Height of the test pattern (default: 720)
+///     pattern: "bars", "ramp", "zoneplate" or "black" (default: "bars")
+///     four_cc: Pixel format (default: "UYVY")
+///     frame_number: Frame number burnt into the pattern (default: 0)
+#[pyfunction]
+#[pyo3(signature = (width=1280, height=720, pattern="bars", four_cc="UYVY", frame_number=0))]
+fn generate_test_pattern(
+    width: u32,
+    height: u32,
+    pattern: &str,
+    four_cc: &str,
+    frame_number: u64,
+    py: Python<'_>,
+) -> PyResult<Py<PyBytes>> {
+    let mut generator = TestPatternGenerator::new(width, height, pattern, four_cc, 30, 1, true, true, py)?;
+    generator.render(Some(frame_number), py)
+}
+
+/// Register test pattern classes and functions
+pub fn register_pattern_functions(m: &PyModule) -> PyResult<()> {
+    m.add_class::<TestPatternGenerator>()?;
+    m.add_function(wrap_pyfunction!(generate_test_pattern, m)?)?;
+
+    Ok(())
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    /// Luma of every pixel of a UYVY canvas row
+    fn luma_row(data: &[u8], stride: usize, y: usize, width: usize) -> Vec<u8> {
+        (0..width).map(|x| data[y * stride + x * 2 + 1]).collect()
+    }
+
+    #[test]
+    fn uyvy_text_keeps_single_pixel_columns() {
+        let (width, height) = (18u32, 7u32);
+        let stride = default_line_stride(FOURCC_UYVY, width);
+        let mut data = vec![0u8; stride * height as usize];
+        let mut canvas = Canvas::new(&mut data, width, height, stride, FOURCC_UYVY);
+        canvas.fill_rect(Rect::new(0, 0, width, height), Rgb::BLACK);
+        canvas.draw_text(0, 0, 1, "083", Rgb::WHITE);
+
+        let (white, black) = (Rgb::WHITE.to_ycbcr().0, Rgb::BLACK.to_ycbcr().0);
+        for y in 0..height as usize {
+            let expected: Vec<u8> = "083"
+                .chars()
+                .flat_map(|c| {
+                    let bits = glyph(c)[y];
+                    (0..6).map(move |col| if col < 5 && bits & (0x10 >> col) != 0 { white } else { black })
+                })
+                .collect();
+            assert_eq!(luma_row(&data, stride, y, width as usize), expected, "row {}", y);
+        }
+    }
+
+    #[test]
+    fn uyvy_pixels_set_chroma_only_for_whole_pairs() {
+        let stride = default_line_stride(FOURCC_UYVY, 4);
+        let mut data = vec![0u8; stride];
+        let mut canvas = Canvas::new(&mut data, 4, 1, stride, FOURCC_UYVY);
+        canvas.fill_rect(Rect::new(0, 0, 4, 1), Rgb::BLACK);
+        canvas.fill_pixels(Rect::new(1, 0, 3, 1), Rgb::RED);
+
+        let (luma, u, v) = Rgb::RED.to_ycbcr();
+        let (black, neutral, _) = Rgb::BLACK.to_ycbcr();
+        assert_eq!(data, vec![neutral, black, neutral, luma, u, luma, v, luma]);
+    }
+
+    #[test]
+    fn odd_uyvy_widths_paint_the_last_column() {
+        let (width, height) = (5u32, 2u32);
+        let stride = default_line_stride(FOURCC_UYVY, width);
+        let mut data = vec![0u8; stride * height as usize];
+        Canvas::new(&mut data, width, height, stride, FOURCC_UYVY).paint(|_, _| Rgb::WHITE);
+
+        let white = Rgb::WHITE.to_ycbcr().0;
+        for y in 0..height as usize {
+            assert_eq!(luma_row(&data, stride, y, width as usize), vec![white; width as usize]);
+            assert_eq!(data[y * stride + 8], 128);
+        }
+    }
+
+    #[test]
+    fn rgb_text_matches_the_glyphs() {
+        let stride = default_line_stride(FOURCC_BGRA, 6);
+        let mut data = vec![0u8; stride * 7];
+        Canvas::new(&mut data, 6, 7, stride, FOURCC_BGRA).draw_text(0, 0, 1, "1", Rgb::WHITE);
+        for (y, bits) in glyph('1').iter().enumerate() {
+            for x in 0..5 {
+                let lit = data[y * stride + x * 4] == 255;
+                assert_eq!(lit, bits & (0x10 >> x) != 0, "pixel {},{}", x, y);
+            }
+        }
+    }
+}
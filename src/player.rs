@@ -0,0 +1,507 @@
+// src/player.rs
+//
+// Plays recordings made by NdiRecorder back through an NdiSender. Segment
+// files are memory-mapped, so frames are sent straight from the page cache
+// and a recording of any length plays without being loaded into memory.
+
+use memmap2::Mmap;
+use pyo3::prelude::*;
+use pyo3::exceptions::{PyRuntimeError, PyValueError};
+use pyo3::types::PyDict;
+use std::borrow::Cow;
+use std::fs::{self, File};
+use std::io;
+use std::path::{Path, PathBuf};
+use std::sync::atomic::{AtomicBool, Ordering};
+use std::time::{Duration, Instant};
+
+use crate::frame::{default_line_stride, four_cc_name, VideoFormat, TIMECODE_SYNTHESIZE};
+use crate::pacing::sleep_until;
+use crate::recorder::{
+    segment_file_name, IndexRecord, INDEX_FILE, INDEX_HEADER_SIZE, INDEX_MAGIC, INDEX_RECORD_SIZE, KIND_AUDIO,
+    KIND_METADATA, KIND_VIDEO,
+};
+use crate::sender::{NdiSender, SendBackend};
+
+/// Longest gap between consecutive frames that is played back as recorded;
+/// longer gaps, from a stalled source or a timecode jump, are closed up
+const MAX_GAP: i64 = 10_000_000;
+
+/// Frames sent later than this after their deadline are counted as late
+const LATE_TOLERANCE: Duration = Duration::from_millis(2);
+
+fn invalid_data(message: String) -> io::Error {
+    io::Error::new(io::ErrorKind::InvalidData, message)
+}
+
+/// Read the index of a recording
+fn read_index(directory: &Path) -> io::Result<Vec<IndexRecord>> {
+    let bytes = fs::read(directory.join(INDEX_FILE))?;
+    if bytes.len() < INDEX_HEADER_SIZE || &bytes[..8] != INDEX_MAGIC {
+        return Err(invalid_data(format!("{} is not a recording index", directory.join(INDEX_FILE).display())));
+    }
+
+    let record_size = u32::from_le_bytes(bytes[8..12].try_into().unwrap()) as usize;
+    if record_size < INDEX_RECORD_SIZE {
+        return Err(invalid_data(format!("Unsupported index record size {}", record_size)));
+    }
+
+    // A recording cut short may end in a partial record, which is ignored
+    Ok(bytes[INDEX_HEADER_SIZE..].chunks_exact(record_size).map(IndexRecord::from_bytes).collect())
+}
+
+/// Duration of one frame of a video record in 100ns units
+fn frame_interval(record: &IndexRecord) -> i64 {
+    let (fps_n, fps_d) = (record.fields[4].max(1) as i64, record.fields[5].max(1) as i64);
+    10_000_000 * fps_d / fps_n
+}
+
+/// Time a record covers in 100ns units: a frame interval for video, the
+/// length of its samples for audio and nothing for metadata
+fn record_interval(record: &IndexRecord) -> i64 {
+    match record.kind {
+        KIND_VIDEO => frame_interval(record),
+        KIND_AUDIO => {
+            let [sample_rate, _, num_samples, ..] = record.fields;
+            10_000_000 * num_samples as i64 / sample_rate.max(1) as i64
+        },
+        _ => 0,
+    }
+}
+
+/// Layout of a video record
+fn video_format(record: &IndexRecord) -> VideoFormat {
+    let [width, height, four_cc, line_stride, frame_rate_n, frame_rate_d] = record.fields;
+    VideoFormat {
+        width,
+        height,
+        four_cc,
+        line_stride: if line_stride > 0 { line_stride as usize } else { default_line_stride(four_cc, width) },
+        frame_rate_n,
+        frame_rate_d,
+    }
+}
+
+/// Time of a record on the sender's clock, preferring its send timestamp
+fn record_time(record: &IndexRecord) -> i64 {
+    if record.timestamp > 0 { record.timestamp } else { record.timecode }
+}
+
+/// Counters of one play() call
+#[derive(Default)]
+struct PlayStats {
+    video_frames: u64,
+    audio_frames: u64,
+    metadata_frames: u64,
+    late: u64,
+    loops: u64,
+}
+
+/// Plays a recording made by NdiRecorder through an NdiSender
+///
+/// Frames are sent at their recorded spacing from memory-mapped segments;
+/// with the NDI backend, video is sent directly from the mapping without
+/// being copied.
+#[pyclass]
+struct NdiPlayer {
+    directory: PathBuf,
+    // Mapping of each segment, None for empty segments
+    segments: Vec<Option<Mmap>>,
+    records: Vec<IndexRecord>,
+    // Playback time of each record relative to the first, in 100ns units
+    offsets: Vec<i64>,
+    // Positions of the video records in `records`
+    video: Vec<usize>,
+    playing: AtomicBool,
+    stopping: AtomicBool,
+}
+
+impl NdiPlayer {
+    /// Payload bytes of a record
+    fn payload(&self, record: &IndexRecord) -> &[u8] {
+        match &self.segments[record.segment as usize] {
+            Some(segment) => &segment[record.offset as usize..(record.offset + record.size) as usize],
+            None => &[],
+        }
+    }
+
+    /// Index of the first video frame with a timecode at or after `timecode`
+    ///
+    /// The position is estimated from the frame rate and then corrected, so
+    /// seeking in a constant-rate recording takes no search at all.
+    fn video_at(&self, timecode: i64) -> usize {
+        let count = self.video.len();
+        if count == 0 {
+            return 0;
+        }
+
+        let first = &self.records[self.video[0]];
+        let estimate = (timecode.saturating_sub(first.timecode)) / frame_interval(first);
+        let mut index = estimate.clamp(0, count as i64 - 1) as usize;
+        while index > 0 && self.records[self.video[index - 1]].timecode >= timecode {
+            index -= 1;
+        }
+        while index < count && self.records[self.video[index]].timecode < timecode {
+            index += 1;
+        }
+        index
+    }
+
+    /// Position in `records` of the first frame of any type with a timecode
+    /// at or after `timecode`, or the end of the recording
+    ///
+    /// With video, the search starts from the video frame found by
+    /// video_at(), so seeking in a long recording only scans the audio and
+    /// metadata frames just before it.
+    fn position_at(&self, timecode: i64) -> usize {
+        if self.video.is_empty() {
+            return self.records.iter().position(|record| record.timecode >= timecode).unwrap_or(self.records.len());
+        }
+
+        let mut position = self.video.get(self.video_at(timecode)).copied().unwrap_or(self.records.len());
+        while position > 0 && self.records[position - 1].timecode >= timecode {
+            position -= 1;
+        }
+        position
+    }
+
+    /// Send one record
+    fn send(&self, record: &IndexRecord, sender: &SendBackend, timecode: i64) -> PyResult<()> {
+        let data = self.payload(record);
+        match record.kind {
+            KIND_VIDEO => sender.send_video(data, &video_format(record), timecode),
+            KIND_AUDIO => {
+                // Payloads are only 4-byte aligned if every earlier frame in the
+                // segment was, so copy the samples when they are not
+                let samples = match unsafe { data.align_to::<f32>() } {
+                    (&[], samples, &[]) => Cow::Borrowed(samples),
+                    _ => Cow::Owned(
+                        data.chunks_exact(4).map(|bytes| f32::from_ne_bytes(bytes.try_into().unwrap())).collect(),
+                    ),
+                };
+                let [sample_rate, num_channels, num_samples, ..] = record.fields;
+                sender.send_audio(&samples, sample_rate, num_channels, num_samples, timecode)
+            },
+            KIND_METADATA => sender.send_metadata(&String::from_utf8_lossy(data), timecode),
+            _ => Ok(()),
+        }
+    }
+}
+
+#[pymethods]
+impl NdiPlayer {
+    /// Open a recording
+    ///
+    /// Args:
+    ///     directory: Directory written by an NdiRecorder
+    #[new]
+    fn new(directory: PathBuf, py: Python<'_>) -> PyResult<Self> {
+        let (segments, records) = py.allow_threads(|| -> io::Result<_> {
+            let records = read_index(&directory)?;
+            let segment_count = records.iter().map(|record| record.segment as usize + 1).max().unwrap_or(0);
+
+            let mut segments = Vec::with_capacity(segment_count);
+            for segment in 0..segment_count {
+                let file = File::open(directory.join(segment_file_name(segment as u32)))?;
+                if file.metadata()?.len() == 0 {
+                    segments.push(None);
+                    continue;
+                }
+
+                // The recording must not be modified while it is mapped
+                let map = unsafe { Mmap::map(&file)? };
+                #[cfg(unix)]
+                let _ = map.advise(memmap2::Advice::Sequential);
+                segments.push(Some(map));
+            }
+
+            for record in &records {
+                let length = segments[record.segment as usize].as_ref().map_or(0, |map| map.len() as u64);
+                if record.offset + record.size > length {
+                    return Err(invalid_data(format!(
+                        "Index refers past the end of {}",
+                        segment_file_name(record.segment)
+                    )));
+                }
+            }
+
+            Ok((segments, records))
+        })?;
+
+        // Play frames back at their recorded spacing, closing up gaps and
+        // keeping video at least a frame interval apart
+        let mut offsets = Vec::with_capacity(records.len());
+        let mut video = Vec::new();
+        let mut offset = 0i64;
+        let mut previous_time = None;
+        let mut previous_video: Option<(i64, i64)> = None;
+        for (position, record) in records.iter().enumerate() {
+            let time = record_time(record);
+            let step = previous_time.map_or(0, |previous| time - previous);
+            previous_time = Some(time);
+
+            let gap = !(0..=MAX_GAP).contains(&step);
+            if !gap {
+                offset += step;
+            }
+            if record.kind == KIND_VIDEO {
+                if let (true, Some((video_offset, interval))) = (gap, previous_video) {
+                    offset = offset.max(video_offset + interval);
+                }
+                previous_video = Some((offset, frame_interval(record)));
+                video.push(position);
+            }
+            offsets.push(offset);
+        }
+
+        Ok(NdiPlayer {
+            directory,
+            segments,
+            records,
+            offsets,
+            video,
+            playing: AtomicBool::new(false),
+            stopping: AtomicBool::new(false),
+        })
+    }
+
+    /// Play the recording through a sender, blocking until it finishes
+    ///
+    /// Frames keep their recorded spacing, divided by `speed`. The GIL is
+    /// released between frames, so stop() can be called from another thread.
+    ///
+    /// Args:
+    ///     sender: The NdiSender to send through
+    ///     start: Timecode to start at, in 100ns units (default: the beginning)
+    ///     end: Timecode to stop before (default: the end)
+    ///     loop: Play the range repeatedly until stop() is called (default: False)
+    ///     speed: Playback speed factor (default: 1.0)
+    ///     video: Send video frames (default: True)
+    ///     audio: Send audio frames (default: True)
+    ///     metadata: Send metadata frames (default: True)
+    ///     original_timecodes: Send the recorded timecodes rather than letting
+    ///         the sender synthesize new ones (default: True)
+    ///
+    /// Returns:
+    ///     dict with video_frames, audio_frames, metadata_frames, late, loops
+    ///     and elapsed
+    #[pyo3(signature = (
+        sender,
+        start = None,
+        end = None,
+        r#loop = false,
+        speed = 1.0,
+        video = true,
+        audio = true,
+        metadata = true,
+        original_timecodes = true
+    ))]
+    fn play(
+        &self,
+        sender: PyRef<NdiSender>,
+        start: Option<i64>,
+        end: Option<i64>,
+        r#loop: bool,
+        speed: f64,
+        video: bool,
+        audio: bool,
+        metadata: bool,
+        original_timecodes: bool,
+        py: Python<'_>,
+    ) -> PyResult<Py<PyDict>> {
+        if !(speed > 0.0 && speed.is_finite()) {
+            return Err(PyValueError::new_err("speed must be positive"));
+        }
+        let sender = sender.transport()?;
+
+        let first = start.map_or(0, |start| self.position_at(start));
+        let last = end.map_or(self.records.len(), |end| self.position_at(end));
+        if first >= last {
+            return Err(PyValueError::new_err("The playback range is empty"));
+        }
+        if self.playing.swap(true, Ordering::SeqCst) {
+            return Err(PyRuntimeError::new_err("Player is already playing"));
+        }
+        self.stopping.store(false, Ordering::SeqCst);
+
+        // A loop lasts until the last video frame or audio block has played
+        let tail = self.records[first..last]
+            .iter()
+            .rev()
+            .map(record_interval)
+            .find(|&interval| interval > 0)
+            .unwrap_or(0);
+        let span = self.offsets[last - 1] - self.offsets[first] + tail;
+
+        let origin = Instant::now();
+        let mut stats = PlayStats::default();
+        let mut loop_offset = 0i64;
+        let result = 'playing: loop {
+            for position in first..last {
+                let record = &self.records[position];
+                let wanted = match record.kind {
+                    KIND_VIDEO => video,
+                    KIND_AUDIO => audio,
+                    KIND_METADATA => metadata,
+                    _ => false,
+                };
+                if !wanted {
+                    continue;
+                }
+                if let Err(error) = py.check_signals() {
+                    break 'playing Err(error);
+                }
+                if self.stopping.load(Ordering::SeqCst) {
+                    break 'playing Ok(());
+                }
+
+                let media_time = loop_offset + self.offsets[position] - self.offsets[first];
+                let deadline = origin + Duration::from_nanos((media_time as f64 * 100.0 / speed) as u64);
+                let timecode = if original_timecodes { record.timecode } else { TIMECODE_SYNTHESIZE };
+                let sent = py.allow_threads(|| {
+                    let now = Instant::now();
+                    let late = now > deadline + LATE_TOLERANCE;
+                    if now < deadline {
+                        sleep_until(deadline);
+                    }
+                    self.send(record, &sender, timecode).map(|_| late)
+                });
+
+                match sent {
+                    Ok(late) => {
+                        stats.late += late as u64;
+                        match record.kind {
+                            KIND_VIDEO => stats.video_frames += 1,
+                            KIND_AUDIO => stats.audio_frames += 1,
+                            _ => stats.metadata_frames += 1,
+                        }
+                    },
+                    Err(error) => break 'playing Err(error),
+                }
+            }
+
+            if !r#loop {
+                break Ok(());
+            }
+            stats.loops += 1;
+            loop_offset += span;
+        };
+        self.playing.store(false, Ordering::SeqCst);
+        result?;
+
+        let summary = PyDict::new(py);
+        summary.set_item("video_frames", stats.video_frames)?;
+        summary.set_item("audio_frames", stats.audio_frames)?;
+        summary.set_item("metadata_frames", stats.metadata_frames)?;
+        summary.set_item("late", stats.late)?;
+        summary.set_item("loops", stats.loops)?;
+        summary.set_item("elapsed", origin.elapsed().as_secs_f64())?;
+        Ok(summary.into())
+    }
+
+    /// Stop a play() call running on another thread
+    fn stop(&self) {
+        self.stopping.store(true, Ordering::SeqCst);
+    }
+
+    /// Get the index of the first video frame at or after a timecode
+    ///
+    /// Args:
+    ///     timecode: Timecode in 100ns units
+    ///
+    /// Returns:
+    ///     The video frame index, or frame_count if the timecode is past the end
+    fn seek(&self, timecode: i64) -> usize {
+        self.video_at(timecode)
+    }
+
+    /// Get the timecode of a video frame
+    ///
+    /// Args:
+    ///     index: Video frame index
+    fn timecode_at(&self, index: usize) -> PyResult<i64> {
+        match self.video.get(index) {
+            Some(&position) => Ok(self.records[position].timecode),
+            None => Err(PyValueError::new_err(format!("Frame index {} is out of range", index))),
+        }
+    }
+
+    /// Whether play() is running
+    #[getter]
+    fn get_is_playing(&self) -> bool {
+        self.playing.load(Ordering::SeqCst)
+    }
+
+    /// Directory of the recording
+    #[getter]
+    fn get_directory(&self) -> PathBuf {
+        self.directory.clone()
+    }
+
+    /// Number of video frames
+    #[getter]
+    fn get_frame_count(&self) -> usize {
+        self.video.len()
+    }
+
+    /// Number of frames of every type
+    #[getter]
+    fn get_record_count(&self) -> usize {
+        self.records.len()
+    }
+
+    /// Playback duration in seconds at normal speed
+    #[getter]
+    fn get_duration(&self) -> f64 {
+        let tail = self.records.iter().rev().map(record_interval).find(|&interval| interval > 0).unwrap_or(0);
+        match self.offsets.last() {
+            Some(&offset) => (offset + tail) as f64 / 10_000_000.0,
+            None => 0.0,
+        }
+    }
+
+    /// Timecode of the first video frame, or of the first frame of any type
+    /// in a recording without video; None if the recording is empty
+    #[getter]
+    fn get_start_timecode(&self) -> Option<i64> {
+        let position = self.video.first().copied().unwrap_or(0);
+        self.records.get(position).map(|record| record.timecode)
+    }
+
+    /// Timecode of the last video frame, or of the last frame of any type in
+    /// a recording without video; None if the recording is empty
+    #[getter]
+    fn get_end_timecode(&self) -> Option<i64> {
+        let position = self.video.last().copied().or(self.records.len().checked_sub(1))?;
+        Some(self.records[position].timecode)
+    }
+
+    /// Video format of the first frame as a dict with width, height,
+    /// four_cc, frame_rate_n and frame_rate_d, or None without video
+    #[getter]
+    fn get_video_format(&self, py: Python<'_>) -> PyResult<Option<Py<PyDict>>> {
+        let Some(&position) = self.video.first() else {
+            return Ok(None);
+        };
+
+        let format = video_format(&self.records[position]);
+        let info = PyDict::new(py);
+        info.set_item("width", format.width)?;
+        info.set_item("height", format.height)?;
+        info.set_item("four_cc", four_cc_name(format.four_cc))?;
+        info.set_item("frame_rate_n", format.frame_rate_n)?;
+        info.set_item("frame_rate_d", format.frame_rate_d)?;
+        Ok(Some(info.into()))
+    }
+
+    fn __repr__(&self) -> String {
+        format!("NdiPlayer('{}', frames={})", self.directory.display(), self.video.len())
+    }
+}
+
+/// Register playback-related Python classes
+pub fn register_player_functions(m: &PyModule) -> PyResult<()> {
+    m.add_class::<NdiPlayer>()?;
+
+    Ok(())
+}
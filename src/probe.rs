@@ -0,0 +1,656 @@
+// src/probe.rs
+//
+// Signal-QC probes on received video. Each frame is reduced natively to a
+// subsampled luma grid, from which black, frozen and colour-bar pictures are
+// detected. Only state changes and per-frame summaries reach Python; pixel
+// data never does.
+
+use pyo3::prelude::*;
+use pyo3::exceptions::{PyRuntimeError, PyValueError};
+use pyo3::types::{PyDict, PyList};
+use std::collections::VecDeque;
+use std::sync::atomic::{AtomicBool, Ordering};
+use std::sync::{Arc, Condvar, Mutex};
+use std::time::{Duration, Instant};
+
+use crate::convert::rgb_order;
+use crate::frame::{current_time_100ns, CapturedFrame, VideoFrameData, FOURCC_UYVY};
+use crate::receiver::{FrameSink, NdiReceiver, ReceiverCore};
+
+/// Most events kept for get_events() before the oldest are dropped
+const MAX_EVENTS: usize = 1024;
+
+/// Side of the block grid the frame hash is made from (8 x 8 = 64 bits)
+const HASH_GRID: usize = 8;
+
+/// Luma spread allowed down a column of colour bars
+const BAR_COLUMN_RANGE: u8 = 12;
+
+/// Luma step that starts a new colour bar
+const BAR_EDGE: f32 = 12.0;
+
+/// Subsampled luma of one frame, full range (0 black, 255 white)
+struct LumaGrid {
+    values: Vec<u8>,
+    columns: usize,
+    rows: usize,
+}
+
+impl LumaGrid {
+    /// Sample every `step`-th pixel of every `step`-th row, or None for
+    /// formats the probe cannot read
+    fn sample(frame: &VideoFrameData, step: usize, grid: &mut Vec<u8>) -> Option<(usize, usize)> {
+        let (width, height, stride) = (frame.width as usize, frame.height as usize, frame.line_stride);
+        if width == 0 || height == 0 {
+            return None;
+        }
+        let bytes_per_pixel = if frame.four_cc == FOURCC_UYVY { 2 } else { 4 };
+        if frame.data.len() < (height - 1) * stride + width * bytes_per_pixel {
+            return None;
+        }
+
+        let columns = (width + step - 1) / step;
+        let rows = (height + step - 1) / step;
+        grid.clear();
+        if frame.four_cc == FOURCC_UYVY {
+            // Expand limited-range luma to full range
+            let expand = |y: u8| ((y.saturating_sub(16) as u32 * 255 + 109) / 219).min(255) as u8;
+            for y in (0..height).step_by(step) {
+                let row = &frame.data[y * stride..];
+                grid.extend((0..width).step_by(step).map(|x| expand(row[x * 2 + 1])));
+            }
+        } else {
+            // BT.709 luma weights in 8-bit fixed point
+            let (r_at, b_at) = rgb_order(frame.four_cc)?;
+            for y in (0..height).step_by(step) {
+                let row = &frame.data[y * stride..];
+                grid.extend((0..width).step_by(step).map(|x| {
+                    let pixel = &row[x * 4..x * 4 + 4];
+                    ((54 * pixel[r_at] as u32 + 183 * pixel[1] as u32 + 19 * pixel[b_at] as u32 + 128) >> 8) as u8
+                }));
+            }
+        }
+        Some((columns, rows))
+    }
+
+    /// 64-bit average hash: one bit per grid block brighter than the frame
+    fn hash(&self, mean: f32) -> u64 {
+        let mut sums = [0u32; HASH_GRID * HASH_GRID];
+        let mut counts = [0u32; HASH_GRID * HASH_GRID];
+        for (y, row) in self.values.chunks_exact(self.columns).enumerate() {
+            let block_y = y * HASH_GRID / self.rows;
+            for (x, &value) in row.iter().enumerate() {
+                let block = block_y * HASH_GRID + x * HASH_GRID / self.columns;
+                sums[block] += value as u32;
+                counts[block] += 1;
+            }
+        }
+
+        let mut hash = 0u64;
+        for (bit, (&sum, &count)) in sums.iter().zip(&counts).enumerate() {
+            if count > 0 && sum as f32 / count as f32 > mean {
+                hash |= 1 << bit;
+            }
+        }
+        hash
+    }
+
+    /// Whether the grid looks like colour bars
+    ///
+    /// Bars are vertical stripes: the upper two thirds of every column is
+    /// flat, and at least six stripes step down in luma from left to right,
+    /// allowing one step up.
+    fn looks_like_bars(&self) -> bool {
+        let rows = (self.rows * 2 / 3).max(2).min(self.rows);
+        if self.columns < 16 || rows < 2 {
+            return false;
+        }
+
+        let mut flat = 0;
+        let mut means = Vec::with_capacity(self.columns);
+        for x in 0..self.columns {
+            let column = (0..rows).map(|y| self.values[y * self.columns + x]);
+            let (low, high, sum) = column.fold((255u8, 0u8, 0u32), |(low, high, sum), value| {
+                (low.min(value), high.max(value), sum + value as u32)
+            });
+            if high - low <= BAR_COLUMN_RANGE {
+                flat += 1;
+            }
+            means.push(sum as f32 / rows as f32);
+        }
+        if flat * 10 < self.columns * 9 {
+            return false;
+        }
+
+        // Split into stripes, ignoring slivers at stripe edges
+        let min_width = (self.columns / 20).max(1);
+        let mut stripes: Vec<f32> = Vec::new();
+        let (mut start, mut level) = (0, means[0]);
+        for x in 1..=self.columns {
+            if x == self.columns || (means[x] - level).abs() > BAR_EDGE {
+                if x - start >= min_width {
+                    let stripe = means[start..x].iter().sum::<f32>() / (x - start) as f32;
+                    if stripes.last().map_or(true, |last| (stripe - last).abs() > BAR_EDGE) {
+                        stripes.push(stripe);
+                    }
+                }
+                if x < self.columns {
+                    start = x;
+                    level = means[x];
+                }
+            }
+        }
+        if !(6..=9).contains(&stripes.len()) {
+            return false;
+        }
+        let rises = stripes.windows(2).filter(|pair| pair[1] > pair[0]).count();
+        rises <= 1
+    }
+}
+
+/// Statistics of one probed frame
+#[derive(Clone, Copy)]
+struct FrameSummary {
+    timecode: i64,
+    timestamp: i64,
+    mean: f32,
+    min: u8,
+    max: u8,
+    // Fraction of samples at or below the black level
+    black_ratio: f32,
+    // Mean absolute luma difference from the previous probed frame
+    difference: Option<f32>,
+    hash: u64,
+    // Bits of the hash that changed since the previous probed frame
+    hash_distance: Option<u32>,
+    bars: bool,
+}
+
+impl FrameSummary {
+    fn to_dict<'py>(&self, py: Python<'py>) -> PyResult<&'py PyDict> {
+        let summary = PyDict::new(py);
+        summary.set_item("timecode", self.timecode)?;
+        summary.set_item("timestamp", self.timestamp)?;
+        summary.set_item("mean_luma", self.mean)?;
+        summary.set_item("min_luma", self.min)?;
+        summary.set_item("max_luma", self.max)?;
+        summary.set_item("black_ratio", self.black_ratio)?;
+        summary.set_item("difference", self.difference)?;
+        summary.set_item("hash", self.hash)?;
+        summary.set_item("hash_distance", self.hash_distance)?;
+        summary.set_item("bars", self.bars)?;
+        Ok(summary)
+    }
+}
+
+/// Kinds of condition a probe reports
+#[derive(Clone, Copy, PartialEq, Eq)]
+enum Condition {
+    Freeze,
+    Black,
+    Bars,
+}
+
+impl Condition {
+    fn name(&self) -> &'static str {
+        match self {
+            Condition::Freeze => "freeze",
+            Condition::Black => "black",
+            Condition::Bars => "bars",
+        }
+    }
+}
+
+/// A condition entering or leaving the active state
+struct ProbeEvent {
+    condition: Condition,
+    active: bool,
+    timecode: i64,
+    // Wall-clock time of the change, in 100ns units since the Unix epoch
+    time: i64,
+    // How long the condition held before it ended
+    duration: Option<f64>,
+}
+
+impl ProbeEvent {
+    fn to_dict<'py>(&self, py: Python<'py>) -> PyResult<&'py PyDict> {
+        let event = PyDict::new(py);
+        event.set_item("kind", self.condition.name())?;
+        event.set_item("active", self.active)?;
+        event.set_item("timecode", self.timecode)?;
+        event.set_item("time", self.time)?;
+        event.set_item("duration", self.duration)?;
+        Ok(event)
+    }
+}
+
+/// Debounced state of one condition
+#[derive(Default)]
+struct ConditionState {
+    // When the condition started holding, if it holds
+    since: Option<Instant>,
+    active: bool,
+}
+
+impl ConditionState {
+    /// Update with whether the condition holds for the current frame,
+    /// returning the change of the active state, if any
+    fn update(&mut self, holds: bool, now: Instant, hold: Duration) -> Option<bool> {
+        if !holds {
+            self.since = None;
+            return std::mem::replace(&mut self.active, false).then_some(false);
+        }
+        let since = *self.since.get_or_insert(now);
+        if !self.active && now.duration_since(since) >= hold {
+            self.active = true;
+            return Some(true);
+        }
+        None
+    }
+}
+
+/// Thresholds of a probe
+struct ProbeSettings {
+    step: usize,
+    every_n: u64,
+    black_level: u8,
+    black_ratio: f32,
+    black_hold: Duration,
+    freeze_threshold: f32,
+    freeze_hold: Duration,
+    bars_hold: Duration,
+    history: usize,
+}
+
+/// Mutable state of a probe, updated on the capture thread
+#[derive(Default)]
+struct ProbeState {
+    // Luma grid of the previous probed frame
+    previous: Option<(Vec<u8>, usize, usize, u64)>,
+    grid: Vec<u8>,
+    freeze: ConditionState,
+    black: ConditionState,
+    bars: ConditionState,
+    last: Option<FrameSummary>,
+    summaries: VecDeque<FrameSummary>,
+    events: VecDeque<ProbeEvent>,
+    frames_seen: u64,
+    frames_probed: u64,
+    unsupported: u64,
+    dropped_events: u64,
+    event_counts: [u64; 3],
+}
+
+impl ProbeState {
+    fn push_event(&mut self, event: ProbeEvent) {
+        if event.active {
+            self.event_counts[event.condition as usize] += 1;
+        }
+        if self.events.len() >= MAX_EVENTS {
+            self.events.pop_front();
+            self.dropped_events += 1;
+        }
+        self.events.push_back(event);
+    }
+
+    fn probe(&mut self, frame: &VideoFrameData, settings: &ProbeSettings) {
+        self.frames_seen += 1;
+        if (self.frames_seen - 1) % settings.every_n != 0 {
+            return;
+        }
+        let mut grid = std::mem::take(&mut self.grid);
+        let (columns, rows) = match LumaGrid::sample(frame, settings.step, &mut grid) {
+            Some(size) => size,
+            None => {
+                self.grid = grid;
+                self.unsupported += 1;
+                return;
+            },
+        };
+        let grid = LumaGrid { values: grid, columns, rows };
+        self.frames_probed += 1;
+
+        let count = grid.values.len() as f32;
+        let (min, max, sum, black) = grid.values.iter().fold((255u8, 0u8, 0u64, 0u32), |(min, max, sum, black), &value| {
+            (min.min(value), max.max(value), sum + value as u64, black + (value <= settings.black_level) as u32)
+        });
+        let mean = sum as f32 / count;
+        let hash = grid.hash(mean);
+
+        // Frames of another size are never a freeze of the previous one
+        let (difference, hash_distance) = match &self.previous {
+            Some((previous, previous_columns, previous_rows, previous_hash))
+                if (*previous_columns, *previous_rows) == (columns, rows) =>
+            {
+                let total: u64 = previous
+                    .iter()
+                    .zip(&grid.values)
+                    .map(|(&a, &b)| (a as i32 - b as i32).unsigned_abs() as u64)
+                    .sum();
+                (Some(total as f32 / count), Some((previous_hash ^ hash).count_ones()))
+            },
+            _ => (None, None),
+        };
+
+        let summary = FrameSummary {
+            timecode: frame.timecode,
+            timestamp: frame.timestamp,
+            mean,
+            min,
+            max,
+            black_ratio: black as f32 / count,
+            difference,
+            hash,
+            hash_distance,
+            bars: grid.looks_like_bars(),
+        };
+
+        // Black frames and colour bars are also static; report them as
+        // black or bars only
+        let is_black = summary.black_ratio >= settings.black_ratio;
+        let is_frozen = !is_black && !summary.bars && hash_distance == Some(0) && difference.map_or(false, |d| d <= settings.freeze_threshold);
+        let now = Instant::now();
+        for (condition, holds, hold) in [
+            (Condition::Freeze, is_frozen, settings.freeze_hold),
+            (Condition::Black, is_black, settings.black_hold),
+            (Condition::Bars, summary.bars, settings.bars_hold),
+        ] {
+            let state = match condition {
+                Condition::Freeze => &mut self.freeze,
+                Condition::Black => &mut self.black,
+                Condition::Bars => &mut self.bars,
+            };
+            let since = state.since;
+            if let Some(active) = state.update(holds, now, hold) {
+                let duration = if active { None } else { since.map(|since| now.duration_since(since).as_secs_f64()) };
+                self.push_event(ProbeEvent {
+                    condition,
+                    active,
+                    timecode: frame.timecode,
+                    time: current_time_100ns(),
+                    duration,
+                });
+            }
+        }
+
+        if settings.history > 0 {
+            if self.summaries.len() >= settings.history {
+                self.summaries.pop_front();
+            }
+            self.summaries.push_back(summary);
+        }
+        self.last = Some(summary);
+        // The previous grid's allocation is reused for the next frame
+        let previous = self.previous.replace((grid.values, columns, rows, hash));
+        self.grid = previous.map(|(values, ..)| values).unwrap_or_default();
+    }
+}
+
+/// State shared between a probe and the receiver's capture thread
+struct ProbeShared {
+    settings: ProbeSettings,
+    state: Mutex<ProbeState>,
+    changed: Condvar,
+}
+
+impl FrameSink for ProbeShared {
+    fn on_frame(&self, frame: &CapturedFrame) {
+        if let CapturedFrame::Video(video) = frame {
+            let mut state = self.state.lock().unwrap();
+            let events = state.events.len();
+            state.probe(video, &self.settings);
+            if state.events.len() != events {
+                self.changed.notify_all();
+            }
+        }
+    }
+}
+
+/// Watches a receiver's video for freeze, black and colour bars
+///
+/// Frames are analysed on the receiver's capture thread from a luma grid of
+/// every `step`-th pixel. A condition becomes active once it has held for its
+/// hold time and ends on the first frame where it no longer holds.
+#[pyclass]
+struct NdiProbe {
+    // Kept so the receiver outlives the probe
+    receiver: Py<NdiReceiver>,
+    core: Arc<ReceiverCore>,
+    shared: Arc<ProbeShared>,
+    running: AtomicBool,
+}
+
+impl NdiProbe {
+    fn detach(&self) {
+        let sink: Arc<dyn FrameSink> = self.shared.clone();
+        self.core.remove_sink(&sink);
+        self.core.release_pump();
+    }
+}
+
+impl Drop for NdiProbe {
+    fn drop(&mut self) {
+        if self.running.swap(false, Ordering::AcqRel) {
+            self.detach();
+        }
+    }
+}
+
+#[pymethods]
+impl NdiProbe {
+    /// Create a probe on a receiver
+    ///
+    /// Args:
+    ///     receiver: The NdiReceiver whose video to probe
+    ///     step: Sample every step-th pixel of every step-th row (default: 8)
+    ///     every_n: Probe only every n-th frame (default: 1)
+    ///     black_level: Full-range luma at or below which a sample is black
+    ///         (default: 24)
+    ///     black_ratio: Fraction of black samples that makes a frame black
+    ///         (default: 0.98)
+    ///     black_seconds: Time a picture must stay black (default: 1.0)
+    ///     freeze_threshold: Largest mean luma difference between frames that
+    ///         still counts as frozen (default: 1.0)
+    ///     freeze_seconds: Time a picture must stay frozen (default: 2.0)
+    ///     bars_seconds: Time colour bars must stay up (default: 1.0)
+    ///     history: Frame summaries kept for get_summaries() (default: 256)
+    #[new]
+    #[pyo3(signature = (
+        receiver,
+        step = 8,
+        every_n = 1,
+        black_level = 24,
+        black_ratio = 0.98,
+        black_seconds = 1.0,
+        freeze_threshold = 1.0,
+        freeze_seconds = 2.0,
+        bars_seconds = 1.0,
+        history = 256
+    ))]
+    fn new(
+        receiver: Py<NdiReceiver>,
+        step: usize,
+        every_n: u64,
+        black_level: u8,
+        black_ratio: f32,
+        black_seconds: f64,
+        freeze_threshold: f32,
+        freeze_seconds: f64,
+        bars_seconds: f64,
+        history: usize,
+        py: Python<'_>,
+    ) -> PyResult<Self> {
+        if step == 0 || every_n == 0 {
+            return Err(PyValueError::new_err("step and every_n must be positive"));
+        }
+        if !(0.0..=1.0).contains(&black_ratio) {
+            return Err(PyValueError::new_err("black_ratio must be between 0 and 1"));
+        }
+        let hold = |seconds: f64| {
+            Duration::try_from_secs_f64(seconds).map_err(|_| PyValueError::new_err("Hold times must not be negative"))
+        };
+
+        let settings = ProbeSettings {
+            step,
+            every_n,
+            black_level,
+            black_ratio,
+            black_hold: hold(black_seconds)?,
+            freeze_threshold,
+            freeze_hold: hold(freeze_seconds)?,
+            bars_hold: hold(bars_seconds)?,
+            history,
+        };
+        let core = receiver.borrow(py).core();
+
+        Ok(NdiProbe {
+            receiver,
+            core,
+            shared: Arc::new(ProbeShared {
+                settings,
+                state: Mutex::new(ProbeState::default()),
+                changed: Condvar::new(),
+            }),
+            running: AtomicBool::new(false),
+        })
+    }
+
+    /// Start probing the receiver's video
+    fn start(&self) -> PyResult<()> {
+        if !self.core.is_open() {
+            return Err(PyRuntimeError::new_err("Receiver is not initialized"));
+        }
+        if self.running.swap(true, Ordering::AcqRel) {
+            return Err(PyRuntimeError::new_err("Probe is already running"));
+        }
+
+        self.core.add_sink(self.shared.clone());
+        self.core.retain_pump();
+        Ok(())
+    }
+
+    /// Stop probing; the state is kept until reset()
+    fn stop(&self, py: Python<'_>) {
+        if self.running.swap(false, Ordering::AcqRel) {
+            py.allow_threads(|| self.detach());
+        }
+        self.shared.changed.notify_all();
+    }
+
+    /// Take the state changes since the last call
+    ///
+    /// Args:
+    ///     timeout_ms: Time to wait for an event if there is none (default: 0)
+    ///
+    /// Returns:
+    ///     List of dicts with "kind" ("freeze", "black" or "bars"), "active",
+    ///     "timecode", "time" (100ns units since the Unix epoch) and
+    ///     "duration" (seconds the condition held, on the event ending it)
+    #[pyo3(signature = (timeout_ms = 0))]
+    fn get_events(&self, timeout_ms: u64, py: Python<'_>) -> PyResult<Py<PyList>> {
+        let events: Vec<ProbeEvent> = py.allow_threads(|| {
+            let timeout = Duration::from_millis(timeout_ms);
+            let state = self.shared.state.lock().unwrap();
+            let mut state = self
+                .shared
+                .changed
+                .wait_timeout_while(state, timeout, |state| {
+                    state.events.is_empty() && self.running.load(Ordering::Acquire)
+                })
+                .unwrap()
+                .0;
+            state.events.drain(..).collect()
+        });
+
+        let list = PyList::empty(py);
+        for event in &events {
+            list.append(event.to_dict(py)?)?;
+        }
+        Ok(list.into())
+    }
+
+    /// Take the summaries of the frames probed since the last call
+    ///
+    /// Returns:
+    ///     List of dicts with "timecode", "timestamp", "mean_luma",
+    ///     "min_luma", "max_luma", "black_ratio", "difference" (mean absolute
+    ///     luma change from the previous probed frame), "hash" (64-bit
+    ///     average hash), "hash_distance" (bits changed) and "bars"
+    fn get_summaries(&self, py: Python<'_>) -> PyResult<Py<PyList>> {
+        let summaries: Vec<FrameSummary> = self.shared.state.lock().unwrap().summaries.drain(..).collect();
+        let list = PyList::empty(py);
+        for summary in &summaries {
+            list.append(summary.to_dict(py)?)?;
+        }
+        Ok(list.into())
+    }
+
+    /// Forget the probe state, pending events and counters
+    fn reset(&self) {
+        *self.shared.state.lock().unwrap() = ProbeState::default();
+    }
+
+    /// Whether the probe is attached to the receiver
+    #[getter]
+    fn get_is_running(&self) -> bool {
+        self.running.load(Ordering::Acquire)
+    }
+
+    /// Whether the picture is frozen
+    #[getter]
+    fn get_is_frozen(&self) -> bool {
+        self.shared.state.lock().unwrap().freeze.active
+    }
+
+    /// Whether the picture is black
+    #[getter]
+    fn get_is_black(&self) -> bool {
+        self.shared.state.lock().unwrap().black.active
+    }
+
+    /// Whether the picture shows colour bars
+    #[getter]
+    fn get_has_bars(&self) -> bool {
+        self.shared.state.lock().unwrap().bars.active
+    }
+
+    /// Summary of the last probed frame, or None
+    #[getter]
+    fn get_last_summary(&self, py: Python<'_>) -> PyResult<Option<Py<PyDict>>> {
+        let last = self.shared.state.lock().unwrap().last;
+        match last {
+            Some(summary) => Ok(Some(summary.to_dict(py)?.into())),
+            None => Ok(None),
+        }
+    }
+
+    /// The receiver being probed
+    #[getter]
+    fn get_receiver(&self, py: Python<'_>) -> Py<NdiReceiver> {
+        self.receiver.clone_ref(py)
+    }
+
+    /// Probe statistics: frames_seen, frames_probed, unsupported (frames in
+    /// formats the probe cannot read), freeze_events, black_events and
+    /// bars_events (times each condition became active) and dropped_events
+    #[getter]
+    fn get_stats(&self, py: Python<'_>) -> PyResult<Py<PyDict>> {
+        let state = self.shared.state.lock().unwrap();
+        let stats = PyDict::new(py);
+        stats.set_item("frames_seen", state.frames_seen)?;
+        stats.set_item("frames_probed", state.frames_probed)?;
+        stats.set_item("unsupported", state.unsupported)?;
+        stats.set_item("freeze_events", state.event_counts[Condition::Freeze as usize])?;
+        stats.set_item("black_events", state.event_counts[Condition::Black as usize])?;
+        stats.set_item("bars_events", state.event_counts[Condition::Bars as usize])?;
+        stats.set_item("dropped_events", state.dropped_events)?;
+        Ok(stats.into())
+    }
+}
+
+/// Register probe classes
+pub fn register_probe_functions(m: &PyModule) -> PyResult<()> {
+    m.add_class::<NdiProbe>()?;
+
+    Ok(())
+}
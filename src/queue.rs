@@ -0,0 +1,230 @@
+// src/queue.rs
+//
+// Bounded queues of captured frames, filled on a receiver's capture thread
+// and drained from Python. A queue can expose a file descriptor that is
+// readable while frames are waiting, so event loops built on selectors,
+// select or epoll can multiplex receivers with sockets and timers.
+
+use std::collections::VecDeque;
+use std::io;
+use std::sync::atomic::{AtomicU64, Ordering};
+use std::sync::{Condvar, Mutex};
+use std::time::Duration;
+
+use crate::frame::CapturedFrame;
+use crate::receiver::FrameSink;
+
+/// Readiness signal for event loops: a connected socket pair whose reading
+/// end is readable while the signal is raised
+#[cfg(unix)]
+struct WakeSignal {
+    reader: std::os::unix::net::UnixStream,
+    writer: std::os::unix::net::UnixStream,
+}
+
+#[cfg(unix)]
+impl WakeSignal {
+    fn new() -> io::Result<Self> {
+        let (reader, writer) = std::os::unix::net::UnixStream::pair()?;
+        reader.set_nonblocking(true)?;
+        writer.set_nonblocking(true)?;
+        Ok(WakeSignal { reader, writer })
+    }
+
+    fn raise(&self) {
+        use std::io::Write;
+        // A full socket buffer is already readable
+        let _ = (&self.writer).write(&[1]);
+    }
+
+    fn clear(&self) {
+        use std::io::Read;
+        let mut drained = [0u8; 64];
+        while matches!((&self.reader).read(&mut drained), Ok(read) if read > 0) {}
+    }
+
+    fn fileno(&self) -> i64 {
+        use std::os::unix::io::AsRawFd;
+        self.reader.as_raw_fd() as i64
+    }
+}
+
+#[cfg(not(unix))]
+struct WakeSignal;
+
+#[cfg(not(unix))]
+impl WakeSignal {
+    fn new() -> io::Result<Self> {
+        Err(io::Error::new(io::ErrorKind::Unsupported, "Pollable receivers require a Unix platform"))
+    }
+
+    fn raise(&self) {}
+
+    fn clear(&self) {}
+
+    fn fileno(&self) -> i64 {
+        -1
+    }
+}
+
+/// Frames waiting in a queue, and the signal raised while there are any
+#[derive(Default)]
+struct QueueState {
+    frames: VecDeque<CapturedFrame>,
+    signal: Option<WakeSignal>,
+}
+
+/// Which frame a full queue gives up
+#[derive(Clone, Copy, Debug, PartialEq, Eq)]
+pub enum DropPolicy {
+    /// Drop the oldest queued frame, keeping the consumer close to live
+    DropOldest,
+    /// Drop the arriving frame, keeping a contiguous run of frames
+    DropNewest,
+}
+
+impl DropPolicy {
+    pub fn from_name(name: &str) -> Option<Self> {
+        match name {
+            "drop_oldest" => Some(DropPolicy::DropOldest),
+            "drop_newest" => Some(DropPolicy::DropNewest),
+            _ => None,
+        }
+    }
+
+    pub fn name(&self) -> &'static str {
+        match self {
+            DropPolicy::DropOldest => "drop_oldest",
+            DropPolicy::DropNewest => "drop_newest",
+        }
+    }
+}
+
+/// Bounded queue of captured frames
+pub struct FrameQueue {
+    state: Mutex<QueueState>,
+    ready: Condvar,
+    depth: usize,
+    policy: DropPolicy,
+    // Frame kinds the queue accepts: video, audio and metadata
+    kinds: [bool; 3],
+    received: AtomicU64,
+    dropped: AtomicU64,
+}
+
+impl FrameQueue {
+    /// Queue every kind of frame, dropping the oldest when full
+    pub fn new(depth: usize) -> Self {
+        FrameQueue::with_options(depth, DropPolicy::DropOldest, true, true, true)
+    }
+
+    pub fn with_options(depth: usize, policy: DropPolicy, video: bool, audio: bool, metadata: bool) -> Self {
+        FrameQueue {
+            state: Mutex::new(QueueState::default()),
+            ready: Condvar::new(),
+            depth: depth.max(1),
+            policy,
+            kinds: [video, audio, metadata],
+            received: AtomicU64::new(0),
+            dropped: AtomicU64::new(0),
+        }
+    }
+
+    /// Add a frame, dropping one as the policy says if the queue is full
+    pub fn push(&self, frame: CapturedFrame) {
+        let mut state = self.state.lock().unwrap();
+        self.received.fetch_add(1, Ordering::Relaxed);
+        if state.frames.len() >= self.depth {
+            self.dropped.fetch_add(1, Ordering::Relaxed);
+            match self.policy {
+                DropPolicy::DropOldest => {
+                    state.frames.pop_front();
+                },
+                DropPolicy::DropNewest => return,
+            }
+        }
+        state.frames.push_back(frame);
+        if state.frames.len() == 1 {
+            if let Some(signal) = &state.signal {
+                signal.raise();
+            }
+        }
+        self.ready.notify_one();
+    }
+
+    /// Take the oldest frame if there is one
+    pub fn try_pop(&self) -> Option<CapturedFrame> {
+        Self::take(&mut self.state.lock().unwrap())
+    }
+
+    /// Take the oldest frame, waiting up to `timeout` for one
+    pub fn pop(&self, timeout: Duration) -> Option<CapturedFrame> {
+        let state = self.state.lock().unwrap();
+        let mut state = self.ready.wait_timeout_while(state, timeout, |state| state.frames.is_empty()).unwrap().0;
+        Self::take(&mut state)
+    }
+
+    fn take(state: &mut QueueState) -> Option<CapturedFrame> {
+        let frame = state.frames.pop_front();
+        if frame.is_some() && state.frames.is_empty() {
+            if let Some(signal) = &state.signal {
+                signal.clear();
+            }
+        }
+        frame
+    }
+
+    /// File descriptor that is readable while frames are waiting
+    ///
+    /// The descriptor is created on first use and lives as long as the queue.
+    pub fn fileno(&self) -> io::Result<i64> {
+        let mut state = self.state.lock().unwrap();
+        if state.signal.is_none() {
+            let signal = WakeSignal::new()?;
+            if !state.frames.is_empty() {
+                signal.raise();
+            }
+            state.signal = Some(signal);
+        }
+        Ok(state.signal.as_ref().map_or(-1, |signal| signal.fileno()))
+    }
+
+    /// Number of frames waiting
+    pub fn len(&self) -> usize {
+        self.state.lock().unwrap().frames.len()
+    }
+
+    /// Most frames the queue holds
+    pub fn depth(&self) -> usize {
+        self.depth
+    }
+
+    pub fn policy(&self) -> DropPolicy {
+        self.policy
+    }
+
+    /// Number of frames offered to the queue, including dropped ones
+    pub fn received(&self) -> u64 {
+        self.received.load(Ordering::Relaxed)
+    }
+
+    /// Number of frames dropped because the queue was full
+    pub fn dropped(&self) -> u64 {
+        self.dropped.load(Ordering::Relaxed)
+    }
+}
+
+impl FrameSink for FrameQueue {
+    fn on_frame(&self, frame: &CapturedFrame) {
+        let accepted = match frame {
+            CapturedFrame::Video(_) => self.kinds[0],
+            CapturedFrame::Audio(_) => self.kinds[1],
+            CapturedFrame::Metadata(_) => self.kinds[2],
+            CapturedFrame::None | CapturedFrame::Error => false,
+        };
+        // Payloads are reference-counted, so queued frames share the capture
+        if accepted {
+            self.push(frame.clone());
+        }
+    }
+}
@@ -2,9 +2,34 @@
 
 use pyo3::prelude::*;
 use ndi;
-use pyo3::exceptions::PyRuntimeError;
-use pyo3::types::{PyBytes, PyDict};
-use std::time::Duration;
+use pyo3::exceptions::{PyRuntimeError, PyValueError};
+use pyo3::ffi;
+use pyo3::sync::GILOnceCell;
+use pyo3::types::{PyBytes, PyDict, PyList};
+use std::os::raw::c_int;
+use std::collections::VecDeque;
+use std::path::PathBuf;
+use std::sync::atomic::{AtomicBool, AtomicU64, Ordering};
+use std::sync::{Arc, Mutex, RwLock};
+use std::thread::JoinHandle;
+use std::time::{Duration, Instant};
+
+use crate::audio_stream;
+use crate::backend::Backend;
+use crate::decimate::{VideoDecimator, VideoHeader};
+use crate::discovery::{FindOptions, NdiFinder};
+use crate::hub;
+use crate::frame::{
+    copy_ndi_audio, copy_ndi_video, current_time_100ns, export_readonly_bytes, four_cc_name, AudioFrameData,
+    CapturedFrame, MetadataFrameData, Payload, VideoFrameData,
+};
+use crate::latency::LatencyTracker;
+use crate::metadata::{self, parse_xml, root_tag, MetadataFilter};
+use crate::meters;
+use crate::probe;
+use crate::queue::FrameQueue;
+use crate::loopback::{self, LoopbackQueue};
+use crate::source_cache::{unix_now, SourceCache, DEFAULT_MAX_AGE};
 
 /// Frame type enum exposed to Python
 #[pyclass]
@@ -35,21 +60,46 @@ struct NdiVideoFrame {
     #[pyo3(get)]
     timecode: i64,
     
+    // Time the sender submitted the frame (100ns units since the Unix epoch, 0 if unknown)
+    #[pyo3(get)]
+    timestamp: i64,
+    
     #[pyo3(get)]
     data_size: usize,
     
-    // We're keeping the frame data as a reference inside a PyBytes object
-    data: Option<Py<PyBytes>>,
+    // Frame data, either supplied from Python or captured natively
+    data: Option<Payload>,
+
+    // Bytes object returned by get_data(), built on the first call
+    bytes: GILOnceCell<Py<PyBytes>>,
     
     // FourCC video format
     #[pyo3(get)]
     four_cc: u32,
 }
 
+impl NdiVideoFrame {
+    /// Wrap a natively captured video frame without copying its data
+    fn from_native(video: VideoFrameData) -> Self {
+        NdiVideoFrame {
+            width: video.width,
+            height: video.height,
+            frame_rate_n: video.frame_rate_n,
+            frame_rate_d: video.frame_rate_d,
+            timecode: video.timecode,
+            timestamp: video.timestamp,
+            data_size: video.data.len(),
+            data: Some(Payload::Video(video.data)),
+            bytes: GILOnceCell::new(),
+            four_cc: video.four_cc,
+        }
+    }
+}
+
 #[pymethods]
 impl NdiVideoFrame {
     #[new]
-    #[pyo3(signature = (width, height, frame_rate_n, frame_rate_d, timecode, data_size, data = None, four_cc = 0))]
+    #[pyo3(signature = (width, height, frame_rate_n, frame_rate_d, timecode, data_size, data = None, four_cc = 0, timestamp = 0))]
     fn new(
         width: u32,
         height: u32,
@@ -59,6 +109,7 @@ impl NdiVideoFrame {
         data_size: usize,
         data: Option<Py<PyBytes>>,
         four_cc: u32,
+        timestamp: i64,
     ) -> Self {
         NdiVideoFrame {
             width,
@@ -66,33 +117,34 @@ impl NdiVideoFrame {
             frame_rate_n,
             frame_rate_d,
             timecode,
+            timestamp,
             data_size,
-            data,
+            data: data.map(Payload::Python),
+            bytes: GILOnceCell::new(),
             four_cc,
         }
     }
 
-    /// Get a copy of the frame data
-    fn get_data(&self, _py: Python<'_>) -> Option<Py<PyBytes>> {
-        self.data.clone()
+    /// Get the frame data as bytes
+    ///
+    /// Natively captured data is copied into a bytes object on the first call
+    /// only; later calls return the same object. The frame also supports the
+    /// buffer protocol, so `numpy.frombuffer(frame, dtype=numpy.uint8)` reads
+    /// the data without any copy.
+    fn get_data(&self, py: Python<'_>) -> Option<Py<PyBytes>> {
+        let data = self.data.as_ref()?;
+        Some(self.bytes.get_or_init(py, || data.to_bytes(py)).clone_ref(py))
+    }
+
+    unsafe fn __getbuffer__(slf: PyRef<'_, Self>, view: *mut ffi::Py_buffer, flags: c_int) -> PyResult<()> {
+        let owner = slf.as_ptr();
+        let data = slf.data.as_ref().map_or(&[][..], |data| data.as_slice(slf.py()));
+        unsafe { export_readonly_bytes(owner, data, view, flags) }
     }
     
     /// Get the FourCC format as a string
     fn get_four_cc_name(&self) -> String {
-        match self.four_cc {
-            0x59565955 => "UYVY".to_string(), // UYVY format
-            0x41565559 => "UYVA".to_string(), // UYVA format
-            0x36313250 => "P216".to_string(), // P216 format
-            0x36314150 => "PA16".to_string(), // PA16 format
-            0x32315659 => "YV12".to_string(), // YV12 format
-            0x30323449 => "I420".to_string(), // I420 format
-            0x3231564E => "NV12".to_string(), // NV12 format
-            0x41524742 => "BGRA".to_string(), // BGRA format
-            0x41424752 => "RGBA".to_string(), // RGBA format
-            0x58524742 => "BGRX".to_string(), // BGRX format
-            0x58424752 => "RGBX".to_string(), // RGBX format
-            _ => format!("Unknown (0x{:08X})", self.four_cc),
-        }
+        four_cc_name(self.four_cc)
     }
 }
 
@@ -111,17 +163,39 @@ struct NdiAudioFrame {
     #[pyo3(get)]
     timecode: i64,
     
+    #[pyo3(get)]
+    timestamp: i64,
+    
     #[pyo3(get)]
     data_size: usize,
     
-    // We're keeping the audio data as a reference inside a PyBytes object
-    data: Option<Py<PyBytes>>,
+    // Planar float samples, either supplied from Python or captured natively
+    data: Option<Payload>,
+
+    // Bytes object returned by get_data(), built on the first call
+    bytes: GILOnceCell<Py<PyBytes>>,
+}
+
+impl NdiAudioFrame {
+    /// Wrap a natively captured audio frame without copying its samples
+    fn from_native(audio: AudioFrameData) -> Self {
+        NdiAudioFrame {
+            sample_rate: audio.sample_rate,
+            num_channels: audio.num_channels,
+            num_samples: audio.num_samples,
+            timecode: audio.timecode,
+            timestamp: audio.timestamp,
+            data_size: audio.data.len() * 4,
+            data: Some(Payload::Audio(audio.data)),
+            bytes: GILOnceCell::new(),
+        }
+    }
 }
 
 #[pymethods]
 impl NdiAudioFrame {
     #[new]
-    #[pyo3(signature = (sample_rate, num_channels, num_samples, timecode, data_size, data = None))]
+    #[pyo3(signature = (sample_rate, num_channels, num_samples, timecode, data_size, data = None, timestamp = 0))]
     fn new(
         sample_rate: u32,
         num_channels: u32,
@@ -129,20 +203,33 @@ impl NdiAudioFrame {
         timecode: i64,
         data_size: usize,
         data: Option<Py<PyBytes>>,
+        timestamp: i64,
     ) -> Self {
         NdiAudioFrame {
             sample_rate,
             num_channels,
             num_samples,
             timecode,
+            timestamp,
             data_size,
-            data,
+            data: data.map(Payload::Python),
+            bytes: GILOnceCell::new(),
         }
     }
 
-    /// Get a copy of the audio data
-    fn get_data(&self, _py: Python<'_>) -> Option<Py<PyBytes>> {
-        self.data.clone()
+    /// Get the planar float32 samples as bytes
+    ///
+    /// As with video frames, the bytes object is built once and the frame
+    /// supports the buffer protocol for copy-free access.
+    fn get_data(&self, py: Python<'_>) -> Option<Py<PyBytes>> {
+        let data = self.data.as_ref()?;
+        Some(self.bytes.get_or_init(py, || data.to_bytes(py)).clone_ref(py))
+    }
+
+    unsafe fn __getbuffer__(slf: PyRef<'_, Self>, view: *mut ffi::Py_buffer, flags: c_int) -> PyResult<()> {
+        let owner = slf.as_ptr();
+        let data = slf.data.as_ref().map_or(&[][..], |data| data.as_slice(slf.py()));
+        unsafe { export_readonly_bytes(owner, data, view, flags) }
     }
 }
 
@@ -152,6 +239,9 @@ struct NdiMetadataFrame {
     #[pyo3(get)]
     timecode: i64,
 
+    #[pyo3(get)]
+    timestamp: i64,
+
     #[pyo3(get)]
     data: String,
 }
@@ -159,37 +249,331 @@ struct NdiMetadataFrame {
 #[pymethods]
 impl NdiMetadataFrame {
     #[new]
-    fn new(timecode: i64, data: String) -> Self {
+    #[pyo3(signature = (timecode, data, timestamp = 0))]
+    fn new(timecode: i64, data: String, timestamp: i64) -> Self {
         NdiMetadataFrame {
             timecode,
+            timestamp,
             data,
         }
     }
+
+    /// Name of the first XML element, found without parsing the whole frame
+    #[getter]
+    fn get_tag(&self) -> Option<String> {
+        root_tag(&self.data).map(str::to_string)
+    }
+
+    /// Attributes of the first XML element as a dict of strings
+    #[getter]
+    fn get_attributes(&self, py: Python<'_>) -> PyResult<Py<PyDict>> {
+        let roots = parse_xml(&self.data).map_err(PyValueError::new_err)?;
+        match roots.first() {
+            Some(root) => Ok(root.attributes_dict(py)?.into()),
+            None => Ok(PyDict::new(py).into()),
+        }
+    }
+
+    /// Parse the XML natively
+    ///
+    /// Returns:
+    ///     List of the top-level elements, as from parse_metadata()
+    fn parse(&self, py: Python<'_>) -> PyResult<Py<PyList>> {
+        metadata::parse_metadata(&self.data, py)
+    }
 }
 
-/// Python class representing an NDI receiver
-#[pyclass]
-struct NdiReceiver {
-    receiver: Option<ndi::recv::Recv>,
-    connected_source: Option<String>,
+/// Transport a receiver captures frames from
+enum RecvBackend {
+    Ndi(ndi::recv::Recv),
+    // Queue of the connected loopback source, if any
+    Loopback(Option<Arc<LoopbackQueue>>),
 }
 
-#[pymethods]
-impl NdiReceiver {
-    #[new]
-    fn new() -> PyResult<Self> {
+/// Copy a frame captured by the SDK out of SDK memory
+///
+/// The SDK frame is freed when it is dropped.
+fn copy_ndi_frame(
+    frame_type: ndi::FrameType,
+    video_data: Option<ndi::VideoData>,
+    audio_data: Option<ndi::AudioData>,
+    metadata_data: Option<ndi::MetaData>,
+) -> CapturedFrame {
+    match frame_type {
+        ndi::FrameType::Video => match video_data {
+            Some(video) => CapturedFrame::Video(copy_ndi_video(&video)),
+            None => CapturedFrame::None,
+        },
+        ndi::FrameType::Audio => match audio_data {
+            Some(audio) => CapturedFrame::Audio(copy_ndi_audio(&audio)),
+            None => CapturedFrame::None,
+        },
+        ndi::FrameType::Metadata => match metadata_data {
+            Some(metadata) => CapturedFrame::Metadata(MetadataFrameData {
+                timecode: metadata.timecode(),
+                // Metadata frames carry no timestamp in the SDK
+                timestamp: 0,
+                data: metadata.data(),
+            }),
+            None => CapturedFrame::None,
+        },
+        ndi::FrameType::None => CapturedFrame::None,
+        _ => CapturedFrame::Error, // Handle any other cases
+    }
+}
+
+/// Capture the next frame into native memory
+///
+/// Video frames the decimator skips are dropped before they are copied and
+/// returned as `CapturedFrame::None`. With `latest_only`, frames already
+/// queued behind a video frame are captured straight away: newer video
+/// supersedes it, and audio and metadata go to `pending`.
+///
+/// This does not need the GIL, so callers should release it while waiting.
+fn capture_frame(
+    backend: &mut RecvBackend,
+    timeout_ms: u32,
+    decimator: &mut VideoDecimator,
+    pending: &mut VecDeque<CapturedFrame>,
+) -> CapturedFrame {
+    match backend {
+        RecvBackend::Ndi(receiver) => {
+            // Create mutable options to hold the received frames
+            let mut video_data = None;
+            let mut audio_data = None;
+            let mut metadata_data = None;
+            
+            // Capture a frame - ndi crate expects u128 value
+            let frame_type = receiver.capture_all(
+                &mut video_data,
+                &mut audio_data,
+                &mut metadata_data,
+                timeout_ms.into() // Convert u32 to u128
+            );
+            
+            let mut video = match (frame_type, video_data) {
+                (ndi::FrameType::Video, Some(video)) => video,
+                (frame_type, video_data) => return copy_ndi_frame(frame_type, video_data, audio_data, metadata_data),
+            };
+            let now = Instant::now();
+            if decimator.latest_only() {
+                loop {
+                    let mut newer_video = None;
+                    let mut newer_audio = None;
+                    let mut newer_metadata = None;
+                    match receiver.capture_all(&mut newer_video, &mut newer_audio, &mut newer_metadata, 0) {
+                        ndi::FrameType::None => break,
+                        ndi::FrameType::Video => {
+                            if let Some(newer) = newer_video {
+                                decimator.supersede(now, &VideoHeader::from_ndi(&video));
+                                video = newer;
+                            }
+                        },
+                        frame_type => match copy_ndi_frame(frame_type, newer_video, newer_audio, newer_metadata) {
+                            CapturedFrame::None => break,
+                            frame => pending.push_back(frame),
+                        },
+                    }
+                }
+            }
+            if decimator.admit(now, &VideoHeader::from_ndi(&video)) {
+                CapturedFrame::Video(copy_ndi_video(&video))
+            } else {
+                CapturedFrame::None
+            }
+        },
+        RecvBackend::Loopback(Some(queue)) => {
+            let mut video = match queue.pop(Duration::from_millis(timeout_ms as u64)) {
+                CapturedFrame::Video(video) => video,
+                frame => return frame,
+            };
+            let now = Instant::now();
+            if decimator.latest_only() {
+                loop {
+                    match queue.pop(Duration::ZERO) {
+                        CapturedFrame::None => break,
+                        CapturedFrame::Video(newer) => {
+                            decimator.supersede(now, &VideoHeader::from_frame(&video));
+                            video = newer;
+                        },
+                        frame => pending.push_back(frame),
+                    }
+                }
+            }
+            if decimator.admit(now, &VideoHeader::from_frame(&video)) { CapturedFrame::Video(video) } else { CapturedFrame::None }
+        },
+        RecvBackend::Loopback(None) => {
+            // An unconnected receiver waits out the timeout, like the SDK does
+            std::thread::sleep(Duration::from_millis(timeout_ms as u64));
+            CapturedFrame::None
+        },
+    }
+}
+
+/// Convert a natively captured frame into the Python frame classes
+pub fn captured_to_py(captured: CapturedFrame, py: Python<'_>) -> PyResult<(FrameType, PyObject)> {
+    match captured {
+        CapturedFrame::Video(video) => {
+            let frame = NdiVideoFrame::from_native(video);
+            Ok((FrameType::Video, Py::new(py, frame)?.into_py(py)))
+        },
+        CapturedFrame::Audio(audio) => {
+            let frame = NdiAudioFrame::from_native(audio);
+            Ok((FrameType::Audio, Py::new(py, frame)?.into_py(py)))
+        },
+        CapturedFrame::Metadata(metadata) => {
+            let frame = NdiMetadataFrame::new(metadata.timecode, metadata.data, metadata.timestamp);
+            Ok((FrameType::Metadata, Py::new(py, frame)?.into_py(py)))
+        },
+        CapturedFrame::None => Ok((FrameType::None, py.None())),
+        CapturedFrame::Error => Ok((FrameType::Error, py.None())),
+    }
+}
+
+/// Consumer of natively captured frames
+///
+/// Sinks are called on whichever thread captured the frame, with the GIL
+/// released and the receiver's sink list locked, so they must not block.
+pub trait FrameSink: Send + Sync {
+    fn on_frame(&self, frame: &CapturedFrame);
+}
+
+/// Timeout of each capture made by the background capture thread
+const PUMP_TIMEOUT_MS: u32 = 100;
+
+/// Time a connect spends looking for its source
+pub const CONNECT_TIMEOUT: Duration = Duration::from_secs(3);
+
+/// Time a source known from the discovery cache is looked for in the background
+const CACHED_CONNECT_TIMEOUT: Duration = Duration::from_secs(30);
+
+/// Pause between looks at the discovered sources while connecting
+const DISCOVERY_POLL: Duration = Duration::from_millis(100);
+
+/// Background thread capturing frames for the receiver's sinks
+struct Pump {
+    stop: Arc<AtomicBool>,
+    thread: JoinHandle<()>,
+}
+
+/// The background capture thread and the number of components relying on it
+#[derive(Default)]
+struct PumpState {
+    pump: Option<Pump>,
+    users: usize,
+}
+
+/// Which streams an NDI receiver asks its source for
+#[derive(Clone, Copy, Debug, Default, PartialEq, Eq)]
+pub enum Bandwidth {
+    /// Full-resolution video, audio and metadata
+    #[default]
+    Highest,
+    /// Proxy (low-resolution) video, audio and metadata
+    Lowest,
+    /// Audio and metadata only
+    AudioOnly,
+    /// Metadata only
+    MetadataOnly,
+}
+
+impl Bandwidth {
+    pub fn from_name(name: &str) -> PyResult<Self> {
+        match name {
+            "highest" => Ok(Bandwidth::Highest),
+            "lowest" => Ok(Bandwidth::Lowest),
+            "audio_only" => Ok(Bandwidth::AudioOnly),
+            "metadata_only" => Ok(Bandwidth::MetadataOnly),
+            _ => Err(PyValueError::new_err(format!(
+                "Unknown bandwidth '{}', expected 'highest', 'lowest', 'audio_only' or 'metadata_only'",
+                name
+            ))),
+        }
+    }
+
+    pub fn name(&self) -> &'static str {
+        match self {
+            Bandwidth::Highest => "highest",
+            Bandwidth::Lowest => "lowest",
+            Bandwidth::AudioOnly => "audio_only",
+            Bandwidth::MetadataOnly => "metadata_only",
+        }
+    }
+
+    fn to_ndi(self) -> ndi::recv::RecvBandwidth {
+        match self {
+            Bandwidth::Highest => ndi::recv::RecvBandwidth::Highest,
+            Bandwidth::Lowest => ndi::recv::RecvBandwidth::Lowest,
+            Bandwidth::AudioOnly => ndi::recv::RecvBandwidth::AudioOnly,
+            Bandwidth::MetadataOnly => ndi::recv::RecvBandwidth::MetadataOnly,
+        }
+    }
+}
+
+/// State of a receiver shared with its background capture thread and sinks
+pub struct ReceiverCore {
+    backend: Backend,
+    bandwidth: Bandwidth,
+    receiver: Mutex<Option<RecvBackend>>,
+    connected_source: Mutex<Option<String>>,
+    // Bumped by every connect, so a background connect still looking for
+    // its source knows when it has been superseded
+    connect_generation: AtomicU64,
+    connecting: AtomicBool,
+    connect_error: Mutex<Option<String>>,
+    latency: Mutex<Option<LatencyTracker>>,
+    metadata_filter: RwLock<Option<MetadataFilter>>,
+    filtered_metadata: AtomicU64,
+    decimator: Mutex<VideoDecimator>,
+    // Frames captured while skipping superseded video, delivered next
+    pending: Mutex<VecDeque<CapturedFrame>>,
+    sinks: Mutex<Vec<Arc<dyn FrameSink>>>,
+    pump: Mutex<PumpState>,
+}
+
+impl ReceiverCore {
+    fn new(backend: Backend, bandwidth: Bandwidth, receiver: RecvBackend, latency: Option<LatencyTracker>) -> Self {
+        ReceiverCore {
+            backend,
+            bandwidth,
+            receiver: Mutex::new(Some(receiver)),
+            connected_source: Mutex::new(None),
+            connect_generation: AtomicU64::new(0),
+            connecting: AtomicBool::new(false),
+            connect_error: Mutex::new(None),
+            latency: Mutex::new(latency),
+            metadata_filter: RwLock::new(None),
+            filtered_metadata: AtomicU64::new(0),
+            decimator: Mutex::new(VideoDecimator::default()),
+            pending: Mutex::new(VecDeque::new()),
+            sinks: Mutex::new(Vec::new()),
+            pump: Mutex::new(PumpState::default()),
+        }
+    }
+
+    /// Create an unconnected receiver on a transport
+    pub fn open(backend: Backend, latency: Option<LatencyTracker>) -> PyResult<Self> {
+        ReceiverCore::open_with_bandwidth(backend, Bandwidth::Highest, latency)
+    }
+
+    /// Create an unconnected receiver asking for the given streams
+    ///
+    /// Loopback sources have no proxy stream, so the bandwidth only applies
+    /// to NDI.
+    pub fn open_with_bandwidth(backend: Backend, bandwidth: Bandwidth, latency: Option<LatencyTracker>) -> PyResult<Self> {
+        if backend == Backend::Loopback {
+            return Ok(ReceiverCore::new(backend, bandwidth, RecvBackend::Loopback(None), latency));
+        }
+        
         // Initialize NDI if not already initialized
         match ndi::initialize() {
             Ok(_) => {
                 // Create an unconnected receiver
-                let recv_builder = ndi::recv::RecvBuilder::new();
+                let recv_builder = ndi::recv::RecvBuilder::new().bandwidth(bandwidth.to_ndi());
                 let recv_create = recv_builder.build();
                 
                 match recv_create {
-                    Ok(receiver) => Ok(NdiReceiver { 
-                        receiver: Some(receiver),
-                        connected_source: None,
-                    }),
+                    Ok(receiver) => Ok(ReceiverCore::new(backend, bandwidth, RecvBackend::Ndi(receiver), latency)),
                     Err(_) => Err(PyRuntimeError::new_err("Failed to create NDI receiver")),
                 }
             },
@@ -199,181 +583,793 @@ impl NdiReceiver {
         }
     }
 
-    /// Connect to an NDI source
-    fn connect_to_source(&mut self, source_name: &str) -> PyResult<()> {
-        let receiver = match &mut self.receiver {
-            Some(r) => r,
-            None => return Err(PyRuntimeError::new_err("Receiver is not initialized")),
-        };
+    /// Connect to a source by name, searching with the given find options
+    pub fn connect(&self, source_name: &str, options: &FindOptions) -> PyResult<()> {
+        self.connect_within(source_name, CONNECT_TIMEOUT, options)
+    }
+
+    /// Connect to a source, looking for it for up to `timeout`
+    pub fn connect_within(&self, source_name: &str, timeout: Duration, options: &FindOptions) -> PyResult<()> {
+        let generation = self.connect_generation.fetch_add(1, Ordering::Relaxed) + 1;
+        self.connecting.store(false, Ordering::Relaxed);
+        self.find_and_connect(source_name, timeout, options, generation)
+    }
+
+    /// Look for a source on a background thread and connect once it appears
+    ///
+    /// Returns at once. A later connect or close() supersedes a connect
+    /// still looking for its source; `on_connected` runs on the thread after
+    /// a successful connection.
+    pub fn connect_in_background(
+        self: &Arc<Self>,
+        source_name: &str,
+        timeout: Duration,
+        options: FindOptions,
+        on_connected: impl FnOnce() + Send + 'static,
+    ) -> PyResult<()> {
+        if !self.is_open() {
+            return Err(PyRuntimeError::new_err("Receiver is not initialized"));
+        }
+        let generation = self.connect_generation.fetch_add(1, Ordering::Relaxed) + 1;
+        self.connecting.store(true, Ordering::Relaxed);
+        *self.connect_error.lock().unwrap() = None;
+
+        let (core, source_name) = (self.clone(), source_name.to_string());
+        std::thread::Builder::new().name("ndirust-connect".to_string()).spawn(move || {
+            let result = core.find_and_connect(&source_name, timeout, &options, generation);
+            if core.connect_generation.load(Ordering::Relaxed) != generation {
+                return;
+            }
+            core.connecting.store(false, Ordering::Relaxed);
+            match result {
+                Ok(()) => on_connected(),
+                Err(error) => *core.connect_error.lock().unwrap() = Some(error.to_string()),
+            }
+        })?;
+        Ok(())
+    }
+
+    /// Stop a background connect from connecting
+    pub fn cancel_connect(&self) {
+        self.connect_generation.fetch_add(1, Ordering::Relaxed);
+        self.connecting.store(false, Ordering::Relaxed);
+    }
+
+    /// Whether a background connect is still looking for its source
+    pub fn is_connecting(&self) -> bool {
+        self.connecting.load(Ordering::Relaxed)
+    }
+
+    /// Why the last background connect failed
+    pub fn connect_error(&self) -> Option<String> {
+        self.connect_error.lock().unwrap().clone()
+    }
+
+    /// Poll the discovered sources until the named one appears
+    ///
+    /// Discovery returns as soon as it knows of any source, so one look is
+    /// not enough: in a large facility the wanted source may be announced
+    /// after the first few. The search uses the given groups and extra IPs,
+    /// so sources only reachable that way can be connected to.
+    fn find_and_connect(
+        &self,
+        source_name: &str,
+        timeout: Duration,
+        options: &FindOptions,
+        generation: u64,
+    ) -> PyResult<()> {
+        if !self.is_open() {
+            return Err(PyRuntimeError::new_err("Receiver is not initialized"));
+        }
+        let superseded = || self.connect_generation.load(Ordering::Relaxed) != generation;
+        let deadline = Instant::now() + timeout;
+        
+        if self.backend == Backend::Loopback {
+            loop {
+                if superseded() {
+                    return Ok(());
+                }
+                if let Some(connected) = loopback::connect(source_name, loopback::DEFAULT_QUEUE_DEPTH) {
+                    if let Some(RecvBackend::Loopback(queue)) = self.receiver.lock().unwrap().as_mut() {
+                        *queue = Some(connected);
+                    }
+                    *self.connected_source.lock().unwrap() = Some(source_name.to_string());
+                    return Ok(());
+                }
+                let remaining = deadline.saturating_duration_since(Instant::now());
+                if remaining.is_zero() {
+                    return Err(PyRuntimeError::new_err(format!("Source not found: {}", source_name)));
+                }
+                std::thread::sleep(remaining.min(DISCOVERY_POLL));
+            }
+        }
         
         // Find the source with the given name
-        let find_create = ndi::find::FindBuilder::new().build();
-        match find_create {
-            Ok(finder) => {
-                // Look for sources with a reasonable timeout
-                let sources_result = finder.current_sources(3000);
-                
-                match sources_result {
-                    Ok(sources) => {
-                        // Find the source with the matching name
-                        for source in sources.iter() {
-                            if source.get_name() == source_name {
-                                // Connect to this source
-                                receiver.connect(source);
-                                self.connected_source = Some(source_name.to_string());
-                                return Ok(());
-                            }
+        let finder = Mutex::new(options.build_finder()?);
+        self.connect_found(&finder, source_name, deadline, generation)
+    }
+
+    /// Connect to a source through a finder that may already know it
+    ///
+    /// No discovery round of its own is started: the finder's current list
+    /// is polled until the source appears or the timeout passes. The finder
+    /// is only locked while its list is read and the receiver connected, so
+    /// many receivers can connect through one finder at once.
+    pub fn connect_through(&self, finder: &Mutex<ndi::find::Find>, source_name: &str, timeout: Duration) -> PyResult<()> {
+        if !self.is_open() {
+            return Err(PyRuntimeError::new_err("Receiver is not initialized"));
+        }
+        let generation = self.connect_generation.fetch_add(1, Ordering::Relaxed) + 1;
+        self.connecting.store(false, Ordering::Relaxed);
+        self.connect_found(finder, source_name, Instant::now() + timeout, generation)
+    }
+
+    /// Poll a finder's sources until the named one appears and connect to it
+    fn connect_found(
+        &self,
+        finder: &Mutex<ndi::find::Find>,
+        source_name: &str,
+        deadline: Instant,
+        generation: u64,
+    ) -> PyResult<()> {
+        let superseded = || self.connect_generation.load(Ordering::Relaxed) != generation;
+        let mut found_any = false;
+        loop {
+            if superseded() {
+                return Ok(());
+            }
+            let remaining = deadline.saturating_duration_since(Instant::now());
+            {
+                // Sources are only valid until the finder's list is read
+                // again, so it stays locked until the receiver is connected
+                let finder = finder.lock().unwrap();
+                if let Ok(sources) = finder.current_sources(remaining.min(DISCOVERY_POLL).as_millis()) {
+                    found_any = true;
+                    if let Some(source) = sources.iter().find(|source| source.get_name() == source_name) {
+                        // Connect to this source; a background capture holds
+                        // the lock for at most one capture timeout
+                        let mut receiver = self.receiver.lock().unwrap();
+                        if superseded() {
+                            return Ok(());
+                        }
+                        if let Some(RecvBackend::Ndi(receiver)) = receiver.as_mut() {
+                            receiver.connect(source);
                         }
-                        
-                        // If we get here, the source was not found
-                        Err(PyRuntimeError::new_err(format!("Source not found: {}", source_name)))
+                        *self.connected_source.lock().unwrap() = Some(source_name.to_string());
+                        return Ok(());
+                    }
+                }
+            }
+            
+            let remaining = deadline.saturating_duration_since(Instant::now());
+            if remaining.is_zero() {
+                return Err(match found_any {
+                    true => PyRuntimeError::new_err(format!("Source not found: {}", source_name)),
+                    false => PyRuntimeError::new_err("Timeout while searching for sources"),
+                });
+            }
+            std::thread::sleep(remaining.min(DISCOVERY_POLL));
+        }
+    }
+
+    /// Replace the metadata filter; None keeps every metadata frame
+    pub fn set_metadata_filter(&self, filter: Option<MetadataFilter>) {
+        *self.metadata_filter.write().unwrap() = filter;
+    }
+
+    /// Change which video frames are kept
+    pub fn set_video_decimation(&self, every_n: u32, max_fps: Option<f64>, latest_only: bool) {
+        self.decimator.lock().unwrap().configure(every_n, max_fps, latest_only);
+    }
+
+    /// Transport the receiver uses
+    pub fn backend(&self) -> Backend {
+        self.backend
+    }
+
+    /// Streams the receiver asks its source for
+    pub fn bandwidth(&self) -> Bandwidth {
+        self.bandwidth
+    }
+
+    /// Name of the connected source
+    pub fn connected_source(&self) -> Option<String> {
+        self.connected_source.lock().unwrap().clone()
+    }
+
+    /// Whether the receiver has not been closed
+    pub fn is_open(&self) -> bool {
+        self.receiver.lock().unwrap().is_some()
+    }
+
+    /// Capture the next frame and hand it to the latency tracker and sinks
+    pub fn capture(&self, timeout_ms: u32) -> CapturedFrame {
+        let deadline = Instant::now() + Duration::from_millis(timeout_ms as u64);
+        let captured = loop {
+            let remaining = deadline.saturating_duration_since(Instant::now()).as_millis() as u32;
+            let captured = {
+                let mut receiver = self.receiver.lock().unwrap();
+                let mut pending = self.pending.lock().unwrap();
+                match (pending.pop_front(), receiver.as_mut()) {
+                    (Some(frame), _) => frame,
+                    (None, Some(receiver)) => {
+                        capture_frame(receiver, remaining, &mut self.decimator.lock().unwrap(), &mut pending)
+                    },
+                    (None, None) => {
+                        drop(pending);
+                        drop(receiver);
+                        std::thread::sleep(Duration::from_millis(remaining as u64));
+                        return CapturedFrame::None;
                     },
-                    Err(_) => Err(PyRuntimeError::new_err("Timeout while searching for sources")),
                 }
-            },
-            Err(_) => Err(PyRuntimeError::new_err("Failed to create NDI finder")),
+            };
+            
+            // Decimated video is skipped in the same way
+            if matches!(captured, CapturedFrame::None) && Instant::now() < deadline {
+                continue;
+            }
+            
+            // Filtered metadata is discarded here, and the wait goes on for
+            // the rest of the timeout
+            if let CapturedFrame::Metadata(metadata) = &captured {
+                let filter = self.metadata_filter.read().unwrap();
+                if filter.as_ref().is_some_and(|filter| !filter.accepts(&metadata.data)) {
+                    self.filtered_metadata.fetch_add(1, Ordering::Relaxed);
+                    if Instant::now() < deadline {
+                        continue;
+                    }
+                    return CapturedFrame::None;
+                }
+            }
+            break captured;
+        };
+        if matches!(captured, CapturedFrame::None) {
+            return captured;
+        }
+        
+        let received_at = current_time_100ns();
+        if let Some(latency) = self.latency.lock().unwrap().as_mut() {
+            if let Some(source) = self.connected_source.lock().unwrap().as_deref() {
+                latency.record(source, &captured, received_at);
+            }
+        }
+        for sink in self.sinks.lock().unwrap().iter() {
+            sink.on_frame(&captured);
+        }
+        
+        captured
+    }
+
+    /// Attach a sink that sees every captured frame
+    pub fn add_sink(&self, sink: Arc<dyn FrameSink>) {
+        self.sinks.lock().unwrap().push(sink);
+    }
+
+    /// Detach a sink added with `add_sink`
+    pub fn remove_sink(&self, sink: &Arc<dyn FrameSink>) {
+        self.sinks.lock().unwrap().retain(|attached| !Arc::ptr_eq(attached, sink));
+    }
+
+    /// Start capturing on a background thread if it is not running yet
+    ///
+    /// Every call must be balanced by `release_pump`; the thread stops when
+    /// the last user releases it.
+    pub fn retain_pump(self: &Arc<Self>) {
+        let mut state = self.pump.lock().unwrap();
+        state.users += 1;
+        if state.pump.is_some() {
+            return;
+        }
+        
+        let stop = Arc::new(AtomicBool::new(false));
+        let thread = {
+            let core = self.clone();
+            let stop = stop.clone();
+            std::thread::Builder::new()
+                .name("ndirust-capture".to_string())
+                .spawn(move || {
+                    while !stop.load(Ordering::Relaxed) {
+                        core.capture(PUMP_TIMEOUT_MS);
+                    }
+                })
+                .expect("failed to spawn capture thread")
+        };
+        state.pump = Some(Pump { stop, thread });
+    }
+
+    /// Release a `retain_pump` call, stopping the thread if it was the last
+    pub fn release_pump(&self) {
+        let pump = {
+            let mut state = self.pump.lock().unwrap();
+            state.users = state.users.saturating_sub(1);
+            if state.users > 0 {
+                return;
+            }
+            state.pump.take()
+        };
+        if let Some(pump) = pump {
+            pump.stop.store(true, Ordering::Relaxed);
+            let _ = pump.thread.join();
+        }
+    }
+
+    /// Stop the background capture thread regardless of its users
+    fn stop_pump(&self) {
+        let pump = {
+            let mut state = self.pump.lock().unwrap();
+            state.users = 0;
+            state.pump.take()
+        };
+        if let Some(pump) = pump {
+            pump.stop.store(true, Ordering::Relaxed);
+            let _ = pump.thread.join();
+        }
+    }
+
+    /// Whether frames are being captured on a background thread
+    pub fn is_pumping(&self) -> bool {
+        self.pump.lock().unwrap().pump.is_some()
+    }
+}
+
+/// Validate video decimation options
+fn check_decimation(every_n: u32, max_fps: Option<f64>) -> PyResult<()> {
+    if every_n == 0 {
+        return Err(PyValueError::new_err("every_n must be positive"));
+    }
+    if max_fps.is_some_and(|fps| !(fps > 0.0)) {
+        return Err(PyValueError::new_err("max_fps must be positive"));
+    }
+    Ok(())
+}
+
+/// Python class representing an NDI receiver
+#[pyclass]
+pub struct NdiReceiver {
+    core: Arc<ReceiverCore>,
+    // Filled by the capture thread once fileno() or try_receive() is used
+    queue: Mutex<Option<Arc<FrameQueue>>>,
+    queue_depth: usize,
+    // Set for handles on a receiver owned elsewhere, such as a capture hub;
+    // closing one only detaches its own frame queue
+    view: Option<AtomicBool>,
+}
+
+/// Frames queued for try_receive() and fileno() users by default
+const DEFAULT_QUEUE_DEPTH: usize = 16;
+
+impl NdiReceiver {
+    /// Wrap an opened core, for components that create receivers natively
+    pub fn from_core(core: Arc<ReceiverCore>) -> Self {
+        NdiReceiver {
+            core,
+            queue: Mutex::new(None),
+            queue_depth: DEFAULT_QUEUE_DEPTH,
+            view: None,
+        }
+    }
+
+    /// A handle on a receiver owned by something else
+    ///
+    /// Closing or dropping the handle detaches its own frame queue but leaves
+    /// the receiver connected for its owner and other handles.
+    pub fn shared_view(core: Arc<ReceiverCore>) -> Self {
+        NdiReceiver {
+            view: Some(AtomicBool::new(true)),
+            ..NdiReceiver::from_core(core)
+        }
+    }
+
+    /// Detach a view's frame queue, once
+    fn detach_view(&self) {
+        let Some(open) = &self.view else {
+            return;
+        };
+        if !open.swap(false, Ordering::AcqRel) {
+            return;
+        }
+        // Queued frames stay available to try_receive()
+        if let Some(queue) = self.queue.lock().unwrap().as_ref() {
+            let sink: Arc<dyn FrameSink> = queue.clone();
+            self.core.remove_sink(&sink);
+            self.core.release_pump();
+        }
+    }
+
+    /// Shared state, for components that attach to the receiver
+    pub fn core(&self) -> Arc<ReceiverCore> {
+        self.core.clone()
+    }
+
+    /// The frame queue, attaching it and starting the capture thread on
+    /// first use
+    fn frame_queue(&self) -> PyResult<Arc<FrameQueue>> {
+        let mut queue = self.queue.lock().unwrap();
+        if let Some(queue) = queue.as_ref() {
+            return Ok(queue.clone());
+        }
+        if !self.core.is_open() || self.view.as_ref().is_some_and(|open| !open.load(Ordering::Acquire)) {
+            return Err(PyRuntimeError::new_err("Receiver is not initialized"));
+        }
+
+        let created = Arc::new(FrameQueue::new(self.queue_depth));
+        self.core.add_sink(created.clone());
+        self.core.retain_pump();
+        *queue = Some(created.clone());
+        Ok(created)
+    }
+}
+
+impl Drop for NdiReceiver {
+    fn drop(&mut self) {
+        if self.view.is_some() {
+            self.detach_view();
+            return;
+        }
+        // The capture thread holds a reference to the core
+        self.core.stop_pump();
+    }
+}
+
+#[pymethods]
+impl NdiReceiver {
+    /// Create a receiver
+    ///
+    /// Args:
+    ///     backend: Transport to use, "ndi" or "loopback" (default: the
+    ///         NDIRUST_BACKEND environment variable, or "ndi")
+    ///     track_latency: Record per-source latency statistics for every
+    ///         received frame (default: False)
+    ///     metadata_filter: Element names of the metadata frames to keep;
+    ///         others are discarded natively (default: keep all)
+    ///     queue_depth: Frames queued for try_receive() and fileno() users
+    ///         before the oldest are dropped (default: 16)
+    ///     video_every_n: Keep one video frame in n (default: 1)
+    ///     max_video_fps: Keep at most this many video frames per second,
+    ///         evenly spaced (default: no limit)
+    ///     latest_only: Skip video frames already superseded by a newer one
+    ///         when captured (default: False)
+    ///     bandwidth: Streams to ask the source for: "highest", "lowest"
+    ///         (proxy video), "audio_only" or "metadata_only"; NDI only
+    ///         (default: "highest")
+    #[new]
+    #[pyo3(signature = (
+        backend = None,
+        track_latency = false,
+        metadata_filter = None,
+        queue_depth = 16,
+        video_every_n = 1,
+        max_video_fps = None,
+        latest_only = false,
+        bandwidth = "highest"
+    ))]
+    fn new(
+        backend: Option<&str>,
+        track_latency: bool,
+        metadata_filter: Option<Vec<String>>,
+        queue_depth: usize,
+        video_every_n: u32,
+        max_video_fps: Option<f64>,
+        latest_only: bool,
+        bandwidth: &str,
+    ) -> PyResult<Self> {
+        if queue_depth == 0 {
+            return Err(PyValueError::new_err("queue_depth must be positive"));
         }
+        check_decimation(video_every_n, max_video_fps)?;
+        let backend = Backend::resolve(backend)?;
+        let bandwidth = Bandwidth::from_name(bandwidth)?;
+        let latency = if track_latency { Some(LatencyTracker::default()) } else { None };
+        let core = ReceiverCore::open_with_bandwidth(backend, bandwidth, latency)?;
+        core.set_metadata_filter(metadata_filter.map(|names| MetadataFilter::new(names, false)));
+        core.set_video_decimation(video_every_n, max_video_fps, latest_only);
+        Ok(NdiReceiver {
+            core: Arc::new(core),
+            queue: Mutex::new(None),
+            queue_depth,
+            view: None,
+        })
+    }
+
+    /// Connect to an NDI source
+    ///
+    /// The GIL is released while the source is looked up, so several
+    /// receivers can connect from a thread pool. Discovery is polled until
+    /// the source appears or the timeout passes.
+    ///
+    /// With a cache_path, a source found in the cache is connected in the
+    /// background: the call returns at once instead of blocking on
+    /// discovery, and is_connecting and connect_error report progress. The
+    /// cache only holds names, so frames arrive once discovery announces the
+    /// source. Sources connected to are recorded in the cache.
+    ///
+    /// Args:
+    ///     source_name: Name of the source
+    ///     timeout_ms: Time to look for the source (default: 3000, or 30000
+    ///         for a cached source connected in the background)
+    ///     cache_path: Discovery cache file, as kept by
+    ///         NdiFinder(cache_path=...); entries older than a day are
+    ///         ignored (default: None)
+    ///     groups: Groups to search for the source, as in NdiFinder
+    ///         (default: the groups configured for this machine)
+    ///     extra_ips: Addresses of machines or discovery servers to query
+    ///         directly, as in NdiFinder (default: None)
+    ///     finder: An NdiFinder that has already discovered the source; its
+    ///         sources are looked at instead of running a discovery round
+    ///         for this receiver. It searches with its own groups and extra
+    ///         IPs, so it cannot be combined with groups, extra_ips or
+    ///         cache_path (default: None)
+    #[pyo3(signature = (source_name, timeout_ms = None, cache_path = None, groups = None, extra_ips = None, finder = None))]
+    fn connect_to_source(
+        &self,
+        source_name: &str,
+        timeout_ms: Option<u32>,
+        cache_path: Option<PathBuf>,
+        groups: Option<&PyAny>,
+        extra_ips: Option<&PyAny>,
+        finder: Option<PyRef<'_, NdiFinder>>,
+        py: Python<'_>,
+    ) -> PyResult<()> {
+        if self.view.is_some() {
+            return Err(PyRuntimeError::new_err("A shared receiver handle cannot be reconnected"));
+        }
+        let timeout = |default| timeout_ms.map_or(default, |ms| Duration::from_millis(ms as u64));
+        if let Some(finder) = finder {
+            let searches = groups.is_some_and(|groups| !groups.is_none()) || extra_ips.is_some_and(|ips| !ips.is_none());
+            if cache_path.is_some() || searches {
+                return Err(PyValueError::new_err("finder cannot be combined with cache_path, groups or extra_ips"));
+            }
+            return finder.connect_receiver(&self.core, source_name, timeout(CONNECT_TIMEOUT), py);
+        }
+        let options = FindOptions::from_py(groups, extra_ips, true)?;
+        let Some(cache_path) = cache_path else {
+            return py.allow_threads(|| self.core.connect_within(source_name, timeout(CONNECT_TIMEOUT), &options));
+        };
+        
+        py.allow_threads(|| {
+            let cached = SourceCache::load(&cache_path, DEFAULT_MAX_AGE).get(source_name, unix_now()).is_some();
+            let name = source_name.to_string();
+            let record = move || {
+                let mut cache = SourceCache::load(&cache_path, DEFAULT_MAX_AGE);
+                cache.seen(&name, unix_now());
+                cache.save()
+            };
+            if cached {
+                // The connection matters more than refreshing the cache
+                self.core.connect_in_background(source_name, timeout(CACHED_CONNECT_TIMEOUT), options, move || {
+                    let _ = record();
+                })
+            } else {
+                self.core.connect_within(source_name, timeout(CONNECT_TIMEOUT), &options)?;
+                Ok(record()?)
+            }
+        })
+    }
+
+    /// Whether a connect from the discovery cache is still looking for its
+    /// source
+    #[getter]
+    fn get_is_connecting(&self) -> bool {
+        self.core.is_connecting()
+    }
+
+    /// Why the last connect from the discovery cache failed, or None
+    #[getter]
+    fn get_connect_error(&self) -> Option<String> {
+        self.core.connect_error()
     }
 
     /// Get the name of the connected source
     #[getter]
     fn get_connected_source(&self) -> Option<String> {
-        self.connected_source.clone()
+        self.core.connected_source()
+    }
+
+    /// Get the name of the transport backend ("ndi" or "loopback")
+    #[getter]
+    fn get_backend(&self) -> &'static str {
+        self.core.backend.name()
+    }
+
+    /// Get the streams the receiver asks its source for
+    #[getter]
+    fn get_bandwidth(&self) -> &'static str {
+        self.core.bandwidth.name()
     }
 
     /// Receive a frame with a timeout
-    fn receive_frame(&mut self, timeout_ms: Option<u32>, py: Python<'_>) -> PyResult<(FrameType, PyObject)> {
-        let receiver = match &mut self.receiver {
-            Some(r) => r,
-            None => return Err(PyRuntimeError::new_err("Receiver is not initialized")),
-        };
+    ///
+    /// The GIL is released while waiting for the frame. Once the frame queue
+    /// is in use, frames are taken from it.
+    fn receive_frame(&self, timeout_ms: Option<u32>, py: Python<'_>) -> PyResult<(FrameType, PyObject)> {
+        if !self.core.is_open() {
+            return Err(PyRuntimeError::new_err("Receiver is not initialized"));
+        }
         
         // Default to 1 second timeout
         let timeout = timeout_ms.unwrap_or(1000); 
         
-        // Create mutable options to hold the received frames
-        let mut video_data = None;
-        let mut audio_data = None;
-        let mut metadata_data = None;
-        
-        // Capture a frame - ndi crate expects u128 value
-        let frame_type = receiver.capture_all(
-            &mut video_data,
-            &mut audio_data,
-            &mut metadata_data,
-            timeout.into() // Convert u32 to u128
-        );
-        
-        // Convert the frame type to our enum
-        let frame_type_py = match frame_type {
-            ndi::FrameType::Video => FrameType::Video,
-            ndi::FrameType::Audio => FrameType::Audio,
-            ndi::FrameType::Metadata => FrameType::Metadata,
-            ndi::FrameType::None => FrameType::None,
-            _ => FrameType::Error, // Handle any other cases
-        };
+        let queue = self.queue.lock().unwrap().clone();
+        if let Some(queue) = queue {
+            let captured = py.allow_threads(|| queue.pop(Duration::from_millis(timeout as u64)));
+            return captured_to_py(captured.unwrap_or(CapturedFrame::None), py);
+        }
+        if self.core.is_pumping() {
+            return Err(PyRuntimeError::new_err("Frames are being captured on a background thread"));
+        }
         
-        // Process the received frame based on its type
-        match frame_type_py {
-            FrameType::Video => {
-                // We received a video frame
-                if let Some(video) = video_data {
-                    let width = video.width() as u32;
-                    let height = video.height() as u32;
-                    let frame_rate_n = video.frame_rate_n() as u32;
-                    let frame_rate_d = video.frame_rate_d() as u32;
-                    let timecode = video.timecode();
-                    
-                    // Get the raw data pointer and size
-                    let p_data = video.p_data();
-                    let mut data_size = 0;
-                    
-                    // Determine the frame data size based on the format
-                    if let Some(stride) = video.line_stride_in_bytes() {
-                        data_size = (stride * height) as usize;
-                    } else if let Some(size) = video.data_size_in_bytes() {
-                        data_size = size as usize;
-                    } else {
-                        // If neither is available, calculate a reasonable default size
-                        // For UYVY format, we need 2 bytes per pixel
-                        data_size = (width as usize * height as usize * 2) as usize;
-                    }
-                    
-                    // Create a PyBytes object with the video data
-                    let data_bytes = unsafe {
-                        PyBytes::from_ptr(py, p_data as *const u8, data_size)
-                    };
-                    
-                    // Create an NdiVideoFrame object with the frame data
-                    let frame = NdiVideoFrame::new(
-                        width,
-                        height,
-                        frame_rate_n,
-                        frame_rate_d,
-                        timecode,
-                        data_size,
-                        Some(data_bytes.into_py(py)),
-                        video.four_cc() as u32,
-                    );
-                    
-                    return Ok((frame_type_py, Py::new(py, frame)?.into_py(py)));
-                }
-            },
-            FrameType::Audio => {
-                // We received an audio frame
-                if let Some(audio) = audio_data {
-                    let sample_rate = audio.sample_rate() as u32;
-                    let num_channels = audio.no_channels() as u32;
-                    let num_samples = audio.no_samples() as u32;
-                    let timecode = audio.timecode();
-                    
-                    // Get the audio data size (samples * channels * 4 bytes per float)
-                    let data_size = (num_samples as usize * num_channels as usize * 4) as usize;
-                    
-                    // Create a PyBytes object with the audio data
-                    let data_bytes = unsafe {
-                        PyBytes::from_ptr(py, audio.p_data() as *const u8, data_size)
-                    };
-                    
-                    // Create an NdiAudioFrame object with the frame data
-                    let frame = NdiAudioFrame::new(
-                        sample_rate,
-                        num_channels,
-                        num_samples,
-                        timecode,
-                        data_size,
-                        Some(data_bytes.into_py(py)),
-                    );
-                    
-                    return Ok((frame_type_py, Py::new(py, frame)?.into_py(py)));
-                }
-            },
-            FrameType::Metadata => {
-                // We received a metadata frame
-                if let Some(metadata) = metadata_data {
-                    let timecode = metadata.timecode();
-                    let data = metadata.data();
-                    
-                    // Create an NdiMetadataFrame object with the frame data
-                    let frame = NdiMetadataFrame::new(
-                        timecode,
-                        data,
-                    );
-                    
-                    return Ok((frame_type_py, Py::new(py, frame)?.into_py(py)));
-                }
+        let captured = py.allow_threads(|| self.core.capture(timeout));
+        captured_to_py(captured, py)
+    }
+
+    /// Take a queued frame without waiting
+    ///
+    /// The first call starts capturing into the frame queue on a background
+    /// thread, so it returns no frame.
+    ///
+    /// Returns:
+    ///     Tuple of frame_type and frame, (FrameType.None, None) if no frame
+    ///     is queued
+    fn try_receive(&self, py: Python<'_>) -> PyResult<(FrameType, PyObject)> {
+        let captured = self.frame_queue()?.try_pop();
+        captured_to_py(captured.unwrap_or(CapturedFrame::None), py)
+    }
+
+    /// File descriptor that is readable while frames are queued
+    ///
+    /// For selectors, select, epoll or an asyncio loop's add_reader():
+    /// register it for reading, then drain frames with try_receive() when it
+    /// becomes readable. Starts capturing into the frame queue on a
+    /// background thread. The descriptor stays valid until the receiver is
+    /// deleted; only Unix platforms are supported.
+    fn fileno(&self) -> PyResult<i64> {
+        self.frame_queue()?.fileno().map_err(|error| PyRuntimeError::new_err(error.to_string()))
+    }
+
+    /// Number of frames waiting in the frame queue
+    #[getter]
+    fn get_queued_frames(&self) -> usize {
+        self.queue.lock().unwrap().as_ref().map_or(0, |queue| queue.len())
+    }
+
+    /// Number of frames dropped because the frame queue was full
+    #[getter]
+    fn get_dropped_frames(&self) -> u64 {
+        self.queue.lock().unwrap().as_ref().map_or(0, |queue| queue.dropped())
+    }
+    
+    /// Get latency statistics per source
+    /// 
+    /// "transport" measures from the sender submitting a frame (its
+    /// timestamp) to it being received here, which covers the network and
+    /// receive buffering. "end_to_end" measures from the frame's timecode,
+    /// and is only recorded for timecodes within a minute of the receive
+    /// time, i.e. synthesized or wall-clock capture timecodes. Values are in
+    /// milliseconds over the last 1024 frames; across machines they include
+    /// any clock offset between them.
+    /// 
+    /// Returns:
+    ///     dict mapping source names to {"transport": stats, "end_to_end": stats},
+    ///     where stats has count, min, mean, p50, p90, p99 and max
+    fn get_latency_stats(&self, py: Python<'_>) -> PyResult<Py<PyDict>> {
+        match self.core.latency.lock().unwrap().as_ref() {
+            Some(latency) => Ok(latency.to_dict(py)?.into()),
+            None => Err(PyRuntimeError::new_err("Latency tracking is not enabled; pass track_latency=True")),
+        }
+    }
+    
+    /// Forget all latency samples
+    fn reset_latency_stats(&self) {
+        if let Some(latency) = self.core.latency.lock().unwrap().as_mut() {
+            latency.reset();
+        }
+    }
+
+    /// Filter metadata frames by the name of their root XML element
+    ///
+    /// Filtered frames are discarded in the native layer, before any Python
+    /// object is created, and do not reach recorders or other attachments.
+    ///
+    /// Args:
+    ///     names: Element names, or None to keep every metadata frame
+    ///     exclude: Discard the named elements instead of keeping only them
+    ///         (default: False)
+    #[pyo3(signature = (names, exclude = false))]
+    fn set_metadata_filter(&self, names: Option<Vec<String>>, exclude: bool) {
+        self.core.set_metadata_filter(names.map(|names| MetadataFilter::new(names, exclude)));
+    }
+
+    /// The metadata filter as a dict with names and exclude, or None
+    #[getter]
+    fn get_metadata_filter(&self, py: Python<'_>) -> PyResult<Option<Py<PyDict>>> {
+        match self.core.metadata_filter.read().unwrap().as_ref() {
+            Some(filter) => {
+                let info = PyDict::new(py);
+                info.set_item("names", filter.names())?;
+                info.set_item("exclude", filter.is_exclude())?;
+                Ok(Some(info.into()))
             },
-            _ => {}
+            None => Ok(None),
         }
-        
-        // If we get here, we either got an empty frame or an error
-        Ok((frame_type_py, py.None()))
+    }
+
+    /// Number of metadata frames discarded by the filter
+    #[getter]
+    fn get_filtered_metadata(&self) -> u64 {
+        self.core.filtered_metadata.load(Ordering::Relaxed)
+    }
+
+    /// Change which video frames are kept
+    ///
+    /// Skipped frames are dropped in the native layer before they are
+    /// copied or reach recorders and other attachments; `video_stats` still
+    /// counts them.
+    ///
+    /// Args:
+    ///     every_n: Keep one video frame in n (default: 1)
+    ///     max_fps: Keep at most this many video frames per second, evenly
+    ///         spaced, or None for no limit (default: None)
+    ///     latest_only: Skip video frames already superseded by a newer one
+    ///         when captured (default: False)
+    #[pyo3(signature = (every_n = 1, max_fps = None, latest_only = false))]
+    fn set_video_decimation(&self, every_n: u32, max_fps: Option<f64>, latest_only: bool) -> PyResult<()> {
+        check_decimation(every_n, max_fps)?;
+        self.core.set_video_decimation(every_n, max_fps, latest_only);
+        Ok(())
+    }
+
+    /// Video frame counters: incoming (every captured frame, including
+    /// skipped ones), delivered, decimated, superseded, incoming_fps,
+    /// delivered_fps, bytes and bitrate (uncompressed video received, in
+    /// bits per second), gaps (frames missing from the timecode sequence),
+    /// the last frame's width, height, four_cc_name and frame_rate, plus the
+    /// every_n, max_fps and latest_only options
+    #[getter]
+    fn get_video_stats(&self, py: Python<'_>) -> PyResult<Py<PyDict>> {
+        let decimator = self.core.decimator.lock().unwrap();
+        let now = Instant::now();
+        let (incoming_fps, delivered_fps) = decimator.rates(now);
+        let stats = PyDict::new(py);
+        stats.set_item("incoming", decimator.incoming())?;
+        stats.set_item("delivered", decimator.delivered())?;
+        stats.set_item("decimated", decimator.incoming() - decimator.delivered())?;
+        stats.set_item("superseded", decimator.superseded())?;
+        stats.set_item("incoming_fps", incoming_fps)?;
+        stats.set_item("delivered_fps", delivered_fps)?;
+        stats.set_item("bytes", decimator.bytes())?;
+        stats.set_item("bitrate", decimator.byte_rate(now) * 8.0)?;
+        stats.set_item("gaps", decimator.gaps())?;
+        let last = decimator.last();
+        stats.set_item("width", last.map(|header| header.width))?;
+        stats.set_item("height", last.map(|header| header.height))?;
+        stats.set_item("four_cc_name", last.map(|header| four_cc_name(header.four_cc)))?;
+        stats.set_item("frame_rate", last.map(|header| (header.frame_rate_n, header.frame_rate_d)))?;
+        stats.set_item("every_n", decimator.every_n())?;
+        stats.set_item("max_fps", decimator.max_fps())?;
+        stats.set_item("latest_only", decimator.latest_only())?;
+        Ok(stats.into())
     }
 
     /// Close the receiver and free resources
-    fn close(&mut self) -> PyResult<()> {
-        self.receiver = None;
-        self.connected_source = None;
+    ///
+    /// On a handle from NdiCaptureHub.receiver this only stops the handle's
+    /// own frame queue; the shared receiver stays connected.
+    fn close(&self, py: Python<'_>) -> PyResult<()> {
+        if self.view.is_some() {
+            py.allow_threads(|| self.detach_view());
+            return Ok(());
+        }
+        // Queued frames stay available to try_receive()
+        if let Some(queue) = self.queue.lock().unwrap().as_ref() {
+            let sink: Arc<dyn FrameSink> = queue.clone();
+            self.core.remove_sink(&sink);
+        }
+        self.core.cancel_connect();
+        py.allow_threads(|| {
+            self.core.stop_pump();
+            *self.core.receiver.lock().unwrap() = None;
+        });
+        *self.core.connected_source.lock().unwrap() = None;
         Ok(())
     }
 }
@@ -385,6 +1381,11 @@ pub fn register_receiver_functions(m: &PyModule) -> PyResult<()> {
     m.add_class::<NdiAudioFrame>()?;
     m.add_class::<NdiMetadataFrame>()?;
     m.add_class::<NdiReceiver>()?;
+    m.add_function(wrap_pyfunction!(metadata::parse_metadata, m)?)?;
+    audio_stream::register_audio_stream_functions(m)?;
+    probe::register_probe_functions(m)?;
+    meters::register_meter_functions(m)?;
+    hub::register_hub_functions(m)?;
     
     Ok(())
 } 
\ No newline at end of file
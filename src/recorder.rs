@@ -0,0 +1,526 @@
+// src/recorder.rs
+//
+// Records the frames an NdiReceiver captures to disk. A recording is a
+// directory holding the raw payloads in segment files and a fixed-size binary
+// index of every frame. Frames are handed to a native writer thread through a
+// bounded queue, so the capture path never waits on the disk or the GIL.
+
+use pyo3::prelude::*;
+use pyo3::exceptions::PyRuntimeError;
+use pyo3::types::PyDict;
+use std::fs::{self, File, OpenOptions};
+use std::io::{self, BufWriter, Write};
+use std::path::{Path, PathBuf};
+use std::sync::atomic::{AtomicU64, Ordering};
+use std::sync::mpsc::{self, Receiver, SyncSender, TrySendError};
+use std::sync::{Arc, Mutex};
+use std::thread::JoinHandle;
+use std::time::{Duration, Instant};
+
+use crate::frame::{samples_as_bytes, CapturedFrame};
+use crate::player;
+use crate::receiver::{FrameSink, NdiReceiver, ReceiverCore};
+
+/// Name of the index file inside a recording directory
+pub const INDEX_FILE: &str = "index.bin";
+
+/// Magic bytes at the start of the index file
+pub const INDEX_MAGIC: &[u8; 8] = b"NDIRIDX1";
+
+/// Size of the index file header: magic, record size and reserved bytes
+pub const INDEX_HEADER_SIZE: usize = 16;
+
+/// Size of one index record
+pub const INDEX_RECORD_SIZE: usize = 64;
+
+// Frame kinds stored in index records, matching FrameType
+pub const KIND_VIDEO: u8 = 1;
+pub const KIND_AUDIO: u8 = 2;
+pub const KIND_METADATA: u8 = 3;
+
+/// Buffer size of the segment writer; large frames bypass it
+const WRITE_BUFFER_SIZE: usize = 4 << 20;
+
+/// Longest time written frames wait in buffers before reaching the files,
+/// so a crash loses at most this much of the index
+const FLUSH_INTERVAL: Duration = Duration::from_secs(1);
+
+/// Name of a segment file inside a recording directory
+pub fn segment_file_name(segment: u32) -> String {
+    format!("segment_{:05}.raw", segment)
+}
+
+/// One entry of the index, stored little-endian
+///
+/// `fields` holds width, height, FourCC, line stride, frame rate numerator and
+/// denominator for video, and sample rate, channel count and samples per
+/// channel for audio.
+#[derive(Clone, Copy, Default, Debug)]
+pub struct IndexRecord {
+    pub kind: u8,
+    pub segment: u32,
+    pub offset: u64,
+    pub size: u64,
+    pub timecode: i64,
+    pub timestamp: i64,
+    pub fields: [u32; 6],
+}
+
+impl IndexRecord {
+    /// Describe a frame whose payload starts at `offset` of `segment`
+    pub fn for_frame(frame: &CapturedFrame, segment: u32, offset: u64) -> Option<Self> {
+        let mut record = IndexRecord { segment, offset, ..Default::default() };
+        match frame {
+            CapturedFrame::Video(video) => {
+                record.kind = KIND_VIDEO;
+                record.size = video.data.len() as u64;
+                record.timecode = video.timecode;
+                record.timestamp = video.timestamp;
+                record.fields = [
+                    video.width,
+                    video.height,
+                    video.four_cc,
+                    video.line_stride as u32,
+                    video.frame_rate_n,
+                    video.frame_rate_d,
+                ];
+            },
+            CapturedFrame::Audio(audio) => {
+                record.kind = KIND_AUDIO;
+                record.size = audio.data.len() as u64 * 4;
+                record.timecode = audio.timecode;
+                record.timestamp = audio.timestamp;
+                record.fields = [audio.sample_rate, audio.num_channels, audio.num_samples, 0, 0, 0];
+            },
+            CapturedFrame::Metadata(metadata) => {
+                record.kind = KIND_METADATA;
+                record.size = metadata.data.len() as u64;
+                record.timecode = metadata.timecode;
+                record.timestamp = metadata.timestamp;
+            },
+            CapturedFrame::None | CapturedFrame::Error => return None,
+        }
+        Some(record)
+    }
+
+    pub fn to_bytes(&self) -> [u8; INDEX_RECORD_SIZE] {
+        let mut bytes = [0u8; INDEX_RECORD_SIZE];
+        bytes[0] = self.kind;
+        bytes[4..8].copy_from_slice(&self.segment.to_le_bytes());
+        bytes[8..16].copy_from_slice(&self.offset.to_le_bytes());
+        bytes[16..24].copy_from_slice(&self.size.to_le_bytes());
+        bytes[24..32].copy_from_slice(&self.timecode.to_le_bytes());
+        bytes[32..40].copy_from_slice(&self.timestamp.to_le_bytes());
+        for (i, field) in self.fields.iter().enumerate() {
+            bytes[40 + i * 4..44 + i * 4].copy_from_slice(&field.to_le_bytes());
+        }
+        bytes
+    }
+
+    pub fn from_bytes(bytes: &[u8]) -> Self {
+        let u32_at = |at: usize| u32::from_le_bytes(bytes[at..at + 4].try_into().unwrap());
+        let u64_at = |at: usize| u64::from_le_bytes(bytes[at..at + 8].try_into().unwrap());
+        let mut fields = [0u32; 6];
+        for (i, field) in fields.iter_mut().enumerate() {
+            *field = u32_at(40 + i * 4);
+        }
+
+        IndexRecord {
+            kind: bytes[0],
+            segment: u32_at(4),
+            offset: u64_at(8),
+            size: u64_at(16),
+            timecode: u64_at(24) as i64,
+            timestamp: u64_at(32) as i64,
+            fields,
+        }
+    }
+}
+
+/// Payload bytes of a frame as written to a segment
+fn payload(frame: &CapturedFrame) -> &[u8] {
+    match frame {
+        CapturedFrame::Video(video) => video.data.as_slice(),
+        CapturedFrame::Audio(audio) => samples_as_bytes(audio.data.as_slice()),
+        CapturedFrame::Metadata(metadata) => metadata.data.as_bytes(),
+        CapturedFrame::None | CapturedFrame::Error => &[],
+    }
+}
+
+/// Writes frames to segment files and the index
+struct RecordingWriter {
+    directory: PathBuf,
+    segment_size: u64,
+    preallocate: bool,
+    segment: u32,
+    file: Option<BufWriter<File>>,
+    position: u64,
+    index: BufWriter<File>,
+    flushed_at: Instant,
+}
+
+impl RecordingWriter {
+    fn create(directory: &Path, segment_size: u64, preallocate: bool) -> io::Result<Self> {
+        fs::create_dir_all(directory)?;
+
+        // Remove the segments of an earlier recording in the same directory
+        for entry in fs::read_dir(directory)? {
+            let path = entry?.path();
+            let name = path.file_name().and_then(|name| name.to_str()).unwrap_or("");
+            if name.starts_with("segment_") && name.ends_with(".raw") {
+                fs::remove_file(&path)?;
+            }
+        }
+
+        let mut index = BufWriter::new(File::create(directory.join(INDEX_FILE))?);
+        let mut header = [0u8; INDEX_HEADER_SIZE];
+        header[..8].copy_from_slice(INDEX_MAGIC);
+        header[8..12].copy_from_slice(&(INDEX_RECORD_SIZE as u32).to_le_bytes());
+        index.write_all(&header)?;
+
+        Ok(RecordingWriter {
+            directory: directory.to_path_buf(),
+            segment_size,
+            preallocate,
+            segment: 0,
+            file: None,
+            position: 0,
+            index,
+            flushed_at: Instant::now(),
+        })
+    }
+
+    /// Flush the current segment and trim any preallocated tail, then the
+    /// index records that point into it
+    fn finish_segment(&mut self) -> io::Result<()> {
+        if let Some(file) = self.file.take() {
+            let file = file.into_inner().map_err(|error| error.into_error())?;
+            if self.preallocate {
+                file.set_len(self.position)?;
+            }
+        }
+        self.index.flush()
+    }
+
+    /// Hand buffered payloads and then their index records to the OS
+    ///
+    /// The segment goes first, so the index never describes payloads that
+    /// are not in their file yet.
+    fn flush(&mut self) -> io::Result<()> {
+        if let Some(file) = self.file.as_mut() {
+            file.flush()?;
+        }
+        self.index.flush()?;
+        self.flushed_at = Instant::now();
+        Ok(())
+    }
+
+    fn open_segment(&mut self, segment: u32) -> io::Result<()> {
+        let file = OpenOptions::new()
+            .write(true)
+            .create(true)
+            .truncate(true)
+            .open(self.directory.join(segment_file_name(segment)))?;
+        if self.preallocate {
+            file.set_len(self.segment_size)?;
+        }
+
+        self.file = Some(BufWriter::with_capacity(WRITE_BUFFER_SIZE, file));
+        self.segment = segment;
+        self.position = 0;
+        Ok(())
+    }
+
+    /// Append a frame; returns the number of payload bytes written
+    fn write_frame(&mut self, frame: &CapturedFrame) -> io::Result<u64> {
+        let data = payload(frame);
+        let size = data.len() as u64;
+
+        if self.file.is_none() {
+            self.open_segment(0)?;
+        } else if self.position > 0 && self.position + size > self.segment_size {
+            self.finish_segment()?;
+            self.open_segment(self.segment + 1)?;
+        }
+
+        let record = match IndexRecord::for_frame(frame, self.segment, self.position) {
+            Some(record) => record,
+            None => return Ok(0),
+        };
+        self.file.as_mut().unwrap().write_all(data)?;
+        self.index.write_all(&record.to_bytes())?;
+        self.position += size;
+        if self.flushed_at.elapsed() >= FLUSH_INTERVAL {
+            self.flush()?;
+        }
+
+        Ok(size)
+    }
+
+    fn finish(&mut self) -> io::Result<()> {
+        self.finish_segment()
+    }
+}
+
+/// Counters shared between the recorder, its sink and its writer thread
+#[derive(Default)]
+struct RecorderStats {
+    frames_written: AtomicU64,
+    bytes_written: AtomicU64,
+    dropped: AtomicU64,
+    segments: AtomicU64,
+    error: Mutex<Option<String>>,
+}
+
+/// Queues captured frames for the writer thread
+struct RecorderSink {
+    queue: Mutex<Option<SyncSender<CapturedFrame>>>,
+    video: bool,
+    audio: bool,
+    metadata: bool,
+    stats: Arc<RecorderStats>,
+}
+
+impl FrameSink for RecorderSink {
+    fn on_frame(&self, frame: &CapturedFrame) {
+        let wanted = match frame {
+            CapturedFrame::Video(_) => self.video,
+            CapturedFrame::Audio(_) => self.audio,
+            CapturedFrame::Metadata(_) => self.metadata,
+            CapturedFrame::None | CapturedFrame::Error => false,
+        };
+        if !wanted {
+            return;
+        }
+
+        // Frames are reference counted, so queueing one does not copy it
+        if let Some(queue) = self.queue.lock().unwrap().as_ref() {
+            match queue.try_send(frame.clone()) {
+                Ok(()) => {},
+                Err(TrySendError::Full(_)) | Err(TrySendError::Disconnected(_)) => {
+                    self.stats.dropped.fetch_add(1, Ordering::Relaxed);
+                },
+            }
+        }
+    }
+}
+
+/// Drain the queue into the writer until the sink is detached
+fn run_writer(mut writer: RecordingWriter, frames: Receiver<CapturedFrame>, stats: Arc<RecorderStats>) {
+    let mut segment = None;
+    let mut result = Ok(());
+
+    for frame in frames.iter() {
+        result = writer.write_frame(&frame).map(|size| {
+            stats.frames_written.fetch_add(1, Ordering::Relaxed);
+            stats.bytes_written.fetch_add(size, Ordering::Relaxed);
+        });
+        if result.is_err() {
+            break;
+        }
+        if segment != Some(writer.segment) {
+            segment = Some(writer.segment);
+            stats.segments.fetch_add(1, Ordering::Relaxed);
+        }
+    }
+
+    // Dropping the queue makes the sink count further frames as dropped
+    drop(frames);
+    let result = result.and_then(|_| writer.finish());
+    if let Err(error) = result {
+        *stats.error.lock().unwrap() = Some(error.to_string());
+    }
+}
+
+/// A recording in progress
+struct Recording {
+    sink: Arc<RecorderSink>,
+    writer: JoinHandle<()>,
+}
+
+/// Records the frames captured by an NdiReceiver to disk
+///
+/// While recording, the receiver captures on a native background thread and
+/// frames are written by another one, so neither needs the GIL. A recorder
+/// dropped while recording stops as stop() would, writing every queued frame.
+#[pyclass]
+struct NdiRecorder {
+    // Kept so the receiver outlives the recording
+    receiver: Py<NdiReceiver>,
+    core: Arc<ReceiverCore>,
+    directory: PathBuf,
+    segment_size: u64,
+    queue_depth: usize,
+    preallocate: bool,
+    video: bool,
+    audio: bool,
+    metadata: bool,
+    stats: Arc<RecorderStats>,
+    recording: Mutex<Option<Recording>>,
+}
+
+impl NdiRecorder {
+    /// Detach from the receiver and wait for the writer to drain the queue
+    fn finish_recording(&self) {
+        let Some(recording) = self.recording.lock().unwrap().take() else {
+            return;
+        };
+        let sink: Arc<dyn FrameSink> = recording.sink.clone();
+        self.core.remove_sink(&sink);
+        self.core.release_pump();
+
+        // Closing the queue lets the writer finish once it is drained
+        recording.sink.queue.lock().unwrap().take();
+        let _ = recording.writer.join();
+    }
+}
+
+impl Drop for NdiRecorder {
+    fn drop(&mut self) {
+        self.finish_recording();
+    }
+}
+
+#[pymethods]
+impl NdiRecorder {
+    /// Create a recorder for a receiver
+    ///
+    /// Args:
+    ///     receiver: The NdiReceiver whose frames to record
+    ///     directory: Directory for the index and segment files; created if
+    ///         missing, and an existing recording in it is overwritten
+    ///     segment_size_mb: Size at which a new segment file is started (default: 1024)
+    ///     queue_depth: Frames buffered for the writer before frames are
+    ///         dropped (default: 120)
+    ///     preallocate: Size each segment file up front and trim it when the
+    ///         segment is finished (default: False)
+    ///     video: Record video frames (default: True)
+    ///     audio: Record audio frames (default: True)
+    ///     metadata: Record metadata frames (default: True)
+    #[new]
+    #[pyo3(signature = (
+        receiver,
+        directory,
+        segment_size_mb = 1024,
+        queue_depth = 120,
+        preallocate = false,
+        video = true,
+        audio = true,
+        metadata = true
+    ))]
+    fn new(
+        receiver: Py<NdiReceiver>,
+        directory: PathBuf,
+        segment_size_mb: u64,
+        queue_depth: usize,
+        preallocate: bool,
+        video: bool,
+        audio: bool,
+        metadata: bool,
+        py: Python<'_>,
+    ) -> PyResult<Self> {
+        let core = receiver.borrow(py).core();
+        Ok(NdiRecorder {
+            receiver,
+            core,
+            directory,
+            segment_size: segment_size_mb.max(1) << 20,
+            queue_depth: queue_depth.max(1),
+            preallocate,
+            video,
+            audio,
+            metadata,
+            stats: Arc::new(RecorderStats::default()),
+            recording: Mutex::new(None),
+        })
+    }
+
+    /// Start recording
+    ///
+    /// Attaches to the receiver and starts capturing on a background thread.
+    /// While recording, frames cannot also be read with receive_frame().
+    fn start(&self, py: Python<'_>) -> PyResult<()> {
+        if self.recording.lock().unwrap().is_some() {
+            return Err(PyRuntimeError::new_err("Recorder is already recording"));
+        }
+        if !self.core.is_open() {
+            return Err(PyRuntimeError::new_err("Receiver is not initialized"));
+        }
+
+        let writer = py.allow_threads(|| RecordingWriter::create(&self.directory, self.segment_size, self.preallocate))?;
+        let mut recording = self.recording.lock().unwrap();
+        if recording.is_some() {
+            return Err(PyRuntimeError::new_err("Recorder is already recording"));
+        }
+
+        let (queue, frames) = mpsc::sync_channel(self.queue_depth);
+        let writer = {
+            let stats = self.stats.clone();
+            std::thread::Builder::new()
+                .name("ndirust-recorder".to_string())
+                .spawn(move || run_writer(writer, frames, stats))?
+        };
+
+        let sink = Arc::new(RecorderSink {
+            queue: Mutex::new(Some(queue)),
+            video: self.video,
+            audio: self.audio,
+            metadata: self.metadata,
+            stats: self.stats.clone(),
+        });
+        self.core.add_sink(sink.clone());
+        self.core.retain_pump();
+
+        *recording = Some(Recording { sink, writer });
+        Ok(())
+    }
+
+    /// Stop recording and wait for every queued frame to be written
+    ///
+    /// Returns:
+    ///     The recording statistics, as from the `stats` property
+    fn stop(&self, py: Python<'_>) -> PyResult<Py<PyDict>> {
+        py.allow_threads(|| self.finish_recording());
+        self.get_stats(py)
+    }
+
+    /// Whether the recorder is recording
+    #[getter]
+    fn get_is_recording(&self) -> bool {
+        self.recording.lock().unwrap().is_some()
+    }
+
+    /// Directory the recording is written to
+    #[getter]
+    fn get_directory(&self) -> PathBuf {
+        self.directory.clone()
+    }
+
+    /// The receiver being recorded
+    #[getter]
+    fn get_receiver(&self, py: Python<'_>) -> Py<NdiReceiver> {
+        self.receiver.clone_ref(py)
+    }
+
+    /// Recording statistics: frames_written, bytes_written, dropped (frames
+    /// that did not fit in the queue), segments and error (the write error
+    /// that stopped the writer, or None)
+    #[getter]
+    fn get_stats(&self, py: Python<'_>) -> PyResult<Py<PyDict>> {
+        let stats = PyDict::new(py);
+        stats.set_item("frames_written", self.stats.frames_written.load(Ordering::Relaxed))?;
+        stats.set_item("bytes_written", self.stats.bytes_written.load(Ordering::Relaxed))?;
+        stats.set_item("dropped", self.stats.dropped.load(Ordering::Relaxed))?;
+        stats.set_item("segments", self.stats.segments.load(Ordering::Relaxed))?;
+        stats.set_item("error", self.stats.error.lock().unwrap().clone())?;
+        Ok(stats.into())
+    }
+}
+
+/// Register recording-related Python classes
+pub fn register_recording_functions(m: &PyModule) -> PyResult<()> {
+    m.add_class::<NdiRecorder>()?;
+    player::register_player_functions(m)?;
+
+    Ok(())
+}
@@ -0,0 +1,351 @@
+// src/relay.rs
+//
+// Forwards a received source to a new output entirely on a native thread.
+// Frames are captured into reference-counted buffers and sent from them, so
+// a relay without scaling or conversion adds no copies beyond the capture.
+
+use pyo3::prelude::*;
+use pyo3::exceptions::{PyRuntimeError, PyValueError};
+use pyo3::types::PyDict;
+use std::borrow::Cow;
+use std::sync::atomic::{AtomicBool, AtomicU64, Ordering};
+use std::sync::{Arc, Mutex};
+use std::thread::JoinHandle;
+use std::time::Instant;
+
+use crate::backend::Backend;
+use crate::convert::{can_convert, convert_video, YuvMatrix};
+use crate::discovery::FindOptions;
+use crate::frame::{four_cc_from_name, four_cc_name, CapturedFrame, VideoFrameData, FOURCC_UYVY};
+use crate::multiview;
+use crate::receiver::ReceiverCore;
+use crate::scale::scale_video;
+use crate::sender::SendBackend;
+
+/// Timeout of each capture made by a relay thread
+const RELAY_TIMEOUT_MS: u32 = 100;
+
+/// What a relay forwards and how it changes video on the way
+struct RelayOptions {
+    width: Option<u32>,
+    height: Option<u32>,
+    four_cc: Option<u32>,
+    video: bool,
+    audio: bool,
+    metadata: bool,
+}
+
+impl RelayOptions {
+    /// Output size for a frame, keeping the aspect ratio if only one side is set
+    fn output_size(&self, frame: &VideoFrameData) -> (u32, u32) {
+        let (width, height) = match (self.width, self.height) {
+            (Some(width), Some(height)) => (width, height),
+            (Some(width), None) => (width, (frame.height as u64 * width as u64 / frame.width.max(1) as u64) as u32),
+            (None, Some(height)) => ((frame.width as u64 * height as u64 / frame.height.max(1) as u64) as u32, height),
+            (None, None) => return (frame.width, frame.height),
+        };
+
+        // UYVY carries chroma per pixel pair
+        let uyvy = frame.four_cc == FOURCC_UYVY || self.four_cc == Some(FOURCC_UYVY);
+        let width = if uyvy { (width & !1).max(2) } else { width.max(1) };
+        (width, height.max(1))
+    }
+
+    /// Apply the scaling and format change, or return None to forward the
+    /// frame as it is
+    fn transform(&self, frame: &VideoFrameData, matrix: &YuvMatrix) -> Result<Option<VideoFrameData>, String> {
+        let (width, height) = self.output_size(frame);
+        let four_cc = self.four_cc.unwrap_or(frame.four_cc);
+        if (width, height, four_cc) == (frame.width, frame.height, frame.four_cc) {
+            return Ok(None);
+        }
+
+        // Scale in whichever format has fewer bytes per pixel
+        let scale_first = frame.four_cc == FOURCC_UYVY || four_cc != FOURCC_UYVY;
+        let mut frame = Cow::Borrowed(frame);
+        if scale_first && (width, height) != (frame.width, frame.height) {
+            frame = Cow::Owned(scale_video(&frame, width, height)?);
+        }
+        if four_cc != frame.four_cc {
+            frame = Cow::Owned(convert_video(&frame, four_cc, matrix)?);
+        }
+        if (width, height) != (frame.width, frame.height) {
+            frame = Cow::Owned(scale_video(&frame, width, height)?);
+        }
+        Ok(Some(frame.into_owned()))
+    }
+}
+
+/// Counters shared between a relay and its thread
+#[derive(Default)]
+struct RelayStats {
+    video_frames: AtomicU64,
+    audio_frames: AtomicU64,
+    metadata_frames: AtomicU64,
+    transformed: AtomicU64,
+    errors: AtomicU64,
+    // Kept as the exception so the relay thread never needs the GIL
+    last_error: Mutex<Option<PyErr>>,
+}
+
+impl RelayStats {
+    fn record_error(&self, error: PyErr) {
+        self.errors.fetch_add(1, Ordering::Relaxed);
+        *self.last_error.lock().unwrap() = Some(error);
+    }
+}
+
+/// Forward one captured frame to the output
+fn forward(frame: CapturedFrame, sender: &SendBackend, options: &RelayOptions, matrix: &YuvMatrix, stats: &RelayStats) {
+    let result = match frame {
+        CapturedFrame::Video(video) if options.video => match options.transform(&video, matrix) {
+            Ok(transformed) => {
+                if transformed.is_some() {
+                    stats.transformed.fetch_add(1, Ordering::Relaxed);
+                }
+                let video = transformed.unwrap_or(video);
+                stats.video_frames.fetch_add(1, Ordering::Relaxed);
+                sender.send_shared_video(&video.data, &video.format(), video.timecode)
+            },
+            Err(error) => return stats.record_error(PyValueError::new_err(error)),
+        },
+        CapturedFrame::Audio(audio) if options.audio => {
+            stats.audio_frames.fetch_add(1, Ordering::Relaxed);
+            sender.send_audio(&audio.data, audio.sample_rate, audio.num_channels, audio.num_samples, audio.timecode)
+        },
+        CapturedFrame::Metadata(metadata) if options.metadata => {
+            stats.metadata_frames.fetch_add(1, Ordering::Relaxed);
+            sender.send_metadata(&metadata.data, metadata.timecode)
+        },
+        _ => Ok(()),
+    };
+
+    // Sends only fail on frames the output cannot carry, such as an
+    // unsupported FourCC; the relay keeps running
+    if let Err(error) = result {
+        stats.record_error(error);
+    }
+}
+
+/// A running relay thread
+struct RelayThread {
+    stop: Arc<AtomicBool>,
+    thread: JoinHandle<()>,
+}
+
+/// Receives a source and republishes it under another name on native threads
+///
+/// Audio and metadata are passed through untouched; video can optionally be
+/// resized and converted between UYVY and the RGB formats on the way.
+#[pyclass]
+struct NdiRelay {
+    source: String,
+    output_name: String,
+    core: Arc<ReceiverCore>,
+    sender: Arc<SendBackend>,
+    options: Arc<RelayOptions>,
+    stats: Arc<RelayStats>,
+    started: Mutex<Option<Instant>>,
+    thread: Mutex<Option<RelayThread>>,
+}
+
+impl NdiRelay {
+    /// Stop the relay thread and wait for it to finish
+    fn stop_thread(&self) {
+        let thread = self.thread.lock().unwrap().take();
+        if let Some(thread) = thread {
+            thread.stop.store(true, Ordering::Relaxed);
+            let _ = thread.thread.join();
+        }
+    }
+}
+
+impl Drop for NdiRelay {
+    fn drop(&mut self) {
+        self.stop_thread();
+    }
+}
+
+#[pymethods]
+impl NdiRelay {
+    /// Create a relay
+    ///
+    /// Args:
+    ///     source: Name of the source to receive
+    ///     output_name: Name to publish the relayed source under
+    ///     backend: Transport for both sides, "ndi" or "loopback" (default:
+    ///         the NDIRUST_BACKEND environment variable, or "ndi")
+    ///     width: Output width; the height follows the aspect ratio if only
+    ///         the width is given (default: the source width)
+    ///     height: Output height (default: the source height)
+    ///     four_cc: Output pixel format, "UYVY", "BGRA", "BGRX", "RGBA" or
+    ///         "RGBX" (default: the source format)
+    ///     video: Relay video frames (default: True)
+    ///     audio: Relay audio frames (default: True)
+    ///     metadata: Relay metadata frames (default: True)
+    ///     start: Start relaying immediately (default: True)
+    ///     groups: Groups to search for the source, as in NdiFinder
+    ///         (default: the groups configured for this machine)
+    ///     extra_ips: Addresses of machines or discovery servers to query
+    ///         directly, as in NdiFinder (default: None)
+    #[new]
+    #[pyo3(signature = (
+        source,
+        output_name,
+        backend = None,
+        width = None,
+        height = None,
+        four_cc = None,
+        video = true,
+        audio = true,
+        metadata = true,
+        start = true,
+        groups = None,
+        extra_ips = None
+    ))]
+    fn new(
+        source: &str,
+        output_name: &str,
+        backend: Option<&str>,
+        width: Option<u32>,
+        height: Option<u32>,
+        four_cc: Option<&str>,
+        video: bool,
+        audio: bool,
+        metadata: bool,
+        start: bool,
+        groups: Option<&PyAny>,
+        extra_ips: Option<&PyAny>,
+        py: Python<'_>,
+    ) -> PyResult<Self> {
+        let backend = Backend::resolve(backend)?;
+        let find_options = FindOptions::from_py(groups, extra_ips, true)?;
+        let four_cc = match four_cc {
+            Some(name) => Some(
+                four_cc_from_name(name)
+                    .filter(|four_cc| can_convert(*four_cc, *four_cc))
+                    .ok_or_else(|| PyValueError::new_err(format!("Unsupported output format: {}", name)))?,
+            ),
+            None => None,
+        };
+        if width == Some(0) || height == Some(0) {
+            return Err(PyValueError::new_err("width and height must be positive"));
+        }
+
+        // Connecting can take seconds, so other Python threads keep running
+        let (core, sender) = py.allow_threads(|| -> PyResult<_> {
+            let core = ReceiverCore::open(backend, None)?;
+            core.connect(source, &find_options)?;
+            let sender = SendBackend::create(output_name, backend, false, false)?;
+            Ok((core, sender))
+        })?;
+
+        let relay = NdiRelay {
+            source: source.to_string(),
+            output_name: output_name.to_string(),
+            core: Arc::new(core),
+            sender: Arc::new(sender),
+            options: Arc::new(RelayOptions { width, height, four_cc, video, audio, metadata }),
+            stats: Arc::new(RelayStats::default()),
+            started: Mutex::new(None),
+            thread: Mutex::new(None),
+        };
+        if start {
+            relay.start()?;
+        }
+        Ok(relay)
+    }
+
+    /// Start relaying on a native thread
+    fn start(&self) -> PyResult<()> {
+        let mut thread = self.thread.lock().unwrap();
+        if thread.is_some() {
+            return Err(PyRuntimeError::new_err("Relay is already running"));
+        }
+
+        let stop = Arc::new(AtomicBool::new(false));
+        let handle = {
+            let (core, sender) = (self.core.clone(), self.sender.clone());
+            let (options, stats, stop) = (self.options.clone(), self.stats.clone(), stop.clone());
+            std::thread::Builder::new().name("ndirust-relay".to_string()).spawn(move || {
+                let matrix = YuvMatrix::bt709();
+                while !stop.load(Ordering::Relaxed) {
+                    let frame = core.capture(RELAY_TIMEOUT_MS);
+                    forward(frame, &sender, &options, &matrix, &stats);
+                }
+            })?
+        };
+
+        *thread = Some(RelayThread { stop, thread: handle });
+        self.started.lock().unwrap().get_or_insert_with(Instant::now);
+        Ok(())
+    }
+
+    /// Stop relaying; start() resumes
+    fn stop(&self, py: Python<'_>) {
+        py.allow_threads(|| self.stop_thread());
+    }
+
+    /// Whether the relay thread is running
+    #[getter]
+    fn get_is_running(&self) -> bool {
+        self.thread.lock().unwrap().is_some()
+    }
+
+    /// Name of the relayed source
+    #[getter]
+    fn get_source(&self) -> String {
+        self.source.clone()
+    }
+
+    /// Name the output was published under
+    #[getter]
+    fn get_output_name(&self) -> String {
+        self.output_name.clone()
+    }
+
+    /// Name receivers connect to for the output
+    ///
+    /// For the loopback backend this is the full "LOOPBACK (name)" form.
+    #[getter]
+    fn get_output_source_name(&self) -> String {
+        self.sender.source_name().unwrap_or(self.output_name.as_str()).to_string()
+    }
+
+    /// Relay statistics: video_frames, audio_frames and metadata_frames
+    /// forwarded, transformed (video frames resized or converted), errors,
+    /// last_error, connections (receivers of the output) and elapsed
+    #[getter]
+    fn get_stats(&self, py: Python<'_>) -> PyResult<Py<PyDict>> {
+        let stats = PyDict::new(py);
+        stats.set_item("video_frames", self.stats.video_frames.load(Ordering::Relaxed))?;
+        stats.set_item("audio_frames", self.stats.audio_frames.load(Ordering::Relaxed))?;
+        stats.set_item("metadata_frames", self.stats.metadata_frames.load(Ordering::Relaxed))?;
+        stats.set_item("transformed", self.stats.transformed.load(Ordering::Relaxed))?;
+        stats.set_item("errors", self.stats.errors.load(Ordering::Relaxed))?;
+        let last_error = self.stats.last_error.lock().unwrap().as_ref().map(|error| error.value(py).to_string());
+        stats.set_item("last_error", last_error)?;
+        stats.set_item("connections", self.sender.connections(0))?;
+        let elapsed = self.started.lock().unwrap().map_or(0.0, |started| started.elapsed().as_secs_f64());
+        stats.set_item("elapsed", elapsed)?;
+        Ok(stats.into())
+    }
+
+    fn __repr__(&self) -> String {
+        let format = self.options.four_cc.map(four_cc_name);
+        format!(
+            "NdiRelay('{}' -> '{}'{})",
+            self.source,
+            self.output_name,
+            format.map_or(String::new(), |format| format!(", {}", format))
+        )
+    }
+}
+
+/// Register relay-related Python classes
+pub fn register_relay_functions(m: &PyModule) -> PyResult<()> {
+    m.add_class::<NdiRelay>()?;
+    multiview::register_multiview_functions(m)?;
+
+    Ok(())
+}
@@ -0,0 +1,126 @@
+// src/scale.rs
+//
+// Resizing of packed 8-bit video frames with an area-average (box) filter.
+// Downscaling averages every source pixel that falls into an output pixel;
+// upscaling repeats pixels. UYVY luma and chroma are resampled separately,
+// so chroma stays averaged over pixel pairs.
+
+use std::sync::Arc;
+
+use crate::frame::{VideoFormat, VideoFrameData, FOURCC_BGRA, FOURCC_BGRX, FOURCC_RGBA, FOURCC_RGBX, FOURCC_UYVY};
+
+/// Check whether frames of a format can be scaled
+pub fn can_scale(four_cc: u32) -> bool {
+    matches!(four_cc, FOURCC_UYVY | FOURCC_BGRA | FOURCC_BGRX | FOURCC_RGBA | FOURCC_RGBX)
+}
+
+/// Source range `start..end` covering each of `target` output positions
+fn spans(source: u32, target: u32) -> Vec<(usize, usize)> {
+    let (source, target) = (source as u64, target.max(1) as u64);
+    (0..target)
+        .map(|i| {
+            let start = (i * source / target) as usize;
+            let end = (((i + 1) * source / target) as usize).max(start + 1);
+            (start, end)
+        })
+        .collect()
+}
+
+/// Area-average one set of interleaved samples
+///
+/// Each unit has `channels` samples `step` bytes apart, starting at the row
+/// offsets given by `source_at` and `target_at`.
+fn resample(
+    source: &[u8],
+    source_stride: usize,
+    target: &mut [u8],
+    target_stride: usize,
+    columns: &[(usize, usize)],
+    rows: &[(usize, usize)],
+    channels: usize,
+    step: usize,
+    source_at: impl Fn(usize) -> usize,
+    target_at: impl Fn(usize) -> usize,
+) {
+    let mut sums = vec![0u32; columns.len() * channels];
+    for (out_y, &(y0, y1)) in rows.iter().enumerate() {
+        sums.fill(0);
+        for y in y0..y1 {
+            let row = &source[y * source_stride..];
+            for (sum, &(x0, x1)) in sums.chunks_exact_mut(channels).zip(columns) {
+                for x in x0..x1 {
+                    let at = source_at(x);
+                    for (c, sum) in sum.iter_mut().enumerate() {
+                        *sum += row[at + c * step] as u32;
+                    }
+                }
+            }
+        }
+
+        let out = &mut target[out_y * target_stride..];
+        for (out_x, (sum, &(x0, x1))) in sums.chunks_exact(channels).zip(columns).enumerate() {
+            let count = ((x1 - x0) * (y1 - y0)) as u32;
+            let at = target_at(out_x);
+            for (c, sum) in sum.iter().enumerate() {
+                out[at + c * step] = ((sum + count / 2) / count) as u8;
+            }
+        }
+    }
+}
+
+/// Resize a packed frame into a buffer of another size but the same format
+///
+/// `target` starts at the top-left pixel of the output and `to.line_stride`
+/// may be wider than the output, so a frame can be scaled into a region of
+/// a larger one.
+pub fn scale_into(source: &[u8], from: &VideoFormat, target: &mut [u8], to: &VideoFormat) -> Result<(), String> {
+    if from.four_cc != to.four_cc || !can_scale(from.four_cc) {
+        return Err("Only UYVY, BGRA, BGRX, RGBA and RGBX frames can be scaled".to_string());
+    }
+    if from.width == 0 || from.height == 0 || to.width == 0 || to.height == 0 {
+        return Err("Frames must not be empty".to_string());
+    }
+    let rows_needed = |format: &VideoFormat, row_bytes: usize| (format.height as usize - 1) * format.line_stride + row_bytes;
+    let bytes_per_pixel = if from.four_cc == FOURCC_UYVY { 2 } else { 4 };
+    if source.len() < rows_needed(from, from.width as usize * bytes_per_pixel)
+        || target.len() < rows_needed(to, to.width as usize * bytes_per_pixel)
+    {
+        return Err("Frame buffer is too small for its format".to_string());
+    }
+
+    let rows = spans(from.height, to.height);
+    if from.four_cc == FOURCC_UYVY {
+        if from.width % 2 != 0 || to.width % 2 != 0 {
+            return Err("UYVY frames must have an even width".to_string());
+        }
+
+        // Luma per pixel, then U and V per pixel pair
+        let luma_at = |x: usize| (x / 2) * 4 + 1 + (x % 2) * 2;
+        let columns = spans(from.width, to.width);
+        resample(source, from.line_stride, target, to.line_stride, &columns, &rows, 1, 0, luma_at, luma_at);
+        let columns = spans(from.width / 2, to.width / 2);
+        let pair_at = |pair: usize| pair * 4;
+        resample(source, from.line_stride, target, to.line_stride, &columns, &rows, 2, 2, pair_at, pair_at);
+    } else {
+        let columns = spans(from.width, to.width);
+        let pixel_at = |x: usize| x * 4;
+        resample(source, from.line_stride, target, to.line_stride, &columns, &rows, 4, 1, pixel_at, pixel_at);
+    }
+    Ok(())
+}
+
+/// Resize a captured frame, keeping its format and rate
+pub fn scale_video(frame: &VideoFrameData, width: u32, height: u32) -> Result<VideoFrameData, String> {
+    let from = frame.format();
+    let to = VideoFormat::new(width, height, from.four_cc, from.frame_rate_n, from.frame_rate_d);
+    let mut data = vec![0u8; to.data_size()];
+    scale_into(&frame.data, &from, &mut data, &to)?;
+
+    Ok(VideoFrameData {
+        width,
+        height,
+        line_stride: to.line_stride,
+        data: Arc::new(data),
+        ..frame.clone()
+    })
+}
@@ -2,31 +2,72 @@
 
 use pyo3::prelude::*;
 use ndi;
-use pyo3::exceptions::PyRuntimeError;
-use pyo3::types::PyBytes;
+use pyo3::exceptions::{PyRuntimeError, PyTypeError, PyValueError};
+use pyo3::buffer::PyBuffer;
+use pyo3::types::PyDict;
+use std::sync::atomic::{AtomicBool, AtomicUsize, Ordering};
+use std::sync::{Arc, Mutex, RwLock};
+use std::time::{Duration, Instant};
 
-/// Python class for creating and sending NDI video frames
-#[pyclass(unsendable)]  // Mark as unsendable to avoid thread safety concerns
-struct NdiSender {
-    sender: Option<ndi::send::Send>,
-    name: String,
+use crate::backend::Backend;
+use crate::convert::{rgb_to_yuv_into, RgbLayout, YuvMatrix};
+use crate::frame::{
+    current_time_100ns, four_cc_from_name, four_cc_name, ndi_audio_frame, ndi_metadata_frame, ndi_video_frame,
+    to_ndi_four_cc, AudioFrameData, CapturedFrame, MetadataFrameData, VideoFormat, VideoFrameData, FOURCC_NV12,
+    FOURCC_UYVY, TIMECODE_SYNTHESIZE,
+};
+use crate::loadgen;
+use crate::loopback::LoopbackSource;
+use crate::pacing::Pacer;
+use crate::patterns::{self, PatternGenerator, PatternKind, TestPatternGenerator};
+use crate::slots::{FrameSlot, SlotPool};
+
+/// SDK send instance that can be shared between threads
+///
+/// The SDK allows a send instance to be used from any thread; `SendBackend`
+/// serialises the sends of each frame type on it.
+pub struct NdiHandle(ndi::send::Send);
+
+unsafe impl Send for NdiHandle {}
+unsafe impl Sync for NdiHandle {}
+
+/// Transport a sender publishes frames through
+pub enum SendBackend {
+    Ndi {
+        sender: NdiHandle,
+        // Held while a frame of the type is being sent
+        video: Mutex<()>,
+        audio: Mutex<()>,
+        metadata: Mutex<()>,
+    },
+    // Published source, and a clock emulating the SDK's clock_video if enabled
+    Loopback(Arc<LoopbackSource>, Option<Mutex<Pacer>>),
 }
 
-#[pymethods]
-impl NdiSender {
-    #[new]
-    fn new(name: &str) -> PyResult<Self> {
+impl SendBackend {
+    /// Create the transport for a sender
+    pub fn create(name: &str, backend: Backend, clock_video: bool, clock_audio: bool) -> PyResult<Self> {
+        if backend == Backend::Loopback {
+            let source = LoopbackSource::publish(name).map_err(PyRuntimeError::new_err)?;
+            let clock = if clock_video { Some(Mutex::new(Pacer::new(30, 1))) } else { None };
+            return Ok(SendBackend::Loopback(source, clock));
+        }
+        
         // Initialize NDI if not already initialized
         match ndi::initialize() {
             Ok(_) => {
                 let sender_create = ndi::send::SendBuilder::new()
                     .ndi_name(name.to_string())
+                    .clock_video(clock_video)
+                    .clock_audio(clock_audio)
                     .build();
 
                 match sender_create {
-                    Ok(sender) => Ok(NdiSender { 
-                        sender: Some(sender),
-                        name: name.to_string(),
+                    Ok(sender) => Ok(SendBackend::Ndi {
+                        sender: NdiHandle(sender),
+                        video: Mutex::new(()),
+                        audio: Mutex::new(()),
+                        metadata: Mutex::new(()),
                     }),
                     Err(_) => Err(PyRuntimeError::new_err("Failed to create NDI sender")),
                 }
@@ -36,130 +77,948 @@ impl NdiSender {
             )),
         }
     }
+    
+    /// Send a video frame borrowed from the caller
+    ///
+    /// The NDI backend sends straight from the caller's buffer; the loopback
+    /// backend takes a copy because receivers keep the frame after this returns.
+    pub fn send_video(&self, data: &[u8], format: &VideoFormat, timecode: i64) -> PyResult<()> {
+        self.send_video_with(data, format, timecode, || Arc::new(data[..format.data_size()].to_vec()))
+    }
+    
+    /// Send a reference-counted video frame
+    ///
+    /// The loopback backend hands the buffer itself to receivers instead of
+    /// copying it.
+    pub fn send_shared_video(&self, data: &Arc<Vec<u8>>, format: &VideoFormat, timecode: i64) -> PyResult<()> {
+        self.send_video_with(data, format, timecode, || data.clone())
+    }
+    
+    fn send_video_with(
+        &self,
+        data: &[u8],
+        format: &VideoFormat,
+        timecode: i64,
+        shared: impl FnOnce() -> Arc<Vec<u8>>,
+    ) -> PyResult<()> {
+        if data.len() < format.data_size() {
+            return Err(PyValueError::new_err(format!(
+                "Frame data is {} bytes, expected at least {} for {}x{} {}",
+                data.len(),
+                format.data_size(),
+                format.width,
+                format.height,
+                four_cc_name(format.four_cc)
+            )));
+        }
+        
+        match self {
+            SendBackend::Ndi { sender, video, .. } => {
+                let video_data = ndi_video_frame(data, format, timecode).ok_or_else(|| {
+                    PyValueError::new_err(format!("Unsupported FourCC format: {}", four_cc_name(format.four_cc)))
+                })?;
+                
+                // Send the frame
+                let _sending = video.lock().unwrap();
+                sender.0.send_video(&video_data);
+            },
+            SendBackend::Loopback(source, clock) => {
+                if let Some(clock) = clock {
+                    let mut pacer = clock.lock().unwrap();
+                    if !pacer.has_rate(format.frame_rate_n, format.frame_rate_d) {
+                        *pacer = Pacer::new(format.frame_rate_n, format.frame_rate_d);
+                    }
+                    pacer.wait_clocked();
+                }
+                
+                // The SDK stamps frames with the send time and synthesizes
+                // timecodes from it
+                let timestamp = current_time_100ns();
+                let timecode = if timecode == TIMECODE_SYNTHESIZE { timestamp } else { timecode };
+                source.send(CapturedFrame::Video(VideoFrameData {
+                    width: format.width,
+                    height: format.height,
+                    four_cc: format.four_cc,
+                    frame_rate_n: format.frame_rate_n,
+                    frame_rate_d: format.frame_rate_d,
+                    timecode,
+                    timestamp,
+                    line_stride: format.line_stride,
+                    data: shared(),
+                }));
+            },
+        }
+        
+        Ok(())
+    }
+    
+    /// Send planar float audio borrowed from the caller
+    ///
+    /// `samples` holds `num_samples` samples of each channel, one channel
+    /// after the other.
+    pub fn send_audio(
+        &self,
+        samples: &[f32],
+        sample_rate: u32,
+        num_channels: u32,
+        num_samples: u32,
+        timecode: i64,
+    ) -> PyResult<()> {
+        let expected = num_channels as usize * num_samples as usize;
+        if samples.len() < expected {
+            return Err(PyValueError::new_err(format!(
+                "Audio data holds {} samples, expected {} for {} channels of {}",
+                samples.len(),
+                expected,
+                num_channels,
+                num_samples
+            )));
+        }
+        
+        match self {
+            SendBackend::Ndi { sender, audio, .. } => {
+                let audio_data = ndi_audio_frame(&samples[..expected], sample_rate, num_channels, num_samples, timecode);
+                let _sending = audio.lock().unwrap();
+                sender.0.send_audio(&audio_data);
+            },
+            SendBackend::Loopback(source, _) => {
+                let timestamp = current_time_100ns();
+                let timecode = if timecode == TIMECODE_SYNTHESIZE { timestamp } else { timecode };
+                source.send(CapturedFrame::Audio(AudioFrameData {
+                    sample_rate,
+                    num_channels,
+                    num_samples,
+                    timecode,
+                    timestamp,
+                    data: Arc::new(samples[..expected].to_vec()),
+                }));
+            },
+        }
+        
+        Ok(())
+    }
+    
+    /// Send a metadata frame
+    pub fn send_metadata(&self, data: &str, timecode: i64) -> PyResult<()> {
+        match self {
+            SendBackend::Ndi { sender, metadata, .. } => {
+                let metadata_frame = ndi_metadata_frame(data, timecode);
+                let _sending = metadata.lock().unwrap();
+                sender.0.send_metadata(&metadata_frame);
+            },
+            SendBackend::Loopback(source, _) => {
+                let timestamp = current_time_100ns();
+                let timecode = if timecode == TIMECODE_SYNTHESIZE { timestamp } else { timecode };
+                source.send(CapturedFrame::Metadata(MetadataFrameData {
+                    timecode,
+                    timestamp,
+                    data: data.to_string(),
+                }));
+            },
+        }
+        
+        Ok(())
+    }
+    
+    /// Number of receivers connected, waiting up to `timeout_ms` for one if
+    /// there are none
+    pub fn connections(&self, timeout_ms: u32) -> usize {
+        match self {
+            SendBackend::Ndi { sender, .. } => sender.0.get_no_connections(timeout_ms) as usize,
+            SendBackend::Loopback(source, _) => {
+                source.wait_for_connections(Duration::from_millis(timeout_ms as u64))
+            },
+        }
+    }
+    
+    /// Full name receivers connect to, if it differs from the sender name
+    pub fn source_name(&self) -> Option<&str> {
+        match self {
+            SendBackend::Loopback(source, _) => Some(source.full_name()),
+            SendBackend::Ndi { .. } => None,
+        }
+    }
+}
+
+/// Tracks a sender's connection count for skipping unwatched frames
+struct ConnectionWatch {
+    skip_unwatched: AtomicBool,
+    callback: Mutex<Option<PyObject>>,
+    // Last count seen, starting at zero for a new sender
+    count: AtomicUsize,
+}
+
+impl ConnectionWatch {
+    /// Record a connection count, calling the callback if it changed
+    fn update(&self, count: usize, py: Python<'_>) -> PyResult<()> {
+        if self.count.swap(count, Ordering::Relaxed) != count {
+            // Call outside the lock so the callback may use the sender
+            let callback = self.callback.lock().unwrap().as_ref().map(|callback| callback.clone_ref(py));
+            if let Some(callback) = callback {
+                callback.call1(py, (count,))?;
+            }
+        }
+        Ok(())
+    }
+    
+    /// Poll the connection count and decide whether the next frame is worth
+    /// rendering and sending
+    fn should_send(&self, sender: &SendBackend, py: Python<'_>) -> PyResult<bool> {
+        let skip_unwatched = self.skip_unwatched.load(Ordering::Relaxed);
+        if !skip_unwatched && self.callback.lock().unwrap().is_none() {
+            return Ok(true);
+        }
+        
+        let count = sender.connections(0);
+        self.update(count, py)?;
+        Ok(!skip_unwatched || count > 0)
+    }
+}
+
+/// Borrow the bytes of any C-contiguous buffer-protocol object
+fn with_buffer<R>(obj: &PyAny, f: impl FnOnce(&[u8]) -> R) -> PyResult<R> {
+    let buffer = PyBuffer::<u8>::get(obj)?;
+    if !buffer.is_c_contiguous() {
+        return Err(PyValueError::new_err("Frame data must be C-contiguous"));
+    }
+    
+    let data = unsafe { std::slice::from_raw_parts(buffer.buf_ptr() as *const u8, buffer.len_bytes()) };
+    Ok(f(data))
+}
+
+/// Threads used for colour conversion on the send path
+fn conversion_threads() -> usize {
+    std::thread::available_parallelism().map_or(1, |cpus| cpus.get())
+}
+
+/// Get the index of the next frame, waiting for its deadline unless the
+/// sender is clocked and will block in the send call itself
+fn next_frame(pacer: &mut Pacer, clocked: bool) -> u64 {
+    if clocked {
+        pacer.skip()
+    } else {
+        pacer.wait()
+    }
+}
+
+/// Measure a clocked send against the schedule once it has returned, so
+/// late and dropped frames are counted in clocked mode too
+fn frame_sent(pacer: &mut Pacer, index: u64, clocked: bool) {
+    if clocked {
+        pacer.complete_clocked(index, Instant::now());
+    }
+}
+
+/// Python class for creating and sending NDI video frames
+///
+/// A sender may be shared between threads. Sends run with the GIL released,
+/// so several senders compress frames in parallel, while frames sent to the
+/// same sender are serialised.
+#[pyclass]
+pub struct NdiSender {
+    // Replaced by rename() and close(); each send holds its own reference,
+    // so the transport is torn down once in-flight sends have finished
+    sender: RwLock<Option<Arc<SendBackend>>>,
+    name: RwLock<String>,
+    backend: Backend,
+    clock_video: bool,
+    clock_audio: bool,
+    watch: ConnectionWatch,
+    // Buffers handed out by acquire_frame
+    slots: Mutex<SlotPool>,
+    // Generator reused by send_test_pattern
+    pattern: Mutex<Option<PatternGenerator>>,
+    // Target of send_video_frame's colour conversion
+    converted: Mutex<Vec<u8>>,
+}
+
+impl NdiSender {
+    /// Get the current transport for a send
+    pub fn transport(&self) -> PyResult<Arc<SendBackend>> {
+        self.sender
+            .read()
+            .unwrap()
+            .clone()
+            .ok_or_else(|| PyRuntimeError::new_err("Sender is not initialized"))
+    }
+}
+
+#[pymethods]
+impl NdiSender {
+    /// Create a sender
+    ///
+    /// Args:
+    ///     name: Name of the NDI source
+    ///     backend: Transport to use, "ndi" or "loopback" (default: the
+    ///         NDIRUST_BACKEND environment variable, or "ndi")
+    ///     clock_video: Let the SDK pace video, blocking each send until the
+    ///         frame is due according to its frame rate (default: False)
+    ///     clock_audio: Let the SDK pace audio the same way (default: False)
+    ///     skip_when_unwatched: Skip rendering and sending frames while no
+    ///         receiver is connected (default: False)
+    ///     on_connections_changed: Callable invoked with the new connection
+    ///         count when a send or get_no_connections() notices it changed
+    #[new]
+    #[pyo3(signature = (
+        name,
+        backend = None,
+        clock_video = false,
+        clock_audio = false,
+        skip_when_unwatched = false,
+        on_connections_changed = None
+    ))]
+    fn new(
+        name: &str,
+        backend: Option<&str>,
+        clock_video: bool,
+        clock_audio: bool,
+        skip_when_unwatched: bool,
+        on_connections_changed: Option<PyObject>,
+    ) -> PyResult<Self> {
+        let backend = Backend::resolve(backend)?;
+        let sender = SendBackend::create(name, backend, clock_video, clock_audio)?;
+        
+        Ok(NdiSender {
+            sender: RwLock::new(Some(Arc::new(sender))),
+            name: RwLock::new(name.to_string()),
+            backend,
+            clock_video,
+            clock_audio,
+            watch: ConnectionWatch {
+                skip_unwatched: AtomicBool::new(skip_when_unwatched),
+                callback: Mutex::new(on_connections_changed),
+                count: AtomicUsize::new(0),
+            },
+            slots: Mutex::new(SlotPool::default()),
+            pattern: Mutex::new(None),
+            converted: Mutex::new(Vec::new()),
+        })
+    }
 
     /// Send a test pattern video frame
     /// 
+    /// The pattern is rendered natively with the GIL released. Its background
+    /// is cached, and only the moving box and burnt-in frame counter are
+    /// redrawn on each call, so repeated calls with the same arguments are cheap.
+    /// 
+    /// Returns:
+    ///     True if the frame was sent, False if it was skipped because
+    ///     skip_when_unwatched is set and no receiver is connected
+    /// 
     /// Args:
     ///     width: Width of the test pattern (default: 1280)
     ///     height: Height of the test pattern (default: 720)
     ///     fps_n: Framerate numerator (default: 30)
     ///     fps_d: Framerate denominator (default: 1)
-    #[pyo3(signature = (width=1280, height=720, fps_n=30, fps_d=1))]
-    fn send_test_pattern(&self, width: u32, height: u32, fps_n: u32, fps_d: u32) -> PyResult<()> {
-        let sender = match &self.sender {
-            Some(s) => s,
-            None => return Err(PyRuntimeError::new_err("Sender is not initialized")),
-        };
+    ///     pattern: "bars", "ramp", "zoneplate" or "black" (default: "bars")
+    ///     four_cc: Pixel format, "UYVY", "BGRA", "BGRX", "RGBA" or "RGBX" (default: "UYVY")
+    ///     timecode: Timecode in 100ns units (default: synthesized from the send time)
+    #[pyo3(signature = (width=1280, height=720, fps_n=30, fps_d=1, pattern="bars", four_cc="UYVY", timecode=None))]
+    fn send_test_pattern(
+        &self,
+        width: u32,
+        height: u32,
+        fps_n: u32,
+        fps_d: u32,
+        pattern: &str,
+        four_cc: &str,
+        timecode: Option<i64>,
+        py: Python<'_>,
+    ) -> PyResult<bool> {
+        let sender = self.transport()?;
+        let kind = PatternKind::from_name(pattern).map_err(PyValueError::new_err)?;
+        let four_cc = four_cc_from_name(four_cc)
+            .ok_or_else(|| PyValueError::new_err(format!("Unknown FourCC format: {}", four_cc)))?;
+        let send = self.watch.should_send(&sender, py)?;
+        let format = VideoFormat::new(width, height, four_cc, fps_n, fps_d);
         
-        // Create a simple color test pattern in UYVY format (2 bytes per pixel)
-        let data_size = (width * height * 2) as usize;
-        let mut data = vec![0u8; data_size];
-        
-        // Create a colorful test pattern
-        for y in 0..height {
-            for x in 0..width {
-                let index = ((y * width + x) * 2) as usize;
-                if index + 1 < data_size {
-                    // U and V values for color
-                    data[index] = ((x * 255) / width) as u8;     // U: blue-difference chroma
-                    data[index + 1] = ((y * 255) / height) as u8; // Y: luma
-                    // Additional Y and V values
-                    if x % 2 == 0 && index + 3 < data_size {
-                        data[index + 2] = 128;   // V: red-difference chroma
-                        data[index + 3] = 235;   // Y: luma (white)
-                    }
-                }
+        py.allow_threads(|| {
+            // Keep the generator between calls so the animation continues and
+            // the background is not looked up again
+            let mut pattern = self.pattern.lock().unwrap();
+            if !matches!(&*pattern, Some(g) if g.matches(kind, width, height, four_cc)) {
+                let generator = PatternGenerator::new(kind, width, height, four_cc, fps_n, fps_d, true, true);
+                *pattern = Some(generator.map_err(PyValueError::new_err)?);
             }
+            
+            let generator = pattern.as_mut().unwrap();
+            generator.fps_n = fps_n;
+            generator.fps_d = fps_d;
+            if !send {
+                // Keep the animation on time for when a receiver connects
+                generator.frame_number += 1;
+                return Ok(false);
+            }
+            
+            generator.advance();
+            sender.send_video(generator.frame(), &format, timecode.unwrap_or(TIMECODE_SYNTHESIZE))?;
+            Ok(true)
+        })
+    }
+    
+    /// Send custom video frame from raw byte data
+    /// 
+    /// Args:
+    ///     data: Raw video data: bytes or any C-contiguous buffer, such as a
+    ///         NumPy array
+    ///     width: Width of the frame
+    ///     height: Height of the frame
+    ///     fps_n: Framerate numerator (default: 30)
+    ///     fps_d: Framerate denominator (default: 1)
+    ///     timecode: Timecode in 100ns units (default: synthesized from the send time)
+    ///     convert_from: Pixel layout of data to convert to four_cc before
+    ///         sending, "RGB", "BGR", "RGBA", "BGRA", "RGBX" or "BGRX"
+    ///         (default: None, data is already in four_cc)
+    ///     four_cc: Pixel format to send; "UYVY" or "NV12" when converting
+    ///         (default: "UYVY")
+    ///     colorspace: Conversion matrix, "bt601" or "bt709" (default: "bt709")
+    ///     full_range: Convert to full-range rather than limited-range YUV
+    ///         (default: False)
+    /// 
+    /// Returns:
+    ///     True if the frame was sent, False if it was skipped because
+    ///     skip_when_unwatched is set and no receiver is connected
+    #[pyo3(signature = (
+        data,
+        width,
+        height,
+        fps_n=30,
+        fps_d=1,
+        timecode=None,
+        convert_from=None,
+        four_cc="UYVY",
+        colorspace="bt709",
+        full_range=false
+    ))]
+    fn send_video_frame(
+        &self,
+        data: &PyAny,
+        width: u32,
+        height: u32,
+        fps_n: u32,
+        fps_d: u32,
+        timecode: Option<i64>,
+        convert_from: Option<&str>,
+        four_cc: &str,
+        colorspace: &str,
+        full_range: bool,
+        py: Python<'_>,
+    ) -> PyResult<bool> {
+        let sender = self.transport()?;
+        let four_cc = four_cc_from_name(four_cc)
+            .filter(|four_cc| to_ndi_four_cc(*four_cc).is_some())
+            .ok_or_else(|| PyValueError::new_err(format!("Unknown FourCC format: {}", four_cc)))?;
+        let conversion = match convert_from {
+            Some(layout) => Some((
+                RgbLayout::from_name(layout)
+                    .ok_or_else(|| PyValueError::new_err(format!("Cannot convert from {}", layout)))?,
+                YuvMatrix::from_name(colorspace, full_range).map_err(PyValueError::new_err)?,
+            )),
+            None => None,
+        };
+        if !self.watch.should_send(&sender, py)? {
+            return Ok(false);
         }
         
-        // Create a video frame using the VideoData::from_buffer method
-        let fourcc = ndi::FourCCVideoType::UYVY;
-        let frame_format = ndi::FrameFormatType::Progressive;
+        let format = VideoFormat::new(width, height, four_cc, fps_n, fps_d);
+        let timecode = timecode.unwrap_or(TIMECODE_SYNTHESIZE);
+        // Bytes objects are immutable and other buffers stay exported while
+        // borrowed, so the data can be read without the GIL
+        let converted = &self.converted;
+        with_buffer(data, |data| {
+            py.allow_threads(|| match conversion {
+                Some((layout, matrix)) => {
+                    let mut converted = converted.lock().unwrap();
+                    converted.resize(format.data_size(), 0);
+                    let source_stride = width as usize * layout.bytes_per_pixel;
+                    rgb_to_yuv_into(data, layout, source_stride, &mut converted, &format, &matrix, conversion_threads())
+                        .map_err(PyValueError::new_err)?;
+                    sender.send_video(&converted, &format, timecode)
+                },
+                None => sender.send_video(data, &format, timecode),
+            })
+        })??;
+        Ok(true)
+    }
+    
+    /// Get a writable frame buffer to render into
+    /// 
+    /// The buffer comes from a pool owned by the sender and is recycled once
+    /// it has been sent and no Python object refers to it any more, so a
+    /// render loop of acquire_frame(), fill, submit() does not allocate in
+    /// steady state. Keep at most a frame or two alive between iterations.
+    /// 
+    /// Args:
+    ///     width: Width of the frame
+    ///     height: Height of the frame
+    ///     four_cc: Pixel format (default: "UYVY")
+    ///     fps_n: Framerate numerator (default: 30)
+    ///     fps_d: Framerate denominator (default: 1)
+    /// 
+    /// Returns:
+    ///     A writable NumPy array viewing the buffer, shaped (height, width, 2)
+    ///     for UYVY, (height, width, 4) for the RGB formats and flat for
+    ///     planar formats; the FrameSlot itself if NumPy is not installed
+    #[pyo3(signature = (width, height, four_cc="UYVY", fps_n=30, fps_d=1))]
+    fn acquire_frame(
+        &self,
+        width: u32,
+        height: u32,
+        four_cc: &str,
+        fps_n: u32,
+        fps_d: u32,
+        py: Python<'_>,
+    ) -> PyResult<PyObject> {
+        self.transport()?;
+        let four_cc = four_cc_from_name(four_cc)
+            .filter(|four_cc| to_ndi_four_cc(*four_cc).is_some())
+            .ok_or_else(|| PyValueError::new_err(format!("Unknown FourCC format: {}", four_cc)))?;
         
-        // Calculate stride (bytes per line)
-        let stride = (width * 2) as i32;  // 2 bytes per pixel for UYVY
+        let format = VideoFormat::new(width, height, four_cc, fps_n, fps_d);
+        let data = self.slots.lock().unwrap().acquire(format.data_size());
+        let slot = Py::new(py, FrameSlot::new(data, format))?;
         
-        // Create video frame
-        let video_data = ndi::VideoData::from_buffer(
-            width as i32, 
-            height as i32,
-            fourcc,
-            fps_n as i32,
-            fps_d as i32,
-            frame_format,
-            0, // timecode
-            stride,
-            None, // metadata
-            &mut data
-        );
+        match py.import("numpy") {
+            Ok(numpy) => Ok(numpy.call_method1("asarray", (slot,))?.into()),
+            Err(_) => Ok(slot.into_py(py)),
+        }
+    }
+    
+    /// Send a frame obtained from acquire_frame()
+    /// 
+    /// The frame must not be written to after it has been submitted. On the
+    /// loopback backend a frame still viewed by NumPy arrays is copied for
+    /// receivers, so later writes through those arrays cannot reach frames
+    /// already delivered; a bare FrameSlot with no views is shared as is.
+    /// 
+    /// Args:
+    ///     frame: The array returned by acquire_frame(), or its FrameSlot
+    ///     timecode: Timecode in 100ns units (default: synthesized by the SDK)
+    /// 
+    /// Returns:
+    ///     True if the frame was sent, False if it was skipped because
+    ///     skip_when_unwatched is set and no receiver is connected
+    #[pyo3(signature = (frame, timecode=None))]
+    fn submit(&self, frame: &PyAny, timecode: Option<i64>, py: Python<'_>) -> PyResult<bool> {
+        let sender = self.transport()?;
         
-        // Send the frame
-        sender.send_video(&video_data);
+        // NumPy keeps the exporting object as the array's base
+        let mut object = frame;
+        let slot = loop {
+            if let Ok(slot) = object.downcast::<PyCell<FrameSlot>>() {
+                break slot;
+            }
+            match object.getattr("base") {
+                Ok(base) if !base.is_none() => object = base,
+                _ => return Err(PyTypeError::new_err("submit() expects a frame returned by acquire_frame()")),
+            }
+        };
         
-        println!("Sent test pattern frame {}x{} @ {}/{} fps", width, height, fps_n, fps_d);
-        Ok(())
+        let (data, format, exported) = {
+            let mut slot = slot.try_borrow_mut()?;
+            if slot.submitted {
+                return Err(PyRuntimeError::new_err("Frame slot has already been submitted"));
+            }
+            slot.submitted = true;
+            (slot.data.clone(), slot.format, slot.is_exported())
+        };
+        
+        if !self.watch.should_send(&sender, py)? {
+            return Ok(false);
+        }
+        
+        // Arrays viewing the slot can still write to it after this returns,
+        // so a buffer they can reach is only lent for the send and never
+        // handed on to loopback receivers
+        let timecode = timecode.unwrap_or(TIMECODE_SYNTHESIZE);
+        if exported {
+            py.allow_threads(|| sender.send_video(&data, &format, timecode))?;
+        } else {
+            py.allow_threads(|| sender.send_shared_video(&data, &format, timecode))?;
+        }
+        Ok(true)
     }
     
-    /// Send custom video frame from raw byte data
+    /// Get the number of receivers connected to this sender
     /// 
     /// Args:
-    ///     data: Raw video data bytes
-    ///     width: Width of the frame
-    ///     height: Height of the frame
+    ///     timeout_ms: How long to wait for a receiver to connect if there
+    ///         are none yet (default: 0, return immediately)
+    #[pyo3(signature = (timeout_ms=0))]
+    fn get_no_connections(&self, timeout_ms: u32, py: Python<'_>) -> PyResult<usize> {
+        let sender = self.transport()?;
+        let count = py.allow_threads(|| sender.connections(timeout_ms));
+        
+        self.watch.update(count, py)?;
+        Ok(count)
+    }
+    
+    /// Whether frames are skipped while no receiver is connected
+    #[getter]
+    fn get_skip_when_unwatched(&self) -> bool {
+        self.watch.skip_unwatched.load(Ordering::Relaxed)
+    }
+    
+    #[setter]
+    fn set_skip_when_unwatched(&self, value: bool) {
+        self.watch.skip_unwatched.store(value, Ordering::Relaxed);
+    }
+    
+    /// Callable invoked with the new connection count when it changes
+    #[getter]
+    fn get_on_connections_changed(&self, py: Python<'_>) -> Option<PyObject> {
+        self.watch.callback.lock().unwrap().as_ref().map(|callback| callback.clone_ref(py))
+    }
+    
+    #[setter]
+    fn set_on_connections_changed(&self, callback: Option<PyObject>) {
+        *self.watch.callback.lock().unwrap() = callback;
+    }
+    
+    /// Send frames at an exact rational frame rate
+    /// 
+    /// Frame deadlines are computed from the start time and frame index, so
+    /// the achieved rate does not drift below the target the way a loop that
+    /// sleeps `1/fps` after each send does. The GIL is released while waiting
+    /// for each deadline. If the loop falls more than one frame behind, the
+    /// missed slots are skipped and counted as dropped. Frames sent more than
+    /// a tenth of an interval after their deadline are counted as late. With
+    /// `clock_video=True` the sender's clock paces the loop instead: each
+    /// send is measured when it returns against a schedule aligned to the
+    /// clock, and a stall long enough for the clock to start over counts the
+    /// slots that passed as dropped. With
+    /// `skip_when_unwatched=True` frames are neither rendered nor sent while
+    /// no receiver is connected, but the schedule keeps running.
+    /// 
+    /// Args:
+    ///     source: A TestPatternGenerator (rendered natively), a sequence of
+    ///         frame buffers sent in turn as a ring, or a callable taking the
+    ///         frame index and returning a buffer, or None to stop
     ///     fps_n: Framerate numerator (default: 30)
     ///     fps_d: Framerate denominator (default: 1)
-    #[pyo3(signature = (data, width, height, fps_n=30, fps_d=1))]
-    fn send_video_frame(&self, data: &PyBytes, width: u32, height: u32, fps_n: u32, fps_d: u32) -> PyResult<()> {
-        let sender = match &self.sender {
-            Some(s) => s,
-            None => return Err(PyRuntimeError::new_err("Sender is not initialized")),
+    ///     width: Frame width; required unless source is a TestPatternGenerator
+    ///     height: Frame height; required unless source is a TestPatternGenerator
+    ///     four_cc: Pixel format of buffer sources (default: "UYVY")
+    ///     duration: Stop after this many seconds of frames (default: no limit)
+    ///     max_frames: Stop after this many frame slots, whether sent, dropped
+    ///         or skipped (default: no limit)
+    /// 
+    /// Returns:
+    ///     dict with frames_sent, late, dropped, skipped, elapsed, target_fps
+    ///     and actual_fps
+    #[pyo3(signature = (source, fps_n=30, fps_d=1, width=None, height=None, four_cc="UYVY", duration=None, max_frames=None))]
+    fn run_paced(
+        &self,
+        source: &PyAny,
+        fps_n: u32,
+        fps_d: u32,
+        width: Option<u32>,
+        height: Option<u32>,
+        four_cc: &str,
+        duration: Option<f64>,
+        max_frames: Option<u64>,
+        py: Python<'_>,
+    ) -> PyResult<Py<PyDict>> {
+        let sender = self.transport()?;
+        if fps_n == 0 || fps_d == 0 {
+            return Err(PyValueError::new_err("fps_n and fps_d must be positive"));
+        }
+        
+        // Stop at whichever limit comes first
+        let duration_frames = duration.map(|seconds| (seconds * fps_n as f64 / fps_d as f64).round() as u64);
+        let limit = match (max_frames, duration_frames) {
+            (Some(a), Some(b)) => Some(a.min(b)),
+            (a, b) => a.or(b),
         };
+        let more = |scheduled: u64| limit.map_or(true, |limit| scheduled < limit);
         
-        // Extract bytes from PyBytes
-        let mut py_bytes = Python::with_gil(|_py| {
-            let bytes = data.as_bytes();
-            bytes.to_vec()
-        });
+        let clocked = self.clock_video;
+        let watch = &self.watch;
+        let mut pacer = Pacer::new(fps_n, fps_d);
+        let mut frames_sent = 0u64;
+        let mut skipped = 0u64;
         
-        // Calculate stride (bytes per line)
-        let stride = (width * 2) as i32;  // 2 bytes per pixel for UYVY
-        
-        // Create video frame
-        let video_data = ndi::VideoData::from_buffer(
-            width as i32, 
-            height as i32,
-            ndi::FourCCVideoType::UYVY,
-            fps_n as i32,
-            fps_d as i32,
-            ndi::FrameFormatType::Progressive,
-            0, // timecode
-            stride,
-            None, // metadata
-            &mut py_bytes
-        );
-        
-        // Send the frame
-        sender.send_video(&video_data);
+        if let Ok(mut generator) = source.extract::<PyRefMut<TestPatternGenerator>>() {
+            // Render natively; the frame number follows the schedule, so
+            // dropped slots show up as gaps in the burnt-in counter
+            let generator = generator.generator_mut();
+            generator.fps_n = fps_n;
+            generator.fps_d = fps_d;
+            let format = VideoFormat::new(generator.width, generator.height, generator.four_cc, fps_n, fps_d);
+            
+            while more(pacer.frames_scheduled()) {
+                py.check_signals()?;
+                // A skipped frame is not sent, so the sender's clock cannot pace it
+                let send = watch.should_send(&sender, py)?;
+                py.allow_threads(|| {
+                    let index = next_frame(&mut pacer, clocked && send);
+                    if send {
+                        generator.render(index);
+                        sender.send_video(generator.frame(), &format, TIMECODE_SYNTHESIZE)?;
+                        frame_sent(&mut pacer, index, clocked);
+                    }
+                    Ok::<_, PyErr>(())
+                })?;
+                
+                if send {
+                    frames_sent += 1;
+                } else {
+                    skipped += 1;
+                }
+            }
+        } else {
+            let (width, height) = match (width, height) {
+                (Some(w), Some(h)) => (w, h),
+                _ => return Err(PyValueError::new_err(
+                    "width and height are required unless the source is a TestPatternGenerator",
+                )),
+            };
+            let four_cc = four_cc_from_name(four_cc)
+                .ok_or_else(|| PyValueError::new_err(format!("Unknown FourCC format: {}", four_cc)))?;
+            let format = VideoFormat::new(width, height, four_cc, fps_n, fps_d);
+            
+            if source.is_callable() {
+                while more(pacer.frames_scheduled()) {
+                    py.check_signals()?;
+                    let send = watch.should_send(&sender, py)?;
+                    let index = py.allow_threads(|| next_frame(&mut pacer, clocked && send));
+                    if !send {
+                        skipped += 1;
+                        continue;
+                    }
+                    
+                    let frame = source.call1((index,))?;
+                    if frame.is_none() {
+                        break;
+                    }
+                    with_buffer(frame, |data| {
+                        py.allow_threads(|| sender.send_video(data, &format, TIMECODE_SYNTHESIZE))
+                    })??;
+                    frame_sent(&mut pacer, index, clocked);
+                    frames_sent += 1;
+                }
+            } else {
+                // Copy the ring once so the loop itself never touches Python objects
+                let mut ring = Vec::new();
+                for item in source.iter()? {
+                    ring.push(with_buffer(item?, |data| data.to_vec())?);
+                }
+                if ring.is_empty() {
+                    return Err(PyValueError::new_err("The frame sequence is empty"));
+                }
+                
+                while more(pacer.frames_scheduled()) {
+                    py.check_signals()?;
+                    let send = watch.should_send(&sender, py)?;
+                    py.allow_threads(|| {
+                        let index = next_frame(&mut pacer, clocked && send);
+                        if send {
+                            let frame = &ring[(index % ring.len() as u64) as usize];
+                            sender.send_video(frame, &format, TIMECODE_SYNTHESIZE)?;
+                            frame_sent(&mut pacer, index, clocked);
+                        }
+                        Ok::<_, PyErr>(())
+                    })?;
+                    
+                    if send {
+                        frames_sent += 1;
+                    } else {
+                        skipped += 1;
+                    }
+                }
+            }
+        }
         
-        Ok(())
+        let elapsed = pacer.elapsed().as_secs_f64();
+        let stats = PyDict::new(py);
+        stats.set_item("frames_sent", frames_sent)?;
+        stats.set_item("late", pacer.late)?;
+        stats.set_item("dropped", pacer.dropped)?;
+        stats.set_item("skipped", skipped)?;
+        stats.set_item("elapsed", elapsed)?;
+        stats.set_item("target_fps", fps_n as f64 / fps_d as f64)?;
+        stats.set_item("actual_fps", if elapsed > 0.0 { frames_sent as f64 / elapsed } else { 0.0 })?;
+        
+        Ok(stats.into())
+    }
+    
+    /// Whether the sender's clock paces video sends
+    #[getter]
+    fn get_clock_video(&self) -> bool {
+        self.clock_video
+    }
+    
+    /// Whether the sender's clock paces audio sends
+    #[getter]
+    fn get_clock_audio(&self) -> bool {
+        self.clock_audio
+    }
+    
+    /// Get the name of the source receivers can connect to
+    ///
+    /// For the loopback backend this is the full "LOOPBACK (name)" form that
+    /// NdiFinder lists.
+    #[getter]
+    fn get_source_name(&self) -> PyResult<String> {
+        let sender = self.sender.read().unwrap();
+        match sender.as_ref().and_then(|sender| sender.source_name()) {
+            Some(source_name) => Ok(source_name.to_string()),
+            None => Ok(self.name.read().unwrap().clone()),
+        }
+    }
+    
+    /// Get the name of the transport backend ("ndi" or "loopback")
+    #[getter]
+    fn get_backend(&self) -> &'static str {
+        self.backend.name()
     }
     
     /// Get the name of this NDI sender
     #[getter]
     fn get_name(&self) -> PyResult<String> {
-        Ok(self.name.clone())
+        Ok(self.name.read().unwrap().clone())
+    }
+    
+    /// Republish the sender under a new name
+    /// 
+    /// A new source is created and swapped in; sends already in progress on
+    /// other threads finish on the old one.
+    /// 
+    /// Args:
+    ///     name: New name of the NDI source
+    fn rename(&self, name: &str, py: Python<'_>) -> PyResult<()> {
+        self.transport()?;
+        let (backend, clock_video, clock_audio) = (self.backend, self.clock_video, self.clock_audio);
+        let sender = py.allow_threads(|| SendBackend::create(name, backend, clock_video, clock_audio))?;
+        
+        let previous = self.sender.write().unwrap().replace(Arc::new(sender));
+        *self.name.write().unwrap() = name.to_string();
+        self.watch.count.store(0, Ordering::Relaxed);
+        
+        // Tear the old source down without holding up other threads
+        py.allow_threads(move || drop(previous));
+        Ok(())
     }
     
     /// Close the sender and free resources
-    fn close(&mut self) -> PyResult<()> {
-        self.sender = None;
+    /// 
+    /// Safe to call while other threads are sending; their sends either
+    /// finish or fail with "Sender is not initialized".
+    fn close(&self, py: Python<'_>) -> PyResult<()> {
+        let previous = self.sender.write().unwrap().take();
+        self.slots.lock().unwrap().clear();
+        py.allow_threads(move || {
+            drop(previous);
+            *self.pattern.lock().unwrap() = None;
+        });
         Ok(())
     }
 }
 
+/// Convert RGB pixels to UYVY or NV12 in a caller-provided buffer
+///
+/// Rows are converted in parallel with the GIL released. Together with
+/// NdiSender.acquire_frame(), a rendered frame is converted straight into
+/// the buffer that will be sent.
+///
+/// Args:
+///     source: RGB pixels in a C-contiguous buffer, such as a NumPy array
+///         shaped (height, width, 3) or (height, width, 4)
+///     target: Writable C-contiguous buffer of at least the frame's size,
+///         such as an array returned by NdiSender.acquire_frame(); it must
+///         not share memory with the source
+///     width: Width of the frame (default: taken from the source's shape)
+///     height: Height of the frame (default: taken from the source's shape)
+///     source_format: "RGB", "BGR", "RGBA", "BGRA", "RGBX" or "BGRX"
+///         (default: "RGB" or "RGBA" by the source's last dimension)
+///     four_cc: "UYVY" or "NV12" (default: "UYVY")
+///     colorspace: Conversion matrix, "bt601" or "bt709" (default: "bt709")
+///     full_range: Convert to full-range rather than limited-range YUV
+///         (default: False)
+///     threads: Threads to convert on (default: one per CPU)
+#[pyfunction]
+#[pyo3(signature = (
+    source,
+    target,
+    width=None,
+    height=None,
+    source_format=None,
+    four_cc="UYVY",
+    colorspace="bt709",
+    full_range=false,
+    threads=None
+))]
+pub fn rgb_to_yuv(
+    source: &PyAny,
+    target: &PyAny,
+    width: Option<u32>,
+    height: Option<u32>,
+    source_format: Option<&str>,
+    four_cc: &str,
+    colorspace: &str,
+    full_range: bool,
+    threads: Option<usize>,
+    py: Python<'_>,
+) -> PyResult<()> {
+    let source = PyBuffer::<u8>::get(source)?;
+    let target = PyBuffer::<u8>::get(target)?;
+    if !source.is_c_contiguous() || !target.is_c_contiguous() {
+        return Err(PyValueError::new_err("Frame data must be C-contiguous"));
+    }
+    if target.readonly() {
+        return Err(PyValueError::new_err("The target buffer is read-only"));
+    }
+    
+    let (shape_height, shape_width, channels) = match source.shape() {
+        &[height, width, channels] => (Some(height as u32), Some(width as u32), Some(channels)),
+        _ => (None, None, None),
+    };
+    let (width, height) = width.or(shape_width).zip(height.or(shape_height)).ok_or_else(|| {
+        PyValueError::new_err("width and height are required unless the source is shaped (height, width, channels)")
+    })?;
+    let source_format = source_format
+        .or(match channels {
+            Some(3) => Some("RGB"),
+            Some(4) => Some("RGBA"),
+            _ => None,
+        })
+        .ok_or_else(|| PyValueError::new_err("source_format is required for this source"))?;
+    let layout = RgbLayout::from_name(source_format)
+        .ok_or_else(|| PyValueError::new_err(format!("Cannot convert from {}", source_format)))?;
+    if channels.is_some_and(|channels| channels != layout.bytes_per_pixel) {
+        return Err(PyValueError::new_err(format!("{} pixels need {} channels", source_format, layout.bytes_per_pixel)));
+    }
+    let four_cc = four_cc_from_name(four_cc)
+        .filter(|four_cc| matches!(*four_cc, FOURCC_UYVY | FOURCC_NV12))
+        .ok_or_else(|| PyValueError::new_err(format!("Cannot convert to {}, expected UYVY or NV12", four_cc)))?;
+    let matrix = YuvMatrix::from_name(colorspace, full_range).map_err(PyValueError::new_err)?;
+    
+    // A target overlapping the source would be aliased as both the input
+    // slice and the mutable output slice below
+    let source_range = source.buf_ptr() as usize..source.buf_ptr() as usize + source.len_bytes();
+    let target_range = target.buf_ptr() as usize..target.buf_ptr() as usize + target.len_bytes();
+    if source_range.start < target_range.end && target_range.start < source_range.end {
+        return Err(PyValueError::new_err("The source and target buffers overlap"));
+    }
+    
+    let format = VideoFormat::new(width, height, four_cc, 30, 1);
+    let threads = threads.unwrap_or_else(conversion_threads);
+    // The exports keep both buffers alive until they are dropped below
+    let input = unsafe { std::slice::from_raw_parts(source.buf_ptr() as *const u8, source.len_bytes()) };
+    let output = unsafe { std::slice::from_raw_parts_mut(target.buf_ptr() as *mut u8, target.len_bytes()) };
+    py.allow_threads(|| {
+        rgb_to_yuv_into(input, layout, width as usize * layout.bytes_per_pixel, output, &format, &matrix, threads)
+    })
+    .map_err(PyValueError::new_err)
+}
+
 /// Register sender-related Python functions and classes
 pub fn register_sender_functions(m: &PyModule) -> PyResult<()> {
     m.add_class::<NdiSender>()?;
+    m.add_class::<FrameSlot>()?;
+    m.add_function(wrap_pyfunction!(rgb_to_yuv, m)?)?;
+    patterns::register_pattern_functions(m)?;
+    loadgen::register_loadgen_functions(m)?;
     
     Ok(())
 } 
\ No newline at end of file
@@ -0,0 +1,1326 @@
+// src/shm.rs
+//
+// Hands captured frames to other processes through a named shared-memory
+// ring. A writer attached to a receiver copies each frame into the next slot
+// and publishes it with a sequence number; readers in worker processes map
+// the same file, lease slots and expose them to NumPy without copying.
+//
+// Layout: a RING_HEADER_SIZE header, slot_count SLOT_HEADER_SIZE slot
+// headers, a table of MAX_READERS reader entries, then slot_count
+// page-aligned payloads of slot_size bytes.
+//
+// Leases are owned by reader entries. Each entry holds a reader's epoch and
+// one bit per slot it has leased; the reader also keeps an exclusive lock on
+// a lock file named after its epoch. The operating system drops that lock if
+// the reader dies, which lets the writer reclaim the entry and its slots.
+// The writer likewise keeps the ring file itself locked while it is alive.
+
+use memmap2::MmapMut;
+use pyo3::prelude::*;
+use pyo3::exceptions::{PyBufferError, PyRuntimeError, PyValueError};
+use pyo3::ffi;
+use pyo3::types::PyDict;
+use std::fs::{self, File, OpenOptions, TryLockError};
+use std::io;
+use std::os::raw::{c_char, c_int};
+use std::path::PathBuf;
+use std::sync::atomic::{AtomicBool, AtomicU32, AtomicU64, AtomicUsize, Ordering};
+use std::sync::{Arc, Mutex};
+use std::time::{Duration, Instant};
+
+use crate::frame::{four_cc_name, samples_as_bytes, CapturedFrame, FOURCC_BGRA, FOURCC_BGRX, FOURCC_RGBA, FOURCC_RGBX, FOURCC_UYVY};
+use crate::receiver::{FrameSink, NdiReceiver, ReceiverCore};
+use crate::recorder::{KIND_AUDIO, KIND_METADATA, KIND_VIDEO};
+
+/// Magic bytes at the start of a ring
+const RING_MAGIC: &[u8; 8] = b"NDIRSHM2";
+
+/// Size of the ring header
+const RING_HEADER_SIZE: usize = 128;
+
+/// Size of one slot header
+const SLOT_HEADER_SIZE: usize = 64;
+
+/// Payloads start on page boundaries
+const PAGE_SIZE: usize = 4096;
+
+// Ring header fields
+const RING_SLOT_COUNT: usize = 8;
+const RING_SLOT_SIZE: usize = 16;
+const RING_DATA_OFFSET: usize = 24;
+const RING_WRITE_SEQUENCE: usize = 32;
+const RING_CLAIM_SEQUENCE: usize = 40;
+const RING_CLOSED: usize = 48;
+const RING_MAX_READERS: usize = 56;
+const RING_NEXT_EPOCH: usize = 64;
+
+// Slot header fields; bytes 8 to 12 are reserved
+const SLOT_SEQUENCE: usize = 0;
+const SLOT_KIND: usize = 12;
+const SLOT_SIZE: usize = 16;
+const SLOT_TIMECODE: usize = 24;
+const SLOT_TIMESTAMP: usize = 32;
+const SLOT_FIELDS: usize = 40;
+
+/// Readers that can have a ring open at the same time
+const MAX_READERS: usize = 64;
+
+/// Epoch of a reader entry being reclaimed by the writer
+const EPOCH_RECLAIMING: u64 = u64::MAX;
+
+/// Least time between the writer's checks for dead readers
+const RECLAIM_INTERVAL: Duration = Duration::from_secs(1);
+
+/// Poll interval of readers waiting for a frame
+const READ_POLL: Duration = Duration::from_micros(500);
+
+/// Longest a reader waits between checks for Python signals
+const SIGNAL_CHECK: Duration = Duration::from_millis(100);
+
+/// Path of the file backing a ring; /dev/shm keeps it in memory on Linux
+fn ring_path(name: &str) -> PathBuf {
+    let file_name = format!("ndirust-{}", name);
+    let shm = PathBuf::from("/dev/shm");
+    if shm.is_dir() { shm.join(file_name) } else { std::env::temp_dir().join(file_name) }
+}
+
+/// Metadata of a frame stored in a slot
+///
+/// `fields` are as in the recording index: width, height, FourCC, line
+/// stride and frame rate for video; sample rate, channels and samples per
+/// channel for audio.
+#[derive(Clone, Copy, Default, Debug)]
+struct SlotInfo {
+    kind: u32,
+    size: u64,
+    timecode: i64,
+    timestamp: i64,
+    fields: [u32; 6],
+}
+
+/// Words of lease bits each reader entry holds for a ring of `slot_count` slots
+fn lease_words(slot_count: usize) -> usize {
+    (slot_count + 63) / 64
+}
+
+/// Size of the headers and reader table, before the page-aligned payloads
+fn tables_size(slot_count: usize, max_readers: usize) -> usize {
+    RING_HEADER_SIZE + slot_count * SLOT_HEADER_SIZE + max_readers * 8 * (1 + lease_words(slot_count))
+}
+
+/// A mapped ring, shared by the writer and any number of readers
+struct ShmRing {
+    // Kept for the mapping; all access goes through `base`
+    _map: MmapMut,
+    base: *mut u8,
+    slot_count: usize,
+    slot_size: usize,
+    data_offset: usize,
+    max_readers: usize,
+    path: PathBuf,
+    // The writer's handle on the ring file, locked for as long as it lives
+    _writer_lock: Option<File>,
+}
+
+// The mapping is only accessed through atomics and through slots leased
+// with the sequence protocol below
+unsafe impl Send for ShmRing {}
+unsafe impl Sync for ShmRing {}
+
+impl ShmRing {
+    /// Create a ring, replacing any ring of the same name left by a writer
+    /// that is gone
+    ///
+    /// The new ring is built in a temporary file and renamed into place, so
+    /// readers still mapping an old ring keep its file and never see a
+    /// partly written header.
+    fn create(name: &str, slot_count: usize, slot_size: usize) -> io::Result<Self> {
+        let slot_size = (slot_size + PAGE_SIZE - 1) / PAGE_SIZE * PAGE_SIZE;
+        let data_offset = (tables_size(slot_count, MAX_READERS) + PAGE_SIZE - 1) / PAGE_SIZE * PAGE_SIZE;
+        let total = data_offset + slot_count * slot_size;
+
+        let path = ring_path(name);
+        if let Ok(existing) = File::open(&path) {
+            match existing.try_lock() {
+                Ok(()) => {},
+                Err(TryLockError::WouldBlock) => {
+                    return Err(io::Error::new(
+                        io::ErrorKind::AlreadyExists,
+                        format!("Ring '{}' already has a writer", name),
+                    ));
+                },
+                Err(TryLockError::Error(error)) => return Err(error),
+            }
+        }
+
+        let mut temporary = path.clone().into_os_string();
+        temporary.push(format!(".{}.tmp", std::process::id()));
+        let temporary = PathBuf::from(temporary);
+        let _ = fs::remove_file(&temporary);
+        let file = OpenOptions::new().read(true).write(true).create_new(true).open(&temporary)?;
+        let initialized = (|| -> io::Result<MmapMut> {
+            file.lock()?;
+            file.set_len(total as u64)?;
+            let mut map = unsafe { MmapMut::map_mut(&file)? };
+            map[RING_SLOT_COUNT..RING_SLOT_COUNT + 8].copy_from_slice(&(slot_count as u64).to_le_bytes());
+            map[RING_SLOT_SIZE..RING_SLOT_SIZE + 8].copy_from_slice(&(slot_size as u64).to_le_bytes());
+            map[RING_DATA_OFFSET..RING_DATA_OFFSET + 8].copy_from_slice(&(data_offset as u64).to_le_bytes());
+            map[RING_MAX_READERS..RING_MAX_READERS + 8].copy_from_slice(&(MAX_READERS as u64).to_le_bytes());
+            map[..8].copy_from_slice(RING_MAGIC);
+            fs::rename(&temporary, &path)?;
+            Ok(map)
+        })();
+        let mut map = match initialized {
+            Ok(map) => map,
+            Err(error) => {
+                let _ = fs::remove_file(&temporary);
+                return Err(error);
+            },
+        };
+
+        let base = map.as_mut_ptr();
+        Ok(ShmRing {
+            _map: map,
+            base,
+            slot_count,
+            slot_size,
+            data_offset,
+            max_readers: MAX_READERS,
+            path,
+            _writer_lock: Some(file),
+        })
+    }
+
+    /// Map an existing ring
+    fn open(name: &str) -> io::Result<Self> {
+        let path = ring_path(name);
+        let file = OpenOptions::new().read(true).write(true).open(&path)?;
+        let mut map = unsafe { MmapMut::map_mut(&file)? };
+        if map.len() < RING_HEADER_SIZE || &map[..8] != RING_MAGIC {
+            return Err(io::Error::new(io::ErrorKind::InvalidData, format!("{} is not a frame ring", path.display())));
+        }
+
+        let field = |at: usize| u64::from_le_bytes(map[at..at + 8].try_into().unwrap()) as usize;
+        let (slot_count, slot_size, data_offset) = (field(RING_SLOT_COUNT), field(RING_SLOT_SIZE), field(RING_DATA_OFFSET));
+        let max_readers = field(RING_MAX_READERS);
+        if slot_count == 0
+            || data_offset < tables_size(slot_count, max_readers)
+            || map.len() < data_offset + slot_count * slot_size
+        {
+            return Err(io::Error::new(io::ErrorKind::InvalidData, format!("{} is truncated", path.display())));
+        }
+
+        let base = map.as_mut_ptr();
+        Ok(ShmRing {
+            _map: map,
+            base,
+            slot_count,
+            slot_size,
+            data_offset,
+            max_readers,
+            path,
+            _writer_lock: None,
+        })
+    }
+
+    fn atomic_u64(&self, offset: usize) -> &AtomicU64 {
+        unsafe { &*(self.base.add(offset) as *const AtomicU64) }
+    }
+
+    fn atomic_u32(&self, offset: usize) -> &AtomicU32 {
+        unsafe { &*(self.base.add(offset) as *const AtomicU32) }
+    }
+
+    fn slot_header(&self, slot: usize) -> usize {
+        RING_HEADER_SIZE + slot * SLOT_HEADER_SIZE
+    }
+
+    fn slot_sequence(&self, slot: usize) -> &AtomicU64 {
+        self.atomic_u64(self.slot_header(slot) + SLOT_SEQUENCE)
+    }
+
+    fn reader_entry(&self, index: usize) -> usize {
+        RING_HEADER_SIZE + self.slot_count * SLOT_HEADER_SIZE + index * 8 * (1 + lease_words(self.slot_count))
+    }
+
+    /// Epoch of the reader owning an entry, 0 if the entry is free
+    fn reader_epoch(&self, index: usize) -> &AtomicU64 {
+        self.atomic_u64(self.reader_entry(index))
+    }
+
+    /// Word of an entry's lease bits holding the bit of `slot`
+    fn lease_word(&self, index: usize, slot: usize) -> &AtomicU64 {
+        self.atomic_u64(self.reader_entry(index) + 8 + slot / 64 * 8)
+    }
+
+    fn lease_bit(slot: usize) -> u64 {
+        1 << (slot % 64)
+    }
+
+    /// Whether any reader holds a lease on a slot
+    fn is_leased(&self, slot: usize) -> bool {
+        let bit = Self::lease_bit(slot);
+        (0..self.max_readers).any(|index| self.lease_word(index, slot).load(Ordering::SeqCst) & bit != 0)
+    }
+
+    /// Path of the lock file a reader holds while it is alive
+    fn lock_path(&self, epoch: u64) -> PathBuf {
+        let mut path = self.path.clone().into_os_string();
+        path.push(format!(".reader-{}", epoch));
+        PathBuf::from(path)
+    }
+
+    /// Whether the reader of an epoch still holds its lock file
+    fn reader_alive(&self, epoch: u64) -> bool {
+        match File::open(self.lock_path(epoch)) {
+            Ok(file) => !matches!(file.try_lock(), Ok(())),
+            Err(error) => error.kind() != io::ErrorKind::NotFound,
+        }
+    }
+
+    /// Number of registered readers
+    fn reader_count(&self) -> usize {
+        (0..self.max_readers).filter(|&index| self.reader_epoch(index).load(Ordering::Acquire) != 0).count()
+    }
+
+    /// Free the entries, and so the leases, of readers that died without
+    /// releasing them, returning how many were freed
+    ///
+    /// Only the writer reclaims entries, so two reclaims never race.
+    fn reclaim_dead_readers(&self) -> usize {
+        let mut reclaimed = 0;
+        for index in 0..self.max_readers {
+            let epoch = self.reader_epoch(index).load(Ordering::Acquire);
+            if epoch == 0 || epoch == EPOCH_RECLAIMING || self.reader_alive(epoch) {
+                continue;
+            }
+            // Readers only claim free entries, so nothing else changes the
+            // entry while its leases are cleared
+            if self
+                .reader_epoch(index)
+                .compare_exchange(epoch, EPOCH_RECLAIMING, Ordering::AcqRel, Ordering::Acquire)
+                .is_err()
+            {
+                continue;
+            }
+            for word in 0..lease_words(self.slot_count) {
+                self.lease_word(index, word * 64).store(0, Ordering::SeqCst);
+            }
+            self.reader_epoch(index).store(0, Ordering::Release);
+            let _ = fs::remove_file(self.lock_path(epoch));
+            reclaimed += 1;
+        }
+        reclaimed
+    }
+
+    fn write_sequence(&self) -> &AtomicU64 {
+        self.atomic_u64(RING_WRITE_SEQUENCE)
+    }
+
+    fn claim_sequence(&self) -> &AtomicU64 {
+        self.atomic_u64(RING_CLAIM_SEQUENCE)
+    }
+
+    fn closed(&self) -> &AtomicU32 {
+        self.atomic_u32(RING_CLOSED)
+    }
+
+    /// Slot holding a sequence number; sequences start at 1
+    fn slot_of(&self, sequence: u64) -> usize {
+        ((sequence - 1) % self.slot_count as u64) as usize
+    }
+
+    fn payload(&self, slot: usize) -> *mut u8 {
+        unsafe { self.base.add(self.data_offset + slot * self.slot_size) }
+    }
+
+    fn read_info(&self, slot: usize) -> SlotInfo {
+        let header = self.slot_header(slot);
+        let bytes = unsafe { std::slice::from_raw_parts(self.base.add(header), SLOT_HEADER_SIZE) };
+        let u32_at = |at: usize| u32::from_le_bytes(bytes[at..at + 4].try_into().unwrap());
+        let u64_at = |at: usize| u64::from_le_bytes(bytes[at..at + 8].try_into().unwrap());
+        let mut fields = [0u32; 6];
+        for (index, field) in fields.iter_mut().enumerate() {
+            *field = u32_at(SLOT_FIELDS + index * 4);
+        }
+        SlotInfo {
+            kind: u32_at(SLOT_KIND),
+            size: u64_at(SLOT_SIZE),
+            timecode: u64_at(SLOT_TIMECODE) as i64,
+            timestamp: u64_at(SLOT_TIMESTAMP) as i64,
+            fields,
+        }
+    }
+
+    fn write_info(&self, slot: usize, info: &SlotInfo) {
+        let header = self.slot_header(slot);
+        let bytes = unsafe { std::slice::from_raw_parts_mut(self.base.add(header), SLOT_HEADER_SIZE) };
+        bytes[SLOT_KIND..SLOT_KIND + 4].copy_from_slice(&info.kind.to_le_bytes());
+        bytes[SLOT_SIZE..SLOT_SIZE + 8].copy_from_slice(&info.size.to_le_bytes());
+        bytes[SLOT_TIMECODE..SLOT_TIMECODE + 8].copy_from_slice(&info.timecode.to_le_bytes());
+        bytes[SLOT_TIMESTAMP..SLOT_TIMESTAMP + 8].copy_from_slice(&info.timestamp.to_le_bytes());
+        for (index, field) in info.fields.iter().enumerate() {
+            let at = SLOT_FIELDS + index * 4;
+            bytes[at..at + 4].copy_from_slice(&field.to_le_bytes());
+        }
+    }
+
+    /// Write a frame as the next sequence number, returning whether it was
+    /// stored; a slot still leased by a reader makes the frame a gap
+    ///
+    /// Only one writer may publish to a ring.
+    fn publish(&self, info: &SlotInfo, data: &[u8]) -> bool {
+        let sequence = self.write_sequence().load(Ordering::Relaxed) + 1;
+        let slot = self.slot_of(sequence);
+
+        // Invalidate the slot before checking for readers; a reader leases
+        // in the opposite order, so either it sees the invalid sequence or
+        // the writer sees the reader
+        let previous = self.slot_sequence(slot).swap(0, Ordering::SeqCst);
+        let stored = !self.is_leased(slot);
+        if stored {
+            self.write_info(slot, info);
+            unsafe { std::ptr::copy_nonoverlapping(data.as_ptr(), self.payload(slot), data.len()) };
+            self.slot_sequence(slot).store(sequence, Ordering::Release);
+        } else {
+            self.slot_sequence(slot).store(previous, Ordering::Release);
+        }
+        self.write_sequence().store(sequence, Ordering::Release);
+        stored
+    }
+}
+
+/// A reader's entry in a ring, freed when the reader goes away
+///
+/// Frames hold a reference, so the entry outlives every lease made through
+/// it.
+struct ReaderEntry {
+    ring: Arc<ShmRing>,
+    index: usize,
+    epoch: u64,
+    // Locked for as long as the reader lives
+    _lock: File,
+}
+
+impl ReaderEntry {
+    /// Claim a free entry in a ring
+    fn register(ring: Arc<ShmRing>) -> io::Result<Self> {
+        let epoch = ring.atomic_u64(RING_NEXT_EPOCH).fetch_add(1, Ordering::AcqRel) + 1;
+
+        // The lock is taken before the entry is claimed, so the writer never
+        // sees a claimed entry without a held lock
+        let lock_path = ring.lock_path(epoch);
+        let lock = OpenOptions::new().write(true).create(true).truncate(true).open(&lock_path)?;
+        lock.lock()?;
+
+        for index in 0..ring.max_readers {
+            if ring.reader_epoch(index).compare_exchange(0, epoch, Ordering::AcqRel, Ordering::Acquire).is_ok() {
+                return Ok(ReaderEntry { ring, index, epoch, _lock: lock });
+            }
+        }
+
+        drop(lock);
+        let _ = fs::remove_file(&lock_path);
+        Err(io::Error::new(
+            io::ErrorKind::Other,
+            format!("{} already has {} readers", ring.path.display(), ring.max_readers),
+        ))
+    }
+
+    /// Lease the slot of a sequence number if it still holds that frame
+    fn lease(&self, sequence: u64) -> Option<usize> {
+        let slot = self.ring.slot_of(sequence);
+        let (word, bit) = (self.ring.lease_word(self.index, slot), ShmRing::lease_bit(slot));
+        word.fetch_or(bit, Ordering::SeqCst);
+        if self.ring.slot_sequence(slot).load(Ordering::SeqCst) == sequence {
+            Some(slot)
+        } else {
+            word.fetch_and(!bit, Ordering::SeqCst);
+            None
+        }
+    }
+
+    fn release(&self, slot: usize) {
+        self.ring.lease_word(self.index, slot).fetch_and(!ShmRing::lease_bit(slot), Ordering::SeqCst);
+    }
+}
+
+impl Drop for ReaderEntry {
+    fn drop(&mut self) {
+        let _ = self.ring.reader_epoch(self.index).compare_exchange(
+            self.epoch,
+            0,
+            Ordering::AcqRel,
+            Ordering::Acquire,
+        );
+        let _ = fs::remove_file(self.ring.lock_path(self.epoch));
+    }
+}
+
+/// Counters of a writer
+#[derive(Default)]
+struct WriterStats {
+    published: AtomicU64,
+    busy: AtomicU64,
+    oversized: AtomicU64,
+    reclaimed: AtomicU64,
+}
+
+/// Sink copying captured frames into a ring
+struct ShmSink {
+    ring: ShmRing,
+    // Frame kinds written: video, audio and metadata
+    kinds: [bool; 3],
+    stats: WriterStats,
+    // When dead readers were last looked for
+    last_reclaim: Mutex<Option<Instant>>,
+}
+
+impl ShmSink {
+    /// Reclaim the leases of dead readers, at most once per RECLAIM_INTERVAL
+    fn reclaim(&self) {
+        let mut last_reclaim = self.last_reclaim.lock().unwrap();
+        if last_reclaim.is_some_and(|last| last.elapsed() < RECLAIM_INTERVAL) {
+            return;
+        }
+        *last_reclaim = Some(Instant::now());
+        let reclaimed = self.ring.reclaim_dead_readers();
+        self.stats.reclaimed.fetch_add(reclaimed as u64, Ordering::Relaxed);
+    }
+}
+
+impl FrameSink for ShmSink {
+    fn on_frame(&self, frame: &CapturedFrame) {
+        let (info, data): (SlotInfo, &[u8]) = match frame {
+            CapturedFrame::Video(video) if self.kinds[0] => (
+                SlotInfo {
+                    kind: KIND_VIDEO as u32,
+                    size: video.data.len() as u64,
+                    timecode: video.timecode,
+                    timestamp: video.timestamp,
+                    fields: [
+                        video.width,
+                        video.height,
+                        video.four_cc,
+                        video.line_stride as u32,
+                        video.frame_rate_n,
+                        video.frame_rate_d,
+                    ],
+                },
+                &video.data,
+            ),
+            CapturedFrame::Audio(audio) if self.kinds[1] => (
+                SlotInfo {
+                    kind: KIND_AUDIO as u32,
+                    size: audio.data.len() as u64 * 4,
+                    timecode: audio.timecode,
+                    timestamp: audio.timestamp,
+                    fields: [audio.sample_rate, audio.num_channels, audio.num_samples, 0, 0, 0],
+                },
+                samples_as_bytes(&audio.data),
+            ),
+            CapturedFrame::Metadata(metadata) if self.kinds[2] => (
+                SlotInfo {
+                    kind: KIND_METADATA as u32,
+                    size: metadata.data.len() as u64,
+                    timecode: metadata.timecode,
+                    timestamp: metadata.timestamp,
+                    fields: [0; 6],
+                },
+                metadata.data.as_bytes(),
+            ),
+            _ => return,
+        };
+
+        if data.len() > self.ring.slot_size {
+            self.stats.oversized.fetch_add(1, Ordering::Relaxed);
+        } else if self.ring.publish(&info, data) {
+            self.stats.published.fetch_add(1, Ordering::Relaxed);
+        } else {
+            // A reader that died holding the slot would keep it forever
+            self.stats.busy.fetch_add(1, Ordering::Relaxed);
+            self.reclaim();
+        }
+    }
+}
+
+/// Writes a receiver's frames into a named shared-memory ring
+///
+/// Worker processes read the frames with NdiShmReader. The ring lives in
+/// /dev/shm where available and is removed when the writer is closed.
+#[pyclass]
+struct NdiShmWriter {
+    name: String,
+    // Kept so the receiver outlives the writer
+    receiver: Py<NdiReceiver>,
+    core: Arc<ReceiverCore>,
+    sink: Arc<ShmSink>,
+    running: AtomicBool,
+    closed: AtomicBool,
+}
+
+impl NdiShmWriter {
+    fn detach(&self) {
+        if self.running.swap(false, Ordering::AcqRel) {
+            let sink: Arc<dyn FrameSink> = self.sink.clone();
+            self.core.remove_sink(&sink);
+            self.core.release_pump();
+        }
+    }
+
+    fn close_ring(&self) {
+        self.detach();
+        if !self.closed.swap(true, Ordering::AcqRel) {
+            // Readers keep their mapping; they see the ring as closed
+            self.sink.ring.closed().store(1, Ordering::Release);
+            self.sink.ring.reclaim_dead_readers();
+            let _ = fs::remove_file(&self.sink.ring.path);
+        }
+    }
+}
+
+impl Drop for NdiShmWriter {
+    fn drop(&mut self) {
+        self.close_ring();
+    }
+}
+
+#[pymethods]
+impl NdiShmWriter {
+    /// Create a ring and a writer feeding it from a receiver
+    ///
+    /// Args:
+    ///     receiver: The NdiReceiver whose frames to write
+    ///     name: Name readers open the ring by; a ring of the same name
+    ///         left by a writer that is gone is replaced, while one whose
+    ///         writer is alive raises an error
+    ///     slot_count: Number of frames the ring holds (default: 8)
+    ///     slot_size: Largest frame in bytes; larger frames are skipped
+    ///         (default: 8 MiB, enough for 1080p BGRA)
+    ///     video: Write video frames (default: True)
+    ///     audio: Write audio frames (default: False)
+    ///     metadata: Write metadata frames (default: False)
+    #[new]
+    #[pyo3(signature = (
+        receiver,
+        name,
+        slot_count = 8,
+        slot_size = 8388608,
+        video = true,
+        audio = false,
+        metadata = false
+    ))]
+    fn new(
+        receiver: Py<NdiReceiver>,
+        name: &str,
+        slot_count: usize,
+        slot_size: usize,
+        video: bool,
+        audio: bool,
+        metadata: bool,
+        py: Python<'_>,
+    ) -> PyResult<Self> {
+        if slot_count == 0 || slot_size == 0 {
+            return Err(PyValueError::new_err("slot_count and slot_size must be positive"));
+        }
+        if name.is_empty() || name.contains(['/', '\\']) {
+            return Err(PyValueError::new_err("name must be a non-empty file name"));
+        }
+
+        let ring = ShmRing::create(name, slot_count, slot_size)?;
+        let core = receiver.borrow(py).core();
+        Ok(NdiShmWriter {
+            name: name.to_string(),
+            receiver,
+            core,
+            sink: Arc::new(ShmSink {
+                ring,
+                kinds: [video, audio, metadata],
+                stats: WriterStats::default(),
+                last_reclaim: Mutex::new(None),
+            }),
+            running: AtomicBool::new(false),
+            closed: AtomicBool::new(false),
+        })
+    }
+
+    /// Start writing the receiver's frames
+    fn start(&self) -> PyResult<()> {
+        if self.closed.load(Ordering::Acquire) {
+            return Err(PyRuntimeError::new_err("Ring has been closed"));
+        }
+        if !self.core.is_open() {
+            return Err(PyRuntimeError::new_err("Receiver is not initialized"));
+        }
+        if self.running.swap(true, Ordering::AcqRel) {
+            return Err(PyRuntimeError::new_err("Writer is already running"));
+        }
+
+        self.core.add_sink(self.sink.clone());
+        self.core.retain_pump();
+        Ok(())
+    }
+
+    /// Stop writing; start() resumes
+    fn stop(&self, py: Python<'_>) {
+        py.allow_threads(|| self.detach());
+    }
+
+    /// Stop writing and remove the ring
+    fn close(&self, py: Python<'_>) {
+        py.allow_threads(|| self.close_ring());
+    }
+
+    /// Name readers open the ring by
+    #[getter]
+    fn get_name(&self) -> String {
+        self.name.clone()
+    }
+
+    /// Path of the file backing the ring
+    #[getter]
+    fn get_path(&self) -> PathBuf {
+        self.sink.ring.path.clone()
+    }
+
+    /// Whether frames are being written
+    #[getter]
+    fn get_is_running(&self) -> bool {
+        self.running.load(Ordering::Acquire)
+    }
+
+    /// The receiver being written
+    #[getter]
+    fn get_receiver(&self, py: Python<'_>) -> Py<NdiReceiver> {
+        self.receiver.clone_ref(py)
+    }
+
+    /// Writer statistics: published, busy (frames skipped because a reader
+    /// still held their slot), oversized (frames larger than slot_size),
+    /// reclaimed (readers that died holding leases, whose slots were freed),
+    /// readers (readers with the ring open), sequence (last sequence
+    /// number), slot_count and slot_size
+    #[getter]
+    fn get_stats(&self, py: Python<'_>) -> PyResult<Py<PyDict>> {
+        let stats = PyDict::new(py);
+        stats.set_item("published", self.sink.stats.published.load(Ordering::Relaxed))?;
+        stats.set_item("busy", self.sink.stats.busy.load(Ordering::Relaxed))?;
+        stats.set_item("oversized", self.sink.stats.oversized.load(Ordering::Relaxed))?;
+        stats.set_item("reclaimed", self.sink.stats.reclaimed.load(Ordering::Relaxed))?;
+        stats.set_item("readers", self.sink.ring.reader_count())?;
+        stats.set_item("sequence", self.sink.ring.write_sequence().load(Ordering::Acquire))?;
+        stats.set_item("slot_count", self.sink.ring.slot_count)?;
+        stats.set_item("slot_size", self.sink.ring.slot_size)?;
+        Ok(stats.into())
+    }
+}
+
+/// Reads frames from a ring written by NdiShmWriter, in another process
+///
+/// With `distribute=True`, readers of the same ring share one cursor and
+/// each frame goes to only one of them, as in a worker pool. Otherwise every
+/// reader sees every frame it keeps up with.
+#[pyclass]
+struct NdiShmReader {
+    name: String,
+    ring: Arc<ShmRing>,
+    entry: Arc<ReaderEntry>,
+    distribute: bool,
+    // Next sequence number for a reader with its own cursor
+    next: Mutex<u64>,
+    missed: AtomicU64,
+}
+
+impl NdiShmReader {
+    /// Lease the next frame if one is available
+    fn try_lease(&self) -> Option<(u64, usize)> {
+        let ring = &self.ring;
+        let oldest = |written: u64| written.saturating_sub(ring.slot_count as u64) + 1;
+        loop {
+            let written = ring.write_sequence().load(Ordering::Acquire);
+            let sequence = if self.distribute {
+                let claimed = ring.claim_sequence().load(Ordering::Acquire);
+                if claimed >= written {
+                    return None;
+                }
+                // Frames already overwritten are skipped
+                let sequence = (claimed + 1).max(oldest(written));
+                if ring
+                    .claim_sequence()
+                    .compare_exchange(claimed, sequence, Ordering::AcqRel, Ordering::Acquire)
+                    .is_err()
+                {
+                    continue;
+                }
+                self.missed.fetch_add(sequence - claimed - 1, Ordering::Relaxed);
+                sequence
+            } else {
+                let mut next = self.next.lock().unwrap();
+                if *next > written {
+                    return None;
+                }
+                let sequence = (*next).max(oldest(written));
+                self.missed.fetch_add(sequence - *next, Ordering::Relaxed);
+                *next = sequence + 1;
+                sequence
+            };
+
+            match self.entry.lease(sequence) {
+                Some(slot) => return Some((sequence, slot)),
+                // Overwritten meanwhile, or skipped by the writer
+                None => {
+                    self.missed.fetch_add(1, Ordering::Relaxed);
+                },
+            }
+        }
+    }
+}
+
+#[pymethods]
+impl NdiShmReader {
+    /// Open a ring by name
+    ///
+    /// Args:
+    ///     name: Name the writer created the ring with
+    ///     distribute: Share frames out between the readers of the ring
+    ///         instead of giving each reader every frame (default: True)
+    ///     from_start: Start with the oldest frame in the ring rather than
+    ///         the next one written; readers with distribute=True share the
+    ///         ring's cursor instead (default: False)
+    #[new]
+    #[pyo3(signature = (name, distribute = true, from_start = false))]
+    fn new(name: &str, distribute: bool, from_start: bool) -> PyResult<Self> {
+        let ring = Arc::new(ShmRing::open(name)?);
+        let entry = Arc::new(ReaderEntry::register(ring.clone())?);
+        let written = ring.write_sequence().load(Ordering::Acquire);
+        let next = if from_start { written.saturating_sub(ring.slot_count as u64) + 1 } else { written + 1 };
+        Ok(NdiShmReader {
+            name: name.to_string(),
+            ring,
+            entry,
+            distribute,
+            next: Mutex::new(next),
+            missed: AtomicU64::new(0),
+        })
+    }
+
+    /// Take the next frame
+    ///
+    /// The frame's slot stays leased, so the writer cannot reuse it, until
+    /// the frame and every array made from it have been released.
+    ///
+    /// Args:
+    ///     timeout_ms: Longest wait in milliseconds (default: 1000)
+    ///
+    /// Returns:
+    ///     An NdiShmFrame, or None on timeout or once the writer has closed
+    ///     the ring
+    #[pyo3(signature = (timeout_ms = 1000))]
+    fn read(&self, timeout_ms: u64, py: Python<'_>) -> PyResult<Option<NdiShmFrame>> {
+        let deadline = Instant::now() + Duration::from_millis(timeout_ms);
+        loop {
+            let leased = py.allow_threads(|| {
+                let until = deadline.min(Instant::now() + SIGNAL_CHECK);
+                loop {
+                    if let Some(leased) = self.try_lease() {
+                        return Some(leased);
+                    }
+                    if self.ring.closed().load(Ordering::Acquire) != 0 || Instant::now() >= until {
+                        return None;
+                    }
+                    std::thread::sleep(READ_POLL);
+                }
+            });
+            if let Some((sequence, slot)) = leased {
+                return Ok(Some(NdiShmFrame::new(self.entry.clone(), sequence, slot)));
+            }
+            if self.ring.closed().load(Ordering::Acquire) != 0 || Instant::now() >= deadline {
+                return Ok(None);
+            }
+            py.check_signals()?;
+        }
+    }
+
+    /// Name of the ring
+    #[getter]
+    fn get_name(&self) -> String {
+        self.name.clone()
+    }
+
+    /// Whether the writer has closed the ring
+    #[getter]
+    fn get_is_closed(&self) -> bool {
+        self.ring.closed().load(Ordering::Acquire) != 0
+    }
+
+    /// Reader statistics: missed (frames overwritten or skipped before this
+    /// reader got to them), sequence (last sequence number written),
+    /// slot_count and slot_size
+    #[getter]
+    fn get_stats(&self, py: Python<'_>) -> PyResult<Py<PyDict>> {
+        let stats = PyDict::new(py);
+        stats.set_item("missed", self.missed.load(Ordering::Relaxed))?;
+        stats.set_item("sequence", self.ring.write_sequence().load(Ordering::Acquire))?;
+        stats.set_item("slot_count", self.ring.slot_count)?;
+        stats.set_item("slot_size", self.ring.slot_size)?;
+        Ok(stats.into())
+    }
+}
+
+/// A frame leased from a shared-memory ring
+///
+/// Supports the buffer protocol, so `numpy.asarray(frame)` is a zero-copy,
+/// read-only view: `(height, width, bytes_per_pixel)` for packed video,
+/// `(channels, samples)` float32 for audio, and flat bytes otherwise.
+/// Consumers that ask for no shape, or for no format on audio, get flat
+/// bytes too. Video with padded rows is only exported to consumers that
+/// accept strides. The slot is returned to the writer by release(), on
+/// leaving a with block, or when the frame and all its arrays are garbage
+/// collected.
+#[pyclass]
+struct NdiShmFrame {
+    entry: Arc<ReaderEntry>,
+    sequence: u64,
+    slot: usize,
+    info: SlotInfo,
+    released: AtomicBool,
+    exports: AtomicUsize,
+    ndim: c_int,
+    shape: [ffi::Py_ssize_t; 3],
+    strides: [ffi::Py_ssize_t; 3],
+    // Length and stride of the payload viewed as flat bytes
+    flat: [ffi::Py_ssize_t; 2],
+}
+
+impl NdiShmFrame {
+    fn new(entry: Arc<ReaderEntry>, sequence: u64, slot: usize) -> Self {
+        let info = entry.ring.read_info(slot);
+        let size = info.size.min(entry.ring.slot_size as u64) as ffi::Py_ssize_t;
+
+        let (ndim, shape, strides) = match info.kind as u8 {
+            KIND_VIDEO => {
+                let [width, height, four_cc, line_stride, ..] = info.fields;
+                let bytes_per_pixel = match four_cc {
+                    FOURCC_BGRA | FOURCC_BGRX | FOURCC_RGBA | FOURCC_RGBX => 4,
+                    FOURCC_UYVY => 2,
+                    _ => 0,
+                };
+                let fits = (height as ffi::Py_ssize_t) * (line_stride as ffi::Py_ssize_t) <= size;
+                if bytes_per_pixel > 0 && fits {
+                    (
+                        3,
+                        [height as ffi::Py_ssize_t, width as ffi::Py_ssize_t, bytes_per_pixel],
+                        [line_stride as ffi::Py_ssize_t, bytes_per_pixel, 1],
+                    )
+                } else {
+                    (1, [size, 0, 0], [1, 0, 0])
+                }
+            },
+            KIND_AUDIO => {
+                let (channels, samples) = (info.fields[1] as ffi::Py_ssize_t, info.fields[2] as ffi::Py_ssize_t);
+                (2, [channels, samples, 0], [samples * 4, 4, 0])
+            },
+            _ => (1, [size, 0, 0], [1, 0, 0]),
+        };
+
+        NdiShmFrame {
+            entry,
+            sequence,
+            slot,
+            info,
+            released: AtomicBool::new(false),
+            exports: AtomicUsize::new(0),
+            ndim,
+            shape,
+            strides,
+            flat: [size, 1],
+        }
+    }
+
+    fn itemsize(&self) -> ffi::Py_ssize_t {
+        if self.info.kind as u8 == KIND_AUDIO { 4 } else { 1 }
+    }
+
+    /// Whether the typed layout has no gaps, such as padding after rows
+    fn is_contiguous(&self) -> bool {
+        let mut expected = self.itemsize();
+        for dim in (0..self.ndim as usize).rev() {
+            if self.shape[dim] > 1 && self.strides[dim] != expected {
+                return false;
+            }
+            expected *= self.shape[dim];
+        }
+        true
+    }
+
+    fn payload(&self) -> &[u8] {
+        let ring = &self.entry.ring;
+        let size = self.info.size.min(ring.slot_size as u64) as usize;
+        unsafe { std::slice::from_raw_parts(ring.payload(self.slot), size) }
+    }
+
+    fn check_leased(&self) -> PyResult<()> {
+        if self.released.load(Ordering::Acquire) {
+            return Err(PyRuntimeError::new_err("Frame has been released"));
+        }
+        Ok(())
+    }
+}
+
+impl Drop for NdiShmFrame {
+    fn drop(&mut self) {
+        if !self.released.swap(true, Ordering::AcqRel) {
+            self.entry.release(self.slot);
+        }
+    }
+}
+
+#[pymethods]
+impl NdiShmFrame {
+    unsafe fn __getbuffer__(slf: PyRef<'_, Self>, view: *mut ffi::Py_buffer, flags: c_int) -> PyResult<()> {
+        if view.is_null() {
+            return Err(PyBufferError::new_err("View is null"));
+        }
+        if (flags & ffi::PyBUF_WRITABLE) == ffi::PyBUF_WRITABLE {
+            return Err(PyBufferError::new_err("Shared-memory frames are read-only"));
+        }
+        slf.check_leased()?;
+        let requested = |flag: c_int| (flags & flag) == flag;
+
+        // Without a format the consumer assumes unsigned bytes, and without a
+        // shape one flat run of them
+        let audio = slf.info.kind as u8 == KIND_AUDIO;
+        let typed = requested(ffi::PyBUF_ND) && (!audio || requested(ffi::PyBUF_FORMAT));
+        if typed && !slf.is_contiguous() {
+            let contiguous_requested = requested(ffi::PyBUF_C_CONTIGUOUS)
+                || requested(ffi::PyBUF_F_CONTIGUOUS)
+                || requested(ffi::PyBUF_ANY_CONTIGUOUS);
+            if !requested(ffi::PyBUF_STRIDES) || contiguous_requested {
+                return Err(PyBufferError::new_err("The frame's rows are padded, so it can only be viewed with strides"));
+            }
+        }
+        if typed && slf.ndim > 1 && requested(ffi::PyBUF_F_CONTIGUOUS) {
+            return Err(PyBufferError::new_err("Frames are laid out in C order"));
+        }
+        slf.exports.fetch_add(1, Ordering::AcqRel);
+
+        let payload = slf.payload();
+        unsafe {
+            ffi::Py_INCREF(slf.as_ptr());
+            (*view).obj = slf.as_ptr();
+            (*view).buf = payload.as_ptr() as *mut std::os::raw::c_void;
+            (*view).len = payload.len() as ffi::Py_ssize_t;
+            (*view).readonly = 1;
+            (*view).itemsize = if typed { slf.itemsize() } else { 1 };
+            (*view).format = if !requested(ffi::PyBUF_FORMAT) {
+                std::ptr::null_mut()
+            } else if typed && audio {
+                b"f\0".as_ptr() as *mut c_char
+            } else {
+                b"B\0".as_ptr() as *mut c_char
+            };
+            (*view).ndim = if typed { slf.ndim } else { 1 };
+            (*view).shape = if !requested(ffi::PyBUF_ND) {
+                std::ptr::null_mut()
+            } else if typed {
+                slf.shape.as_ptr() as *mut ffi::Py_ssize_t
+            } else {
+                slf.flat[..1].as_ptr() as *mut ffi::Py_ssize_t
+            };
+            (*view).strides = if !requested(ffi::PyBUF_STRIDES) {
+                std::ptr::null_mut()
+            } else if typed {
+                slf.strides.as_ptr() as *mut ffi::Py_ssize_t
+            } else {
+                slf.flat[1..].as_ptr() as *mut ffi::Py_ssize_t
+            };
+            (*view).suboffsets = std::ptr::null_mut();
+            (*view).internal = std::ptr::null_mut();
+        }
+
+        Ok(())
+    }
+
+    unsafe fn __releasebuffer__(&self, _view: *mut ffi::Py_buffer) {
+        self.exports.fetch_sub(1, Ordering::AcqRel);
+    }
+
+    /// Return the slot to the writer
+    ///
+    /// Fails while arrays made from the frame still exist, since the writer
+    /// would overwrite the memory they show.
+    fn release(&self) -> PyResult<()> {
+        if self.exports.load(Ordering::Acquire) > 0 {
+            return Err(PyRuntimeError::new_err("Arrays made from the frame are still in use"));
+        }
+        if !self.released.swap(true, Ordering::AcqRel) {
+            self.entry.release(self.slot);
+        }
+        Ok(())
+    }
+
+    fn __enter__(slf: PyRef<'_, Self>) -> PyRef<'_, Self> {
+        slf
+    }
+
+    fn __exit__(&self, _exc_type: PyObject, _exc_value: PyObject, _traceback: PyObject) -> PyResult<bool> {
+        self.release()?;
+        Ok(false)
+    }
+
+    /// Frame type: "video", "audio" or "metadata"
+    #[getter]
+    fn get_kind(&self) -> &'static str {
+        match self.info.kind as u8 {
+            KIND_VIDEO => "video",
+            KIND_AUDIO => "audio",
+            _ => "metadata",
+        }
+    }
+
+    /// Sequence number of the frame in the ring
+    #[getter]
+    fn get_sequence(&self) -> u64 {
+        self.sequence
+    }
+
+    #[getter]
+    fn get_timecode(&self) -> i64 {
+        self.info.timecode
+    }
+
+    #[getter]
+    fn get_timestamp(&self) -> i64 {
+        self.info.timestamp
+    }
+
+    /// Size of the payload in bytes
+    #[getter]
+    fn get_data_size(&self) -> u64 {
+        self.info.size
+    }
+
+    /// Video width in pixels, 0 for other frames
+    #[getter]
+    fn get_width(&self) -> u32 {
+        if self.info.kind as u8 == KIND_VIDEO { self.info.fields[0] } else { 0 }
+    }
+
+    /// Video height in pixels, 0 for other frames
+    #[getter]
+    fn get_height(&self) -> u32 {
+        if self.info.kind as u8 == KIND_VIDEO { self.info.fields[1] } else { 0 }
+    }
+
+    /// Video line stride in bytes, 0 for other frames
+    #[getter]
+    fn get_line_stride(&self) -> u32 {
+        if self.info.kind as u8 == KIND_VIDEO { self.info.fields[3] } else { 0 }
+    }
+
+    /// Name of the pixel format, or None for other frames
+    #[getter]
+    fn get_four_cc_name(&self) -> Option<String> {
+        if self.info.kind as u8 == KIND_VIDEO { Some(four_cc_name(self.info.fields[2])) } else { None }
+    }
+
+    /// Video frame rate as (numerator, denominator), or None
+    #[getter]
+    fn get_frame_rate(&self) -> Option<(u32, u32)> {
+        if self.info.kind as u8 == KIND_VIDEO { Some((self.info.fields[4], self.info.fields[5])) } else { None }
+    }
+
+    /// Audio sample rate, or None for other frames
+    #[getter]
+    fn get_sample_rate(&self) -> Option<u32> {
+        if self.info.kind as u8 == KIND_AUDIO { Some(self.info.fields[0]) } else { None }
+    }
+
+    /// Audio channel count, or None for other frames
+    #[getter]
+    fn get_num_channels(&self) -> Option<u32> {
+        if self.info.kind as u8 == KIND_AUDIO { Some(self.info.fields[1]) } else { None }
+    }
+
+    /// Audio samples per channel, or None for other frames
+    #[getter]
+    fn get_num_samples(&self) -> Option<u32> {
+        if self.info.kind as u8 == KIND_AUDIO { Some(self.info.fields[2]) } else { None }
+    }
+
+    /// Metadata XML, or None for other frames
+    #[getter]
+    fn get_text(&self) -> PyResult<Option<String>> {
+        self.check_leased()?;
+        if self.info.kind as u8 != KIND_METADATA {
+            return Ok(None);
+        }
+        Ok(Some(String::from_utf8_lossy(self.payload()).into_owned()))
+    }
+
+    /// Whether the slot has been returned to the writer
+    #[getter]
+    fn get_released(&self) -> bool {
+        self.released.load(Ordering::Acquire)
+    }
+
+    fn __repr__(&self) -> String {
+        match self.info.kind as u8 {
+            KIND_VIDEO => format!(
+                "NdiShmFrame(#{} video {}x{} {})",
+                self.sequence,
+                self.info.fields[0],
+                self.info.fields[1],
+                four_cc_name(self.info.fields[2])
+            ),
+            _ => format!("NdiShmFrame(#{} {}, {} bytes)", self.sequence, self.get_kind(), self.info.size),
+        }
+    }
+}
+
+/// Register shared-memory classes
+pub fn register_shm_functions(m: &PyModule) -> PyResult<()> {
+    m.add_class::<NdiShmWriter>()?;
+    m.add_class::<NdiShmReader>()?;
+    m.add_class::<NdiShmFrame>()?;
+
+    Ok(())
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    /// A ring name of its own for each test
+    fn ring_name(test: &str) -> String {
+        format!("test-{}-{}", std::process::id(), test)
+    }
+
+    fn frame_info(size: usize) -> SlotInfo {
+        SlotInfo { kind: KIND_METADATA as u32, size: size as u64, timecode: 42, ..Default::default() }
+    }
+
+    /// A writer and a registered reader on a new ring
+    fn open_ring(test: &str, slot_count: usize) -> (ShmRing, ReaderEntry) {
+        let writer = ShmRing::create(&ring_name(test), slot_count, 64).unwrap();
+        let reader = ReaderEntry::register(Arc::new(ShmRing::open(&ring_name(test)).unwrap())).unwrap();
+        (writer, reader)
+    }
+
+    fn read_payload(ring: &ShmRing, slot: usize) -> Vec<u8> {
+        let size = ring.read_info(slot).size as usize;
+        unsafe { std::slice::from_raw_parts(ring.payload(slot), size) }.to_vec()
+    }
+
+    #[test]
+    fn published_frames_can_be_leased() {
+        let (writer, reader) = open_ring("lease", 4);
+        assert!(writer.publish(&frame_info(5), b"hello"));
+
+        let slot = reader.lease(1).unwrap();
+        let info = reader.ring.read_info(slot);
+        assert_eq!((info.kind, info.size, info.timecode), (KIND_METADATA as u32, 5, 42));
+        assert_eq!(read_payload(&reader.ring, slot), b"hello");
+        assert!(writer.is_leased(slot));
+        reader.release(slot);
+        assert!(!writer.is_leased(slot));
+
+        // A sequence number not yet written cannot be leased
+        assert!(reader.lease(2).is_none());
+        let _ = fs::remove_file(&writer.path);
+    }
+
+    #[test]
+    fn leased_slots_are_not_overwritten() {
+        let (writer, reader) = open_ring("busy", 2);
+        assert!(writer.publish(&frame_info(1), b"a"));
+        let slot = reader.lease(1).unwrap();
+        assert!(writer.publish(&frame_info(1), b"b"));
+        // Sequence 3 maps to the leased slot, so it becomes a gap
+        assert!(!writer.publish(&frame_info(1), b"c"));
+        assert_eq!(read_payload(&writer, slot), b"a");
+        assert!(reader.lease(3).is_none());
+
+        reader.release(slot);
+        assert!(writer.publish(&frame_info(1), b"d"));
+        assert!(writer.publish(&frame_info(1), b"e"));
+        assert_eq!(read_payload(&writer, slot), b"e");
+        // The frame was overwritten, so its lease fails and is undone
+        assert!(reader.lease(1).is_none());
+        assert!(!writer.is_leased(slot));
+        let _ = fs::remove_file(&writer.path);
+    }
+
+    #[test]
+    fn leases_of_dead_readers_are_reclaimed() {
+        let (writer, alive) = open_ring("reclaim", 2);
+        assert!(writer.publish(&frame_info(1), b"a"));
+
+        // A reader that died holding a lease: its entry and lease bit are
+        // set, but nothing holds the lock on its lock file any more
+        let epoch = writer.atomic_u64(RING_NEXT_EPOCH).fetch_add(1, Ordering::AcqRel) + 1;
+        fs::write(writer.lock_path(epoch), b"").unwrap();
+        let index = (0..writer.max_readers).find(|&index| writer.reader_epoch(index).load(Ordering::Acquire) == 0).unwrap();
+        writer.reader_epoch(index).store(epoch, Ordering::Release);
+        writer.lease_word(index, 0).fetch_or(ShmRing::lease_bit(0), Ordering::SeqCst);
+        assert_eq!(writer.reader_count(), 2);
+        assert!(writer.is_leased(0));
+
+        assert!(writer.reader_alive(alive.epoch));
+        assert!(!writer.reader_alive(epoch));
+        assert_eq!(writer.reclaim_dead_readers(), 1);
+        assert_eq!(writer.reclaim_dead_readers(), 0);
+        assert_eq!(writer.reader_count(), 1);
+        assert!(!writer.is_leased(0));
+        assert!(!writer.lock_path(epoch).exists());
+
+        // A reader that goes away cleanly frees its entry itself
+        let lock_path = writer.lock_path(alive.epoch);
+        drop(alive);
+        assert_eq!(writer.reader_count(), 0);
+        assert!(!lock_path.exists());
+        let _ = fs::remove_file(&writer.path);
+    }
+
+    #[test]
+    fn a_live_writer_keeps_its_ring() {
+        let name = ring_name("writer");
+        let writer = ShmRing::create(&name, 2, 64).unwrap();
+        assert!(writer.publish(&frame_info(3), b"old"));
+        let error = ShmRing::create(&name, 2, 64).err().unwrap();
+        assert_eq!(error.kind(), io::ErrorKind::AlreadyExists);
+
+        // Once the writer is gone its ring is replaced by a new file, and a
+        // reader of the old ring still sees the old frames
+        let old = ShmRing::open(&name).unwrap();
+        drop(writer);
+        let replacement = ShmRing::create(&name, 4, 64).unwrap();
+        assert_eq!(old.write_sequence().load(Ordering::Acquire), 1);
+        assert_eq!(read_payload(&old, 0), b"old");
+        let new = ShmRing::open(&name).unwrap();
+        assert_eq!((new.slot_count, new.write_sequence().load(Ordering::Acquire)), (4, 0));
+        let _ = fs::remove_file(&replacement.path);
+    }
+
+    #[test]
+    fn readers_are_limited_to_the_entry_table() {
+        let name = ring_name("limit");
+        let writer = ShmRing::create(&name, 2, 64).unwrap();
+        let ring = Arc::new(ShmRing::open(&name).unwrap());
+        let readers: Vec<ReaderEntry> =
+            (0..writer.max_readers).map(|_| ReaderEntry::register(ring.clone()).unwrap()).collect();
+        assert!(ReaderEntry::register(ring.clone()).is_err());
+        drop(readers);
+        assert!(ReaderEntry::register(ring).is_ok());
+        let _ = fs::remove_file(&writer.path);
+    }
+
+    #[test]
+    fn rejects_files_that_are_not_rings() {
+        let name = ring_name("invalid");
+        fs::write(ring_path(&name), b"not a ring").unwrap();
+        assert_eq!(ShmRing::open(&name).err().unwrap().kind(), io::ErrorKind::InvalidData);
+        let _ = fs::remove_file(ring_path(&name));
+        assert_eq!(ShmRing::open(&name).err().unwrap().kind(), io::ErrorKind::NotFound);
+    }
+}
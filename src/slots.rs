@@ -0,0 +1,202 @@
+// src/slots.rs
+//
+// Recycled frame buffers for the acquire_frame()/submit() send path. Python
+// writes into a slot in place through the buffer protocol, so steady-state
+// sending allocates nothing: a slot goes back to the pool as soon as nothing
+// but the pool references it any more.
+
+use pyo3::prelude::*;
+use pyo3::exceptions::{PyBufferError, PyRuntimeError};
+use pyo3::ffi;
+use std::os::raw::{c_char, c_int};
+use std::sync::atomic::{AtomicUsize, Ordering};
+use std::sync::Arc;
+
+use crate::frame::{four_cc_name, VideoFormat, FOURCC_BGRA, FOURCC_BGRX, FOURCC_RGBA, FOURCC_RGBX, FOURCC_UYVY};
+
+/// Number of idle slots a pool keeps around
+const MAX_IDLE_SLOTS: usize = 8;
+
+/// Pool of reusable frame buffers
+///
+/// A slot is free when the pool holds its only reference; Python views,
+/// frames in flight and loopback receivers all keep it busy by holding a
+/// clone of the `Arc`.
+#[derive(Default)]
+pub struct SlotPool {
+    slots: Vec<Arc<Vec<u8>>>,
+}
+
+impl SlotPool {
+    /// Take a free buffer of exactly `size` bytes, allocating one if needed
+    pub fn acquire(&mut self, size: usize) -> Arc<Vec<u8>> {
+        if let Some(slot) = self.slots.iter().find(|slot| slot.len() == size && Arc::strong_count(slot) == 1) {
+            return slot.clone();
+        }
+
+        // Free buffers of another size belong to an earlier format
+        self.slots.retain(|slot| slot.len() == size || Arc::strong_count(slot) > 1);
+
+        let slot = Arc::new(vec![0u8; size]);
+        let idle = self.slots.iter().filter(|slot| Arc::strong_count(slot) == 1).count();
+        if idle < MAX_IDLE_SLOTS {
+            self.slots.push(slot.clone());
+        }
+        slot
+    }
+
+    /// Number of buffers owned by the pool
+    pub fn len(&self) -> usize {
+        self.slots.len()
+    }
+
+    /// Drop every buffer that is not in use
+    pub fn clear(&mut self) {
+        self.slots.retain(|slot| Arc::strong_count(slot) > 1);
+    }
+}
+
+/// A writable video frame buffer taken from a sender's pool
+///
+/// Supports the buffer protocol, so `numpy.asarray(slot)` is a zero-copy
+/// view. Packed formats are exposed as `(height, width, bytes_per_pixel)`
+/// with the line stride as the row stride; planar formats as a flat array
+/// of bytes. Views taken after the slot is submitted are read-only.
+#[pyclass]
+pub struct FrameSlot {
+    pub data: Arc<Vec<u8>>,
+    pub format: VideoFormat,
+    pub submitted: bool,
+    /// Buffer views currently exported to Python
+    exports: AtomicUsize,
+    ndim: c_int,
+    shape: [ffi::Py_ssize_t; 3],
+    strides: [ffi::Py_ssize_t; 3],
+}
+
+impl FrameSlot {
+    pub fn new(data: Arc<Vec<u8>>, format: VideoFormat) -> Self {
+        let bytes_per_pixel = match format.four_cc {
+            FOURCC_BGRA | FOURCC_BGRX | FOURCC_RGBA | FOURCC_RGBX => 4,
+            FOURCC_UYVY => 2,
+            _ => 0,
+        };
+
+        let (ndim, shape, strides) = if bytes_per_pixel > 0 {
+            (
+                3,
+                [format.height as ffi::Py_ssize_t, format.width as ffi::Py_ssize_t, bytes_per_pixel],
+                [format.line_stride as ffi::Py_ssize_t, bytes_per_pixel, 1],
+            )
+        } else {
+            (1, [data.len() as ffi::Py_ssize_t, 0, 0], [1, 0, 0])
+        };
+
+        FrameSlot {
+            data,
+            format,
+            submitted: false,
+            exports: AtomicUsize::new(0),
+            ndim,
+            shape,
+            strides,
+        }
+    }
+
+    /// Whether Python still holds a view of the buffer
+    ///
+    /// Views exported before submission stay writable, so a slot with live
+    /// exports must not be shared with anything that reads it later.
+    pub fn is_exported(&self) -> bool {
+        self.exports.load(Ordering::Acquire) > 0
+    }
+}
+
+#[pymethods]
+impl FrameSlot {
+    unsafe fn __getbuffer__(slf: PyRef<'_, Self>, view: *mut ffi::Py_buffer, flags: c_int) -> PyResult<()> {
+        if view.is_null() {
+            return Err(PyBufferError::new_err("View is null"));
+        }
+        if slf.submitted && (flags & ffi::PyBUF_WRITABLE) == ffi::PyBUF_WRITABLE {
+            return Err(PyRuntimeError::new_err("Frame slot has already been submitted"));
+        }
+
+        slf.exports.fetch_add(1, Ordering::AcqRel);
+        unsafe {
+            ffi::Py_INCREF(slf.as_ptr());
+            (*view).obj = slf.as_ptr();
+            // The pool only hands out a slot to one FrameSlot at a time, so
+            // this is the only writer until it is submitted
+            (*view).buf = slf.data.as_ptr() as *mut std::os::raw::c_void;
+            (*view).len = slf.data.len() as ffi::Py_ssize_t;
+            (*view).readonly = if slf.submitted { 1 } else { 0 };
+            (*view).itemsize = 1;
+            (*view).format = if (flags & ffi::PyBUF_FORMAT) == ffi::PyBUF_FORMAT {
+                b"B\0".as_ptr() as *mut c_char
+            } else {
+                std::ptr::null_mut()
+            };
+            (*view).ndim = slf.ndim;
+            (*view).shape = if (flags & ffi::PyBUF_ND) == ffi::PyBUF_ND {
+                slf.shape.as_ptr() as *mut ffi::Py_ssize_t
+            } else {
+                std::ptr::null_mut()
+            };
+            // Slots use the default line stride, so they are also C-contiguous
+            (*view).strides = if (flags & ffi::PyBUF_STRIDES) == ffi::PyBUF_STRIDES {
+                slf.strides.as_ptr() as *mut ffi::Py_ssize_t
+            } else {
+                std::ptr::null_mut()
+            };
+            (*view).suboffsets = std::ptr::null_mut();
+            (*view).internal = std::ptr::null_mut();
+        }
+
+        Ok(())
+    }
+
+    unsafe fn __releasebuffer__(&self, _view: *mut ffi::Py_buffer) {
+        self.exports.fetch_sub(1, Ordering::AcqRel);
+    }
+
+    /// Width of the frame in pixels
+    #[getter]
+    fn get_width(&self) -> u32 {
+        self.format.width
+    }
+
+    /// Height of the frame in pixels
+    #[getter]
+    fn get_height(&self) -> u32 {
+        self.format.height
+    }
+
+    /// Line stride in bytes
+    #[getter]
+    fn get_line_stride(&self) -> usize {
+        self.format.line_stride
+    }
+
+    /// Name of the pixel format
+    #[getter]
+    fn get_four_cc_name(&self) -> String {
+        four_cc_name(self.format.four_cc)
+    }
+
+    /// Whether the slot has been submitted for sending
+    #[getter]
+    fn get_submitted(&self) -> bool {
+        self.submitted
+    }
+
+    fn __repr__(&self) -> String {
+        format!(
+            "FrameSlot({}x{} {}, submitted={})",
+            self.format.width,
+            self.format.height,
+            four_cc_name(self.format.four_cc),
+            if self.submitted { "True" } else { "False" }
+        )
+    }
+}
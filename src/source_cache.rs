@@ -0,0 +1,275 @@
+// src/source_cache.rs
+//
+// On-disk cache of discovered sources, so a restarted process knows which
+// sources it last saw and can start connecting to them without blocking on a
+// discovery round. Only names are kept: connecting still waits for discovery
+// to announce the source. The file is plain text, one source per line;
+// entries not seen within the cache's maximum age expire when it is loaded or
+// saved.
+
+use std::collections::HashMap;
+use std::fs;
+use std::io::Write;
+use std::path::{Path, PathBuf};
+use std::sync::atomic::{AtomicU64, Ordering};
+use std::time::{Duration, Instant, SystemTime, UNIX_EPOCH};
+
+/// Age after which an entry expires unless configured otherwise
+pub const DEFAULT_MAX_AGE: Duration = Duration::from_secs(24 * 60 * 60);
+
+/// Distinguishes the temporary files of saves running at the same time
+static SAVE_COUNTER: AtomicU64 = AtomicU64::new(0);
+
+/// First line of a cache file
+const HEADER: &str = "# ndirust-py source cache v2: last_seen<TAB>name";
+
+/// Seconds since the Unix epoch
+pub fn unix_now() -> f64 {
+    SystemTime::now().duration_since(UNIX_EPOCH).map_or(0.0, |elapsed| elapsed.as_secs_f64())
+}
+
+/// A source as last seen by discovery
+#[derive(Clone, Debug, PartialEq)]
+pub struct CachedSource {
+    pub name: String,
+    /// Seconds since the Unix epoch
+    pub last_seen: f64,
+}
+
+/// Sources read from and written to a cache file
+pub struct SourceCache {
+    path: PathBuf,
+    max_age: Duration,
+    entries: HashMap<String, CachedSource>,
+    /// Whether sightings were recorded since the last save
+    unsaved: bool,
+    saved_at: Option<Instant>,
+}
+
+impl SourceCache {
+    /// Read a cache file, treating a missing or unreadable one as empty
+    pub fn load(path: &Path, max_age: Duration) -> Self {
+        let mut cache = SourceCache {
+            path: path.to_path_buf(),
+            max_age,
+            entries: HashMap::new(),
+            unsaved: false,
+            saved_at: None,
+        };
+        cache.merge_file();
+        cache.expire(unix_now());
+        cache
+    }
+
+    /// Merge the file's entries, keeping the latest sighting of each source
+    fn merge_file(&mut self) {
+        let Ok(text) = fs::read_to_string(&self.path) else {
+            return;
+        };
+        for line in text.lines().filter(|line| !line.starts_with('#')) {
+            let Some((last_seen, name)) = line.split_once('\t') else {
+                continue;
+            };
+            let Ok(last_seen) = last_seen.parse::<f64>() else {
+                continue;
+            };
+            self.insert(CachedSource { name: name.to_string(), last_seen });
+        }
+    }
+
+    /// Keep the later of two sightings, returning whether the source is new
+    fn insert(&mut self, source: CachedSource) -> bool {
+        match self.entries.get(&source.name) {
+            Some(existing) if existing.last_seen >= source.last_seen => false,
+            existing => {
+                let added = existing.is_none();
+                self.entries.insert(source.name.clone(), source);
+                added
+            },
+        }
+    }
+
+    /// Record that discovery saw a source
+    ///
+    /// Returns:
+    ///     Whether the source was not in the cache yet
+    pub fn seen(&mut self, name: &str, now: f64) -> bool {
+        if name.contains(['\t', '\n', '\r']) {
+            return false;
+        }
+        self.unsaved = true;
+        self.insert(CachedSource { name: name.to_string(), last_seen: now })
+    }
+
+    /// Whether sightings were recorded since the last save
+    pub fn has_unsaved(&self) -> bool {
+        self.unsaved
+    }
+
+    /// Whether the cache was saved less than `interval` ago
+    pub fn saved_within(&self, interval: Duration) -> bool {
+        self.saved_at.is_some_and(|saved_at| saved_at.elapsed() < interval)
+    }
+
+    /// Drop entries older than the maximum age, returning how many
+    pub fn expire(&mut self, now: f64) -> usize {
+        let max_age = self.max_age.as_secs_f64();
+        let before = self.entries.len();
+        self.entries.retain(|_, entry| now - entry.last_seen <= max_age);
+        before - self.entries.len()
+    }
+
+    /// The entry for a source, if it has not expired
+    pub fn get(&self, name: &str, now: f64) -> Option<&CachedSource> {
+        self.entries.get(name).filter(|entry| now - entry.last_seen <= self.max_age.as_secs_f64())
+    }
+
+    /// Unexpired entries, most recently seen first
+    pub fn entries(&self, now: f64) -> Vec<CachedSource> {
+        let max_age = self.max_age.as_secs_f64();
+        let mut entries: Vec<CachedSource> =
+            self.entries.values().filter(|entry| now - entry.last_seen <= max_age).cloned().collect();
+        entries.sort_by(|a, b| b.last_seen.total_cmp(&a.last_seen).then_with(|| a.name.cmp(&b.name)));
+        entries
+    }
+
+    pub fn path(&self) -> &Path {
+        &self.path
+    }
+
+    /// Write the cache, merged with whatever other processes saved meanwhile
+    ///
+    /// The file is replaced atomically, so readers never see a partial one.
+    pub fn save(&mut self) -> std::io::Result<()> {
+        self.merge_file();
+        self.expire(unix_now());
+
+        let mut text = String::from(HEADER);
+        text.push('\n');
+        for entry in self.entries(unix_now()) {
+            text.push_str(&format!("{:.3}\t{}\n", entry.last_seen, entry.name));
+        }
+
+        if let Some(directory) = self.path.parent().filter(|directory| !directory.as_os_str().is_empty()) {
+            fs::create_dir_all(directory)?;
+        }
+        let mut temporary = self.path.clone().into_os_string();
+        temporary.push(format!(".{}-{}.tmp", std::process::id(), SAVE_COUNTER.fetch_add(1, Ordering::Relaxed)));
+        let temporary = PathBuf::from(temporary);
+        {
+            let mut file = fs::File::create(&temporary)?;
+            file.write_all(text.as_bytes())?;
+            file.sync_all()?;
+        }
+        fs::rename(&temporary, &self.path)?;
+        self.unsaved = false;
+        self.saved_at = Some(Instant::now());
+        Ok(())
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    /// A cache file path of its own for each test
+    fn cache_path(test: &str) -> PathBuf {
+        std::env::temp_dir().join(format!("ndirust-source-cache-{}-{}.tsv", std::process::id(), test))
+    }
+
+    #[test]
+    fn round_trip() {
+        let path = cache_path("round-trip");
+        let now = unix_now().floor();
+        let mut cache = SourceCache::load(&path, DEFAULT_MAX_AGE);
+        assert!(cache.seen("STUDIO (Camera 1)", now - 10.0));
+        assert!(cache.seen("STUDIO (Camera 2)", now));
+        cache.save().unwrap();
+
+        let loaded = SourceCache::load(&path, DEFAULT_MAX_AGE);
+        let _ = fs::remove_file(&path);
+        assert_eq!(
+            loaded.entries(now),
+            vec![
+                CachedSource { name: "STUDIO (Camera 2)".to_string(), last_seen: now },
+                CachedSource { name: "STUDIO (Camera 1)".to_string(), last_seen: now - 10.0 },
+            ]
+        );
+    }
+
+    #[test]
+    fn keeps_latest_sighting() {
+        let mut cache = SourceCache::load(&cache_path("latest"), DEFAULT_MAX_AGE);
+        let now = unix_now();
+        assert!(cache.seen("A", now));
+        assert!(!cache.seen("A", now - 5.0));
+        assert_eq!(cache.get("A", now).unwrap().last_seen, now);
+        assert!(!cache.seen("A", now + 1.0));
+        assert_eq!(cache.get("A", now + 1.0).unwrap().last_seen, now + 1.0);
+    }
+
+    #[test]
+    fn tracks_unsaved_sightings() {
+        let path = cache_path("unsaved");
+        let mut cache = SourceCache::load(&path, DEFAULT_MAX_AGE);
+        assert!(!cache.has_unsaved());
+        assert!(!cache.saved_within(Duration::from_secs(60)));
+        cache.seen("A", unix_now());
+        assert!(cache.has_unsaved());
+        cache.save().unwrap();
+        let _ = fs::remove_file(&path);
+        assert!(!cache.has_unsaved());
+        assert!(cache.saved_within(Duration::from_secs(60)));
+        assert!(!cache.saved_within(Duration::ZERO));
+    }
+
+    #[test]
+    fn expired_entries_are_dropped() {
+        let mut cache = SourceCache::load(&cache_path("expiry"), Duration::from_secs(60));
+        let now = unix_now();
+        cache.seen("Old", now - 120.0);
+        cache.seen("New", now - 30.0);
+        assert!(cache.get("Old", now).is_none());
+        assert!(cache.get("New", now).is_some());
+        assert_eq!(cache.entries(now).len(), 1);
+        assert_eq!(cache.expire(now), 1);
+        assert_eq!(cache.expire(now), 0);
+        // Everything has expired a long time later
+        assert!(cache.entries(now + 3600.0).is_empty());
+    }
+
+    #[test]
+    fn expired_file_loads_empty() {
+        let path = cache_path("expired-file");
+        let old = unix_now() - 2.0 * DEFAULT_MAX_AGE.as_secs_f64();
+        fs::write(&path, format!("{}\n{:.3}\tGone\n", HEADER, old)).unwrap();
+        let cache = SourceCache::load(&path, DEFAULT_MAX_AGE);
+        let _ = fs::remove_file(&path);
+        assert!(cache.entries(unix_now()).is_empty());
+    }
+
+    #[test]
+    fn missing_and_malformed_files_are_tolerated() {
+        let missing = SourceCache::load(&cache_path("missing"), DEFAULT_MAX_AGE);
+        assert!(missing.entries(unix_now()).is_empty());
+
+        let path = cache_path("malformed");
+        let now = unix_now();
+        fs::write(&path, format!("{}\nnot a line\nsoon\tBad time\n\n{:.3}\tGood\n", HEADER, now)).unwrap();
+        let cache = SourceCache::load(&path, DEFAULT_MAX_AGE);
+        let _ = fs::remove_file(&path);
+        let names: Vec<String> = cache.entries(now).into_iter().map(|entry| entry.name).collect();
+        assert_eq!(names, vec!["Good".to_string()]);
+    }
+
+    #[test]
+    fn names_that_would_break_the_file_are_ignored() {
+        let mut cache = SourceCache::load(&cache_path("names"), DEFAULT_MAX_AGE);
+        let now = unix_now();
+        assert!(!cache.seen("Tab\tName", now));
+        assert!(!cache.seen("Line\nName", now));
+        assert!(cache.seen("", now));
+        let names: Vec<String> = cache.entries(now).into_iter().map(|entry| entry.name).collect();
+        assert_eq!(names, vec![String::new()]);
+    }
+}
@@ -29,10 +29,20 @@ pub fn register_utility_functions(m: &PyModule) -> PyResult<()> {
         }
     }
     
+    /// Get the current UTC time as an NDI timecode (100ns units since the Unix epoch)
+    ///
+    /// Pass this as the timecode of a frame at capture time to let receivers
+    /// measure end-to-end latency.
+    #[pyfunction]
+    fn current_timecode() -> i64 {
+        crate::frame::current_time_100ns()
+    }
+    
     // Register the functions with the module
     m.add_function(wrap_pyfunction!(get_ndi_version, m)?)?;
     m.add_function(wrap_pyfunction!(is_supported_cpu, m)?)?;
     m.add_function(wrap_pyfunction!(initialize_ndi, m)?)?;
+    m.add_function(wrap_pyfunction!(current_timecode, m)?)?;
     
     Ok(())
 } 
\ No newline at end of file
@@ -0,0 +1,98 @@
+"""
+Shared fixtures for the Python API tests.
+
+Every test runs on the in-process loopback backend, so the suite needs
+neither the NDI runtime nor a network source. Frames are captured on native
+threads, so tests wait for results with a timeout rather than assuming a
+frame has already arrived.
+"""
+
+import time
+import uuid
+
+import pytest
+
+# Small frames keep the tests fast; the width is even for UYVY
+WIDTH, HEIGHT = 64, 36
+
+# Generous bound for native threads to deliver a frame on a loaded CI runner
+TIMEOUT_MS = 2000
+
+
+def unique_name(prefix):
+    """A sender or ring name no other test uses."""
+    return f"{prefix}-{uuid.uuid4().hex[:8]}"
+
+
+def wait_until(predicate, timeout_ms=TIMEOUT_MS):
+    """Poll `predicate` until it returns something truthy, and return that."""
+    deadline = time.monotonic() + timeout_ms / 1000
+    while True:
+        result = predicate()
+        if result or time.monotonic() >= deadline:
+            return result
+        time.sleep(0.01)
+
+
+def uyvy_frame(luma, width=WIDTH, height=HEIGHT):
+    """A UYVY frame with neutral chroma and the given luma per column.
+
+    Args:
+        luma: One limited-range luma value for every pixel, or an array of
+            `width` values, one per column
+    """
+    np = pytest.importorskip("numpy")
+    frame = np.empty((height, width, 2), dtype=np.uint8)
+    frame[:, :, 0] = 128
+    frame[:, :, 1] = luma
+    return frame
+
+
+@pytest.fixture
+def sender():
+    """A loopback sender, closed after the test."""
+    ndirust_py = pytest.importorskip("ndirust_py")
+    sender = ndirust_py.sender.NdiSender(unique_name("test-sender"), backend="loopback")
+    yield sender
+    sender.close()
+
+
+@pytest.fixture
+def receiver(sender):
+    """A loopback receiver connected to `sender`."""
+    ndirust_py = pytest.importorskip("ndirust_py")
+    receiver = ndirust_py.receiver.NdiReceiver(backend="loopback")
+    receiver.connect_to_source(sender.source_name)
+    yield receiver
+    receiver.close()
+
+
+@pytest.fixture
+def tone_source():
+    """A running loopback source sending video and stereo -20 dBFS 1 kHz tone."""
+    ndirust_py = pytest.importorskip("ndirust_py")
+    source = ndirust_py.sender.NdiLoadGenerator(
+        1,
+        name_template=unique_name("test-tone"),
+        width=WIDTH,
+        height=HEIGHT,
+        audio_channels=2,
+        backend="loopback",
+    )
+    yield source
+    source.close()
+
+
+@pytest.fixture
+def tone_receiver(tone_source):
+    """A loopback receiver connected to `tone_source`.
+
+    The source starts sending once the receiver is connected, so no frame
+    is lost before the receiver exists.
+    """
+    ndirust_py = pytest.importorskip("ndirust_py")
+    receiver = ndirust_py.receiver.NdiReceiver(backend="loopback")
+    receiver.connect_to_source(tone_source.source_names[0])
+    tone_source.start()
+    yield receiver
+    receiver.close()
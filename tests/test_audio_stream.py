@@ -0,0 +1,111 @@
+"""Tests for NdiAudioStream on loopback tone audio."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+ndirust_py = pytest.importorskip("ndirust_py")
+
+from conftest import TIMEOUT_MS
+
+# Peak of the load generator's tone
+TONE_PEAK = 0.1
+
+
+@pytest.fixture
+def stream_of(tone_receiver):
+    """Make a started audio stream on the tone receiver, stopped after the test."""
+    streams = []
+
+    def make(**options):
+        stream = ndirust_py.receiver.NdiAudioStream(tone_receiver, **options)
+        stream.start()
+        streams.append(stream)
+        return stream
+
+    yield make
+    for stream in streams:
+        stream.stop()
+
+
+def test_blocks_have_the_requested_size(stream_of):
+    stream = stream_of(block_size=512)
+
+    # Frames carry 1600 samples, so blocks straddle frame boundaries
+    for _ in range(5):
+        block = stream.read(timeout_ms=TIMEOUT_MS)
+        assert block.shape == (512, 2)
+        assert block.dtype == np.float32
+        assert np.abs(block).max() == pytest.approx(TONE_PEAK, abs=0.01)
+
+    assert stream.channels == 2
+    assert stream.sample_rate == 48000
+    assert stream.stats["blocks_read"] == 5
+
+
+def test_blocks_are_continuous(stream_of):
+    stream = stream_of(block_size=480)
+    samples = np.concatenate([stream.read(timeout_ms=TIMEOUT_MS)[:, 0] for _ in range(10)])
+
+    # A 1 kHz tone at 48 kHz repeats every 48 samples; a gap or repeated
+    # chunk between blocks would break the period
+    assert np.allclose(samples[48:], samples[:-48], atol=1e-6)
+
+
+def test_blocks_are_writable_arrays(stream_of):
+    block = stream_of(block_size=256).read(timeout_ms=TIMEOUT_MS)
+
+    block[:] = 0.0
+    assert not block.any()
+
+
+def test_selects_channels(stream_of):
+    block = stream_of(block_size=256, channels=[1]).read(timeout_ms=TIMEOUT_MS)
+
+    assert block.shape == (256, 1)
+
+
+def test_converts_to_int16(stream_of):
+    block = stream_of(block_size=256, dtype="int16").read(timeout_ms=TIMEOUT_MS)
+
+    assert block.dtype == np.int16
+    assert np.abs(block).max() == pytest.approx(TONE_PEAK * 32767, rel=0.05)
+
+
+def test_resamples(stream_of):
+    stream = stream_of(block_size=256, sample_rate=24000)
+    block = stream.read(timeout_ms=TIMEOUT_MS)
+
+    assert stream.sample_rate == 24000
+    assert block.shape == (256, 2)
+
+
+def test_iteration_ends_when_stopped(stream_of):
+    stream = stream_of(block_size=256)
+    blocks = 0
+    for block in stream:
+        blocks += 1
+        if blocks == 3:
+            stream.stop()
+
+    assert blocks >= 3
+    assert not stream.is_running
+
+
+def test_read_times_out_without_audio(receiver):
+    stream = ndirust_py.receiver.NdiAudioStream(receiver, block_size=256)
+    stream.start()
+    try:
+        assert stream.read(timeout_ms=50) is None
+    finally:
+        stream.stop()
+
+
+@pytest.mark.parametrize("options", [
+    {"block_size": 0},
+    {"channels": []},
+    {"sample_rate": 0},
+    {"dtype": "float64"},
+])
+def test_rejects_invalid_options(receiver, options):
+    with pytest.raises(ValueError):
+        ndirust_py.receiver.NdiAudioStream(receiver, **options)
@@ -0,0 +1,88 @@
+"""Tests for NdiLoadGenerator on the loopback backend."""
+
+import pytest
+
+ndirust_py = pytest.importorskip("ndirust_py")
+
+from conftest import HEIGHT, TIMEOUT_MS, WIDTH, unique_name, wait_until
+
+FrameType = ndirust_py.receiver.FrameType
+
+
+@pytest.fixture
+def load_of():
+    """Make a loopback load generator, closed after the test."""
+    generators = []
+
+    def make(count, **options):
+        options = {"name_template": unique_name("test-load") + " {index}", "width": WIDTH, "height": HEIGHT, **options}
+        generator = ndirust_py.sender.NdiLoadGenerator(count, backend="loopback", **options)
+        generators.append(generator)
+        return generator
+
+    yield make
+    for generator in generators:
+        generator.close()
+
+
+def test_names_follow_the_template(load_of):
+    load = load_of(3, first_index=5)
+
+    assert len(load) == 3
+    assert [name.rsplit(" ", 1)[1] for name in load.names] == ["5", "6", "7"]
+    finder = ndirust_py.discovery.NdiFinder(backend="loopback")
+    found = {source.name for source in finder.find_sources(0)}
+    assert set(load.source_names) <= found
+
+
+def test_every_sender_sends_at_its_rate(load_of):
+    load = load_of(4, fps_n=60, audio_channels=2, metadata_rate=10.0, threads=2)
+    load.start()
+    assert load.is_running
+    assert wait_until(lambda: all(entry["video_frames"] >= 15 for entry in load.stats))
+    load.stop()
+
+    for entry in load.stats:
+        assert entry["audio_frames"] == entry["video_frames"]
+        assert entry["metadata_frames"] > 0
+        assert entry["errors"] == 0
+        assert entry["target_fps"] == 60.0
+    assert not load.is_running
+    assert load.elapsed > 0.0
+
+
+def test_receivers_get_the_configured_frames(load_of):
+    load = load_of(1, four_cc="BGRA", animate=False)
+    receiver = ndirust_py.receiver.NdiReceiver(backend="loopback")
+    try:
+        receiver.connect_to_source(load.source_names[0])
+        load.start()
+        frame_type, frame = receiver.receive_frame(timeout_ms=TIMEOUT_MS)
+    finally:
+        receiver.close()
+
+    assert frame_type == FrameType.Video
+    assert (frame.width, frame.height, frame.get_four_cc_name()) == (WIDTH, HEIGHT, "BGRA")
+
+
+def test_close_removes_the_senders(load_of):
+    load = load_of(2)
+    load.close()
+
+    finder = ndirust_py.discovery.NdiFinder(backend="loopback")
+    found = {source.name for source in finder.find_sources(0)}
+    assert not set(load.source_names) & found
+    with pytest.raises(RuntimeError):
+        load.start()
+
+
+@pytest.mark.parametrize("count, options", [
+    (0, {}),
+    (2, {"name_template": "No index"}),
+    (1, {"fps_n": 0}),
+    (1, {"metadata_rate": -1.0}),
+    (1, {"pattern": "plaid"}),
+])
+def test_rejects_invalid_options(count, options):
+    with pytest.raises(ValueError):
+        ndirust_py.sender.NdiLoadGenerator(count, backend="loopback", **options)
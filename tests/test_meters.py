@@ -0,0 +1,54 @@
+"""Tests for NdiAudioMeter on loopback tone audio."""
+
+import pytest
+
+ndirust_py = pytest.importorskip("ndirust_py")
+
+from conftest import TIMEOUT_MS, wait_until
+
+# The load generator's tone: a 1 kHz sine peaking at 0.1 (-20 dBFS), whose
+# RMS is 3 dB lower
+TONE_PEAK_DBFS = -20.0
+TONE_RMS_DBFS = -23.0
+
+
+def test_levels_measure_the_tone(tone_receiver):
+    meter = ndirust_py.receiver.NdiAudioMeter(tone_receiver)
+    meter.start()
+    try:
+        assert wait_until(lambda: meter.stats["frames"] >= 3)
+        meter.levels()  # restart the interval on whole frames
+        assert wait_until(lambda: meter.stats["frames"] >= 6)
+        levels = meter.levels()
+    finally:
+        meter.stop()
+
+    assert meter.channels == 2
+    assert meter.sample_rate == 48000
+    assert levels["peak"] == pytest.approx([TONE_PEAK_DBFS] * 2, abs=0.2)
+    assert levels["true_peak"] == pytest.approx([TONE_PEAK_DBFS] * 2, abs=0.2)
+    assert levels["rms"] == pytest.approx([TONE_RMS_DBFS] * 2, abs=0.2)
+
+
+def test_readings_are_emitted_at_the_interval(tone_receiver):
+    meter = ndirust_py.receiver.NdiAudioMeter(tone_receiver, interval_ms=100)
+    meter.start()
+    try:
+        readings = meter.get_readings(timeout_ms=TIMEOUT_MS)
+    finally:
+        meter.stop()
+
+    assert readings
+    assert readings[0]["peak"] == pytest.approx([TONE_PEAK_DBFS] * 2, abs=0.2)
+    assert set(readings[0]["programme"]) == {"momentary", "short_term", "integrated"}
+
+
+def test_readings_need_an_interval(receiver):
+    meter = ndirust_py.receiver.NdiAudioMeter(receiver)
+    with pytest.raises(RuntimeError):
+        meter.get_readings()
+
+
+def test_rejects_a_zero_interval(receiver):
+    with pytest.raises(ValueError):
+        ndirust_py.receiver.NdiAudioMeter(receiver, interval_ms=0)
@@ -0,0 +1,78 @@
+"""Tests for the pollable frame queue of NdiReceiver."""
+
+import selectors
+import sys
+
+import pytest
+
+ndirust_py = pytest.importorskip("ndirust_py")
+
+from conftest import HEIGHT, TIMEOUT_MS, WIDTH, unique_name, wait_until
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="fileno() is only supported on Unix")
+
+FrameType = ndirust_py.receiver.FrameType
+
+
+def send_pattern(sender):
+    sender.send_test_pattern(width=WIDTH, height=HEIGHT)
+
+
+def poll(receiver):
+    """The next queued (frame_type, frame), or None."""
+    frame_type, frame = receiver.try_receive()
+    return (frame_type, frame) if frame is not None else None
+
+
+def test_selector_wakes_for_queued_frames(sender, receiver):
+    with selectors.DefaultSelector() as selector:
+        selector.register(receiver, selectors.EVENT_READ)
+        assert selector.select(timeout=0) == []
+
+        send_pattern(sender)
+        [(key, _)] = selector.select(timeout=TIMEOUT_MS / 1000)
+        assert key.fileobj is receiver
+
+        frame_type, frame = receiver.try_receive()
+        assert frame_type == FrameType.Video
+        assert (frame.width, frame.height) == (WIDTH, HEIGHT)
+
+        # Drained, so the descriptor is no longer readable
+        assert receiver.try_receive()[1] is None
+        assert selector.select(timeout=0) == []
+
+
+def test_first_try_receive_starts_capturing(sender, receiver):
+    assert receiver.try_receive()[1] is None
+
+    send_pattern(sender)
+    frame_type, frame = wait_until(lambda: poll(receiver))
+    assert frame_type == FrameType.Video
+
+
+def test_full_queue_drops_the_oldest_frames():
+    sender = ndirust_py.sender.NdiSender(unique_name("test-poll"), backend="loopback")
+    receiver = ndirust_py.receiver.NdiReceiver(backend="loopback", queue_depth=2)
+    try:
+        receiver.connect_to_source(sender.source_name)
+        receiver.fileno()
+        timecodes = [1000 * index for index in range(1, 6)]
+        for timecode in timecodes:
+            sender.send_test_pattern(width=WIDTH, height=HEIGHT, timecode=timecode)
+
+        assert wait_until(lambda: receiver.dropped_frames == 3)
+        assert receiver.queued_frames == 2
+        received = [receiver.try_receive()[1].timecode for _ in range(2)]
+        assert received == timecodes[-2:]
+    finally:
+        receiver.close()
+        sender.close()
+
+
+def test_receive_frame_reads_the_same_queue(sender, receiver):
+    receiver.fileno()
+    send_pattern(sender)
+
+    frame_type, frame = receiver.receive_frame(timeout_ms=TIMEOUT_MS)
+    assert frame_type == FrameType.Video
+    assert receiver.queued_frames == 0
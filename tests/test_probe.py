@@ -0,0 +1,105 @@
+"""Tests for NdiProbe on loopback video."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+ndirust_py = pytest.importorskip("ndirust_py")
+
+from conftest import HEIGHT, WIDTH, uyvy_frame, wait_until
+
+BLACK = 16
+RAMP = np.linspace(16, 235, WIDTH).astype(np.uint8)
+
+
+@pytest.fixture
+def probe_of(receiver):
+    """Make a started probe with no hold times, stopped after the test."""
+    probes = []
+
+    def make(**options):
+        options = {"black_seconds": 0.0, "freeze_seconds": 0.0, "bars_seconds": 0.0, **options}
+        probe = ndirust_py.receiver.NdiProbe(receiver, **options)
+        probe.start()
+        probes.append(probe)
+        return probe
+
+    yield make
+    for probe in probes:
+        probe.stop()
+
+
+def send_frames(sender, probe, frames, width=WIDTH, height=HEIGHT):
+    """Send frames and wait until the probe has seen all of them."""
+    expected = probe.stats["frames_seen"] + len(frames)
+    for frame in frames:
+        sender.send_video_frame(frame, width, height)
+    assert wait_until(lambda: probe.stats["frames_seen"] >= expected)
+
+
+def active_kinds(events):
+    return [event["kind"] for event in events if event["active"]]
+
+
+def test_detects_black(sender, probe_of):
+    probe = probe_of()
+    send_frames(sender, probe, [uyvy_frame(BLACK)] * 3)
+
+    assert active_kinds(probe.get_events()) == ["black"]
+    assert probe.is_black
+    assert not probe.is_frozen
+    assert probe.last_summary["black_ratio"] == 1.0
+
+
+def test_detects_freeze_until_the_picture_changes(sender, probe_of):
+    probe = probe_of()
+    send_frames(sender, probe, [uyvy_frame(RAMP)] * 3)
+
+    assert active_kinds(probe.get_events()) == ["freeze"]
+    assert probe.is_frozen
+
+    send_frames(sender, probe, [uyvy_frame(RAMP[::-1])])
+    [ended] = probe.get_events()
+    assert ended["kind"] == "freeze"
+    assert not ended["active"]
+    assert ended["duration"] >= 0.0
+    assert not probe.is_frozen
+
+
+def test_static_bars_are_not_frozen(sender, probe_of):
+    width, height = 320, 180
+    generator = ndirust_py.sender.TestPatternGenerator(
+        width=width, height=height, pattern="bars", moving_box=False, burn_in=False
+    )
+    bars = generator.render()
+    probe = probe_of()
+    send_frames(sender, probe, [bars] * 3, width, height)
+
+    assert active_kinds(probe.get_events()) == ["bars"]
+    assert probe.has_bars
+    assert not probe.is_frozen
+
+
+def test_moving_picture_raises_no_events(sender, probe_of):
+    probe = probe_of()
+    send_frames(sender, probe, [uyvy_frame(np.roll(RAMP, shift)) for shift in range(0, 40, 8)])
+
+    assert probe.get_events() == []
+    assert not (probe.is_black or probe.is_frozen or probe.has_bars)
+
+
+def test_summaries_describe_each_frame(sender, probe_of):
+    probe = probe_of(every_n=2)
+    send_frames(sender, probe, [uyvy_frame(BLACK), uyvy_frame(RAMP)] * 2)
+
+    summaries = probe.get_summaries()
+    assert len(summaries) == 2
+    assert all(summary["mean_luma"] == 0.0 for summary in summaries)
+    assert summaries[0]["difference"] is None
+    assert summaries[1]["difference"] == 0.0
+    assert probe.stats["frames_seen"] == 4
+
+
+@pytest.mark.parametrize("options", [{"step": 0}, {"every_n": 0}, {"black_ratio": 1.5}, {"freeze_seconds": -1.0}])
+def test_rejects_invalid_options(receiver, options):
+    with pytest.raises(ValueError):
+        ndirust_py.receiver.NdiProbe(receiver, **options)
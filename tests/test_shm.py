@@ -0,0 +1,124 @@
+"""Tests for the shared-memory frame handoff on loopback frames."""
+
+import zlib
+
+import pytest
+
+np = pytest.importorskip("numpy")
+ndirust_py = pytest.importorskip("ndirust_py")
+
+from conftest import HEIGHT, TIMEOUT_MS, WIDTH, unique_name, uyvy_frame
+
+RAMP = np.linspace(16, 235, WIDTH).astype(np.uint8)
+
+
+@pytest.fixture
+def ring_of():
+    """Make a started writer on a receiver, closed after the test."""
+    writers = []
+
+    def make(receiver, **options):
+        writer = ndirust_py.shm.NdiShmWriter(receiver, unique_name("test-ring"), slot_count=4, slot_size=1 << 20, **options)
+        writer.start()
+        writers.append(writer)
+        return writer
+
+    yield make
+    for writer in writers:
+        writer.close()
+
+
+def read_frame(reader):
+    frame = reader.read(timeout_ms=TIMEOUT_MS)
+    assert frame is not None
+    return frame
+
+
+def test_video_is_viewed_as_pixels(sender, receiver, ring_of):
+    reader = ndirust_py.shm.NdiShmReader(ring_of(receiver).name)
+    sent = uyvy_frame(RAMP)
+    sender.send_video_frame(sent, WIDTH, HEIGHT)
+
+    with read_frame(reader) as frame:
+        assert frame.kind == "video"
+        assert (frame.width, frame.height, frame.four_cc_name) == (WIDTH, HEIGHT, "UYVY")
+
+        pixels = np.asarray(frame)
+        assert pixels.shape == (HEIGHT, WIDTH, 2)
+        assert not pixels.flags.writeable
+        assert np.array_equal(pixels, sent)
+        del pixels
+
+        view = memoryview(frame)
+        assert (view.ndim, view.format, view.itemsize) == (3, "B", 1)
+        view.release()
+
+
+def test_plain_byte_consumers_get_the_whole_payload(sender, receiver, ring_of):
+    reader = ndirust_py.shm.NdiShmReader(ring_of(receiver).name)
+    sent = uyvy_frame(RAMP)
+    sender.send_video_frame(sent, WIDTH, HEIGHT)
+
+    with read_frame(reader) as frame:
+        # zlib asks for a simple buffer: no shape, strides or format
+        assert zlib.crc32(frame) == zlib.crc32(sent.tobytes())
+        assert np.frombuffer(frame, dtype=np.uint8).size == frame.data_size
+
+
+def test_audio_is_viewed_as_channels(tone_receiver, ring_of):
+    reader = ndirust_py.shm.NdiShmReader(ring_of(tone_receiver, video=False, audio=True).name)
+
+    with read_frame(reader) as frame:
+        assert frame.kind == "audio"
+        assert frame.num_channels == 2
+
+        samples = np.asarray(frame)
+        assert samples.shape == (2, frame.num_samples)
+        assert samples.dtype == np.float32
+        assert np.abs(samples).max() == pytest.approx(0.1, abs=0.01)
+
+        # Without a format the samples are plain bytes
+        flat = np.frombuffer(frame, dtype=np.uint8)
+        assert flat.size == 2 * frame.num_samples * 4
+        assert np.array_equal(flat.view(np.float32).reshape(samples.shape), samples)
+        del samples, flat
+
+
+def test_release_waits_for_arrays(sender, receiver, ring_of):
+    reader = ndirust_py.shm.NdiShmReader(ring_of(receiver).name)
+    sender.send_video_frame(uyvy_frame(RAMP), WIDTH, HEIGHT)
+    frame = read_frame(reader)
+
+    pixels = np.asarray(frame)
+    with pytest.raises(RuntimeError):
+        frame.release()
+
+    del pixels
+    frame.release()
+    assert frame.released
+    with pytest.raises(RuntimeError):
+        memoryview(frame)
+
+
+def test_every_reader_gets_every_frame_without_distribution(sender, receiver, ring_of):
+    name = ring_of(receiver).name
+    readers = [ndirust_py.shm.NdiShmReader(name, distribute=False) for _ in range(2)]
+    for shift in range(3):
+        sender.send_video_frame(uyvy_frame(np.roll(RAMP, shift)), WIDTH, HEIGHT)
+
+    for reader in readers:
+        sequences = []
+        for _ in range(3):
+            with read_frame(reader) as frame:
+                sequences.append(frame.sequence)
+        assert sequences == sorted(sequences)
+        assert len(set(sequences)) == 3
+
+
+def test_readers_see_the_ring_close(receiver, ring_of):
+    writer = ring_of(receiver)
+    reader = ndirust_py.shm.NdiShmReader(writer.name)
+
+    writer.close()
+    assert reader.read(timeout_ms=TIMEOUT_MS) is None
+    assert reader.is_closed